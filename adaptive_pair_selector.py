@@ -11,6 +11,8 @@ import os
 import sys
 import json
 
+from latency_tracer import traced
+
 # إعداد التسجيل
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("adaptive_pair_selector")
@@ -447,6 +449,7 @@ pair_selector = AdaptivePairSelector()
 
 
 # دوال مساعدة للاستخدام المباشر في البرنامج
+@traced('generation.pair_selection')
 def get_optimal_trading_pair(market_pairs, otc_pairs, force_market=False, force_otc=False):
     """
     الحصول على زوج التداول الأمثل للإشارة التالية
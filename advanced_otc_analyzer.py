@@ -7,6 +7,10 @@ import numpy as np
 import logging
 from datetime import datetime, timedelta
 
+import indicators
+from indicators import candle_columns
+from analysis_context import get_analysis
+
 logger = logging.getLogger(__name__)
 
 # Constants for OTC pairs analysis
@@ -104,19 +108,19 @@ class AdvancedOTCAnalyzer:
 
     def _extract_close_prices(self, candles):
         """استخراج أسعار الإغلاق من بيانات الشموع"""
-        return np.array([candle['close'] for candle in candles])
+        return candle_columns(candles)[3]
         
     def _extract_open_prices(self, candles):
         """استخراج أسعار الافتتاح من بيانات الشموع"""
-        return np.array([candle['open'] for candle in candles])
+        return candle_columns(candles)[0]
         
     def _extract_high_prices(self, candles):
         """استخراج أعلى الأسعار من بيانات الشموع"""
-        return np.array([candle['high'] for candle in candles])
+        return candle_columns(candles)[1]
         
     def _extract_low_prices(self, candles):
         """استخراج أدنى الأسعار من بيانات الشموع"""
-        return np.array([candle['low'] for candle in candles])
+        return candle_columns(candles)[2]
 
     def _analyze_technical_indicators(self, closes, opens, highs, lows, pair_symbol, is_otc):
         """
@@ -186,38 +190,16 @@ class AdvancedOTCAnalyzer:
         
     def _calculate_rsi(self, prices, period):
         """
-        حساب مؤشر القوة النسبية (RSI)
+        حساب مؤشر القوة النسبية (RSI) بتنعيم Wilder
         
         Args:
             prices: سلسلة الأسعار
             period: الفترة
             
         Returns:
-            np.array: قيم مؤشر RSI
+            np.array: قيم مؤشر RSI (50 قبل توفر period تغير)
         """
-        deltas = np.diff(prices)
-        seed = deltas[:period+1]
-        up = seed[seed >= 0].sum()/period
-        down = -seed[seed < 0].sum()/period
-        rs = up/down if down != 0 else float('inf')
-        rsi = np.zeros_like(prices)
-        rsi[:period] = 100. - 100./(1. + rs)
-
-        for i in range(period, len(prices)):
-            delta = deltas[i-1]
-            if delta > 0:
-                upval = delta
-                downval = 0.
-            else:
-                upval = 0.
-                downval = -delta
-
-            up = (up * (period - 1) + upval) / period
-            down = (down * (period - 1) + downval) / period
-            rs = up/down if down != 0 else float('inf')
-            rsi[i] = 100. - 100./(1. + rs)
-            
-        return rsi
+        return np.nan_to_num(indicators.rsi(prices, period, method='wilder'), nan=50.0)
     
     def _calculate_ema(self, prices, period):
         """
@@ -230,15 +212,7 @@ class AdvancedOTCAnalyzer:
         Returns:
             np.array: قيم EMA
         """
-        ema = np.zeros_like(prices)
-        ema[0] = prices[0]
-        
-        multiplier = 2 / (period + 1)
-        
-        for i in range(1, len(prices)):
-            ema[i] = (prices[i] - ema[i-1]) * multiplier + ema[i-1]
-            
-        return ema
+        return indicators.ema(prices, period)
     
     def _calculate_macd(self, prices, fast_period, slow_period, signal_period=9):
         """
@@ -253,14 +227,7 @@ class AdvancedOTCAnalyzer:
         Returns:
             tuple: (خط MACD، خط الإشارة، الهيستوجرام)
         """
-        ema_fast = self._calculate_ema(prices, fast_period)
-        ema_slow = self._calculate_ema(prices, slow_period)
-        
-        macd_line = ema_fast - ema_slow
-        signal_line = self._calculate_ema(macd_line, signal_period)
-        histogram = macd_line - signal_line
-        
-        return macd_line, signal_line, histogram
+        return indicators.macd(prices, fast_period, slow_period, signal_period)
     
     def _calculate_bollinger_bands(self, prices, std_dev=2.0, period=20):
         """
@@ -274,26 +241,8 @@ class AdvancedOTCAnalyzer:
         Returns:
             tuple: (النطاق العلوي، النطاق المتوسط، النطاق السفلي)
         """
-        middle_band = np.zeros_like(prices)
-        for i in range(len(prices)):
-            if i < period - 1:
-                middle_band[i] = np.mean(prices[:i+1])
-            else:
-                middle_band[i] = np.mean(prices[i-period+1:i+1])
-        
-        upper_band = np.zeros_like(prices)
-        lower_band = np.zeros_like(prices)
-        
-        for i in range(len(prices)):
-            if i < period - 1:
-                std = np.std(prices[:i+1])
-            else:
-                std = np.std(prices[i-period+1:i+1])
-                
-            upper_band[i] = middle_band[i] + std_dev * std
-            lower_band[i] = middle_band[i] - std_dev * std
-            
-        return upper_band, middle_band, lower_band
+        # نافذة متزايدة في بداية السلسلة كما في الحساب السابق
+        return indicators.bollinger_bands(prices, period, std_dev, min_periods=1)
     
     def _identify_candle_pattern(self, opens, closes, highs, lows):
         """
@@ -1177,8 +1126,9 @@ def analyze_otc_pair(candles, pair_symbol):
     # إنشاء محلل أزواج OTC
     analyzer = AdvancedOTCAnalyzer()
     
-    # تحليل الزوج
-    analysis_results = analyzer.analyze_pair(candles, pair_symbol, is_otc)
+    # تحليل الزوج (مرة واحدة لكل نافذة شموع، ثم من سياق التحليل المشترك)
+    analysis_results = get_analysis(pair_symbol, candles, ('otc_analysis', is_otc),
+                                    lambda: analyzer.analyze_pair(candles, pair_symbol, is_otc))
     
     return analysis_results
 
@@ -9,10 +9,16 @@ import numpy as np
 from datetime import datetime, time
 import importlib
 
+from analysis_context import get_analysis, signal_pair
+from latency_tracer import traced
+
 # إعداد السجلات
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# الحد الأدنى الافتراضي لدرجة جودة الإشارة لكل مرشح جديد (0-100)
+MIN_QUALITY_SCORE = 75
+
 class AdvancedSignalFilter:
     """نظام تصفية متقدم للإشارات لتحسين جودة الإشارات المرسلة"""
     
@@ -21,7 +27,9 @@ class AdvancedSignalFilter:
         logger.info("تم تهيئة نظام تصفية الإشارات المتقدم والمحسن")
         
         # معايير التصفية المحسنة للحصول على إشارات أكثر دقة
-        self.min_quality_score = 75  # تخفيض الحد الأدنى لدرجة الجودة لزيادة عدد الإشارات OTC (0-100)
+        # الحد الأدنى لدرجة الجودة (0-100): None = قيمة MIN_QUALITY_SCORE الحالية في الوحدة
+        # حتى تسري المعلمات المحملة (signal_parameters) على المرشحات الموجودة
+        self._min_quality_score = None
         self.min_probability = 75  # تخفيض الحد الأدنى للاحتمالية المقبولة لأزواج OTC (%)
         self.min_pattern_strength = 65  # تخفيض الحد الأدنى لقوة نمط الشموع لأزواج OTC (%)
         self.risk_reward_threshold = 1.5  # تخفيض الحد الأدنى لنسبة المخاطرة/العائد
@@ -81,6 +89,7 @@ class AdvancedSignalFilter:
             }
         }
     
+    @traced('filter.advanced')
     def filter_signal(self, signal, candles=None, multi_timeframe_analysis=None):
         """
         تصفية الإشارة بناءً على معايير الجودة المتعددة ونقاط الدعم والمقاومة
@@ -159,8 +168,7 @@ class AdvancedSignalFilter:
         pair_symbol = signal.get('pair', '')
         is_otc_pair = "-OTC" in pair_symbol
 
-        # تعديل حد الجودة المطلوب للأزواج OTC (تخفيض بنسبة 10% للسماح بمزيد من إشارات OTC)
-        min_quality_required = self.min_quality_score * 0.9 if is_otc_pair else self.min_quality_score
+        min_quality_required = self.get_min_quality_required(pair_symbol)
         
         # تسجيل سجل عن الحد المستخدم
         logger.debug(f"الحد المطلوب للجودة: {min_quality_required} (OTC: {is_otc_pair})")
@@ -254,7 +262,8 @@ class AdvancedSignalFilter:
         if candles and len(candles) >= 3:
             try:
                 from candlestick_pattern_analyzer import analyze_candlestick_patterns
-                pattern_result = analyze_candlestick_patterns(candles)
+                pattern_result = get_analysis(signal_pair(signal), candles, ('candlestick_patterns',),
+                                              lambda: analyze_candlestick_patterns(candles))
                 pattern_strength = pattern_result.get('strength', 0)
                 pattern_direction = pattern_result.get('direction', 'NEUTRAL')
                 
@@ -468,8 +477,22 @@ class AdvancedSignalFilter:
         
         return weighted_sum, criteria_scores
     
+    def get_min_quality_required(self, pair_symbol):
+        """الحد الأدنى لدرجة الجودة المطلوب لزوج معين"""
+        # تعديل حد الجودة المطلوب للأزواج OTC (تخفيض بنسبة 10% للسماح بمزيد من إشارات OTC)
+        return self.min_quality_score * 0.9 if "-OTC" in pair_symbol else self.min_quality_score
+    
+    @property
+    def min_quality_score(self):
+        """الحد الأدنى لدرجة الجودة: القيمة المعينة للمرشح، وإلا MIN_QUALITY_SCORE الحالية"""
+        return MIN_QUALITY_SCORE if self._min_quality_score is None else self._min_quality_score
+
+    @min_quality_score.setter
+    def min_quality_score(self, score):
+        self._min_quality_score = score
+
     def set_min_quality_score(self, score):
-        """تعيين الحد الأدنى لدرجة جودة الإشارة"""
+        """تعيين الحد الأدنى لدرجة جودة الإشارة (None = العودة إلى MIN_QUALITY_SCORE)"""
         self.min_quality_score = score
     
     def set_min_probability(self, probability):
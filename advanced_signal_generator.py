@@ -8,7 +8,7 @@ import random
 import time
 from datetime import datetime, timedelta
 
-from technical_analyzer import TechnicalAnalyzer
+from technical_analyzer import technical_analyzer
 from multi_timeframe_analyzer import validate_signal, get_trading_recommendation
 from signal_filter import get_high_quality_signal, generate_safe_signal
 from confidence_evaluator import enhance_signal_with_confidence
@@ -23,7 +23,7 @@ class AdvancedSignalGenerator:
     
     def __init__(self):
         """تهيئة مولد الإشارات المتقدم"""
-        self.technical_analyzer = TechnicalAnalyzer()
+        self.technical_analyzer = technical_analyzer
         
         # إعدادات الإشارات
         self.min_probability = 92  # الحد الأدنى للاحتمالية
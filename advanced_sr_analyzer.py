@@ -6,9 +6,12 @@
 
 import logging
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from datetime import datetime, timedelta
 import traceback
 
+from indicators import candle_columns
+
 # تهيئة نظام السجلات
 logger = logging.getLogger(__name__)
 
@@ -73,12 +76,12 @@ class AdvancedSRAnalyzer:
             # تحديد الشموع المستخدمة في التحليل (آخر time_window شمعة أو أقل إذا لم تتوفر)
             analysis_candles = candles[-min(self.time_window, len(candles)):]
             
-            # استخراج الأسعار
-            highs = np.array([candle['high'] for candle in analysis_candles])
-            lows = np.array([candle['low'] for candle in analysis_candles])
-            closes = np.array([candle['close'] for candle in analysis_candles])
-            opens = np.array([candle['open'] for candle in analysis_candles])
-            volumes = np.array([candle.get('volume', 1.0) for candle in analysis_candles])
+            # استخراج الأسعار كأعمدة (بدون نسخ عند تمرير CandleView)
+            opens, highs, lows, closes = candle_columns(analysis_candles)
+            if hasattr(analysis_candles, 'array'):
+                volumes = np.ones(len(analysis_candles))
+            else:
+                volumes = np.array([candle.get('volume', 1.0) for candle in analysis_candles], dtype=np.float64)
             
             # 1. تحليل نقاط الدعم والمقاومة
             support_levels = self._find_support_levels(analysis_candles, lows, closes)
@@ -94,8 +97,8 @@ class AdvancedSRAnalyzer:
             breakout_points = self._find_breakout_points(analysis_candles, closes, support_levels, resistance_levels)
             
             # 5. تقييم قوة مستويات الدعم والمقاومة
-            support_levels = self._evaluate_level_strength(support_levels, analysis_candles, "support")
-            resistance_levels = self._evaluate_level_strength(resistance_levels, analysis_candles, "resistance")
+            support_levels = self._evaluate_level_strength(support_levels, opens, lows, closes, "support")
+            resistance_levels = self._evaluate_level_strength(resistance_levels, opens, highs, closes, "resistance")
             
             # تجميع النتائج
             return {
@@ -131,32 +134,17 @@ class AdvancedSRAnalyzer:
         Returns:
             list: قائمة بنقاط الدعم المكتشفة مع معلوماتها
         """
-        support_points = []
         current_price = closes[-1]
         
-        # البحث عن القيعان المحلية (نقاط الدعم المحتملة)
-        for i in range(2, len(lows) - 2):
-            # نقطة تعتبر قاعًا محليًا إذا كانت أقل من النقطتين قبلها والنقطتين بعدها
-            if (lows[i] < lows[i-1] and lows[i] < lows[i-2] and 
-                lows[i] < lows[i+1] and lows[i] < lows[i+2]):
-                support_points.append({
-                    "price": lows[i],
-                    "index": i,
-                    "candle": candles[i],
-                    "touches": 0,
-                    "strength": 0
-                })
-        
-        # تجميع نقاط الدعم القريبة من بعضها
-        clustered_supports = self._cluster_price_levels(support_points)
+        # القيعان المحلية (نقاط الدعم المحتملة) ثم تجميع المتقارب منها
+        indices = _local_extrema(lows, np.less)
+        prices, indices, touches = self._cluster_price_levels(lows[indices], indices)
         
         # تصفية نقاط الدعم والاحتفاظ بالنقاط القوية فقط
-        valid_supports = [s for s in clustered_supports if s["price"] < current_price * (1 + self.price_sensitivity)]
-        
-        # فرز نقاط الدعم من الأعلى إلى الأدنى للتداول (من الأقرب إلى السعر الحالي إلى الأبعد)
-        valid_supports.sort(key=lambda x: abs(current_price - x["price"]))
+        valid = prices < current_price * (1 + self.price_sensitivity)
         
-        return valid_supports[:5]  # الاحتفاظ بأفضل 5 نقاط دعم فقط
+        # الاحتفاظ بأقرب 5 نقاط دعم إلى السعر الحالي
+        return self._build_levels(candles, prices[valid], indices[valid], touches[valid], current_price)
     
     def _find_resistance_levels(self, candles, highs, closes):
         """
@@ -170,105 +158,88 @@ class AdvancedSRAnalyzer:
         Returns:
             list: قائمة بنقاط المقاومة المكتشفة مع معلوماتها
         """
-        resistance_points = []
         current_price = closes[-1]
         
-        # البحث عن القمم المحلية (نقاط المقاومة المحتملة)
-        for i in range(2, len(highs) - 2):
-            # نقطة تعتبر قمة محلية إذا كانت أعلى من النقطتين قبلها والنقطتين بعدها
-            if (highs[i] > highs[i-1] and highs[i] > highs[i-2] and 
-                highs[i] > highs[i+1] and highs[i] > highs[i+2]):
-                resistance_points.append({
-                    "price": highs[i],
-                    "index": i,
-                    "candle": candles[i],
-                    "touches": 0,
-                    "strength": 0
-                })
-        
-        # تجميع نقاط المقاومة القريبة من بعضها
-        clustered_resistances = self._cluster_price_levels(resistance_points)
+        # القمم المحلية (نقاط المقاومة المحتملة) ثم تجميع المتقارب منها
+        indices = _local_extrema(highs, np.greater)
+        prices, indices, touches = self._cluster_price_levels(highs[indices], indices)
         
         # تصفية نقاط المقاومة والاحتفاظ بالنقاط القوية فقط
-        valid_resistances = [r for r in clustered_resistances if r["price"] > current_price * (1 - self.price_sensitivity)]
-        
-        # فرز نقاط المقاومة من الأدنى إلى الأعلى للتداول (من الأقرب إلى السعر الحالي إلى الأبعد)
-        valid_resistances.sort(key=lambda x: abs(current_price - x["price"]))
+        valid = prices > current_price * (1 - self.price_sensitivity)
         
-        return valid_resistances[:5]  # الاحتفاظ بأفضل 5 نقاط مقاومة فقط
+        # الاحتفاظ بأقرب 5 نقاط مقاومة إلى السعر الحالي
+        return self._build_levels(candles, prices[valid], indices[valid], touches[valid], current_price)
     
-    def _cluster_price_levels(self, price_points):
+    def _build_levels(self, candles, prices, indices, touches, current_price, limit=5):
         """
-        تجميع مستويات الأسعار المتقاربة في مستويات موحدة
+        إنشاء قواميس المستويات الأقرب إلى السعر الحالي
         
         Args:
-            price_points: قائمة بنقاط الأسعار المكتشفة
+            candles: بيانات الشموع الكاملة
+            prices: أسعار المستويات المجمعة
+            indices: موضع آخر نقطة في كل تجمع
+            touches: عدد النقاط في كل تجمع
+            current_price: السعر الحالي
+            limit: أقصى عدد مستويات
             
         Returns:
-            list: قائمة بمستويات الأسعار المجمعة
+            list: المستويات مرتبة من الأقرب إلى السعر الحالي إلى الأبعد
         """
-        if not price_points:
-            return []
+        levels = []
+        for k in np.argsort(np.abs(current_price - prices), kind='stable')[:limit]:
+            index = int(indices[k])
+            level = {
+                "price": prices[k],
+                "index": index,
+                "candle": candles[index],
+                "touches": int(touches[k]),
+                "strength": 0
+            }
+            # تعليم نقاط أزواج OTC
+            if self.is_otc_pair:
+                level["is_otc"] = True
+            levels.append(level)
+        return levels
+    
+    def _cluster_price_levels(self, prices, indices):
+        """
+        تجميع مستويات الأسعار المتقاربة في مستويات موحدة
         
-        # فرز النقاط حسب السعر
-        sorted_points = sorted(price_points, key=lambda x: x["price"])
+        بعد فرز الأسعار يبدأ تجمع جديد عند كل فرق نسبي بين سعرين متتاليين يبلغ عتبة التجميع.
         
-        # تجميع النقاط المتقاربة
-        clusters = []
-        current_cluster = [sorted_points[0]]
+        Args:
+            prices: أسعار النقاط المكتشفة
+            indices: مواضع النقاط في الشموع
+            
+        Returns:
+            tuple: (متوسط سعر كل تجمع، موضع آخر نقطة فيه، عدد نقاطه) مرتبة تصاعدياً حسب السعر
+        """
+        if len(prices) == 0:
+            return prices, indices, np.zeros(0, dtype=np.int64)
         
         # استخدام عتبة تجميع مخصصة لأزواج OTC إذا كان الزوج من منصة Pocket Option
         clustering_threshold = self.clustering_threshold
         if self.is_otc_pair:
             # أزواج OTC تحتاج عتبة أقل للتجميع
             clustering_threshold = self.clustering_threshold * 0.8
-            logger.debug(f"🔍 استخدام عتبة تجميع مخصصة لزوج OTC: {clustering_threshold}")
         
-        for i in range(1, len(sorted_points)):
-            current_point = sorted_points[i]
-            prev_point = sorted_points[i-1]
-            
-            # إذا كان الفرق بين النقطتين أقل من العتبة، أضف النقطة إلى التجمع الحالي
-            if (current_point["price"] - prev_point["price"]) / prev_point["price"] < clustering_threshold:
-                current_cluster.append(current_point)
-            else:
-                # إنشاء مستوى للتجمع الحالي
-                if current_cluster:
-                    price_sum = sum(p["price"] for p in current_cluster)
-                    avg_price = price_sum / len(current_cluster)
-                    
-                    # اختيار أقوى نقطة في التجمع
-                    strongest_point = max(current_cluster, key=lambda x: x["index"])
-                    strongest_point["price"] = avg_price
-                    strongest_point["touches"] = len(current_cluster)
-                    
-                    # تعزيز وزن النقاط في أزواج OTC
-                    if self.is_otc_pair:
-                        strongest_point["strength"] = min(100, int(strongest_point.get("strength", 0) * 1.15))
-                        strongest_point["is_otc"] = True
-                        
-                    clusters.append(strongest_point)
-                
-                # بدء تجمع جديد
-                current_cluster = [current_point]
-        
-        # إضافة التجمع الأخير
-        if current_cluster:
-            price_sum = sum(p["price"] for p in current_cluster)
-            avg_price = price_sum / len(current_cluster)
-            
-            strongest_point = max(current_cluster, key=lambda x: x["index"])
-            strongest_point["price"] = avg_price
-            strongest_point["touches"] = len(current_cluster)
-            
-            # تعزيز وزن النقاط في أزواج OTC
-            if self.is_otc_pair:
-                strongest_point["strength"] = min(100, int(strongest_point.get("strength", 0) * 1.15))
-                strongest_point["is_otc"] = True
-                
-            clusters.append(strongest_point)
-        
-        return clusters
+        order = np.argsort(prices, kind='stable')
+        sorted_prices = prices[order]
+        sorted_indices = indices[order]
+        
+        # بداية كل تجمع: أول نقطة ونقاط الانقطاع حيث لا يقل الفرق النسبي عن العتبة
+        gaps = (sorted_prices[1:] - sorted_prices[:-1]) / sorted_prices[:-1]
+        starts = np.concatenate(([0], np.flatnonzero(~(gaps < clustering_threshold)) + 1))
+        counts = np.diff(np.append(starts, len(sorted_prices)))
+        
+        # سعر التجمع هو المتوسط، ويمثله أحدث نقطة فيه
+        sums = np.add.reduceat(sorted_prices, starts)
+        # reduceat يجمع المقاطع من 8 قيم فأكثر بشكل زوجي؛ الجمع المتسلسل يطابق المتوسطات السابقة تماماً
+        for k in np.flatnonzero(counts >= 8):
+            sums[k] = np.cumsum(sorted_prices[starts[k]:starts[k] + counts[k]])[-1]
+        cluster_prices = sums / counts
+        cluster_indices = np.maximum.reduceat(sorted_indices, starts)
+        return cluster_prices, cluster_indices, counts
     
     def _find_accumulation_zones(self, candles, closes, volumes):
         """
@@ -282,46 +253,46 @@ class AdvancedSRAnalyzer:
         Returns:
             list: قائمة بمناطق التجميع المكتشفة مع معلوماتها
         """
-        accumulation_zones = []
+        duration = self.accumulation_min_duration
+        count = len(closes) - duration
+        if count <= 0:
+            return []
         
-        # حساب المتوسط المتحرك لحجم التداول
+        # حساب المتوسط العام لحجم التداول
         avg_volume = np.mean(volumes)
         
-        # البحث عن التراكم: حجم تداول مرتفع مع تحرك سعري محدود
-        for i in range(self.accumulation_min_duration, len(candles)):
-            # فحص نافذة من الشموع
-            window_closes = closes[i-self.accumulation_min_duration:i]
-            window_volumes = volumes[i-self.accumulation_min_duration:i]
-            
-            # حساب التحرك السعري ضمن النافذة
-            price_range = max(window_closes) - min(window_closes)
-            price_range_percent = price_range / min(window_closes)
-            
-            # حساب متوسط حجم التداول ضمن النافذة
-            window_avg_volume = np.mean(window_volumes)
-            
-            # شروط تحديد منطقة التجميع:
-            # 1. حجم تداول أعلى من المتوسط العام
-            # 2. تحرك سعري محدود (إشارة إلى التجميع/التوزيع)
-            if (window_avg_volume > avg_volume * self.volume_threshold and
-                price_range_percent < 0.015):  # تغير سعري أقل من 1.5%
-                
-                # تحديد نوع منطقة التجميع (تجميع قبل صعود أو توزيع قبل هبوط)
-                accumulation_type = "accumulation" if closes[i] > closes[i-self.accumulation_min_duration] else "distribution"
-                
-                accumulation_zones.append({
-                    "start_index": i-self.accumulation_min_duration,
-                    "end_index": i,
-                    "price_level": np.mean(window_closes),
-                    "volume_ratio": window_avg_volume / avg_volume,
-                    "type": accumulation_type,
-                    "strength": min(100, int(window_avg_volume / avg_volume * 50))
-                })
+        # نوافذ الشموع السابقة لكل شمعة i (من i - duration حتى i - 1)
+        window_closes = sliding_window_view(closes, duration)[:count]
+        window_volumes = sliding_window_view(volumes, duration)[:count]
+        
+        # التحرك السعري ومتوسط حجم التداول ضمن كل نافذة
+        lowest = window_closes.min(axis=1)
+        price_range_percent = (window_closes.max(axis=1) - lowest) / lowest
+        window_avg_volume = window_volumes.mean(axis=1)
         
-        # فرز مناطق التجميع حسب قوتها
-        accumulation_zones.sort(key=lambda x: x["strength"], reverse=True)
+        # شروط تحديد منطقة التجميع:
+        # 1. حجم تداول أعلى من المتوسط العام
+        # 2. تحرك سعري محدود أقل من 1.5% (إشارة إلى التجميع/التوزيع)
+        zones = np.flatnonzero((window_avg_volume > avg_volume * self.volume_threshold) &
+                               (price_range_percent < 0.015))
+        volume_ratio = window_avg_volume[zones] / avg_volume
+        strength = np.minimum(100, (window_avg_volume[zones] / avg_volume * 50).astype(np.int64))
         
-        return accumulation_zones[:3]  # الاحتفاظ بأقوى 3 مناطق تجميع
+        # الاحتفاظ بأقوى 3 مناطق تجميع
+        accumulation_zones = []
+        for k in np.argsort(-strength, kind='stable')[:3]:
+            start = int(zones[k])
+            end = start + duration
+            accumulation_zones.append({
+                "start_index": start,
+                "end_index": end,
+                "price_level": np.mean(window_closes[start]),
+                "volume_ratio": volume_ratio[k],
+                # نوع المنطقة: تجميع قبل صعود أو توزيع قبل هبوط
+                "type": "accumulation" if closes[end] > closes[start] else "distribution",
+                "strength": int(strength[k])
+            })
+        return accumulation_zones
     
     def _find_volatility_zones(self, candles, closes, highs, lows):
         """
@@ -336,45 +307,49 @@ class AdvancedSRAnalyzer:
         Returns:
             list: قائمة بمناطق التذبذب المكتشفة مع معلوماتها
         """
-        volatility_zones = []
-        
-        # حساب متوسط المدى اليومي (الفرق بين الأعلى والأدنى)
-        true_ranges = []
-        for i in range(1, len(candles)):
-            prev_close = closes[i-1]
-            high = highs[i]
-            low = lows[i]
-            
-            # حساب المدى الحقيقي
-            tr1 = high - low
-            tr2 = abs(high - prev_close)
-            tr3 = abs(low - prev_close)
-            true_range = max(tr1, tr2, tr3)
-            true_ranges.append(true_range)
+        # المدى الحقيقي لكل شمعة بعد الأولى
+        true_ranges = _true_ranges(highs, lows, closes)
         
         # متوسط المدى الحقيقي
-        atr = np.mean(true_ranges) if true_ranges else 0
+        atr = np.mean(true_ranges) if len(true_ranges) else 0
         
-        # البحث عن مناطق التذبذب العالي
-        for i in range(self.volatility_window, len(candles)):
-            # فحص نافذة من الشموع
-            window_true_ranges = true_ranges[i-self.volatility_window:i]
-            window_atr = np.mean(window_true_ranges)
-            
-            # شرط تحديد منطقة التذبذب: متوسط مدى حقيقي أعلى من متوسط المدى العام
-            if window_atr > atr * self.volatility_threshold:
-                volatility_zones.append({
-                    "start_index": i-self.volatility_window,
-                    "end_index": i,
-                    "price_level": closes[i],
-                    "atr_ratio": window_atr / atr,
-                    "strength": min(100, int(window_atr / atr * 50))
-                })
+        window = self.volatility_window
+        if len(true_ranges) < window:
+            return []
+        
+        # متوسط المدى الحقيقي لنافذة الشموع السابقة لكل شمعة i
+        window_atr = sliding_window_view(true_ranges, window).mean(axis=1)
+        return self._volatility_zones(window_atr, atr, closes[window:])
+    
+    def _volatility_zones(self, window_atr, atr, closes):
+        """
+        مناطق التذبذب من متوسط المدى الحقيقي لكل نافذة
         
-        # فرز مناطق التذبذب حسب قوتها
-        volatility_zones.sort(key=lambda x: x["strength"], reverse=True)
+        Args:
+            window_atr: متوسط المدى الحقيقي لكل نافذة (النافذة k تبدأ عند الشمعة k)
+            atr: متوسط المدى الحقيقي العام
+            closes: سعر إغلاق الشمعة التالية لكل نافذة
+            
+        Returns:
+            list: أقوى 3 مناطق تذبذب
+        """
+        # شرط تحديد منطقة التذبذب: متوسط مدى حقيقي أعلى من متوسط المدى العام
+        zones = np.flatnonzero(window_atr > atr * self.volatility_threshold)
+        atr_ratio = window_atr[zones] / atr
+        strength = np.minimum(100, (window_atr[zones] / atr * 50).astype(np.int64))
         
-        return volatility_zones[:3]  # الاحتفاظ بأقوى 3 مناطق تذبذب
+        # الاحتفاظ بأقوى 3 مناطق تذبذب
+        volatility_zones = []
+        for k in np.argsort(-strength, kind='stable')[:3]:
+            start = int(zones[k])
+            volatility_zones.append({
+                "start_index": start,
+                "end_index": start + self.volatility_window,
+                "price_level": closes[start],
+                "atr_ratio": atr_ratio[k],
+                "strength": int(strength[k])
+            })
+        return volatility_zones
     
     def _find_breakout_points(self, candles, closes, support_levels, resistance_levels):
         """
@@ -431,47 +406,72 @@ class AdvancedSRAnalyzer:
         
         return breakout_points[:3]  # الاحتفاظ بأقرب 3 نقاط اختراق محتملة
     
-    def _evaluate_level_strength(self, levels, candles, level_type):
+    def _evaluate_level_strength(self, levels, opens, extremes, closes, level_type):
         """
         تقييم قوة مستويات الدعم أو المقاومة
         
         Args:
             levels: قائمة بمستويات الدعم أو المقاومة
-            candles: بيانات الشموع الكاملة
+            opens: مصفوفة أسعار الافتتاح
+            extremes: مصفوفة الأسعار الدنيا (للدعم) أو العليا (للمقاومة)
+            closes: مصفوفة أسعار الإغلاق
             level_type: نوع المستوى ("support" أو "resistance")
             
         Returns:
             list: قائمة بمستويات الدعم أو المقاومة مع تقييم قوتها
         """
-        for level in levels:
-            price = level["price"]
-            touches = 0
-            bounces = 0
+        if not levels:
+            return levels
+        
+        prices = np.array([level["price"] for level in levels])
+        touch_counts, bounce_counts = self._count_level_touches(prices, opens, extremes, closes, level_type)
+        return self._score_levels(levels, touch_counts.tolist(), bounce_counts.tolist(), len(closes))
+    
+    def _count_level_touches(self, prices, opens, extremes, closes, level_type):
+        """
+        عدد مرات لمس كل مستوى والارتداد عنه
+        
+        Args:
+            prices: أسعار المستويات
+            opens: أسعار الافتتاح
+            extremes: الأسعار الدنيا (للدعم) أو العليا (للمقاومة)
+            closes: أسعار الإغلاق
+            level_type: نوع المستوى ("support" أو "resistance")
             
-            # حساب عدد المرات التي تم فيها لمس المستوى والارتداد عنه
-            for candle in candles:
-                # نطاق السعر للمستوى (مع هامش)
-                price_range = price * self.clustering_threshold
-                
-                # شروط لمس المستوى تختلف حسب نوع المستوى
-                if level_type == "support":
-                    if candle["low"] <= price + price_range and candle["low"] >= price - price_range:
-                        touches += 1
-                        # الارتداد: إذا ارتفع السعر بعد لمس مستوى الدعم
-                        if candle["close"] > candle["open"] and candle["close"] > price:
-                            bounces += 1
-                else:  # resistance
-                    if candle["high"] >= price - price_range and candle["high"] <= price + price_range:
-                        touches += 1
-                        # الارتداد: إذا انخفض السعر بعد لمس مستوى المقاومة
-                        if candle["close"] < candle["open"] and candle["close"] < price:
-                            bounces += 1
+        Returns:
+            tuple: مصفوفتا (عدد مرات اللمس، عدد مرات الارتداد) لكل مستوى
+        """
+        # مصفوفات (المستويات × الشموع): لمس المستوى ضمن هامش والارتداد عنه
+        prices = np.asarray(prices)[:, None]
+        price_range = prices * self.clustering_threshold
+        touched = (extremes <= prices + price_range) & (extremes >= prices - price_range)
+        if level_type == "support":
+            # الارتداد: إذا ارتفع السعر بعد لمس مستوى الدعم
+            bounced = touched & (closes > opens) & (closes > prices)
+        else:  # resistance
+            # الارتداد: إذا انخفض السعر بعد لمس مستوى المقاومة
+            bounced = touched & (closes < opens) & (closes < prices)
+        return touched.sum(axis=1), bounced.sum(axis=1)
+    
+    def _score_levels(self, levels, touch_counts, bounce_counts, candle_count):
+        """
+        حساب قوة المستويات من عدد مرات اللمس والارتداد وحداثة المستوى
+        
+        Args:
+            levels: قائمة المستويات
+            touch_counts: عدد مرات اللمس لكل مستوى
+            bounce_counts: عدد مرات الارتداد لكل مستوى
+            candle_count: عدد الشموع في نافذة التحليل
             
+        Returns:
+            list: المستويات مرتبة حسب قوتها
+        """
+        for level, touches, bounces in zip(levels, touch_counts, bounce_counts):
             # حساب معامل قوة المستوى (0-100)
             if touches > 0:
                 # القوة تعتمد على عدد مرات اللمس وفعالية الارتداد
-                bounce_effectiveness = bounces / touches if touches > 0 else 0
-                recency_factor = 1 + (level["index"] / len(candles)) * 0.5  # المستويات الحديثة لها وزن أكبر
+                bounce_effectiveness = bounces / touches
+                recency_factor = 1 + (level["index"] / candle_count) * 0.5  # المستويات الحديثة لها وزن أكبر
                 
                 # صيغة حساب القوة: تجمع بين عدد مرات اللمس، وفعالية الارتداد، وحداثة المستوى
                 strength = min(100, int((touches * 10 + bounce_effectiveness * 50) * recency_factor))
@@ -483,13 +483,40 @@ class AdvancedSRAnalyzer:
                 # المستوى لم يتم لمسه (قد يكون ضعيفًا أو جديدًا جدًا)
                 level["touches"] = 0
                 level["bounces"] = 0
-                level["strength"] = max(20, int(30 * (level["index"] / len(candles))))  # المستويات الحديثة لها أولوية أعلى
+                level["strength"] = max(20, int(30 * (level["index"] / candle_count)))  # المستويات الحديثة لها أولوية أعلى
         
         # ترتيب المستويات حسب قوتها
         levels.sort(key=lambda x: x["strength"], reverse=True)
         
         return levels
 
+
+def _true_ranges(highs, lows, closes):
+    """المدى الحقيقي لكل شمعة بعد الأولى: أكبر من (الأعلى - الأدنى) وبُعدَي الأعلى والأدنى عن الإغلاق السابق"""
+    prev_closes = closes[:-1]
+    return np.maximum(np.maximum(highs[1:] - lows[1:], np.abs(highs[1:] - prev_closes)),
+                      np.abs(lows[1:] - prev_closes))
+
+
+def _local_extrema(values, compare):
+    """
+    مواضع القمم أو القيعان المحلية
+
+    Args:
+        values: مصفوفة الأسعار
+        compare: np.greater للقمم أو np.less للقيعان
+
+    Returns:
+        مواضع النقاط التي تتفوق على الشمعتين قبلها والشمعتين بعدها
+    """
+    if len(values) < 5:
+        return np.zeros(0, dtype=np.int64)
+    center = values[2:-2]
+    mask = (compare(center, values[1:-3]) & compare(center, values[:-4]) &
+            compare(center, values[3:-1]) & compare(center, values[4:]))
+    return np.flatnonzero(mask) + 2
+
+
 # إنشاء مثيل للاستخدام العالمي لكل من الأزواج العادية وأزواج OTC
 sr_analyzer = AdvancedSRAnalyzer()
 sr_analyzer_otc = AdvancedSRAnalyzer(
@@ -498,17 +525,25 @@ sr_analyzer_otc = AdvancedSRAnalyzer(
     is_otc_pair=True  # تحديد أن هذا المحلل مخصص لأزواج OTC
 )
 
-def analyze_sr_levels(candles, is_otc_pair=False):
+def analyze_sr_levels(candles, is_otc_pair=False, pair_symbol=None):
     """
     تحليل مستويات الدعم والمقاومة ومناطق التذبذب والتجميع
     
     Args:
         candles: بيانات الشموع للتحليل
         is_otc_pair: ما إذا كان الزوج من أزواج OTC الخاصة بمنصة Pocket Option
+        pair_symbol: رمز الزوج؛ عند تحديده مع CandleView يُستخدم الفهرس التزايدي للزوج
     
     Returns:
         dict: نتائج التحليل المتكامل
     """
+    if pair_symbol and hasattr(candles, 'array'):
+        try:
+            from sr_level_index import get_sr_levels
+            return get_sr_levels(pair_symbol, candles, is_otc_pair)
+        except Exception as e:
+            logger.error(f"❌ خطأ في الفهرس التزايدي للدعم والمقاومة ({pair_symbol}): {e}")
+    
     # استخدام المحلل المناسب حسب نوع الزوج
     if is_otc_pair:
         logger.info("🔍 استخدام محلل متخصص لزوج OTC من منصة Pocket Option")
@@ -516,22 +551,19 @@ def analyze_sr_levels(candles, is_otc_pair=False):
     else:
         return sr_analyzer.analyze(candles)
 
-def get_key_price_levels(candles, is_otc_pair=False):
+def get_key_price_levels(candles, is_otc_pair=False, pair_symbol=None):
     """
     الحصول على مستويات الأسعار الرئيسية للتداول
     
     Args:
         candles: بيانات الشموع للتحليل
         is_otc_pair: ما إذا كان الزوج من أزواج OTC الخاصة بمنصة Pocket Option
+        pair_symbol: رمز الزوج (لاستخدام الفهرس التزايدي)
     
     Returns:
         dict: مستويات الأسعار الرئيسية مع توصيات التداول
     """
-    # استخدام المحلل المناسب حسب نوع الزوج
-    if is_otc_pair:
-        analysis = sr_analyzer_otc.analyze(candles)
-    else:
-        analysis = sr_analyzer.analyze(candles)
+    analysis = analyze_sr_levels(candles, is_otc_pair=is_otc_pair, pair_symbol=pair_symbol)
     current_price = analysis.get("current_price")
     
     if not current_price:
@@ -0,0 +1,196 @@
+"""
+سياق التحليل المشترك بين مراحل الفلترة
+يحفظ نتائج التحليل المشتقة من نافذة شموع واحدة (مستويات الدعم والمقاومة، التحليل الفني
+المتقدم، أنماط الشموع، التذبذب وحالة السوق) بحيث تقرأها جميع المراحل التي تفحص نفس الإشارة
+بدلاً من إعادة حسابها. السياقات مفهرسة بالمفتاح (الزوج، الإطار الزمني، وقت آخر شمعة)
+ويتم إخراج الأقدم استخداماً عند امتلاء الذاكرة (LRU)
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from config import ANALYSIS_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class AnalysisContext:
+    """
+    نتائج التحليل المشتقة لنافذة شموع واحدة
+
+    النتائج المحفوظة مشتركة بين جميع المستدعين ويجب معاملتها للقراءة فقط.
+    """
+
+    __slots__ = ('key', 'last_close', 'artifacts')
+
+    def __init__(self, key, last_close):
+        self.key = key
+        self.last_close = last_close
+        self.artifacts = {}
+
+
+class AnalysisContextCache:
+    """
+    ذاكرة مؤقتة لسياقات التحليل مع إخراج الأقدم استخداماً وعدادات الإصابة والإخفاق
+    """
+
+    def __init__(self, capacity=ANALYSIS_CACHE_SIZE):
+        """
+        Args:
+            capacity (int): أقصى عدد سياقات محفوظة (0 لتعطيل الذاكرة)
+        """
+        self.capacity = capacity
+        self._contexts = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _context_for(self, pair, candles):
+        """سياق نافذة الشموع (يُنشأ عند الحاجة)، أو None إذا تعذر تحديد مفتاحها"""
+        identity = candle_identity(candles)
+        if identity is None:
+            return None
+        timeframe, last_time, last_close = identity
+        key = (pair, timeframe, last_time)
+
+        context = self._contexts.get(key)
+        if context is not None and context.last_close != last_close:
+            # تم تحديث آخر شمعة في مكانها (شمعة لم تكتمل) فالنتائج السابقة لم تعد صالحة
+            context = None
+        if context is None:
+            context = AnalysisContext(key, last_close)
+            self._contexts[key] = context
+        self._contexts.move_to_end(key)
+
+        while len(self._contexts) > self.capacity:
+            self._contexts.popitem(last=False)
+            self.evictions += 1
+        return context
+
+    def get_or_compute(self, pair, candles, artifact, compute):
+        """
+        قراءة نتيجة تحليل من السياق أو حسابها وحفظها
+
+        Args:
+            pair (str): رمز الزوج
+            candles: بيانات الشموع (CandleView أو قائمة قواميس شموع)
+            artifact (tuple): اسم النتيجة ومعلماتها (مثل ('sr_levels', True))
+            compute: دالة بدون معاملات تحسب النتيجة عند عدم وجودها
+
+        Returns:
+            نتيجة التحليل
+        """
+        if not pair or not candles or self.capacity <= 0:
+            return compute()
+
+        # النوافذ بأطوال مختلفة تنتهي بنفس الشمعة تعطي نتائج مختلفة
+        artifact_key = (artifact, len(candles))
+        with self._lock:
+            context = self._context_for(pair, candles)
+            if context is None:
+                return compute()
+            if artifact_key in context.artifacts:
+                self.hits += 1
+                return context.artifacts[artifact_key]
+            self.misses += 1
+
+        # الحساب خارج القفل حتى لا تنتظر الخيوط الأخرى؛ الحساب المتزامن لنفس النتيجة ينتج قيمة مطابقة
+        value = compute()
+        with self._lock:
+            context.artifacts[artifact_key] = value
+        return value
+
+    def stats(self):
+        """
+        إحصائيات استخدام الذاكرة
+
+        Returns:
+            dict: عدد السياقات والإصابات والإخفاقات ونسبة الإصابة
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'contexts': len(self._contexts),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def clear(self):
+        """حذف جميع السياقات وتصفير العدادات"""
+        with self._lock:
+            self._contexts.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+def candle_identity(candles):
+    """
+    هوية نافذة الشموع: الإطار الزمني (الفرق بين آخر شمعتين بالثواني) ووقت وسعر إغلاق آخر شمعة
+
+    Args:
+        candles: CandleView أو قائمة قواميس شموع بحقل time
+
+    Returns:
+        tuple: (الإطار الزمني، وقت آخر شمعة، سعر إغلاق آخر شمعة)، أو None إذا لم يتوفر الوقت
+    """
+    if hasattr(candles, 'array'):
+        times = candles.time
+        timeframe = float(times[-1] - times[-2]) if len(times) > 1 else None
+        return timeframe, float(times[-1]), float(candles.close[-1])
+
+    last = candles[-1]
+    last_time = _seconds(last.get('time')) if isinstance(last, dict) else None
+    if last_time is None:
+        return None
+    timeframe = None
+    if len(candles) > 1 and isinstance(candles[-2], dict):
+        previous = _seconds(candles[-2].get('time'))
+        if previous is not None:
+            timeframe = last_time - previous
+    return timeframe, last_time, float(last['close'])
+
+
+def _seconds(value):
+    """تحويل وقت شمعة (datetime أو رقم) إلى ثوانٍ منذ epoch"""
+    if isinstance(value, datetime):
+        return (value - _EPOCH).total_seconds()
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+def signal_pair(signal):
+    """رمز الزوج في الإشارة (الحقل pair أو pair_symbol)"""
+    return signal.get('pair') or signal.get('pair_symbol')
+
+
+# الذاكرة المشتركة على مستوى العملية
+analysis_cache = AnalysisContextCache()
+
+
+def get_analysis(pair, candles, artifact, compute):
+    """
+    قراءة نتيجة تحليل من السياق المشترك أو حسابها
+
+    Args:
+        pair (str): رمز الزوج
+        candles: بيانات الشموع
+        artifact (tuple): اسم النتيجة ومعلماتها
+        compute: دالة بدون معاملات تحسب النتيجة
+
+    Returns:
+        نتيجة التحليل
+    """
+    return analysis_cache.get_or_compute(pair, candles, artifact, compute)
+
+
+def get_analysis_cache_stats():
+    """إحصائيات الذاكرة المشتركة"""
+    return analysis_cache.stats()
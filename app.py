@@ -4,9 +4,10 @@ import base64
 import io
 import re
 from flask import Flask, request, render_template, redirect, url_for, flash, jsonify, session, g
+from flask import Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_wtf.csrf import CSRFProtect
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, joinedload
 from sqlalchemy.sql import func
 from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -83,8 +84,24 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
 db.init_app(app)
 
 from models import Admin, User, Signal, ApprovedChannel, OTCPair, ChartAnalysis, BotConfiguration, AdSettings
+from models import SignalDailyStat, SignalHourlyStat, SignalPairStat
+from signal_rollups import SignalRollups
+from signal_statistics import SignalStatistics, build_heatmap
+from signal_archive import ARCHIVE_PAGE_SIZE, SignalArchive
+
+# جداول تجميع الإشارات تُحدَّث مع كل flush يُدرج إشارة أو يغير نتيجتها
+signal_rollups = SignalRollups(Signal, SignalDailyStat, SignalHourlyStat, SignalPairStat)
+signal_rollups.register(db.session)
+
 from bot.telegram_bot import setup_bot
 from bot.signal_generator import generate_signal
+from latency_tracer import span, traced, latency_tracer
+from filter_pipeline import get_filter_pipeline_stats
+from analysis_context import get_analysis_cache_stats
+from market_condition_analyzer import get_market_condition_cache_stats
+
+# قياس زمن توليد الإشارة وإرسالها (التحليل والإدراج في قاعدة البيانات والنشر في Telegram)
+generate_signal = traced('generation.generate_signal')(generate_signal)
 from bot.utils import is_admin, admin_required
 # Login manager already imported at the top
 # from flask_login import LoginManager, login_user, logout_user, current_user, login_required
@@ -248,7 +265,131 @@ def generate_new_signal(force=False):
         logger.info(f"لم يحن وقت إنشاء إشارة جديدة بعد (منذ آخر إشارة: {time_diff_seconds:.2f} ثانية)")
         return False
         
+# أزواج OTC ذات العائد المرتفع المستخدمة كبديل لأزواج البورصة العادية بدون زوج OTC مطابق
+PREFERRED_PROXY_OTC_PAIRS = ['EURUSD-OTC', 'EURGBP-OTC', 'EURJPY-OTC', 'USDJPY-OTC', 'AUDJPY-OTC', 'CADCHF-OTC']
+
+def _find_proxy_otc_pair(symbol):
+    """
+    زوج OTC المستخدم لإشارة زوج بورصة عادية (نظام الإشارات يعمل مع أزواج OTC في قاعدة البيانات)
+    
+    Args:
+        symbol (str): رمز زوج البورصة العادية
+        
+    Returns:
+        OTCPair: الزوج المطابق، أو زوج مفضل نشط، أو أي زوج OTC نشط (None إذا لم يوجد)
+    """
+    from models import OTCPair
+    
+    otc_symbol = symbol + "-OTC" if not symbol.endswith("-OTC") else symbol
+    otc_pair = OTCPair.query.filter_by(symbol=otc_symbol).first()
+    if otc_pair:
+        return otc_pair
+    
+    logger.info(f"⚠️ لم يتم العثور على زوج OTC مطابق لـ {symbol}، البحث عن زوج مفضل...")
+    for preferred_symbol in PREFERRED_PROXY_OTC_PAIRS:
+        preferred_pair = OTCPair.query.filter_by(symbol=preferred_symbol, is_active=True).first()
+        if preferred_pair:
+            logger.info(f"✅ تم العثور على زوج OTC مفضل بديل: {preferred_pair.symbol}")
+            return preferred_pair
+    
+    # إذا لم نجد أي زوج مفضل، نستخدم أي زوج OTC نشط
+    otc_pair = OTCPair.query.filter_by(is_active=True).first()
+    if otc_pair:
+        logger.info(f"✅ تم العثور على زوج OTC نشط: {otc_pair.symbol}")
+    return otc_pair
+
+@traced('precompute.candidates')
+def _collect_signal_candidates():
+    """
+    المرشحون المتاحون للإشارة التالية (يستدعيه المحضّر المسبق في الخلفية قبل موعد الإشارة)
+    
+    يطبق نفس سياسة اختيار نوع الزوج (70% للبورصة العادية) وفحص التوافر المستخدمة في
+    _real_generate_new_signal، مع ربط كل زوج بورصة عادية بزوج OTC المستخدم لإشارته.
+    
+    Returns:
+        list: قواميس المرشحين (symbol و pair_id لزوج OTC المستخدم، source للزوج الأصلي، pair_type)
+    """
+    import random
+    from models import OTCPair, MarketPair
+    from bot.signal_generator import check_pair_availability
+    check_pair_availability = traced('precompute.availability')(check_pair_availability)
+    
+    with app.app_context():
+        otc_pairs = OTCPair.query.filter_by(is_active=True).all()
+        market_pairs = MarketPair.query.filter_by(is_active=True).all()
+        
+        if random.random() < 0.7 and market_pairs:
+            pair_list, pair_type = market_pairs, "regular exchange"
+        elif otc_pairs:
+            pair_list, pair_type = otc_pairs, "OTC"
+        else:
+            return []
+        
+        candidates = []
+        for pair in pair_list:
+            if not check_pair_availability(pair):
+                continue
+            otc_pair = pair if pair_type == "OTC" else _find_proxy_otc_pair(pair.symbol)
+            if otc_pair:
+                candidates.append({
+                    'symbol': otc_pair.symbol,
+                    'pair_id': otc_pair.id,
+                    'source': pair.symbol,
+                    'pair_type': pair_type
+                })
+        return candidates
+
+@traced('generation.prepared_signal')
+def _generate_prepared_signal(current_bot):
+    """
+    توليد الإشارة من المرشح المحضّر مسبقاً (بدون اختيار الزوج وفحص توافره وتحليله من جديد)
+    
+    Returns:
+        bool: True إذا تم توليد الإشارة
+    """
+    from signal_precomputer import signal_precomputer
+    
+    candidate = signal_precomputer.take_prepared_candidate()
+    if not candidate:
+        return False
+    
+    logger.info(f"Using pre-computed {candidate['pair_type']} candidate {candidate['source']} "
+                f"(OTC pair {candidate['symbol']}, {candidate['direction']} {candidate['probability']}%)")
+    # generate_signal (bot.signal_generator) يأخذ معرف الزوج فقط ويقرأ تحليل الزوج من سياق التحليل المشترك؛
+    # التحليل المحضّر يُستخدم كما هو ما دامت لم تصل شمعة جديدة منذ تحضيره
+    if not signal_precomputer.is_current(candidate):
+        logger.warning(f"New candle for {candidate['symbol']} since pre-computation, its analysis will be recomputed")
+    try:
+        signal = generate_signal(current_bot, candidate['pair_id'], is_doubling=False)
+    except Exception as e:
+        logger.error(f"Error generating signal for pre-computed candidate: {e}")
+        signal = None
+    if signal:
+        logger.info(f"Successfully generated automated signal for pre-computed pair {candidate['source']}")
+        return True
+    
+    logger.error("Failed to generate signal for pre-computed candidate, falling back to regular pair selection")
+    return False
+
+def _record_next_signal_time():
+    """تسجيل موعد الإشارة التالية في مدير الإشارات بناءً على آخر إشارة أساسية"""
+    import signal_manager
+    # تعيين وقت بداية أول إشارة تالية بعد 5 دقائق
+    last_signal = Signal.query.filter_by(doubling_strategy=False).order_by(Signal.created_at.desc()).first()
+    if last_signal:
+        signal_manager.last_signal_time = last_signal.created_at
+    else:
+        # إذا لم تكن هناك إشارات سابقة
+        signal_manager.last_signal_time = datetime.utcnow()
+    
+    # حساب الوقت المتبقي للإشارة التالية
+    next_time = signal_manager.get_time_until_next_signal()
+    minutes = next_time // 60
+    seconds = next_time % 60
+    logger.info(f"Next signal will be generated in {next_time} seconds ({minutes} minutes, {seconds} seconds)")
+
 # المكون الفعلي لتوليد الإشارات - يتم استدعاؤه من generate_new_signal wrapper
+@traced('generation.total')
 def _real_generate_new_signal():
     """Generate a new signal every 5 minutes exactly - actual implementation"""
     with app.app_context():
@@ -267,17 +408,24 @@ def _real_generate_new_signal():
                 active_bot_config = active_bots[0]
                 os.environ["TELEGRAM_BOT_TOKEN"] = active_bot_config.api_token
                 current_bot = setup_bot(app)
+            
+            # المرشح المحضّر مسبقاً قبل موعد الإشارة يجعل التوليد هنا مجرد إدراج الإشارة وإرسالها
+            if _generate_prepared_signal(current_bot):
+                logger.info("=== SIGNAL GENERATION COMPLETED ===")
+                _record_next_signal_time()
+                return
                 
             # استيراد نماذج الأزواج
             from models import OTCPair, MarketPair
             
-            # الحصول على جميع أزواج OTC النشطة
-            otc_pairs = OTCPair.query.filter_by(is_active=True).all()
-            logger.info(f"Found {len(otc_pairs)} active OTC pairs")
-            
-            # الحصول على جميع أزواج البورصة العادية النشطة
-            market_pairs = MarketPair.query.filter_by(is_active=True).all()
-            logger.info(f"Found {len(market_pairs)} active regular exchange pairs")
+            with span('generation.pair_queries'):
+                # الحصول على جميع أزواج OTC النشطة
+                otc_pairs = OTCPair.query.filter_by(is_active=True).all()
+                logger.info(f"Found {len(otc_pairs)} active OTC pairs")
+                
+                # الحصول على جميع أزواج البورصة العادية النشطة
+                market_pairs = MarketPair.query.filter_by(is_active=True).all()
+                logger.info(f"Found {len(market_pairs)} active regular exchange pairs")
             
             if not otc_pairs and not market_pairs:
                 logger.error("No active pairs found (neither OTC nor regular exchange), cannot generate signal")
@@ -354,6 +502,7 @@ def _real_generate_new_signal():
                 # إذا كان الزوج من النوع OTC، نمرره مباشرة
                 # تحقق إذا كان الزوج متاح حاليًا للتداول (ميزة ذكية لتجاوز الأزواج غير المتاحة)
                 from bot.signal_generator import check_pair_availability
+                check_pair_availability = traced('generation.availability')(check_pair_availability)
                 
                 if pair_type == "OTC":
                     # تحقق ما إذا كان الزوج OTC متاح
@@ -391,29 +540,9 @@ def _real_generate_new_signal():
                     
                     # تحقق ما إذا كان الزوج متاح
                     if check_pair_availability(pair):
-                        # نحاول العثور على زوج OTC مطابق (للتوافق)
-                        otc_symbol = pair.symbol + "-OTC" if not pair.symbol.endswith("-OTC") else pair.symbol
-                        otc_pair = OTCPair.query.filter_by(symbol=otc_symbol).first()
+                        # نحاول العثور على زوج OTC مطابق (للتوافق) أو زوج OTC بديل جيد
+                        otc_pair = _find_proxy_otc_pair(pair.symbol)
                         
-                        if not otc_pair:
-                            # إذا لم نجد زوج OTC مقابل، نحاول العثور على زوج OTC بديل جيد
-                            # أولاً، نحاول استخدام أحد الأزواج ذات العائد المرتفع
-                            preferred_pairs = ['EURUSD-OTC', 'EURGBP-OTC', 'EURJPY-OTC', 'USDJPY-OTC', 'AUDJPY-OTC', 'CADCHF-OTC']
-                            
-                            # البحث عن زوج مفضل نشط
-                            for preferred_symbol in preferred_pairs:
-                                preferred_pair = OTCPair.query.filter_by(symbol=preferred_symbol, is_active=True).first()
-                                if preferred_pair:
-                                    otc_pair = preferred_pair
-                                    logger.info(f"✅ تم العثور على زوج OTC مفضل بديل: {preferred_pair.symbol}")
-                                    break
-                            
-                            # إذا لم نجد أي زوج مفضل، نستخدم أي زوج OTC نشط
-                            if not otc_pair:
-                                otc_pair = OTCPair.query.filter_by(is_active=True).first()
-                                if otc_pair:
-                                    logger.info(f"✅ تم العثور على زوج OTC نشط: {otc_pair.symbol}")
-                            
                         if otc_pair:
                             logger.info(f"Using OTC pair {otc_pair.symbol} as proxy for regular exchange pair {pair.symbol}")
                             
@@ -441,28 +570,8 @@ def _real_generate_new_signal():
                             available_pair = random.choice(available_pairs)
                             logger.info(f"✅ Found alternative market pair: {available_pair.symbol}")
                             
-                            # نحاول العثور على زوج OTC مطابق للزوج البديل
-                            alt_otc_symbol = available_pair.symbol + "-OTC" if not available_pair.symbol.endswith("-OTC") else available_pair.symbol
-                            alt_otc_pair = OTCPair.query.filter_by(symbol=alt_otc_symbol).first()
-                            
-                            # إنشاء قائمة من الأزواج المفضلة التي لها عائد مرتفع
-                            preferred_pairs = ['EURUSD-OTC', 'EURGBP-OTC', 'EURJPY-OTC', 'USDJPY-OTC', 'AUDJPY-OTC', 'CADCHF-OTC']
-                            
-                            # إذا لم نجد زوج OTC مطابق، حاول استخدام أحد الأزواج المفضلة
-                            if not alt_otc_pair:
-                                logger.info(f"⚠️ لم يتم العثور على زوج OTC مطابق لـ {available_pair.symbol}، البحث عن زوج مفضل...")
-                                
-                                # البحث عن زوج مفضل نشط
-                                for preferred_symbol in preferred_pairs:
-                                    preferred_pair = OTCPair.query.filter_by(symbol=preferred_symbol, is_active=True).first()
-                                    if preferred_pair:
-                                        alt_otc_pair = preferred_pair
-                                        logger.info(f"✅ تم العثور على زوج مفضل نشط: {preferred_pair.symbol}")
-                                        break
-                                
-                                # إذا لم نجد أي زوج مفضل، استخدم أي زوج OTC نشط
-                                if not alt_otc_pair:
-                                    alt_otc_pair = OTCPair.query.filter_by(is_active=True).first()
+                            # نحاول العثور على زوج OTC مطابق للزوج البديل أو أحد الأزواج المفضلة
+                            alt_otc_pair = _find_proxy_otc_pair(available_pair.symbol)
                             
                             if alt_otc_pair:
                                 logger.info(f"Using OTC pair {alt_otc_pair.symbol} as proxy for alternative market pair {available_pair.symbol}")
@@ -516,20 +625,7 @@ def _real_generate_new_signal():
         logger.info("=== SIGNAL GENERATION COMPLETED ===")
         
         # تسجيل موعد الإشارة التالية
-        import signal_manager
-        # تعيين وقت بداية أول إشارة تالية بعد 5 دقائق
-        last_signal = Signal.query.filter_by(doubling_strategy=False).order_by(Signal.created_at.desc()).first()
-        if last_signal:
-            signal_manager.last_signal_time = last_signal.created_at
-        else:
-            # إذا لم تكن هناك إشارات سابقة
-            signal_manager.last_signal_time = datetime.utcnow()
-        
-        # حساب الوقت المتبقي للإشارة التالية
-        next_time = signal_manager.get_time_until_next_signal()
-        minutes = next_time // 60
-        seconds = next_time % 60
-        logger.info(f"Next signal will be generated in {next_time} seconds ({minutes} minutes, {seconds} seconds)")
+        _record_next_signal_time()
             
 
 # دالة مخصصة للتحقق من الإشارات المنتهية
@@ -575,6 +671,10 @@ logger.info(f"تم تعيين وقت الإشارة الأخيرة إلى: {last
 
 # تعطيل نظام الإشارات القديم تمامًا
 
+# تطبيق معلمات الفلترة المحسنة (إن وجد ملفها) قبل بدء توليد الإشارات
+from signal_parameters import load_signal_parameters
+load_signal_parameters()
+
 # بدء تشغيل نظام الإشارات الجديد (signal_manager.py)
 import signal_manager
 
@@ -601,6 +701,11 @@ def configure_signal_manager():
     # تعيين دالة العمل في مدير الإشارات
     signal_manager.worker_function = signal_worker_function
     
+    # تحضير الإشارة التالية في الخلفية قبل موعدها
+    from signal_precomputer import signal_precomputer
+    signal_precomputer.candidate_provider = _collect_signal_candidates
+    signal_precomputer.start()
+    
     # إعادة تهيئة المتغيرات لضمان عمل النظام
     signal_manager.is_signal_system_running = True  # تأكد من تشغيل النظام
     signal_manager.is_signal_generation_locked = False  # فك قفل توليد الإشارات
@@ -771,6 +876,36 @@ def signal_status():
         restart_url=restart_url
     )
 
+# أزمنة مراحل توليد الإشارات (p50/p95/p99 لكل مرحلة)
+@app.route('/admin/latency', methods=['GET'])
+@admin_required
+def latency_statistics():
+    """ملخص أزمنة مراحل توليد الإشارات وفلترتها بصيغة JSON"""
+    try:
+        recent = min(int(request.args.get('recent', 0)), latency_tracer.capacity)
+    except ValueError:
+        recent = 0
+    
+    result = {
+        'enabled': latency_tracer.enabled,
+        'capacity': latency_tracer.capacity,
+        'stages': latency_tracer.summary(),
+        'filter_pipelines': get_filter_pipeline_stats()
+    }
+    if recent > 0:
+        result['recent'] = latency_tracer.recent(recent)
+    return jsonify(result)
+
+# نسب الإصابة في ذاكرات التحليل المؤقتة
+@app.route('/admin/cache_stats', methods=['GET'])
+@admin_required
+def cache_statistics():
+    """إحصائيات ذاكرة سياقات التحليل وذاكرة حالة السوق بصيغة JSON"""
+    return jsonify({
+        'analysis_context': get_analysis_cache_stats(),
+        'market_condition': get_market_condition_cache_stats()
+    })
+
 # Route to manually fix signal expiration times
 @app.route('/admin/fix_signals', methods=['GET'])
 @admin_required
@@ -845,15 +980,13 @@ def admin_panel():
     
     # Calculate counts for statistics
     users_count = User.query.filter_by(is_active=True).count()
-    signals_count = Signal.query.count()
     bots_count = BotConfiguration.query.filter_by(is_active=True).count()
     channels_count = ApprovedChannel.query.count()
     
-    # Calculate success rate
-    success_signals = Signal.query.filter_by(result='WIN').count()
-    success_rate = 0
-    if signals_count > 0:
-        success_rate = round((success_signals / signals_count) * 100)
+    # Signal count and success rate from the rollup tables
+    overview = signal_rollups.statistics(db.session, OTCPair).overview()
+    signals_count = overview['total_signals']
+    success_rate = overview['success_rate']
     
     return render_template(
         'admin_panel.html',
@@ -1894,159 +2027,13 @@ def statistics():
     # Get language preference from query parameter
     lang = request.args.get('lang', 'ar')
     
-    # Get statistics data
-    total_signals = Signal.query.count()
-    successful_signals = Signal.query.filter_by(result='WIN').count()
-    failed_signals = Signal.query.filter_by(result='LOSS').count()
-    
-    # Calculate success rate
-    success_rate = 0
-    if total_signals > 0:
-        success_rate = round((successful_signals / total_signals) * 100)
-    
-    # Get today's signals
-    today = datetime.utcnow().date()
-    today_signals = Signal.query.filter(
-        func.date(Signal.created_at) == today
-    ).count()
-    
-    today_successful = Signal.query.filter(
-        func.date(Signal.created_at) == today,
-        Signal.result == 'WIN'
-    ).count()
-    
-    today_success_rate = 0
-    if today_signals > 0:
-        today_success_rate = round((today_successful / today_signals) * 100)
-    
-    # Get weekly data
-    weekly_data = {
-        'dates': [],
-        'success_rates': []
-    }
-    
-    # For the past 7 days
-    for i in range(6, -1, -1):
-        day = today - timedelta(days=i)
-        day_signals = Signal.query.filter(
-            func.date(Signal.created_at) == day
-        ).count()
-        
-        day_successful = Signal.query.filter(
-            func.date(Signal.created_at) == day,
-            Signal.result == 'WIN'
-        ).count()
-        
-        day_rate = 0
-        if day_signals > 0:
-            day_rate = round((day_successful / day_signals) * 100)
-        
-        weekly_data['dates'].append(day.strftime('%m/%d'))
-        weekly_data['success_rates'].append(day_rate)
-    
-    # Get pair statistics
-    pairs = OTCPair.query.all()
-    pair_stats = []
-    
-    for pair in pairs:
-        pair_signals = Signal.query.filter(Signal.pair_id == pair.id).count()
-        if pair_signals == 0:
-            continue
-            
-        pair_successful = Signal.query.filter(
-            Signal.pair_id == pair.id,
-            Signal.result == 'WIN'
-        ).count()
-        
-        pair_success_rate = 0
-        if pair_signals > 0:
-            pair_success_rate = round((pair_successful / pair_signals) * 100)
-        
-        # Get buy signals
-        buy_signals = Signal.query.filter(
-            Signal.pair_id == pair.id,
-            Signal.direction == 'BUY'
-        ).count()
-        
-        buy_successful = Signal.query.filter(
-            Signal.pair_id == pair.id,
-            Signal.direction == 'BUY',
-            Signal.result == 'WIN'
-        ).count()
-        
-        buy_success_rate = 0
-        if buy_signals > 0:
-            buy_success_rate = round((buy_successful / buy_signals) * 100)
-        
-        # Get sell signals
-        sell_signals = Signal.query.filter(
-            Signal.pair_id == pair.id,
-            Signal.direction == 'SELL'
-        ).count()
-        
-        sell_successful = Signal.query.filter(
-            Signal.pair_id == pair.id,
-            Signal.direction == 'SELL',
-            Signal.result == 'WIN'
-        ).count()
-        
-        sell_success_rate = 0
-        if sell_signals > 0:
-            sell_success_rate = round((sell_successful / sell_signals) * 100)
-        
-        pair_stats.append({
-            'symbol': pair.symbol,
-            'total': pair_signals,
-            'success_rate': pair_success_rate,
-            'buy_signals': buy_signals,
-            'buy_success_rate': buy_success_rate,
-            'sell_signals': sell_signals,
-            'sell_success_rate': sell_success_rate
-        })
-    
-    # Sort by success rate (highest first)
-    pair_stats.sort(key=lambda x: x['success_rate'], reverse=True)
-    
-    # Time distribution
-    time_distribution = {
-        'hours': [],
-        'success_counts': [],
-        'failure_counts': []
-    }
-    
-    for hour in range(24):
-        time_distribution['hours'].append(f"{hour}:00")
-        
-        hour_successful = Signal.query.filter(
-            func.extract('hour', Signal.created_at) == hour,
-            Signal.result == 'WIN'
-        ).count()
-        
-        hour_failed = Signal.query.filter(
-            func.extract('hour', Signal.created_at) == hour,
-            Signal.result == 'LOSS'
-        ).count()
-        
-        time_distribution['success_counts'].append(hour_successful)
-        time_distribution['failure_counts'].append(hour_failed)
-    
-    # Compile stats
-    stats = {
-        'total_signals': total_signals,
-        'successful_signals': successful_signals,
-        'failed_signals': failed_signals,
-        'success_rate': success_rate,
-        'today_signals': today_signals,
-        'today_success_rate': today_success_rate
-    }
+    # Totals, weekly, per-pair and hourly breakdowns from the signal rollup tables
+    statistics_data = signal_rollups.statistics(db.session, OTCPair).collect()
     
     return render_template(
         'statistics.html',
         lang=lang,
-        stats=stats,
-        weekly_data=weekly_data,
-        pair_stats=pair_stats,
-        time_distribution=time_distribution
+        **statistics_data
     )
 
 # Archive route
@@ -2055,41 +2042,58 @@ def archive():
     # Get language preference from query parameter
     lang = request.args.get('lang', 'ar')
     
-    # Get archived signals with pagination
-    page = request.args.get('page', 1, type=int)
-    per_page = 20
-    
-    # Optional filter parameters
-    pair_id = request.args.get('pair_id', type=int)
-    direction = request.args.get('direction')
-    result = request.args.get('result')
-    
-    # Build query
-    query = Signal.query
-    
-    if pair_id:
-        query = query.filter(Signal.pair_id == pair_id)
-    
-    if direction:
-        query = query.filter(Signal.direction == direction)
-    
-    if result:
-        query = query.filter(Signal.result == result)
-    
-    # Paginate results
-    signals = query.order_by(Signal.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
-    
-    # Get all pairs for filter dropdown
-    pairs = OTCPair.query.all()
-    
-    # Just return placeholder template for now
+    # Archived signals are served by /api/archive/signals; just return placeholder template for now
     return render_template(
         'index.html', 
         lang=lang
     )
 
+def _archive_filters(signal_archive):
+    """شروط تصفية الأرشيف من معلمات الطلب (الزوج والاتجاه والنتيجة)"""
+    return signal_archive.filters(
+        pair_id=request.args.get('pair_id', type=int),
+        direction=request.args.get('direction'),
+        result=request.args.get('result')
+    )
+
+# API endpoint لتصفح أرشيف الإشارات بالمؤشر (من الأحدث إلى الأقدم)
+@app.route('/api/archive/signals', methods=['GET'])
+def archive_signals():
+    """صفحة من أرشيف الإشارات؛ next_cursor يُمرر كمعلمة cursor للحصول على الصفحة التالية"""
+    signal_archive = SignalArchive(db.session, Signal, OTCPair)
+    try:
+        page = signal_archive.page(
+            _archive_filters(signal_archive),
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', ARCHIVE_PAGE_SIZE, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    return jsonify(page)
+
+# API endpoint لتصدير أرشيف الإشارات بالكامل (NDJSON أو CSV) بشكل متدفق
+@app.route('/api/archive/export', methods=['GET'])
+@admin_required
+def archive_export():
+    """تصدير الإشارات على دفعات دون تحميلها كاملة في الذاكرة"""
+    export_format = request.args.get('format', 'ndjson').lower()
+    signal_archive = SignalArchive(db.session, Signal, OTCPair)
+    criteria = _archive_filters(signal_archive)
+    
+    if export_format == 'csv':
+        chunks, mimetype = signal_archive.export_csv(criteria), 'text/csv'
+    elif export_format == 'ndjson':
+        chunks, mimetype = signal_archive.export_ndjson(criteria), 'application/x-ndjson'
+    else:
+        return jsonify({'status': 'error', 'message': f"Unsupported export format: {export_format}"}), 400
+    
+    filename = f"signals_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
 # خريطة الإشارات الحرارية
 @app.route('/heatmap', methods=['GET'])
 @admin_required
@@ -2097,24 +2101,18 @@ def heatmap():
     """صفحة خريطة الإشارات الحرارية التفاعلية"""
     return render_template('admin/heatmap.html')
 
-# API endpoint لبيانات الإشارات للخريطة الحرارية
-@app.route('/api/heatmap/signals', methods=['GET'])
-@admin_required
-def heatmap_signals():
-    # الحصول على المعلمات
+def _heatmap_filters():
+    """شروط تصفية الإشارات للخريطة الحرارية من معلمات الطلب (التاريخ والزوج والاتجاه)"""
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     pair_id = request.args.get('pair_id')
     direction = request.args.get('direction')
     
-    # بناء الاستعلام
-    query = Signal.query
-    
-    # تطبيق المرشحات
+    criteria = []
     if start_date:
         try:
             start_date = datetime.strptime(start_date, '%Y-%m-%d')
-            query = query.filter(Signal.created_at >= start_date)
+            criteria.append(Signal.created_at >= start_date)
         except ValueError:
             pass
     
@@ -2123,25 +2121,32 @@ def heatmap_signals():
             end_date = datetime.strptime(end_date, '%Y-%m-%d')
             # إضافة يوم كامل لتضمين اليوم الأخير بالكامل
             end_date = end_date + timedelta(days=1)
-            query = query.filter(Signal.created_at < end_date)
+            criteria.append(Signal.created_at < end_date)
         except ValueError:
             pass
     
     if pair_id and pair_id != 'all':
-        query = query.filter(Signal.pair_id == pair_id)
+        criteria.append(Signal.pair_id == pair_id)
     
     if direction and direction != 'all':
-        query = query.filter(Signal.direction == direction)
+        criteria.append(Signal.direction == direction)
     
-    # الحصول على نتائج الاستعلام
-    signals = query.order_by(Signal.created_at).all()
+    return criteria
+
+# API endpoint لبيانات الإشارات للخريطة الحرارية
+@app.route('/api/heatmap/signals', methods=['GET'])
+@admin_required
+def heatmap_signals():
+    # الحصول على نتائج الاستعلام مع أزواجها في نفس الاستعلام
+    signals = Signal.query.options(joinedload(Signal.pair)).filter(
+        *_heatmap_filters()
+    ).order_by(Signal.created_at).all()
     
     # تحويل النتائج إلى تنسيق JSON
     signals_data = []
     for signal in signals:
         # الحصول على زوج العملات
-        pair = OTCPair.query.get(signal.pair_id)
-        pair_symbol = pair.symbol if pair else "Unknown"
+        pair_symbol = signal.pair.symbol if signal.pair else "Unknown"
         
         # تنسيق النتيجة
         result = signal.result
@@ -2170,6 +2175,15 @@ def heatmap_signals():
     
     return jsonify(signals_data)
 
+# API endpoint لمصفوفات الخريطة الحرارية المجمعة (يوم الأسبوع × الساعة، والزوج × الساعة اختيارياً)
+@app.route('/api/heatmap/matrix', methods=['GET'])
+@admin_required
+def heatmap_matrix():
+    """مصفوفات 7×24 لعدد الإشارات الرابحة والخاسرة والمنتهية محسوبة باستعلام GROUP BY واحد"""
+    by_pair = request.args.get('by_pair', 'false').lower() == 'true'
+    rows = SignalStatistics(db.session, Signal, OTCPair).heatmap_counts(_heatmap_filters(), by_pair=by_pair)
+    return jsonify(build_heatmap(rows, by_pair=by_pair))
+
 # API endpoint للحصول على أزواج العملات للخريطة الحرارية
 @app.route('/api/heatmap/pairs', methods=['GET'])
 @admin_required
@@ -2377,29 +2391,13 @@ def user_login():
 @app.route('/user/dashboard')
 @login_required
 def user_dashboard():
-    # Get user stats
-    total_signals = Signal.query.count()
-    successful_signals = Signal.query.filter_by(result='WIN').count()
-    
-    # Calculate success rate
-    success_rate = 0
-    if total_signals > 0:
-        success_rate = round((successful_signals / total_signals) * 100)
-    
-    # Get today's signals
-    today = datetime.utcnow().date()
-    today_signals = Signal.query.filter(
-        func.date(Signal.created_at) == today
-    ).count()
-    
-    today_success = Signal.query.filter(
-        func.date(Signal.created_at) == today,
-        Signal.result == 'WIN'
-    ).count()
-    
-    today_success_rate = 0
-    if today_signals > 0:
-        today_success_rate = round((today_success / today_signals) * 100)
+    # Get user stats (totals and today's signals from the rollup tables)
+    overview = signal_rollups.statistics(db.session, OTCPair).overview()
+    total_signals = overview['total_signals']
+    successful_signals = overview['successful_signals']
+    success_rate = overview['success_rate']
+    today_signals = overview['today_signals']
+    today_success_rate = overview['today_success_rate']
     
     # Get user's chart analyses
     analysis_count = ChartAnalysis.query.filter_by(user_id=current_user.id).count()
@@ -2874,6 +2872,11 @@ csrf.exempt("/signal_monitoring")  # إعفاء نقطة حالة الإشارا
 with app.app_context():
     db.create_all()
     
+    # جداول تجميع الإشارات تُبنى لقاعدة بيانات تحتوي على إشارات سابقة عبر migrations.py فقط
+    # (هذا الكود يعمل في كل عملية عند الاستيراد، والبناء المتزامن من عدة عمليات يكرر العد)
+    if signal_rollups.is_empty(db.session) and Signal.query.first() is not None:
+        logger.warning("Signal rollup tables are empty, statistics will be incomplete until python migrations.py is run")
+    
     # Create default admin if none exists
     if Admin.query.count() == 0:
         default_admin = Admin(
@@ -0,0 +1,428 @@
+"""
+محرك الاختبار التاريخي لخط توليد الإشارات
+يمر على الشموع التاريخية لكل زوج ويشغل عند كل شمعة مؤهلة نفس مراحل الإنتاج:
+advanced_otc_analyzer.analyze_otc_pair ← MultiStageSignalFilter.filter_signal
+← SRSignalValidator.validate_signal ← DynamicDurationCalibrator.calibrate_duration
+ثم يحسم نتيجة كل إشارة (WIN / LOSS / DRAW) عند انتهاء المدة المعايرة.
+
+المؤشرات تُحسب مسبقاً لجميع النوافذ دفعة واحدة بالمكتبة المتجهة، والأزواج تُوزع
+على مجموعة عمليات متوازية.
+
+الاستخدام:
+    python backtester.py --source replay --days 30 --workers 4 --output backtest.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+import advanced_otc_analyzer as otc_analyzer
+from advanced_otc_analyzer import AdvancedOTCAnalyzer
+from candle_store import OPEN, CLOSE, TIME, CandleView
+from candle_archive import CandleArchive, safe_pair_name
+from candle_sources import load_candle_directory
+from multi_stage_signal_filter import MultiStageSignalFilter
+from sr_signal_validator import SRSignalValidator
+from dynamic_duration_calibrator import DynamicDurationCalibrator
+from pocket_option_otc_pairs import get_all_otc_pairs
+from config import CANDLE_REPLAY_DIR, CANDLE_HISTORY_DIR
+
+logger = logging.getLogger(__name__)
+
+# عدد الشموع التي يراها خط الإشارات عند كل شمعة (نفس عمق البيانات في الإنتاج)
+DEFAULT_WINDOW = 100
+
+# الدخول بعد دقيقتين من توليد الإشارة (كما في generate_trade_signal)
+ENTRY_DELAY_CANDLES = 2
+
+# أطول مدة يمكن أن يعيدها معاير المدة (بالدقائق)
+MAX_DURATION_CANDLES = 3
+
+# عدد النوافذ التي تُحسب مؤشراتها دفعة واحدة (يحد استهلاك الذاكرة لتاريخ طويل)
+PRECOMPUTE_CHUNK = 2048
+
+# فرق توقيت تركيا المستخدم في أوقات الدخول
+ENTRY_TIME_OFFSET = timedelta(hours=3)
+
+# مراحل الرفض بترتيب تنفيذها
+PIPELINE_STAGES = (
+    'analysis',            # التحليل لم ينتج إشارة (اتجاه محايد أو ثقة < 60)
+    'basic_filter',        # الفلتر الأساسي في المرحلة الأولى
+    'direction_conflict',  # تناقض الاتجاه مع التحليل المتقدم
+    'confirmations',       # عدد تأكيدات غير كافٍ
+    'multi_stage_score',   # درجة المراحل المتعددة أقل من الحد
+    'sr_compatibility',    # عدم التوافق مع الدعم والمقاومة في الفلتر متعدد المراحل
+    'sr_validation',       # رفض محقق نقاط الدعم والمقاومة
+)
+
+
+class PrecomputedOTCAnalyzer(AdvancedOTCAnalyzer):
+    """
+    محلل OTC يقرأ المؤشرات من مصفوفات محسوبة مسبقاً لمجموعة نوافذ
+
+    دوال المؤشرات في المكتبة تعمل على المحور الأخير، لذا يُحسب كل مؤشر مرة واحدة
+    لمصفوفة النوافذ (B, window) عند أول طلب له، ثم تعيد الاستدعاءات التالية الصف
+    الخاص بالنافذة الحالية. باقي مراحل التحليل تبقى كما هي.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._windows = None
+        self._row = 0
+        self._cache = {}
+
+    def load_windows(self, closes):
+        """
+        تحديد مجموعة النوافذ الحالية
+
+        Args:
+            closes: أسعار الإغلاق بالشكل (B, window)
+        """
+        self._windows = closes
+        self._row = 0
+        self._cache = {}
+
+    def select(self, row):
+        """اختيار النافذة التي سيتم تحليلها"""
+        self._row = row
+
+    def _batched(self, key, compute):
+        values = self._cache.get(key)
+        if values is None:
+            values = self._cache[key] = compute(self._windows)
+        if isinstance(values, tuple):
+            return tuple(value[self._row] for value in values)
+        return values[self._row]
+
+    def _calculate_rsi(self, prices, period):
+        if self._windows is None:
+            return super()._calculate_rsi(prices, period)
+        return self._batched(('rsi', period), lambda w: super(PrecomputedOTCAnalyzer, self)._calculate_rsi(w, period))
+
+    def _calculate_ema(self, prices, period):
+        if self._windows is None:
+            return super()._calculate_ema(prices, period)
+        return self._batched(('ema', period), lambda w: super(PrecomputedOTCAnalyzer, self)._calculate_ema(w, period))
+
+    def _calculate_macd(self, prices, fast_period, slow_period, signal_period=9):
+        if self._windows is None:
+            return super()._calculate_macd(prices, fast_period, slow_period, signal_period)
+        return self._batched(
+            ('macd', fast_period, slow_period, signal_period),
+            lambda w: tuple(super(PrecomputedOTCAnalyzer, self)._calculate_macd(w, fast_period, slow_period, signal_period))
+        )
+
+    def _calculate_bollinger_bands(self, prices, std_dev=2.0, period=20):
+        if self._windows is None:
+            return super()._calculate_bollinger_bands(prices, std_dev, period)
+        return self._batched(
+            ('bollinger', std_dev, period),
+            lambda w: tuple(super(PrecomputedOTCAnalyzer, self)._calculate_bollinger_bands(w, std_dev, period))
+        )
+
+
+def _rejection_stage(detailed_analysis):
+    """تحديد مرحلة الرفض داخل الفلتر متعدد المراحل من التحليل المفصل"""
+    if not detailed_analysis.get('basic_filter', {}).get('accepted', True):
+        return 'basic_filter'
+    otc_details = detailed_analysis.get('otc_analysis', {})
+    if 'direction' in otc_details:
+        return 'direction_conflict'
+    if 'confirmations' in otc_details:
+        return 'confirmations'
+    if 'sr_check' in otc_details:
+        return 'sr_compatibility'
+    return 'multi_stage_score'
+
+
+def _entry_time_string(bar_time):
+    """وقت الدخول بصيغة HH:MM بتوقيت تركيا كما يولده النظام في الإنتاج"""
+    entry = datetime.utcfromtimestamp(bar_time) + timedelta(minutes=ENTRY_DELAY_CANDLES) + ENTRY_TIME_OFFSET
+    return entry.strftime('%H:%M')
+
+
+def resolve_outcomes(block, indices, directions, durations):
+    """
+    حسم نتائج الإشارات دفعة واحدة
+
+    الدخول عند افتتاح الشمعة index + ENTRY_DELAY_CANDLES والخروج عند إغلاق آخر
+    شمعة ضمن المدة.
+
+    Args:
+        block: شموع الزوج بالشكل (5, n)
+        indices: موضع الشمعة التي ولدت كل إشارة
+        directions: 1 للشراء و -1 للبيع
+        durations: مدة كل إشارة بالدقائق
+
+    Returns:
+        numpy.ndarray: 1 للربح و -1 للخسارة و 0 للتعادل
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    entries = indices + ENTRY_DELAY_CANDLES
+    exits = entries + np.asarray(durations, dtype=np.int64) - 1
+    moves = block[CLOSE, exits] - block[OPEN, entries]
+    return np.sign(moves).astype(np.int64) * np.asarray(directions, dtype=np.int64)
+
+
+def eligible_range(block, window=DEFAULT_WINDOW):
+    """
+    نطاق الشموع المؤهلة لتوليد إشارة
+
+    Returns:
+        tuple: (أول شمعة لها نافذة كاملة، نهاية النطاق غير المشمولة) بحيث تبقى
+        شموع كافية للدخول وأطول مدة ممكنة
+    """
+    first = window - 1
+    last = block.shape[1] - ENTRY_DELAY_CANDLES - MAX_DURATION_CANDLES + 1
+    return first, max(first, last)
+
+
+def iterate_signals(pair, block, window=DEFAULT_WINDOW):
+    """
+    المرور على الشموع المؤهلة وتحليل كل نافذة
+
+    Args:
+        pair (str): رمز الزوج
+        block: شموع M1 بالشكل (5, n) مرتبة زمنياً
+        window (int): عدد الشموع المتاحة للتحليل عند كل شمعة
+
+    Yields:
+        tuple: (موضع الشمعة، الشموع، نتيجة التحليل، الإشارة الأولية أو None)
+    """
+    analyzer = PrecomputedOTCAnalyzer()
+    is_otc = "-OTC" in pair
+    first, last = eligible_range(block, window)
+
+    for chunk_start in range(first, last, PRECOMPUTE_CHUNK):
+        chunk_end = min(chunk_start + PRECOMPUTE_CHUNK, last)
+        closes = sliding_window_view(block[CLOSE, chunk_start - first:chunk_end], window)
+        analyzer.load_windows(closes)
+
+        for row, index in enumerate(range(chunk_start, chunk_end)):
+            candles = CandleView(block[:, index - first:index + 1])
+            analyzer.select(row)
+            analysis = analyzer.analyze_pair(candles, pair, is_otc)
+
+            signal = otc_analyzer.generate_trade_signal(analysis, pair)
+            if signal is not None:
+                signal['entry_time'] = _entry_time_string(block[TIME, index])
+                # المعاير يتوقع المدة الحالية بالدقائق وليس النص المعروض للمستخدم
+                signal['duration'] = 1
+            yield index, candles, analysis, signal
+
+
+def backtest_pair(pair, block, window=DEFAULT_WINDOW, quiet=True):
+    """
+    اختبار خط الإشارات على تاريخ زوج واحد
+
+    Args:
+        pair (str): رمز الزوج
+        block: شموع M1 بالشكل (5, n) مرتبة زمنياً
+        window (int): عدد الشموع المتاحة للتحليل عند كل شمعة
+        quiet (bool): إيقاف سجلات المراحل لكل شمعة (تكلفتها تفوق التحليل نفسه)
+
+    Returns:
+        dict: عدادات المراحل والإشارات ونتائجها وزمن التنفيذ
+    """
+    previous_disable = logging.root.manager.disable
+    if quiet:
+        logging.disable(logging.WARNING)
+    try:
+        block = np.ascontiguousarray(block, dtype=np.float64)
+        signal_filter = MultiStageSignalFilter()
+        sr_validator = SRSignalValidator()
+        calibrator = DynamicDurationCalibrator()
+
+        first, last = eligible_range(block, window)
+        rejected = dict.fromkeys(PIPELINE_STAGES, 0)
+        indices, directions, durations = [], [], []
+
+        start = time.perf_counter()
+        for index, candles, analysis, signal in iterate_signals(pair, block, window):
+            if signal is None:
+                rejected['analysis'] += 1
+                continue
+
+            accept, _, _, detailed_analysis = signal_filter.filter_signal(signal, candles, pair, analysis)
+            if not accept:
+                rejected[_rejection_stage(detailed_analysis)] += 1
+                continue
+
+            is_valid, _, _ = sr_validator.validate_signal(signal, candles)
+            if not is_valid:
+                rejected['sr_validation'] += 1
+                continue
+
+            indices.append(index)
+            directions.append(1 if signal['direction'] == 'BUY' else -1)
+            durations.append(calibrator.calibrate_duration(signal, candles))
+
+        outcomes = resolve_outcomes(block, indices, directions, durations)
+        elapsed = time.perf_counter() - start
+    finally:
+        # إعادة السجلات حتى عند فشل التحليل وإلا تبقى معطلة في العملية بالكامل
+        logging.disable(previous_disable)
+
+    return {
+        'pair': pair,
+        'evaluated': last - first,
+        'rejected': rejected,
+        'signals': len(indices),
+        'wins': int(np.sum(outcomes == 1)),
+        'losses': int(np.sum(outcomes == -1)),
+        'draws': int(np.sum(outcomes == 0)),
+        'durations': {str(d): durations.count(d) for d in sorted(set(durations))},
+        'elapsed': elapsed
+    }
+
+
+def _worker(args):
+    return backtest_pair(*args)
+
+
+def summarize(results, wall_time):
+    """
+    تجميع نتائج الأزواج في تقرير واحد
+
+    Args:
+        results (list): نتائج backtest_pair
+        wall_time (float): الزمن الكلي بالثواني
+
+    Returns:
+        dict: الدقة ومعدلات الرفض لكل مرحلة والإنتاجية
+    """
+    evaluated = sum(r['evaluated'] for r in results)
+    signals = sum(r['signals'] for r in results)
+    wins = sum(r['wins'] for r in results)
+    losses = sum(r['losses'] for r in results)
+
+    stages = {}
+    reached = evaluated
+    for stage in PIPELINE_STAGES:
+        count = sum(r['rejected'][stage] for r in results)
+        stages[stage] = {
+            'reached': reached,
+            'rejected': count,
+            'rejection_rate': round(count / reached, 4) if reached else 0.0
+        }
+        reached -= count
+
+    return {
+        'pairs': len(results),
+        'evaluated_bars': evaluated,
+        'signals': signals,
+        'wins': wins,
+        'losses': losses,
+        'draws': sum(r['draws'] for r in results),
+        'accuracy': round(wins / (wins + losses), 4) if wins + losses else None,
+        'stages': stages,
+        'wall_time': round(wall_time, 2),
+        'bars_per_second': round(evaluated / wall_time, 1) if wall_time else None,
+        'signals_per_second': round(signals / wall_time, 2) if wall_time else None,
+        'per_pair': {
+            r['pair']: {
+                'signals': r['signals'],
+                'accuracy': round(r['wins'] / (r['wins'] + r['losses']), 4) if r['wins'] + r['losses'] else None,
+                'durations': r['durations']
+            }
+            for r in results
+        }
+    }
+
+
+def run_backtest(histories, window=DEFAULT_WINDOW, workers=None):
+    """
+    تشغيل الاختبار التاريخي على عدة أزواج بالتوازي
+
+    Args:
+        histories (dict): {رمز الزوج: شموع M1 بالشكل (5, n)}
+        window (int): عدد الشموع المتاحة للتحليل عند كل شمعة
+        workers (int, optional): عدد العمليات (الافتراضي: عدد المعالجات، 1 = بدون عمليات فرعية)
+
+    Returns:
+        dict: التقرير المجمع
+    """
+    tasks = [(pair, block, window) for pair, block in histories.items()]
+    workers = workers or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    if workers == 1 or len(tasks) <= 1:
+        results = [_worker(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            results = list(executor.map(_worker, tasks))
+    wall_time = time.perf_counter() - start
+
+    logger.info(f"Backtested {len(results)} pairs in {wall_time:.1f}s")
+    return summarize(results, wall_time)
+
+
+def load_histories(source='replay', pairs=None, days=None, seed=None):
+    """
+    تحميل تاريخ الشموع للاختبار
+
+    Args:
+        source (str): 'replay' (ملفات CANDLE_REPLAY_DIR) أو 'archive' (أرشيف الشموع)
+            أو 'synthetic' (المولد الاصطناعي)
+        pairs (list, optional): الأزواج المطلوبة (الافتراضي: جميع الأزواج المتوفرة)
+        days (float, optional): عدد الأيام الأخيرة المطلوبة من كل زوج
+        seed (int, optional): بذرة المولد الاصطناعي
+
+    Returns:
+        dict: {رمز الزوج: شموع M1 بالشكل (5, n)}
+    """
+    limit = int(days * 1440) if days else None
+
+    if source == 'replay':
+        recorded = load_candle_directory(CANDLE_REPLAY_DIR)
+        names = pairs or list(recorded)
+        histories = {pair: recorded.get(safe_pair_name(pair)) for pair in names}
+    elif source == 'archive':
+        archive = CandleArchive(CANDLE_HISTORY_DIR)
+        names = pairs or get_all_otc_pairs()
+        histories = {pair: archive.read(pair) for pair in names}
+    elif source == 'synthetic':
+        from candle_sources import SyntheticCandleSource
+        from technical_analyzer import technical_analyzer
+        names = pairs or get_all_otc_pairs()
+        generator = SyntheticCandleSource(technical_analyzer._get_base_price_for_pair,
+                                          technical_analyzer._get_volatility_for_pair, seed=seed)
+        histories = dict(zip(names, generator.history(names, limit or 1440)))
+    else:
+        raise ValueError(f"Unknown backtest source: {source}")
+
+    missing = [pair for pair, block in histories.items() if block is None]
+    if missing:
+        logger.warning(f"No candle history for {len(missing)} pairs: {', '.join(missing)}")
+    return {pair: np.array(block[:, -limit:] if limit else block)
+            for pair, block in histories.items() if block is not None}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Backtest the signal pipeline on historical M1 candles")
+    parser.add_argument('--source', choices=('replay', 'archive', 'synthetic'), default='replay')
+    parser.add_argument('--pairs', help="comma separated pair symbols (default: all available)")
+    parser.add_argument('--days', type=float, help="use only the last N days of each pair")
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW)
+    parser.add_argument('--workers', type=int, help="worker processes (default: CPU count)")
+    parser.add_argument('--seed', type=int, help="seed for synthetic history")
+    parser.add_argument('--output', help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    histories = load_histories(args.source, args.pairs.split(',') if args.pairs else None, args.days, args.seed)
+    report = run_backtest(histories, args.window, args.workers)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    print(text)
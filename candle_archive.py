@@ -0,0 +1,226 @@
+"""
+أرشيف الشموع الدائم
+يحفظ تاريخ شموع كل زوج في ملف ثنائي بسجلات ثابتة الطول (5 قيم float64 لكل شمعة)
+يُفتح بتعيين الذاكرة (memmap) عند التشغيل، بحيث يستأنف النظام من التاريخ الحقيقي بدلاً
+من توليد تاريخ اصطناعي جديد، وتتشارك عمليات gunicorn نفس الصفحات للقراءة فقط
+"""
+
+import atexit
+import logging
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+from candle_store import CANDLE_FIELDS
+from config import (CANDLE_HISTORY_DIR, CANDLE_HISTORY_RETENTION,
+                    CANDLE_HISTORY_FLUSH_CANDLES, CANDLE_HISTORY_FLUSH_SECONDS)
+
+try:
+    import fcntl
+except ImportError:  # أنظمة بدون أقفال ملفات POSIX
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# ترويسة الملف: توقيع الصيغة + عدد الحقول في كل سجل
+_MAGIC = b'CANDLES1'
+_HEADER_SIZE = 16
+_RECORD_DTYPE = np.dtype('<f8')
+_RECORD_SIZE = _RECORD_DTYPE.itemsize * len(CANDLE_FIELDS)
+
+# يُضغط الملف عند تجاوزه مدة الاحتفاظ بهذه النسبة (لتوزيع تكلفة إعادة الكتابة)
+_COMPACTION_SLACK = 0.25
+
+
+def safe_pair_name(pair):
+    """اسم ملف آمن لرمز الزوج (الرموز غير الآمنة تستبدل بـ _)"""
+    return re.sub(r'[^A-Za-z0-9_-]', '_', pair)
+
+
+def _header():
+    fields = len(CANDLE_FIELDS).to_bytes(4, 'little')
+    return _MAGIC + fields + b'\0' * (_HEADER_SIZE - len(_MAGIC) - len(fields))
+
+
+class CandleArchive:
+    """
+    أرشيف شموع على القرص لكل زوج
+
+    القراءة عبر np.memmap للقراءة فقط (بدون نسخ حتى الوصول للبيانات). الكتابة إلحاقية
+    ومجمعة في الذاكرة حتى يتجاوز عدد الشموع المعلقة flush_candles أو يمر flush_seconds.
+    عملية واحدة فقط تكتب في نفس المجلد (قفل ملف)، وباقي العمليات تقرأ فقط.
+    """
+
+    def __init__(self, directory=CANDLE_HISTORY_DIR, retention=CANDLE_HISTORY_RETENTION,
+                 flush_candles=CANDLE_HISTORY_FLUSH_CANDLES, flush_seconds=CANDLE_HISTORY_FLUSH_SECONDS):
+        """
+        Args:
+            directory (str): مجلد ملفات الأرشيف
+            retention (int): أقصى عدد شموع محفوظة لكل زوج
+            flush_candles (int): عدد الشموع المعلقة الذي يفرض الكتابة على القرص
+            flush_seconds (float): أقصى مدة لبقاء شموع معلقة في الذاكرة
+        """
+        self.directory = directory
+        self.retention = retention
+        self.flush_candles = flush_candles
+        self.flush_seconds = flush_seconds
+
+        self._pending = {}
+        self._pending_count = 0
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        # يحمي الكتابة على القرص: دفعات flush المتداخلة تُكتب بترتيب أخذها ولا تُضغط الملفات بالتوازي
+        self._write_lock = threading.Lock()
+        self._lock_file = None
+        self._writable = None
+
+    def _path(self, pair):
+        return os.path.join(self.directory, f"{safe_pair_name(pair)}.candles")
+
+    @property
+    def writable(self):
+        """هل تملك هذه العملية حق الكتابة في الأرشيف (أول عملية تحصل على القفل)"""
+        if self._writable is None:
+            self._writable = self._acquire_writer_lock()
+        return self._writable
+
+    def _acquire_writer_lock(self):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self._lock_file = open(os.path.join(self.directory, '.writer.lock'), 'a')
+        except OSError as e:
+            logger.error(f"Candle archive disabled, cannot open {self.directory}: {e}")
+            return False
+
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            logger.info("Candle archive is owned by another worker, opening read-only")
+            return False
+        logger.info(f"Candle archive writer lock acquired in {self.directory}")
+        return True
+
+    def read(self, pair, limit=None):
+        """
+        قراءة تاريخ زوج من القرص بتعيين الذاكرة
+
+        Args:
+            pair (str): رمز الزوج
+            limit (int, optional): عدد الشموع الأخيرة المطلوبة
+
+        Returns:
+            numpy.ndarray: عرض للقراءة فقط بالشكل (5, n)، أو None إذا لم يوجد أرشيف صالح
+        """
+        path = self._path(pair)
+        count = self._record_count(path)
+        if not count:
+            return None
+
+        records = np.memmap(path, dtype=_RECORD_DTYPE, mode='r', offset=_HEADER_SIZE,
+                            shape=(count, len(CANDLE_FIELDS)))
+        if limit is not None:
+            records = records[-limit:]
+        return records.T
+
+    def record(self, pair, block):
+        """
+        تسجيل شموع جديدة لزوج (تُكتب على القرص لاحقاً على دفعات)
+
+        Args:
+            pair (str): رمز الزوج
+            block: شموع بالشكل (5, n) بترتيب CANDLE_FIELDS
+        """
+        if not self.writable:
+            return
+
+        block = np.asarray(block, dtype=_RECORD_DTYPE)
+        if block.shape[1] == 0:
+            return
+
+        with self._lock:
+            self._pending.setdefault(pair, []).append(block)
+            self._pending_count += block.shape[1]
+            due = (self._pending_count >= self.flush_candles or
+                   time.time() - self._last_flush >= self.flush_seconds)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """كتابة جميع الشموع المعلقة على القرص"""
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._pending_count = 0
+                self._last_flush = time.time()
+
+            for pair, blocks in pending.items():
+                try:
+                    self._append(pair, np.concatenate(blocks, axis=1))
+                except OSError as e:
+                    logger.error(f"Failed to write candle archive for {pair}: {e}")
+
+    def _record_count(self, path):
+        """عدد السجلات الكاملة في ملف موجود بصيغة صالحة، أو None"""
+        try:
+            size = os.path.getsize(path)
+            with open(path, 'rb') as f:
+                header = f.read(_HEADER_SIZE)
+        except OSError:
+            return None
+        if header != _header():
+            return None
+        return (size - _HEADER_SIZE) // _RECORD_SIZE
+
+    def _append(self, pair, block):
+        path = self._path(pair)
+        records = np.ascontiguousarray(block.T[-self.retention:])
+
+        existing = self._record_count(path)
+        if existing is None:
+            self._rewrite(path, records)
+            return
+
+        if existing + len(records) > self.retention * (1 + _COMPACTION_SLACK):
+            # الاحتفاظ بآخر retention شمعة فقط
+            kept_count = self.retention - len(records)
+            kept = self.read(pair, kept_count).T if kept_count > 0 else records[:0]
+            self._rewrite(path, np.concatenate([kept, records]))
+            return
+
+        with open(path, 'r+b') as f:
+            # إزالة سجل غير مكتمل من كتابة سابقة مقطوعة قبل الإلحاق
+            f.truncate(_HEADER_SIZE + existing * _RECORD_SIZE)
+            f.seek(0, os.SEEK_END)
+            f.write(records.tobytes())
+
+    def _rewrite(self, path, records):
+        """كتابة ملف جديد بشكل ذري (القراء الحاليون يحتفظون بالنسخة السابقة حتى إعادة الفتح)"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(_header())
+            f.write(np.ascontiguousarray(records, dtype=_RECORD_DTYPE).tobytes())
+        os.replace(temp_path, path)
+
+    def close(self):
+        """كتابة الشموع المعلقة وتحرير قفل الكتابة"""
+        if self._writable:
+            self.flush()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        self._writable = None
+
+
+# الأرشيف المشترك للعملية
+candle_archive = CandleArchive()
+atexit.register(candle_archive.close)
+
+
+def get_candle_archive():
+    """الحصول على الأرشيف المشترك"""
+    return candle_archive
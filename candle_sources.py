@@ -0,0 +1,263 @@
+"""
+مصادر الشموع القابلة للاستبدال
+يحدد واجهة موحدة لمصدر شموع M1 يستخدمها المحلل الفني لتهيئة تاريخ الأزواج وتحديثه:
+- SyntheticCandleSource: المولد الاصطناعي ذو الارتداد إلى المتوسط (السلوك الافتراضي)
+- ReplayCandleSource: إعادة تشغيل بيانات OHLC مسجلة من ملفات CSV أو ملفات أرشيف ثنائية
+  بسرعة الزمن الحقيقي أو بسرعة مضاعفة، لاختبار الحمل على بيانات واقعية قابلة للتكرار
+"""
+
+import csv
+import logging
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from candle_store import CANDLE_FIELDS, TIME
+from candle_archive import CandleArchive, safe_pair_name
+from synthetic_price_generator import generate_ohlc_batch
+from config import CANDLE_SOURCE, CANDLE_REPLAY_DIR, CANDLE_REPLAY_SPEED
+
+logger = logging.getLogger(__name__)
+
+# مدة شمعة M1 بالثواني
+CANDLE_SECONDS = 60
+
+_EMPTY_BLOCK = np.empty((len(CANDLE_FIELDS), 0), dtype=np.float64)
+
+
+class CandleSource:
+    """
+    الواجهة الأساسية لمصادر شموع M1
+
+    جميع الكتل بالشكل (5, n) بترتيب CANDLE_FIELDS والوقت بالثواني منذ epoch.
+    """
+
+    name = 'base'
+
+    def has_pair(self, pair):
+        """هل يوفر المصدر بيانات لهذا الزوج"""
+        return True
+
+    def history(self, pairs, count):
+        """
+        التاريخ الأولي لمجموعة أزواج
+
+        Args:
+            pairs (list): رموز الأزواج
+            count (int): أقصى عدد شموع لكل زوج
+
+        Returns:
+            list: كتلة شموع لكل زوج (تنتهي بآخر شمعة متاحة حالياً)
+        """
+        raise NotImplementedError
+
+    def updates(self, pair, last_time, last_close, max_count):
+        """
+        الشموع الجديدة المتاحة بعد آخر شمعة معروفة
+
+        Args:
+            pair (str): رمز الزوج
+            last_time (float): وقت آخر شمعة في المخزن
+            last_close (float): آخر سعر إغلاق في المخزن
+            max_count (int): أقصى عدد شموع مطلوب (الأقدم يتم تجاهله)
+
+        Returns:
+            numpy.ndarray: كتلة الشموع الجديدة (قد تكون فارغة)
+        """
+        raise NotImplementedError
+
+
+class SyntheticCandleSource(CandleSource):
+    """مصدر اصطناعي: مسارات ذات ارتداد إلى المتوسط تتقدم مع الزمن الحقيقي"""
+
+    name = 'synthetic'
+
+    def __init__(self, base_price, volatility, seed=None):
+        """
+        Args:
+            base_price: دالة تعيد السعر الأساسي للزوج
+            volatility: دالة تعيد تقلب الزوج
+            seed (int | numpy.random.Generator, optional): بذرة المولد العشوائي
+        """
+        self.base_price = base_price
+        self.volatility = volatility
+        self.rng = np.random.default_rng(seed)
+
+    def history(self, pairs, count):
+        base_prices = [self.base_price(pair) for pair in pairs]
+        volatilities = [self.volatility(pair) for pair in pairs]
+        return list(generate_ohlc_batch(base_prices, volatilities, count, seed=self.rng))
+
+    def updates(self, pair, last_time, last_close, max_count):
+        # عدد الدقائق الكاملة التي مرت منذ آخر شمعة
+        missing = int((time.time() - last_time) // CANDLE_SECONDS)
+        if missing < 1:
+            return _EMPTY_BLOCK
+
+        batch = generate_ohlc_batch(
+            [self.base_price(pair)],
+            [self.volatility(pair)],
+            min(missing, max_count),
+            seed=self.rng,
+            last_closes=[last_close],
+            end_time=last_time + missing * CANDLE_SECONDS,
+            timeframe_seconds=CANDLE_SECONDS
+        )
+        return batch[0]
+
+
+def load_candle_file(path):
+    """
+    قراءة شموع مسجلة من ملف CSV أو ملف أرشيف ثنائي
+
+    ملفات CSV تحتوي على ترويسة بالأعمدة time و open و high و low و close (أعمدة إضافية
+    مثل volume يتم تجاهلها)؛ الوقت إما ثوانٍ منذ epoch أو تاريخ بصيغة ISO بتوقيت UTC.
+
+    Args:
+        path (str): مسار الملف (.csv أو .candles)
+
+    Returns:
+        numpy.ndarray: كتلة الشموع مرتبة زمنياً بالشكل (5, n)
+    """
+    if path.endswith('.candles'):
+        directory, filename = os.path.split(path)
+        block = CandleArchive(directory).read(filename[:-len('.candles')])
+        return _EMPTY_BLOCK if block is None else np.array(block)
+
+    rows = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            row = {key.strip().lower(): value for key, value in row.items()}
+            rows.append((float(row['open']), float(row['high']), float(row['low']),
+                         float(row['close']), _parse_time(row['time'])))
+
+    block = np.array(rows, dtype=np.float64).T.reshape(len(CANDLE_FIELDS), -1)
+    return block[:, np.argsort(block[TIME], kind='stable')]
+
+
+def load_candle_directory(directory):
+    """
+    قراءة جميع ملفات الشموع المسجلة في مجلد
+
+    Args:
+        directory (str): مجلد الملفات (<رمز الزوج>.csv أو <رمز الزوج>.candles)
+
+    Returns:
+        dict: {اسم الزوج الآمن: كتلة الشموع} للملفات غير الفارغة
+    """
+    data = {}
+    for filename in sorted(os.listdir(directory)):
+        # الملف بنفس اسم الزوج الآمن (مثل EURUSD-OTC.csv)
+        pair, extension = os.path.splitext(filename)
+        if extension not in ('.csv', '.candles') or pair in data:
+            continue
+        block = load_candle_file(os.path.join(directory, filename))
+        if block.shape[1]:
+            data[pair] = block
+    return data
+
+
+def _parse_time(value):
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        parsed = datetime.fromisoformat(value.replace('Z', ''))
+        return (parsed - datetime(1970, 1, 1)).total_seconds()
+
+
+class ReplayCandleSource(CandleSource):
+    """
+    إعادة تشغيل شموع مسجلة
+
+    ساعة الإعادة تبدأ عند الشمعة رقم warmup_candles في التسجيل (الشموع السابقة تشكل التاريخ
+    الأولي) وتتقدم بمعدل speed ثانية مسجلة لكل ثانية حقيقية. الشموع تحتفظ بأوقاتها المسجلة؛
+    عند التكرار (loop) تُزاح أوقات كل دورة بطول البيانات لتبقى متصاعدة.
+    """
+
+    name = 'replay'
+
+    def __init__(self, directory, speed=1.0, warmup_candles=1500, loop=True, clock=time.time):
+        """
+        Args:
+            directory (str): مجلد الملفات (<رمز الزوج>.csv أو <رمز الزوج>.candles)
+            speed (float): مضاعف السرعة (1.0 = الزمن الحقيقي)
+            warmup_candles (int): عدد الشموع المتاحة فوراً كتاريخ أولي
+            loop (bool): إعادة البيانات من البداية عند انتهائها
+            clock: دالة الوقت الحقيقي (للاختبار)
+        """
+        self.directory = directory
+        self.speed = speed
+        self.loop = loop
+        self.clock = clock
+        self._data = load_candle_directory(directory)
+
+        if not self._data:
+            raise ValueError(f"No replay candle files found in {directory}")
+
+        first = min(block[TIME, 0] for block in self._data.values())
+        last = max(block[TIME, -1] for block in self._data.values())
+        self._first = first
+        self._span = last - first + CANDLE_SECONDS
+        self._origin = first + (warmup_candles - 1) * CANDLE_SECONDS
+        self._started = clock()
+
+        logger.info(f"Replaying {len(self._data)} pairs from {directory} at {speed}x")
+
+    def has_pair(self, pair):
+        return safe_pair_name(pair) in self._data
+
+    def replay_time(self):
+        """الوقت المسجل الحالي لساعة الإعادة"""
+        return self._origin + (self.clock() - self._started) * self.speed
+
+    def _range(self, pair, after, until):
+        """الشموع التي وقتها في الفترة (after, until] مع مراعاة دورات التكرار"""
+        block = self._data[safe_pair_name(pair)]
+        if not self.loop:
+            times = block[TIME]
+            begin = 0 if after is None else np.searchsorted(times, after, 'right')
+            return block[:, begin:np.searchsorted(times, until, 'right')]
+
+        parts = []
+        first_cycle = int((after - self._first) // self._span) if after is not None else 0
+        last_cycle = int((until - self._first) // self._span)
+        for cycle in range(max(first_cycle, 0), last_cycle + 1):
+            offset = cycle * self._span
+            times = block[TIME] + offset
+            begin = 0 if after is None else np.searchsorted(times, after, 'right')
+            end = np.searchsorted(times, until, 'right')
+            if end > begin:
+                part = block[:, begin:end].copy()
+                part[TIME] += offset
+                parts.append(part)
+        return np.concatenate(parts, axis=1) if parts else _EMPTY_BLOCK
+
+    def history(self, pairs, count):
+        now = self.replay_time()
+        return [self._range(pair, None, now)[:, -count:] for pair in pairs]
+
+    def updates(self, pair, last_time, last_close, max_count):
+        return self._range(pair, last_time, self.replay_time())[:, -max_count:]
+
+
+def create_candle_source(name=CANDLE_SOURCE, base_price=None, volatility=None, seed=None):
+    """
+    إنشاء مصدر الشموع المحدد في الإعدادات
+
+    Args:
+        name (str): 'synthetic' أو 'replay'
+        base_price: دالة السعر الأساسي (للمصدر الاصطناعي)
+        volatility: دالة التقلب (للمصدر الاصطناعي)
+        seed: بذرة المولد العشوائي (للمصدر الاصطناعي)
+
+    Returns:
+        CandleSource: المصدر
+    """
+    if name == 'replay':
+        return ReplayCandleSource(CANDLE_REPLAY_DIR, speed=CANDLE_REPLAY_SPEED)
+    if name != 'synthetic':
+        logger.warning(f"Unknown candle source '{name}', using synthetic data")
+    return SyntheticCandleSource(base_price, volatility, seed=seed)
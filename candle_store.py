@@ -0,0 +1,310 @@
+"""
+مخزن الشموع المشترك على مستوى العملية
+يحتفظ بتاريخ الأسعار لكل زوج في مخازن حلقية ثابتة الحجم من مصفوفات NumPy
+(أعمدة الفتح والأعلى والأدنى والإغلاق والوقت) بحيث تقرأ جميع المحللات من نفس البيانات
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ترتيب الأعمدة داخل المخزن
+CANDLE_FIELDS = ('open', 'high', 'low', 'close', 'time')
+OPEN, HIGH, LOW, CLOSE, TIME = range(len(CANDLE_FIELDS))
+
+# عدد الشموع المحفوظة لكل زوج (نفس عمق التاريخ المستخدم سابقاً في المحلل الفني)
+DEFAULT_CAPACITY = 100
+
+# بداية التوقيت بصيغة UTC بدون منطقة زمنية (نفس صيغة datetime.utcnow)
+_EPOCH = datetime(1970, 1, 1)
+
+
+class CandleView:
+    """
+    عرض للقراءة فقط على شموع زوج واحد بدون نسخ البيانات
+
+    يدعم نفس طريقة الوصول القديمة لقائمة الشموع (candles[-1]['close'] و candles[-20:])
+    مع إتاحة الأعمدة مباشرة كمصفوفات NumPy عبر open و high و low و close و time.
+    العرض صالح حتى إضافة الشمعة التالية للزوج، لذا يجب نسخه عند الحاجة للاحتفاظ به.
+    """
+
+    __slots__ = ('_data',)
+
+    def __init__(self, data):
+        self._data = data
+
+    @property
+    def array(self):
+        """مصفوفة الأعمدة الكاملة بالشكل (5, n)"""
+        return self._data
+
+    @property
+    def open(self):
+        return self._data[OPEN]
+
+    @property
+    def high(self):
+        return self._data[HIGH]
+
+    @property
+    def low(self):
+        return self._data[LOW]
+
+    @property
+    def close(self):
+        return self._data[CLOSE]
+
+    @property
+    def time(self):
+        return self._data[TIME]
+
+    def __len__(self):
+        return self._data.shape[1]
+
+    def __bool__(self):
+        return self._data.shape[1] > 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CandleView(self._data[:, index])
+        return _row_to_candle(self._data[:, index].tolist())
+
+    def __iter__(self):
+        for row in self._data.T.tolist():
+            yield _row_to_candle(row)
+
+    def to_list(self):
+        """تحويل العرض إلى قائمة قواميس (نسخة مستقلة عن المخزن)"""
+        return list(self)
+
+
+def _row_to_candle(row):
+    """تحويل صف أعمدة إلى قاموس شمعة بالصيغة المستخدمة في باقي المشروع"""
+    return {
+        'open': row[OPEN],
+        'high': row[HIGH],
+        'low': row[LOW],
+        'close': row[CLOSE],
+        'time': datetime.utcfromtimestamp(row[TIME])
+    }
+
+
+class CandleBuffer:
+    """
+    مخزن حلقي لزوج واحد
+
+    يتم حفظ كل قيمة مرتين (في الموضع i و i + capacity) بحيث تكون آخر capacity شمعة
+    متجاورة دائماً في الذاكرة، وبالتالي يمكن إرجاعها كشريحة بدون نسخ.
+    """
+
+    __slots__ = ('capacity', 'data', 'start', 'size')
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.data = np.zeros((len(CANDLE_FIELDS), 2 * capacity), dtype=np.float64)
+        self.start = 0
+        self.size = 0
+
+    def append(self, open_price, high, low, close, timestamp):
+        """إضافة شمعة واحدة بتكلفة ثابتة"""
+        position = (self.start + self.size) % self.capacity
+        values = (open_price, high, low, close, timestamp)
+        self.data[:, position] = values
+        self.data[:, position + self.capacity] = values
+
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def extend(self, block):
+        """
+        إضافة عدة شموع دفعة واحدة
+
+        Args:
+            block: مصفوفة بالشكل (5, n) بترتيب CANDLE_FIELDS
+        """
+        block = np.asarray(block, dtype=np.float64)
+        count = block.shape[1]
+        if count == 0:
+            return
+
+        if count >= self.capacity:
+            # الكتلة تغطي المخزن بالكامل: نحتفظ بآخر capacity شمعة فقط
+            tail = block[:, -self.capacity:]
+            self.data[:, :self.capacity] = tail
+            self.data[:, self.capacity:] = tail
+            self.start = 0
+            self.size = self.capacity
+            return
+
+        positions = (self.start + self.size + np.arange(count)) % self.capacity
+        self.data[:, positions] = block
+        self.data[:, positions + self.capacity] = block
+
+        overflow = max(0, self.size + count - self.capacity)
+        self.size = min(self.capacity, self.size + count)
+        self.start = (self.start + overflow) % self.capacity
+
+    def update_last(self, open_price, high, low, close, timestamp):
+        """استبدال آخر شمعة في مكانها (لتحديث شمعة لم تكتمل بعد)"""
+        if self.size == 0:
+            self.append(open_price, high, low, close, timestamp)
+            return
+        position = (self.start + self.size - 1) % self.capacity
+        values = (open_price, high, low, close, timestamp)
+        self.data[:, position] = values
+        self.data[:, position + self.capacity] = values
+
+    def view(self, limit=None):
+        """إرجاع شريحة للقراءة فقط على آخر limit شمعة"""
+        end = self.start + self.size
+        begin = self.start if limit is None else max(self.start, end - limit)
+        window = self.data[:, begin:end]
+        window.flags.writeable = False
+        return window
+
+    def last(self, field):
+        """آخر قيمة في عمود معين"""
+        if self.size == 0:
+            return None
+        return float(self.data[field, self.start + self.size - 1])
+
+
+class CandleStore:
+    """مخزن مشترك لشموع جميع الأزواج (نسخة واحدة لكل عملية)"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._buffers = {}
+        # قفل قابل لإعادة الدخول؛ يستخدمه الكتّاب أيضاً لجعل التحقق من آخر شمعة والإضافة عملية واحدة
+        self.lock = threading.RLock()
+        self._empty = np.zeros((len(CANDLE_FIELDS), 0), dtype=np.float64)
+        self._empty.flags.writeable = False
+
+    def has_pair(self, pair):
+        return pair in self._buffers
+
+    def pairs(self):
+        """قائمة الأزواج المحفوظة في المخزن"""
+        return list(self._buffers.keys())
+
+    def load(self, pair, block):
+        """
+        استبدال تاريخ زوج بالكامل
+
+        Args:
+            pair (str): رمز الزوج
+            block: مصفوفة بالشكل (5, n) بترتيب CANDLE_FIELDS
+        """
+        with self.lock:
+            buffer = CandleBuffer(self.capacity)
+            buffer.extend(block)
+            self._buffers[pair] = buffer
+
+    def load_candles(self, pair, candles):
+        """استبدال تاريخ زوج من قائمة قواميس شموع"""
+        self.load(pair, candles_to_block(candles))
+
+    def append(self, pair, open_price, high, low, close, timestamp=None):
+        """إضافة شمعة جديدة لزوج (ينشئ المخزن الخاص بالزوج إذا لم يكن موجوداً)"""
+        if timestamp is None:
+            timestamp = time.time()
+        with self.lock:
+            buffer = self._buffers.get(pair)
+            if buffer is None:
+                buffer = self._buffers[pair] = CandleBuffer(self.capacity)
+            buffer.append(open_price, high, low, close, timestamp)
+
+    def extend(self, pair, block):
+        """إضافة عدة شموع لزوج دفعة واحدة"""
+        with self.lock:
+            buffer = self._buffers.get(pair)
+            if buffer is None:
+                buffer = self._buffers[pair] = CandleBuffer(self.capacity)
+            buffer.extend(block)
+
+    def get_candles(self, pair, limit=None):
+        """
+        الحصول على شموع زوج كعرض بدون نسخ
+
+        Args:
+            pair (str): رمز الزوج
+            limit (int, optional): عدد الشموع الأخيرة المطلوبة
+
+        Returns:
+            CandleView: عرض على الشموع (فارغ إذا لم يكن الزوج موجوداً)
+        """
+        with self.lock:
+            buffer = self._buffers.get(pair)
+            if buffer is None:
+                return CandleView(self._empty)
+            return CandleView(buffer.view(limit))
+
+    def get_current_price(self, pair):
+        """آخر سعر إغلاق للزوج، أو 0.0 إذا لم تتوفر بيانات"""
+        buffer = self._buffers.get(pair)
+        if buffer is None or buffer.size == 0:
+            return 0.0
+        return buffer.last(CLOSE)
+
+    def get_last_time(self, pair):
+        """وقت آخر شمعة للزوج (بالثواني منذ epoch) أو None"""
+        buffer = self._buffers.get(pair)
+        if buffer is None:
+            return None
+        return buffer.last(TIME)
+
+
+def candles_to_block(candles):
+    """تحويل قائمة قواميس شموع إلى مصفوفة أعمدة بالشكل (5, n)"""
+    block = np.empty((len(CANDLE_FIELDS), len(candles)), dtype=np.float64)
+    for i, candle in enumerate(candles):
+        candle_time = candle.get('time')
+        if isinstance(candle_time, datetime):
+            candle_time = (candle_time - _EPOCH).total_seconds()
+        elif candle_time is None:
+            candle_time = time.time()
+        block[:, i] = (candle['open'], candle['high'], candle['low'], candle['close'], candle_time)
+    return block
+
+
+# المخزن المشترك لجميع المحللات في هذه العملية
+candle_store = CandleStore()
+
+
+def get_candle_store():
+    """الحصول على المخزن المشترك"""
+    return candle_store
+
+
+def get_candles(pair, limit=None):
+    """
+    الحصول على شموع زوج من المخزن المشترك
+
+    Args:
+        pair (str): رمز الزوج
+        limit (int, optional): عدد الشموع الأخيرة المطلوبة
+
+    Returns:
+        CandleView: عرض بدون نسخ على الشموع
+    """
+    return candle_store.get_candles(pair, limit)
+
+
+def get_current_price(pair):
+    """
+    الحصول على آخر سعر إغلاق لزوج من المخزن المشترك
+
+    Args:
+        pair (str): رمز الزوج
+
+    Returns:
+        float: السعر الحالي أو 0.0
+    """
+    return candle_store.get_current_price(pair)
@@ -7,10 +7,69 @@
 import numpy as np
 import logging
 
+from indicators import candle_columns
+
 # إعداد السجلات
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# رموز الاتجاه في مصفوفات المسح
+DIRECTION_NAMES = {1: 'BUY', -1: 'SELL', 0: 'NEUTRAL'}
+_DIRECTION_CODES = {name: code for code, name in DIRECTION_NAMES.items()}
+
+# مجموعات الأنماط بترتيب فحصها، ولكل مجموعة حالاتها الممكنة:
+# (المفتاح، الاسم، الاسم العربي، الاتجاه، القوة، الوصف). رمز الحالة في المسح هو موضعها (-1 = لا يوجد نمط)
+PATTERN_GROUPS = {
+    'engulfing': (
+        ('bullish_engulfing', 'Engulfing Pattern', 'نمط الابتلاع', 'BUY', 80, "نمط ابتلاع صاعد - إشارة محتملة للشراء"),
+        ('bullish_engulfing', 'Engulfing Pattern', 'نمط الابتلاع', 'BUY', 60, "نمط ابتلاع صاعد - إشارة محتملة للشراء"),
+        ('bearish_engulfing', 'Engulfing Pattern', 'نمط الابتلاع', 'SELL', 80, "نمط ابتلاع هابط - إشارة محتملة للبيع"),
+        ('bearish_engulfing', 'Engulfing Pattern', 'نمط الابتلاع', 'SELL', 60, "نمط ابتلاع هابط - إشارة محتملة للبيع"),
+    ),
+    'hammer': (
+        ('hammer', 'Hammer', 'نمط المطرقة', 'BUY', 75,
+         "نمط المطرقة - إشارة انعكاس محتملة للشراء بعد اتجاه هبوطي"),
+        ('inverted_hammer', 'Inverted Hammer', 'نمط المطرقة المقلوبة', 'BUY', 70,
+         "نمط المطرقة المقلوبة - إشارة انعكاس محتملة للشراء بعد اتجاه هبوطي"),
+        ('hanging_man', 'Hanging Man', 'نمط الرجل المشنوق', 'SELL', 75,
+         "نمط الرجل المشنوق - إشارة انعكاس محتملة للبيع بعد اتجاه صعودي"),
+        ('shooting_star', 'Shooting Star', 'نمط النجم الهابط', 'SELL', 75,
+         "نمط النجم الهابط - إشارة انعكاس محتملة للبيع بعد اتجاه صعودي"),
+    ),
+    'star': (
+        ('morning_star', 'Morning Star', 'نجمة الصباح', 'BUY', 90,
+         "نمط نجمة الصباح - إشارة قوية للانعكاس الصعودي بعد اتجاه هبوطي"),
+        ('evening_star', 'Evening Star', 'نجمة المساء', 'SELL', 90,
+         "نمط نجمة المساء - إشارة قوية للانعكاس الهبوطي بعد اتجاه صعودي"),
+    ),
+    'doji': (
+        ('gravestone_doji', 'Gravestone Doji', 'دوجي شاهد القبر', 'SELL', 65,
+         "نمط دوجي شاهد القبر - إشارة محتملة للانعكاس الهبوطي بعد اتجاه صعودي"),
+        ('dragonfly_doji', 'Dragonfly Doji', 'دوجي اليعسوب', 'BUY', 65,
+         "نمط دوجي اليعسوب - إشارة محتملة للانعكاس الصعودي بعد اتجاه هبوطي"),
+        ('doji', 'Doji', 'دوجي', 'SELL', 50, "نمط دوجي - إشارة محتملة للتردد والانعكاس الهبوطي"),
+        ('doji', 'Doji', 'دوجي', 'BUY', 50, "نمط دوجي - إشارة محتملة للتردد والانعكاس الصعودي"),
+        ('doji', 'Doji', 'دوجي', 'NEUTRAL', 40, "نمط دوجي - إشارة للتردد وعدم وضوح الاتجاه"),
+    ),
+    'harami': (
+        ('bullish_harami', 'Harami Pattern', 'نمط الهاراكامي', 'BUY', 60, "نمط هاراكامي صاعد - إشارة محتملة للانعكاس الصعودي"),
+        ('bearish_harami', 'Harami Pattern', 'نمط الهاراكامي', 'SELL', 60, "نمط هاراكامي هابط - إشارة محتملة للانعكاس الهبوطي"),
+    ),
+    'three_candles': (
+        ('three_white_soldiers', 'Three White Soldiers', 'ثلاث جنود صاعد', 'BUY', 85,
+         "نمط ثلاث جنود صاعد - إشارة قوية لاستمرار الاتجاه الصعودي"),
+        ('three_black_crows', 'Three Black Crows', 'ثلاث غربان هابطة', 'SELL', 85,
+         "نمط ثلاث غربان هابطة - إشارة قوية لاستمرار الاتجاه الهبوطي"),
+    ),
+}
+
+# قوة واتجاه كل حالة مع قيمة إضافية في النهاية يقرؤها الرمز -1 (لا يوجد نمط)
+_VARIANT_STRENGTHS = {group: np.array([variant[4] for variant in variants] + [0])
+                      for group, variants in PATTERN_GROUPS.items()}
+_VARIANT_DIRECTIONS = {group: np.array([_DIRECTION_CODES[variant[3]] for variant in variants] + [0], dtype=np.int8)
+                       for group, variants in PATTERN_GROUPS.items()}
+
+
 class CandlestickPatternAnalyzer:
     """محلل أنماط الشموع اليابانية المتقدم"""
     
@@ -36,529 +95,224 @@ class CandlestickPatternAnalyzer:
                 'strength': 0,
                 'description': 'بيانات غير كافية للتحليل'
             }
-            
-        # الحصول على الشموع الأخيرة للتحليل
-        last_candle = candles[-1]  # آخر شمعة
-        prev_candle = candles[-2]  # الشمعة قبل الأخيرة
-        prev2_candle = candles[-3]  # الشمعة قبل قبل الأخيرة
         
-        # تحليل الشموع
-        patterns = []
-        pattern_strength = 0
-        pattern_direction = 'NEUTRAL'
-        
-        # حساب جسم وظلال الشمعة الأخيرة
-        last_body_size = abs(last_candle['open'] - last_candle['close'])
-        last_body_ratio = last_body_size / (last_candle['high'] - last_candle['low']) if (last_candle['high'] - last_candle['low']) > 0 else 0
-        upper_shadow = last_candle['high'] - max(last_candle['open'], last_candle['close'])
-        lower_shadow = min(last_candle['open'], last_candle['close']) - last_candle['low']
-        
-        # تحديد ما إذا كانت الشموع صاعدة أو هابطة
-        is_last_bullish = last_candle['close'] > last_candle['open']
-        is_prev_bullish = prev_candle['close'] > prev_candle['open']
-        is_prev2_bullish = prev2_candle['close'] > prev2_candle['open']
-        
-        # تحديد الاتجاه العام للشموع الثلاث
-        candle_trend = self._determine_candle_trend(candles[-5:] if len(candles) >= 5 else candles)
-        
-        # 1. نمط الابتلاع (Engulfing Pattern)
-        engulfing = self._check_engulfing_pattern(last_candle, prev_candle, candle_trend)
-        if engulfing['pattern_found']:
-            patterns.append(engulfing)
-            pattern_strength = max(pattern_strength, engulfing['strength'])
-            pattern_direction = engulfing['direction']
-        
-        # 2. نمط المطرقة والمطرقة المقلوبة (Hammer & Inverted Hammer)
-        hammer = self._check_hammer_pattern(last_candle, candle_trend)
-        if hammer['pattern_found']:
-            patterns.append(hammer)
-            pattern_strength = max(pattern_strength, hammer['strength'])
-            if pattern_direction == 'NEUTRAL':
-                pattern_direction = hammer['direction']
-        
-        # 3. نمط نجمة المساء والصباح (Evening Star & Morning Star)
-        star = self._check_star_pattern(last_candle, prev_candle, prev2_candle, candle_trend)
-        if star['pattern_found']:
-            patterns.append(star)
-            pattern_strength = max(pattern_strength, star['strength'])
-            pattern_direction = star['direction']  # نمط النجمة له أولوية أعلى
-        
-        # 4. نمط الدوجي (Doji)
-        doji = self._check_doji_pattern(last_candle, candle_trend)
-        if doji['pattern_found']:
-            patterns.append(doji)
-            if pattern_strength < doji['strength']:  # الدوجي له أولوية أقل
-                pattern_strength = doji['strength']
-                if pattern_direction == 'NEUTRAL':
-                    pattern_direction = doji['direction']
-        
-        # 5. نمط الهاراكامي (Harami)
-        harami = self._check_harami_pattern(last_candle, prev_candle, candle_trend)
-        if harami['pattern_found']:
-            patterns.append(harami)
-            if pattern_strength < harami['strength']:  # الهاراكامي له أولوية متوسطة
-                pattern_strength = harami['strength']
-                if pattern_direction == 'NEUTRAL':
-                    pattern_direction = harami['direction']
-        
-        # 6. نمط ثلاث جنود صاعد أو ثلاث غربان هابطة (Three White Soldiers / Three Black Crows)
-        three_candles = self._check_three_candles_pattern(last_candle, prev_candle, prev2_candle)
-        if three_candles['pattern_found']:
-            patterns.append(three_candles)
-            pattern_strength = max(pattern_strength, three_candles['strength'])
-            pattern_direction = three_candles['direction']  # هذا النمط له أولوية عالية
-        
-        # إعداد النتيجة النهائية
-        result = {
-            'patterns': patterns,
-            'direction': pattern_direction,
-            'strength': pattern_strength,
-            'description': self._generate_pattern_description(patterns)
-        }
-        
-        return result
-    
-    def _determine_candle_trend(self, candles):
-        """تحديد الاتجاه العام للشموع"""
-        if len(candles) < 2:
-            return 'NEUTRAL'
-        
-        closes = [candle['close'] for candle in candles]
-        opens = [candle['open'] for candle in candles]
-        
-        # حساب متوسط أسعار الإغلاق والافتتاح
-        avg_close = sum(closes) / len(closes)
-        first_close = closes[0]
-        last_close = closes[-1]
-        
-        # تحديد الاتجاه بناءً على الفرق بين أول وآخر سعر إغلاق
-        if last_close > first_close * 1.002:  # اتجاه صاعد إذا كان الارتفاع أكثر من 0.2%
-            return 'UPTREND'
-        elif last_close < first_close * 0.998:  # اتجاه هابط إذا كان الانخفاض أكثر من 0.2%
-            return 'DOWNTREND'
-        else:
-            return 'NEUTRAL'  # اتجاه محايد
+        # الاتجاه العام يُحسب من آخر 5 شموع، فيكفي مسحها وقراءة آخر صف
+        return self.patterns_at(self.scan_patterns(candles[-5:]), -1)
     
-    def _check_engulfing_pattern(self, current_candle, prev_candle, trend):
+    def patterns_at(self, scan, row):
         """
-        التحقق من نمط الابتلاع (Engulfing Pattern)
+        نتيجة تحليل الأنماط لشمعة واحدة من نتائج المسح
         
         Args:
-            current_candle: الشمعة الحالية
-            prev_candle: الشمعة السابقة
-            trend: الاتجاه العام
+            scan (dict): نتائج scan_patterns
+            row (int): موضع الشمعة
             
         Returns:
-            dict: معلومات النمط
+            dict: نفس مخرجات analyze_patterns
         """
-        result = {
-            'name': 'Engulfing Pattern',
-            'arabic_name': 'نمط الابتلاع',
-            'pattern_found': False,
-            'direction': 'NEUTRAL',
-            'strength': 0
+        patterns = []
+        for group, variants in PATTERN_GROUPS.items():
+            code = scan['patterns'][group][row]
+            if code >= 0:
+                _, name, arabic_name, direction, strength, description = variants[code]
+                patterns.append({
+                    'name': name,
+                    'arabic_name': arabic_name,
+                    'pattern_found': True,
+                    'direction': direction,
+                    'strength': strength,
+                    'description': description
+                })
+        
+        return {
+            'patterns': patterns,
+            'direction': DIRECTION_NAMES[int(scan['direction'][row])],
+            'strength': int(scan['strength'][row]),
+            'description': self._generate_pattern_description(patterns)
         }
-        
-        current_body_size = abs(current_candle['close'] - current_candle['open'])
-        prev_body_size = abs(prev_candle['close'] - prev_candle['open'])
-        
-        is_current_bullish = current_candle['close'] > current_candle['open']
-        is_prev_bullish = prev_candle['close'] > prev_candle['open']
-        
-        # شرط نمط الابتلاع الصاعد: الشمعة الحالية صاعدة والسابقة هابطة، وجسم الحالية يبتلع السابقة
-        bullish_engulfing = (
-            is_current_bullish and 
-            not is_prev_bullish and
-            current_candle['close'] > prev_candle['open'] and
-            current_candle['open'] < prev_candle['close'] and
-            current_body_size > prev_body_size * 1.1  # جسم الشمعة الحالية أكبر بنسبة 10% على الأقل
-        )
-        
-        # شرط نمط الابتلاع الهابط: الشمعة الحالية هابطة والسابقة صاعدة، وجسم الحالية يبتلع السابقة
-        bearish_engulfing = (
-            not is_current_bullish and 
-            is_prev_bullish and
-            current_candle['close'] < prev_candle['open'] and
-            current_candle['open'] > prev_candle['close'] and
-            current_body_size > prev_body_size * 1.1  # جسم الشمعة الحالية أكبر بنسبة 10% على الأقل
-        )
-        
-        if bullish_engulfing:
-            result['pattern_found'] = True
-            result['direction'] = 'BUY'
-            # قوة النمط تزداد إذا كان في اتجاه عكس الاتجاه العام (انعكاس محتمل)
-            result['strength'] = 80 if trend == 'DOWNTREND' else 60
-            result['description'] = "نمط ابتلاع صاعد - إشارة محتملة للشراء"
-        
-        elif bearish_engulfing:
-            result['pattern_found'] = True
-            result['direction'] = 'SELL'
-            # قوة النمط تزداد إذا كان في اتجاه عكس الاتجاه العام (انعكاس محتمل)
-            result['strength'] = 80 if trend == 'UPTREND' else 60
-            result['description'] = "نمط ابتلاع هابط - إشارة محتملة للبيع"
-        
-        return result
     
-    def _check_hammer_pattern(self, candle, trend):
-        """
-        التحقق من نمط المطرقة والمطرقة المقلوبة (Hammer & Inverted Hammer)
-        
-        Args:
-            candle: الشمعة المراد فحصها
-            trend: الاتجاه العام
-            
-        Returns:
-            dict: معلومات النمط
+    def scan_patterns(self, candles):
         """
-        result = {
-            'name': 'Hammer Pattern',
-            'arabic_name': 'نمط المطرقة',
-            'pattern_found': False,
-            'direction': 'NEUTRAL',
-            'strength': 0
-        }
+        مسح جميع أنماط الشموع لكل شمعة في السلسلة دفعة واحدة
         
-        body_size = abs(candle['close'] - candle['open'])
-        total_size = candle['high'] - candle['low']
-        
-        if total_size == 0:  # تجنب القسمة على صفر
-            return result
-            
-        body_ratio = body_size / total_size
-        
-        is_bullish = candle['close'] > candle['open']
-        upper_shadow = candle['high'] - max(candle['open'], candle['close'])
-        lower_shadow = min(candle['open'], candle['close']) - candle['low']
-        
-        upper_shadow_ratio = upper_shadow / total_size if total_size > 0 else 0
-        lower_shadow_ratio = lower_shadow / total_size if total_size > 0 else 0
-        
-        # شروط المطرقة: جسم صغير، ظل سفلي طويل، ظل علوي قصير
-        is_hammer = (
-            body_ratio < 0.3 and  # جسم صغير
-            lower_shadow_ratio > 0.6 and  # ظل سفلي طويل
-            upper_shadow_ratio < 0.1  # ظل علوي قصير جداً
-        )
-        
-        # شروط المطرقة المقلوبة: جسم صغير، ظل علوي طويل، ظل سفلي قصير
-        is_inverted_hammer = (
-            body_ratio < 0.3 and  # جسم صغير
-            upper_shadow_ratio > 0.6 and  # ظل علوي طويل
-            lower_shadow_ratio < 0.1  # ظل سفلي قصير جداً
-        )
-        
-        if is_hammer and trend == 'DOWNTREND':
-            result['pattern_found'] = True
-            result['name'] = 'Hammer'
-            result['arabic_name'] = 'نمط المطرقة'
-            result['direction'] = 'BUY'
-            result['strength'] = 75
-            result['description'] = "نمط المطرقة - إشارة انعكاس محتملة للشراء بعد اتجاه هبوطي"
-        
-        elif is_inverted_hammer and trend == 'DOWNTREND':
-            result['pattern_found'] = True
-            result['name'] = 'Inverted Hammer'
-            result['arabic_name'] = 'نمط المطرقة المقلوبة'
-            result['direction'] = 'BUY'
-            result['strength'] = 70
-            result['description'] = "نمط المطرقة المقلوبة - إشارة انعكاس محتملة للشراء بعد اتجاه هبوطي"
-        
-        elif is_hammer and trend == 'UPTREND':
-            result['pattern_found'] = True
-            result['name'] = 'Hanging Man'
-            result['arabic_name'] = 'نمط الرجل المشنوق'
-            result['direction'] = 'SELL'
-            result['strength'] = 75
-            result['description'] = "نمط الرجل المشنوق - إشارة انعكاس محتملة للبيع بعد اتجاه صعودي"
-        
-        elif is_inverted_hammer and trend == 'UPTREND':
-            result['pattern_found'] = True
-            result['name'] = 'Shooting Star'
-            result['arabic_name'] = 'نمط النجم الهابط'
-            result['direction'] = 'SELL'
-            result['strength'] = 75
-            result['description'] = "نمط النجم الهابط - إشارة انعكاس محتملة للبيع بعد اتجاه صعودي"
-        
-        return result
-    
-    def _check_star_pattern(self, current_candle, prev_candle, prev2_candle, trend):
-        """
-        التحقق من نمط نجمة المساء والصباح (Evening Star & Morning Star)
+        كل شمعة تُقيَّم كما لو كانت آخر شمعة: مع الشمعتين السابقتين لها والاتجاه العام لآخر 5 شموع
+        حتى موضعها.
         
         Args:
-            current_candle: الشمعة الحالية
-            prev_candle: الشمعة السابقة
-            prev2_candle: الشمعة قبل السابقة
-            trend: الاتجاه العام
+            candles: CandleView أو قائمة قواميس شموع
             
         Returns:
-            dict: معلومات النمط
+            dict: trend (1 صاعد، -1 هابط، 0 محايد)، و patterns برمز حالة كل مجموعة أنماط لكل شمعة
+                (-1 = لا يوجد نمط)، و direction و strength بعد دمج الأنماط كما في analyze_patterns
         """
-        result = {
-            'name': 'Star Pattern',
-            'arabic_name': 'نمط النجمة',
-            'pattern_found': False,
-            'direction': 'NEUTRAL',
-            'strength': 0
+        opens, highs, lows, closes = candle_columns(candles)
+        n = len(closes)
+        
+        # خصائص كل شمعة
+        bodies = np.abs(closes - opens)
+        ranges = highs - lows
+        bullish = closes > opens
+        tops = np.maximum(opens, closes)
+        bottoms = np.minimum(opens, closes)
+        upper_shadows = highs - tops
+        lower_shadows = bottoms - lows
+        
+        # الاتجاه العام لآخر 5 شموع حتى كل شمعة: الفرق بين أول وآخر سعر إغلاق
+        first_closes = closes[np.maximum(np.arange(n) - 4, 0)]
+        up = closes > first_closes * 1.002
+        down = ~up & (closes < first_closes * 0.998)
+        up[:1] = down[:1] = False
+        trend = up.astype(np.int8) - down.astype(np.int8)
+        
+        # نسب الجسم والظلال إلى نطاق الشمعة (الشموع بلا نطاق لا تحتوي على أنماط المطرقة أو الدوجي)
+        has_range = ranges != 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            body_ratios = bodies / ranges
+            upper_ratios = np.where(ranges > 0, upper_shadows / ranges, 0)
+            lower_ratios = np.where(ranges > 0, lower_shadows / ranges, 0)
+        
+        # الشمعة الحالية والسابقة لها ((n - 1) صف يبدأ من الشمعة الثانية)
+        cur, prev = slice(1, None), slice(None, -1)
+        
+        # 1. نمط الابتلاع: جسم الشمعة الحالية يبتلع السابقة وأكبر منه بنسبة 10% على الأقل
+        larger = bodies[cur] > bodies[prev] * 1.1
+        bullish_engulfing = (bullish[cur] & ~bullish[prev] & (closes[cur] > opens[prev]) &
+                             (opens[cur] < closes[prev]) & larger)
+        bearish_engulfing = (~bullish[cur] & bullish[prev] & (closes[cur] < opens[prev]) &
+                             (opens[cur] > closes[prev]) & larger)
+        engulfing = _shifted(n, 1, [bullish_engulfing & down[cur], bullish_engulfing,
+                                    bearish_engulfing & up[cur], bearish_engulfing])
+        
+        # 2. نمط المطرقة والمطرقة المقلوبة: جسم صغير وظل طويل من جهة وقصير جداً من الأخرى
+        small_body = has_range & (body_ratios < 0.3)
+        is_hammer = small_body & (lower_ratios > 0.6) & (upper_ratios < 0.1)
+        is_inverted_hammer = small_body & (upper_ratios > 0.6) & (lower_ratios < 0.1)
+        hammer = _shifted(n, 0, [is_hammer & down, is_inverted_hammer & down, is_hammer & up, is_inverted_hammer & up])
+        
+        # 3. نمط نجمة الصباح والمساء: شمعة كبيرة ثم شمعة وسطى صغيرة بفجوة ثم شمعة بالاتجاه المعاكس
+        last, middle, first = slice(2, None), slice(1, -1), slice(None, -2)
+        large_first = bodies[first] > bodies[last] * 0.7
+        middle_small = bodies[middle] < ranges[middle] * 0.3
+        morning_star = (~bullish[first] & large_first & middle_small & bullish[last] &
+                        (tops[middle] < closes[first]) & (bottoms[middle] > opens[last]))
+        evening_star = (bullish[first] & large_first & middle_small & ~bullish[last] &
+                        (bottoms[middle] > closes[first]) & (tops[middle] < opens[last]))
+        star = _shifted(n, 2, [morning_star & down[last], evening_star & up[last]])
+        
+        # 4. نمط الدوجي: جسم صغير جداً، مع حالتي شاهد القبر واليعسوب حسب الظلال
+        is_doji = has_range & (body_ratios < 0.1)
+        gravestone = is_doji & (upper_shadows > 0.7 * ranges) & (lower_shadows < 0.1 * ranges)
+        dragonfly = is_doji & (lower_shadows > 0.7 * ranges) & (upper_shadows < 0.1 * ranges)
+        doji = _shifted(n, 0, [gravestone & up, dragonfly & down, is_doji & up, is_doji & down, is_doji])
+        
+        # 5. نمط الهاراكامي: الشمعة الحالية صغيرة ومحتواة داخل جسم السابقة وبالاتجاه المعاكس لها
+        inside = ((bodies[cur] < bodies[prev] * 0.6) & (tops[cur] <= tops[prev]) & (bottoms[cur] >= bottoms[prev]))
+        bullish_harami = inside & ~bullish[prev] & bullish[cur]
+        bearish_harami = inside & bullish[prev] & ~bullish[cur]
+        harami = _shifted(n, 1, [bullish_harami & down[cur], bearish_harami & up[cur]])
+        
+        # 6. ثلاث جنود صاعد أو ثلاث غربان هابطة: ثلاث شموع متتالية بنفس الاتجاه دون ظلال طويلة
+        short_lower = (opens - lows) < 0.3 * ranges
+        short_upper = (highs - opens) < 0.3 * ranges
+        soldiers = (bullish[last] & bullish[middle] & bullish[first] &
+                    (opens[last] > opens[middle]) & (opens[middle] > opens[first]) &
+                    (closes[last] > closes[middle]) & (closes[middle] > closes[first]) &
+                    short_lower[last] & short_lower[middle] & short_lower[first])
+        crows = (~bullish[last] & ~bullish[middle] & ~bullish[first] &
+                 (opens[last] < opens[middle]) & (opens[middle] < opens[first]) &
+                 (closes[last] < closes[middle]) & (closes[middle] < closes[first]) &
+                 short_upper[last] & short_upper[middle] & short_upper[first])
+        three_candles = _shifted(n, 2, [soldiers, crows])
+        
+        patterns = {
+            'engulfing': engulfing,
+            'hammer': hammer,
+            'star': star,
+            'doji': doji,
+            'harami': harami,
+            'three_candles': three_candles
         }
-        
-        # حساب أحجام الأجسام
-        current_body_size = abs(current_candle['close'] - current_candle['open'])
-        prev_body_size = abs(prev_candle['close'] - prev_candle['open'])
-        prev2_body_size = abs(prev2_candle['close'] - prev2_candle['open'])
-        
-        # تحديد اتجاه الشموع
-        is_current_bullish = current_candle['close'] > current_candle['open']
-        is_prev_bullish = prev_candle['close'] > prev_candle['open']
-        is_prev2_bullish = prev2_candle['close'] > prev2_candle['open']
-        
-        # شروط الشمعة الوسطى (يجب أن تكون صغيرة)
-        prev_total_size = prev_candle['high'] - prev_candle['low']
-        is_middle_small = prev_body_size < prev_total_size * 0.3
-        
-        # فحص نمط نجمة الصباح (Morning Star)
-        is_morning_star = (
-            # الشمعة الأولى هابطة وكبيرة
-            not is_prev2_bullish and prev2_body_size > current_body_size * 0.7 and
-            # الشمعة الوسطى صغيرة
-            is_middle_small and
-            # الشمعة الثالثة صاعدة وكبيرة
-            is_current_bullish and
-            # الفجوة بين الشموع
-            max(prev_candle['open'], prev_candle['close']) < prev2_candle['close'] and
-            min(prev_candle['open'], prev_candle['close']) > current_candle['open']
-        )
-        
-        # فحص نمط نجمة المساء (Evening Star)
-        is_evening_star = (
-            # الشمعة الأولى صاعدة وكبيرة
-            is_prev2_bullish and prev2_body_size > current_body_size * 0.7 and
-            # الشمعة الوسطى صغيرة
-            is_middle_small and
-            # الشمعة الثالثة هابطة وكبيرة
-            not is_current_bullish and
-            # الفجوة بين الشموع
-            min(prev_candle['open'], prev_candle['close']) > prev2_candle['close'] and
-            max(prev_candle['open'], prev_candle['close']) < current_candle['open']
-        )
-        
-        if is_morning_star and trend == 'DOWNTREND':
-            result['pattern_found'] = True
-            result['name'] = 'Morning Star'
-            result['arabic_name'] = 'نجمة الصباح'
-            result['direction'] = 'BUY'
-            result['strength'] = 90  # هذا نمط قوي جدًا
-            result['description'] = "نمط نجمة الصباح - إشارة قوية للانعكاس الصعودي بعد اتجاه هبوطي"
-        
-        elif is_evening_star and trend == 'UPTREND':
-            result['pattern_found'] = True
-            result['name'] = 'Evening Star'
-            result['arabic_name'] = 'نجمة المساء'
-            result['direction'] = 'SELL'
-            result['strength'] = 90  # هذا نمط قوي جدًا
-            result['description'] = "نمط نجمة المساء - إشارة قوية للانعكاس الهبوطي بعد اتجاه صعودي"
-        
-        return result
+        direction, strength = self._combine_patterns(patterns, n)
+        return {'trend': trend, 'patterns': patterns, 'direction': direction, 'strength': strength}
     
-    def _check_doji_pattern(self, candle, trend):
+    def _combine_patterns(self, patterns, n):
         """
-        التحقق من نمط الدوجي (Doji)
+        دمج الأنماط المكتشفة لكل شمعة في اتجاه وقوة واحدة
         
-        Args:
-            candle: الشمعة المراد فحصها
-            trend: الاتجاه العام
-            
-        Returns:
-            dict: معلومات النمط
+        الابتلاع والنجمة والشموع الثلاث تحدد الاتجاه دائماً، والمطرقة تحدده فقط إن لم يتحدد بعد،
+        أما الدوجي والهاراكامي فيؤثران فقط إذا كانا أقوى من الأنماط السابقة.
         """
-        result = {
-            'name': 'Doji Pattern',
-            'arabic_name': 'نمط الدوجي',
-            'pattern_found': False,
-            'direction': 'NEUTRAL',
-            'strength': 0
-        }
-        
-        body_size = abs(candle['close'] - candle['open'])
-        total_size = candle['high'] - candle['low']
-        
-        if total_size == 0:  # تجنب القسمة على صفر
-            return result
-            
-        body_ratio = body_size / total_size
-        
-        # شروط الدوجي: جسم صغير جدًا
-        is_doji = body_ratio < 0.1
-        
-        # دوجي نجمة المسائية (Gravestone Doji) - ظل علوي طويل بدون ظل سفلي
-        upper_shadow = candle['high'] - max(candle['open'], candle['close'])
-        lower_shadow = min(candle['open'], candle['close']) - candle['low']
-        
-        is_gravestone_doji = (
-            is_doji and
-            upper_shadow > 0.7 * total_size and
-            lower_shadow < 0.1 * total_size
-        )
-        
-        # دوجي شاهد القبر (Dragonfly Doji) - ظل سفلي طويل بدون ظل علوي
-        is_dragonfly_doji = (
-            is_doji and
-            lower_shadow > 0.7 * total_size and
-            upper_shadow < 0.1 * total_size
-        )
-        
-        if is_gravestone_doji and trend == 'UPTREND':
-            result['pattern_found'] = True
-            result['name'] = 'Gravestone Doji'
-            result['arabic_name'] = 'دوجي شاهد القبر'
-            result['direction'] = 'SELL'
-            result['strength'] = 65
-            result['description'] = "نمط دوجي شاهد القبر - إشارة محتملة للانعكاس الهبوطي بعد اتجاه صعودي"
-        
-        elif is_dragonfly_doji and trend == 'DOWNTREND':
-            result['pattern_found'] = True
-            result['name'] = 'Dragonfly Doji'
-            result['arabic_name'] = 'دوجي اليعسوب'
-            result['direction'] = 'BUY'
-            result['strength'] = 65
-            result['description'] = "نمط دوجي اليعسوب - إشارة محتملة للانعكاس الصعودي بعد اتجاه هبوطي"
-        
-        elif is_doji:
-            result['pattern_found'] = True
-            result['name'] = 'Doji'
-            result['arabic_name'] = 'دوجي'
-            if trend == 'UPTREND':
-                result['direction'] = 'SELL'
-                result['strength'] = 50
-                result['description'] = "نمط دوجي - إشارة محتملة للتردد والانعكاس الهبوطي"
-            elif trend == 'DOWNTREND':
-                result['direction'] = 'BUY'
-                result['strength'] = 50
-                result['description'] = "نمط دوجي - إشارة محتملة للتردد والانعكاس الصعودي"
-            else:
-                result['direction'] = 'NEUTRAL'
-                result['strength'] = 40
-                result['description'] = "نمط دوجي - إشارة للتردد وعدم وضوح الاتجاه"
-        
-        return result
+        direction = np.zeros(n, dtype=np.int8)
+        strength = np.zeros(n, dtype=np.int64)
+        for group in PATTERN_GROUPS:
+            codes = patterns[group]
+            found = codes >= 0
+            group_strength = _VARIANT_STRENGTHS[group][codes]
+            group_direction = _VARIANT_DIRECTIONS[group][codes]
+            if group in ('doji', 'harami'):
+                found &= strength < group_strength
+                strength = np.where(found, group_strength, strength)
+                direction = np.where(found & (direction == 0), group_direction, direction)
+                continue
+            strength = np.where(found, np.maximum(strength, group_strength), strength)
+            if group == 'hammer':
+                found &= direction == 0
+            direction = np.where(found, group_direction, direction)
+        return direction, strength
     
-    def _check_harami_pattern(self, current_candle, prev_candle, trend):
+    def pattern_masks(self, scan):
         """
-        التحقق من نمط الهاراكامي (Harami)
+        مصفوفة منطقية لكل نمط (حسب المفتاح) من نتائج المسح
         
         Args:
-            current_candle: الشمعة الحالية
-            prev_candle: الشمعة السابقة
-            trend: الاتجاه العام
+            scan (dict): نتائج scan_patterns
             
         Returns:
-            dict: معلومات النمط
+            dict: مفتاح النمط -> مصفوفة منطقية بمواضع ظهوره
         """
-        result = {
-            'name': 'Harami Pattern',
-            'arabic_name': 'نمط الهاراكامي',
-            'pattern_found': False,
-            'direction': 'NEUTRAL',
-            'strength': 0
-        }
-        
-        current_body_size = abs(current_candle['close'] - current_candle['open'])
-        prev_body_size = abs(prev_candle['close'] - prev_candle['open'])
-        
-        is_current_bullish = current_candle['close'] > current_candle['open']
-        is_prev_bullish = prev_candle['close'] > prev_candle['open']
-        
-        # شروط نمط الهاراكامي: الشمعة السابقة كبيرة والحالية صغيرة ومحتواة داخل جسم السابقة
-        is_harami = (
-            current_body_size < prev_body_size * 0.6 and  # الشمعة الحالية أصغر بكثير
-            max(current_candle['open'], current_candle['close']) <= max(prev_candle['open'], prev_candle['close']) and
-            min(current_candle['open'], current_candle['close']) >= min(prev_candle['open'], prev_candle['close'])
-        )
-        
-        # هاراكامي صاعد: الشمعة السابقة هابطة والحالية صاعدة
-        is_bullish_harami = is_harami and not is_prev_bullish and is_current_bullish
-        
-        # هاراكامي هابط: الشمعة السابقة صاعدة والحالية هابطة
-        is_bearish_harami = is_harami and is_prev_bullish and not is_current_bullish
-        
-        if is_bullish_harami and trend == 'DOWNTREND':
-            result['pattern_found'] = True
-            result['direction'] = 'BUY'
-            result['strength'] = 60
-            result['description'] = "نمط هاراكامي صاعد - إشارة محتملة للانعكاس الصعودي"
-        
-        elif is_bearish_harami and trend == 'UPTREND':
-            result['pattern_found'] = True
-            result['direction'] = 'SELL'
-            result['strength'] = 60
-            result['description'] = "نمط هاراكامي هابط - إشارة محتملة للانعكاس الهبوطي"
-        
-        return result
+        masks = {}
+        for group, variants in PATTERN_GROUPS.items():
+            codes = scan['patterns'][group]
+            for code, variant in enumerate(variants):
+                mask = codes == code
+                masks[variant[0]] = masks[variant[0]] | mask if variant[0] in masks else mask
+        return masks
     
-    def _check_three_candles_pattern(self, c1, c2, c3):
+    def pattern_hit_rates(self, candles, horizon=1):
         """
-        التحقق من نمط ثلاث جنود صاعد أو ثلاث غربان هابطة
+        نسبة نجاح كل نمط تاريخياً: تحرك سعر الإغلاق في اتجاه النمط بعد horizon شمعة
         
         Args:
-            c1: الشمعة الأولى (الأحدث)
-            c2: الشمعة الثانية
-            c3: الشمعة الثالثة (الأقدم)
+            candles: CandleView أو قائمة قواميس شموع
+            horizon (int): عدد الشموع بعد النمط
             
         Returns:
-            dict: معلومات النمط
+            dict: مفتاح النمط -> {'count': عدد مرات الظهور، 'hit_rate': نسبة النجاح}
+                (الأنماط المحايدة لا تُحتسب)
         """
-        result = {
-            'name': 'Three Candles Pattern',
-            'arabic_name': 'نمط الشموع الثلاث',
-            'pattern_found': False,
-            'direction': 'NEUTRAL',
-            'strength': 0
-        }
-        
-        # تحديد اتجاه الشموع
-        is_c1_bullish = c1['close'] > c1['open']
-        is_c2_bullish = c2['close'] > c2['open']
-        is_c3_bullish = c3['close'] > c3['open']
-        
-        # ثلاث جنود صاعد: ثلاث شموع صاعدة متتالية
-        is_three_white_soldiers = (
-            is_c1_bullish and is_c2_bullish and is_c3_bullish and
-            c1['open'] > c2['open'] and c2['open'] > c3['open'] and
-            c1['close'] > c2['close'] and c2['close'] > c3['close'] and
-            # عدم وجود ظلال سفلية طويلة
-            (c1['open'] - c1['low']) < 0.3 * (c1['high'] - c1['low']) and
-            (c2['open'] - c2['low']) < 0.3 * (c2['high'] - c2['low']) and
-            (c3['open'] - c3['low']) < 0.3 * (c3['high'] - c3['low'])
-        )
-        
-        # ثلاث غربان هابطة: ثلاث شموع هابطة متتالية
-        is_three_black_crows = (
-            not is_c1_bullish and not is_c2_bullish and not is_c3_bullish and
-            c1['open'] < c2['open'] and c2['open'] < c3['open'] and
-            c1['close'] < c2['close'] and c2['close'] < c3['close'] and
-            # عدم وجود ظلال علوية طويلة
-            (c1['high'] - c1['open']) < 0.3 * (c1['high'] - c1['low']) and
-            (c2['high'] - c2['open']) < 0.3 * (c2['high'] - c2['low']) and
-            (c3['high'] - c3['open']) < 0.3 * (c3['high'] - c3['low'])
-        )
-        
-        if is_three_white_soldiers:
-            result['pattern_found'] = True
-            result['name'] = 'Three White Soldiers'
-            result['arabic_name'] = 'ثلاث جنود صاعد'
-            result['direction'] = 'BUY'
-            result['strength'] = 85
-            result['description'] = "نمط ثلاث جنود صاعد - إشارة قوية لاستمرار الاتجاه الصعودي"
-        
-        elif is_three_black_crows:
-            result['pattern_found'] = True
-            result['name'] = 'Three Black Crows'
-            result['arabic_name'] = 'ثلاث غربان هابطة'
-            result['direction'] = 'SELL'
-            result['strength'] = 85
-            result['description'] = "نمط ثلاث غربان هابطة - إشارة قوية لاستمرار الاتجاه الهبوطي"
-        
-        return result
+        scan = self.scan_patterns(candles)
+        closes = candle_columns(candles)[3]
+        n = len(closes)
+        
+        # حركة السعر بعد كل شمعة (الشموع الأخيرة بلا نتيجة بعد لا تُحتسب)
+        move = np.zeros(n, dtype=np.int8)
+        if n > horizon:
+            move[:n - horizon] = np.sign(closes[horizon:] - closes[:n - horizon])
+        evaluated = np.arange(n) < n - horizon
+        
+        counts, hits = {}, {}
+        for group, variants in PATTERN_GROUPS.items():
+            codes = scan['patterns'][group]
+            for code, variant in enumerate(variants):
+                direction = _DIRECTION_CODES[variant[3]]
+                if not direction:
+                    continue
+                occurred = (codes == code) & evaluated
+                counts[variant[0]] = counts.get(variant[0], 0) + int(np.count_nonzero(occurred))
+                hits[variant[0]] = hits.get(variant[0], 0) + int(np.count_nonzero(occurred & (move == direction)))
+        
+        return {key: {'count': count, 'hit_rate': round(hits[key] / count, 4) if count else 0.0}
+                for key, count in counts.items()}
     
     def _generate_pattern_description(self, patterns):
         """
@@ -579,6 +333,20 @@ class CandlestickPatternAnalyzer:
         
         return " | ".join(descriptions)
 
+
+def _shifted(n, offset, conditions):
+    """
+    رمز الحالة لكل شمعة من شروط محسوبة ابتداءً من الشمعة offset
+
+    أول شرط متحقق يحدد الحالة، والشموع التي ليس لها عدد كافٍ من الشموع السابقة لا تحتوي على النمط.
+    """
+    codes = np.full(n, -1, dtype=np.int8)
+    if n > offset:
+        # الكتابة بترتيب عكسي تجعل الأولوية لأول شرط متحقق
+        for code in range(len(conditions) - 1, -1, -1):
+            codes[offset:][conditions[code]] = code
+    return codes
+
 # إنشاء مثيل عام من المحلل للاستخدام في جميع أنحاء التطبيق
 candlestick_analyzer = CandlestickPatternAnalyzer()
 
@@ -9,7 +9,10 @@ import random
 import time
 from datetime import datetime, timedelta
 
-from technical_analyzer import TechnicalAnalyzer
+from technical_analyzer import technical_analyzer
+from candle_store import get_candles
+from analysis_context import get_analysis
+from indicators import candle_columns, range_volatility
 
 # إعداد سجل الأحداث
 logging.basicConfig(level=logging.INFO)
@@ -20,7 +23,7 @@ class ConfidenceEvaluator:
     
     def __init__(self):
         """تهيئة نظام تقييم الثقة"""
-        self.technical_analyzer = TechnicalAnalyzer()
+        self.technical_analyzer = technical_analyzer
         
         # أوزان العوامل المختلفة في تقييم الثقة
         self.factor_weights = {
@@ -140,15 +143,13 @@ class ConfidenceEvaluator:
         direction = signal['direction']
         
         # الحصول على بيانات السوق الحالية
-        market_data = self.technical_analyzer.price_data.get(pair, {})
-        if not market_data or 'candles' not in market_data or len(market_data['candles']) < 20:
+        candles = get_candles(pair)
+        if len(candles) < 20:
             # لا توجد بيانات كافية للتقييم
             return 85  # قيمة متوسطة
         
-        candles = market_data['candles']
-        
-        # حساب مؤشر التذبذب (Volatility)
-        volatility = self._calculate_volatility(candles)
+        # حساب مؤشر التذبذب (Volatility) - مشترك مع باقي المراحل لنفس الشموع
+        volatility = get_analysis(pair, candles, ('volatility', 20), lambda: self._calculate_volatility(candles))
         
         # حساب السيولة (تقريباً من خلال حجم الشموع)
         liquidity = self._estimate_liquidity(candles)
@@ -202,20 +203,10 @@ class ConfidenceEvaluator:
         if len(candles) < lookback:
             return 1.0  # قيمة افتراضية معتدلة
         
-        # استخدام آخر N شمعة
-        recent_candles = candles[-lookback:]
-        
-        # حساب متوسط حجم الشموع
-        heights = [(c['high'] - c['low']) / c['close'] * 100 for c in recent_candles]
-        avg_height = sum(heights) / len(heights)
-        
-        # حساب الانحراف المعياري للأسعار
-        closes = [c['close'] for c in recent_candles]
-        mean_price = sum(closes) / len(closes)
-        std_dev = math.sqrt(sum([(p - mean_price) ** 2 for p in closes]) / len(closes))
+        _, highs, lows, closes = candle_columns(candles)
         
-        # مؤشر التذبذب المركب
-        volatility = (avg_height + (std_dev / mean_price * 100)) / 2
+        # مؤشر التذبذب المركب: متوسط حجم الشموع ومعامل الاختلاف لأسعار الإغلاق
+        volatility = float(range_volatility(highs, lows, closes, lookback))
         
         return volatility
     
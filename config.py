@@ -7,6 +7,42 @@ WEBHOOK_URL = os.environ.get("WEBHOOK_URL", "")
 # Database configuration
 DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///trading_signals.db")
 
+# Candle history persistence (per-pair memory-mapped files)
+CANDLE_HISTORY_DIR = os.environ.get("CANDLE_HISTORY_DIR", "candle_history")
+CANDLE_HISTORY_RETENTION = int(os.environ.get("CANDLE_HISTORY_RETENTION", "10080"))  # one week of M1 candles
+CANDLE_HISTORY_FLUSH_CANDLES = int(os.environ.get("CANDLE_HISTORY_FLUSH_CANDLES", "200"))
+CANDLE_HISTORY_FLUSH_SECONDS = float(os.environ.get("CANDLE_HISTORY_FLUSH_SECONDS", "30"))
+
+# Candle feed: "synthetic" (generated prices) or "replay" (recorded CSV/.candles files)
+CANDLE_SOURCE = os.environ.get("CANDLE_SOURCE", "synthetic")
+CANDLE_REPLAY_DIR = os.environ.get("CANDLE_REPLAY_DIR", "candle_replay")
+CANDLE_REPLAY_SPEED = float(os.environ.get("CANDLE_REPLAY_SPEED", "1.0"))  # recorded seconds per real second
+
+# Tuned signal filter parameters written by walk_forward_optimizer.py (applied at startup if present)
+SIGNAL_PARAMETERS_FILE = os.environ.get("SIGNAL_PARAMETERS_FILE", "signal_parameters.json")
+
+# Next-signal pre-computation: candidates are ranked this many seconds before the signal window opens
+SIGNAL_PRECOMPUTE_LEAD_SECONDS = float(os.environ.get("SIGNAL_PRECOMPUTE_LEAD_SECONDS", "60"))
+SIGNAL_PRECOMPUTE_POLL_SECONDS = float(os.environ.get("SIGNAL_PRECOMPUTE_POLL_SECONDS", "5"))
+SIGNAL_PRECOMPUTE_MAX_AGE_SECONDS = float(os.environ.get("SIGNAL_PRECOMPUTE_MAX_AGE_SECONDS", "120"))
+
+# Per-stage latency spans for signal generation (samples kept per stage, served at /admin/latency)
+LATENCY_TRACING_ENABLED = os.environ.get("LATENCY_TRACING_ENABLED", "true").lower() == "true"
+LATENCY_TRACE_CAPACITY = int(os.environ.get("LATENCY_TRACE_CAPACITY", "1024"))
+
+# Filter stage ordering: reorder checks by measured cost and rejection rate (same accept/reject decision)
+FILTER_ADAPTIVE_ORDERING_ENABLED = os.environ.get("FILTER_ADAPTIVE_ORDERING_ENABLED", "true").lower() == "true"
+FILTER_REORDER_INTERVAL = int(os.environ.get("FILTER_REORDER_INTERVAL", "50"))
+FILTER_STAGE_MIN_SAMPLES = int(os.environ.get("FILTER_STAGE_MIN_SAMPLES", "20"))
+
+# Per-candle analysis results shared between filter stages (number of candle windows kept, 0 disables)
+ANALYSIS_CACHE_SIZE = int(os.environ.get("ANALYSIS_CACHE_SIZE", "256"))
+
+# Market condition results: per-pair entries (TTL and max pairs kept, 0 disables) and the all-pairs aggregate TTL
+MARKET_CONDITION_CACHE_TTL_SECONDS = float(os.environ.get("MARKET_CONDITION_CACHE_TTL_SECONDS", "900"))
+MARKET_CONDITION_CACHE_MAX_PAIRS = int(os.environ.get("MARKET_CONDITION_CACHE_MAX_PAIRS", "64"))
+MARKET_CONDITION_AGGREGATE_TTL_SECONDS = float(os.environ.get("MARKET_CONDITION_AGGREGATE_TTL_SECONDS", "900"))
+
 # Affiliate link
 AFFILIATE_LINK = "https://bit.ly/trading3litepro"
 
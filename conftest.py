@@ -0,0 +1,18 @@
+"""
+إعدادات الاختبارات المشتركة
+المحلل الفني ومحلل حالة السوق يستوردان get_all_valid_pairs و is_valid_pair من وحدتي قوائم الأزواج؛
+إذا لم تعرّف الوحدتان هاتين الدالتين تُضافان هنا من القوائم الموجودة فيهما قبل جمع الاختبارات،
+حتى تعمل اختبارات هذه المحللات بدلاً من الفشل عند الاستيراد
+"""
+
+import market_pairs
+import pocket_option_otc_pairs
+
+if not hasattr(pocket_option_otc_pairs, 'get_all_valid_pairs'):
+    pocket_option_otc_pairs.get_all_valid_pairs = pocket_option_otc_pairs.get_all_otc_pairs
+
+if not hasattr(market_pairs, 'get_all_valid_pairs'):
+    market_pairs.get_all_valid_pairs = market_pairs.get_default_market_pairs
+
+if not hasattr(market_pairs, 'is_valid_pair'):
+    market_pairs.is_valid_pair = lambda pair_symbol: pair_symbol in market_pairs.DEFAULT_MARKET_PAIRS
@@ -9,6 +9,8 @@ from datetime import datetime, time, timedelta
 import random
 import math
 
+from price_level_index import PriceLevelIndex
+
 # إعداد السجلات
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -271,6 +273,23 @@ class DynamicDurationCalibrator:
             logger.warning(f"خطأ في تحديد اتجاه السوق: {e}")
             return False
     
+    def _nearest_levels(self, sr_zones, price):
+        """
+        أقرب مستوى مقاومة فوق السعر وأقرب مستوى دعم تحته
+        
+        Args:
+            sr_zones (dict): مناطق الدعم والمقاومة
+            price (float): السعر الحالي
+            
+        Returns:
+            tuple: (أقرب مقاومة، المسافة إليها، أقرب دعم، المسافة إليه) - المسافة لا نهائية إذا لم يوجد المستوى
+        """
+        nearest_resistance = PriceLevelIndex(sr_zones.get('resistance', [])).nearest_above(price)
+        nearest_support = PriceLevelIndex(sr_zones.get('support', [])).nearest_below(price)
+        min_resistance_dist = nearest_resistance['price'] - price if nearest_resistance else float('inf')
+        min_support_dist = price - nearest_support['price'] if nearest_support else float('inf')
+        return nearest_resistance, min_resistance_dist, nearest_support, min_support_dist
+    
     def _is_near_support_resistance(self, price, sr_zones):
         """
         التحقق مما إذا كان السعر قريباً من منطقة دعم أو مقاومة
@@ -286,26 +305,8 @@ class DynamicDurationCalibrator:
             return False
         
         try:
-            resistance_levels = sr_zones.get('resistance', [])
-            support_levels = sr_zones.get('support', [])
-            
-            # حساب أقرب مستوى مقاومة
-            nearest_resistance = None
-            min_resistance_dist = float('inf')
-            for level in resistance_levels:
-                dist = level['price'] - price
-                if dist > 0 and dist < min_resistance_dist:
-                    min_resistance_dist = dist
-                    nearest_resistance = level
-            
-            # حساب أقرب مستوى دعم
-            nearest_support = None
-            min_support_dist = float('inf')
-            for level in support_levels:
-                dist = price - level['price']
-                if dist > 0 and dist < min_support_dist:
-                    min_support_dist = dist
-                    nearest_support = level
+            nearest_resistance, min_resistance_dist, nearest_support, min_support_dist = \
+                self._nearest_levels(sr_zones, price)
             
             # تحديد ما إذا كان السعر قريباً من الدعم أو المقاومة
             # نعتبر السعر قريباً إذا كانت المسافة أقل من 0.2% من السعر
@@ -438,24 +439,8 @@ class DynamicDurationCalibrator:
                 return duration
             
             # البحث عن أقرب دعم ومقاومة
-            resistance_levels = sr_zones.get('resistance', [])
-            support_levels = sr_zones.get('support', [])
-            
-            nearest_resistance = None
-            min_resistance_dist = float('inf')
-            for level in resistance_levels:
-                dist = level['price'] - current_price
-                if dist > 0 and dist < min_resistance_dist:
-                    min_resistance_dist = dist
-                    nearest_resistance = level
-            
-            nearest_support = None
-            min_support_dist = float('inf')
-            for level in support_levels:
-                dist = current_price - level['price']
-                if dist > 0 and dist < min_support_dist:
-                    min_support_dist = dist
-                    nearest_support = level
+            nearest_resistance, min_resistance_dist, nearest_support, min_support_dist = \
+                self._nearest_levels(sr_zones, current_price)
             
             # تعديل المدة بناءً على القرب من الدعم والمقاومة واتجاه الإشارة
             if direction == 'BUY':
@@ -14,6 +14,8 @@ from advanced_signal_filter import filter_trading_signal
 import multi_stage_signal_filter as msf
 import advanced_otc_analyzer as otc_analyzer
 import market_pairs
+from candle_store import CandleView
+from latency_tracer import span, traced
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +44,7 @@ class EnhancedSignalSystem:
             "high_quality_signals": 0
         }
     
+    @traced('enhanced.generate_signal')
     def generate_signal(self, pair_symbol=None, force_generation=False):
         """
         توليد إشارة عالية الجودة
@@ -58,7 +61,8 @@ class EnhancedSignalSystem:
         # تحديد الزوج
         if not pair_symbol:
             # اختيار زوج بناءً على الأولوية
-            pair_symbol, is_otc = self._select_optimal_pair()
+            with span('enhanced.pair_selection'):
+                pair_symbol, is_otc = self._select_optimal_pair()
             logger.info(f"تم اختيار الزوج {pair_symbol} (OTC: {is_otc})")
         else:
             # التحقق من نوع الزوج
@@ -72,17 +76,19 @@ class EnhancedSignalSystem:
             
             try:
                 # الحصول على بيانات الشموع
-                candles = self._get_candle_data(pair_symbol)
+                with span('enhanced.candles'):
+                    candles = self._get_candle_data(pair_symbol)
                 
                 if not candles or len(candles) < 30:
                     logger.warning(f"بيانات شموع غير كافية للزوج {pair_symbol}")
                     continue
                 
                 # تحليل متقدم
-                otc_analysis = otc_analyzer.analyze_otc_pair(candles, pair_symbol)
-                
-                # توليد الإشارة الأولية
-                signal = self._generate_initial_signal(pair_symbol, candles, otc_analysis)
+                with span('enhanced.analysis'):
+                    otc_analysis = otc_analyzer.analyze_otc_pair(candles, pair_symbol)
+                    
+                    # توليد الإشارة الأولية
+                    signal = self._generate_initial_signal(pair_symbol, candles, otc_analysis)
                 
                 if not signal:
                     logger.warning(f"فشل في توليد إشارة أولية للزوج {pair_symbol}")
@@ -95,9 +101,10 @@ class EnhancedSignalSystem:
                 
                 if is_valid or force_generation:
                     # إذا كانت الإشارة صالحة أو تم فرض التوليد
-                    enhanced_signal = self._enhance_signal(
-                        signal, quality, candles, pair_symbol, otc_analysis
-                    )
+                    with span('enhanced.enhance'):
+                        enhanced_signal = self._enhance_signal(
+                            signal, quality, candles, pair_symbol, otc_analysis
+                        )
                     
                     # تسجيل الإشارة في السجل
                     self._record_signal(enhanced_signal, is_valid, quality)
@@ -156,43 +163,23 @@ class EnhancedSignalSystem:
     
     def _get_candle_data(self, pair_symbol):
         """
-        الحصول على بيانات الشموع للزوج
+        الحصول على بيانات الشموع للزوج من مصدر الشموع المشترك
         
         Args:
             pair_symbol (str): رمز الزوج
             
         Returns:
-            list: بيانات الشموع
+            CandleView: نسخة ثابتة من آخر 100 شمعة (أو None عند الفشل)
         """
-        # هذه دالة وهمية تعيد بيانات شموع للاختبار
-        # في التطبيق الحقيقي، ستقوم بجلب البيانات من مصدر خارجي أو API
-        
-        # محاكاة بيانات شموع لأغراض الاختبار
-        candles = []
-        base_price = 1.0
-        
-        # توليد 100 شمعة
-        for i in range(100):
-            change = (random.random() - 0.5) * 0.002  # تغير السعر
-            base_price += change
-            
-            # تكوين الشمعة
-            candle = {
-                'time': datetime.utcnow() - timedelta(minutes=100-i),
-                'open': base_price,
-                'high': base_price + abs(change) * random.random() * 2,
-                'low': base_price - abs(change) * random.random() * 2,
-                'close': base_price + change,
-                'volume': random.randint(100, 1000)
-            }
-            
-            # التأكد من أن High أكبر من Low
-            candle['high'] = max(candle['high'], candle['open'], candle['close'])
-            candle['low'] = min(candle['low'], candle['open'], candle['close'])
-            
-            candles.append(candle)
+        try:
+            from technical_analyzer import technical_analyzer
+            candles = technical_analyzer.get_candles(pair_symbol, 100)
+        except Exception as e:
+            logger.error(f"Error getting candles for {pair_symbol}: {e}")
+            return None
         
-        return candles
+        # نسخة مستقلة عن المخزن الحلقي حتى لا تتغير الشموع أثناء مراحل التصفية
+        return CandleView(candles.array.copy())
     
     def _generate_initial_signal(self, pair_symbol, candles, otc_analysis):
         """
@@ -0,0 +1,135 @@
+"""
+فحص خطط تنفيذ الاستعلامات الأكثر استخداماً
+يشغّل EXPLAIN (EXPLAIN QUERY PLAN في SQLite) على كل استعلام ويتحقق من أن قاعدة البيانات
+تستخدم الفهرس المتوقع بدلاً من المرور على الجدول بالكامل. في PostgreSQL يُعطَّل المسح
+التسلسلي أثناء الفحص لأن المخطط يفضله على الجداول الصغيرة حتى مع وجود الفهرس.
+
+الاستخدام (على قاعدة بيانات التطبيق المحددة في DATABASE_URL):
+
+    python explain_hot_queries.py
+"""
+
+import sys
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import func, select, text, tuple_
+
+
+def hot_queries(signal, chart_analysis, approved_channel, system_lock, now=None):
+    """
+    الاستعلامات الأكثر استخداماً والفهرس المتوقع لكل منها
+
+    Args:
+        signal, chart_analysis, approved_channel, system_lock: نماذج الجداول
+        now (datetime, optional): الوقت المستخدم في نطاقات التاريخ
+
+    Returns:
+        list: عناصر (الاسم، اسم الفهرس المتوقع أو None لأي فهرس، الاستعلام)
+    """
+    if now is None:
+        now = datetime.utcnow()
+    today = datetime.combine(now.date(), time.min)
+    return [
+        ('signals_last_24h',
+         'ix_signals_created_at_id',
+         select(func.count()).select_from(signal).where(signal.created_at >= now - timedelta(hours=24))),
+        # نطاق اليوم بدلاً من func.date(created_at) = اليوم
+        ('signals_today',
+         'ix_signals_created_at_id',
+         select(func.count()).select_from(signal).where(
+             signal.created_at >= today, signal.created_at < today + timedelta(days=1))),
+        ('archive_page',
+         'ix_signals_created_at_id',
+         select(signal.id).where(tuple_(signal.created_at, signal.id) < (now, 10 ** 9)).order_by(
+             signal.created_at.desc(), signal.id.desc()).limit(51)),
+        ('last_regular_signal',
+         'ix_signals_doubling_created_at',
+         select(signal.id).where(signal.doubling_strategy == False).order_by(  # noqa: E712
+             signal.created_at.desc()).limit(1)),
+        ('signals_by_pair_direction_result',
+         'ix_signals_pair_direction_result',
+         select(signal.id).where(signal.pair_id == 1, signal.direction == 'BUY', signal.result == 'WIN').order_by(
+             signal.created_at.desc()).limit(51)),
+        ('latest_active_signal',
+         'ix_signals_result_created_at',
+         select(signal.id).where(signal.result.is_(None)).order_by(signal.created_at.desc()).limit(1)),
+        ('user_chart_analyses',
+         'ix_chart_analyses_user_created_at',
+         select(chart_analysis.id).where(chart_analysis.user_id == 1).order_by(chart_analysis.created_at.desc())),
+        ('bot_active_channels',
+         'ix_approved_channels_bot_expiration',
+         select(approved_channel.id).where(approved_channel.bot_id == 1, approved_channel.expiration_date > now)),
+        # lock_name فريد، فالفهرس هو فهرس القيد الفريد (اسمه يختلف حسب قاعدة البيانات)
+        ('system_lock',
+         None,
+         select(system_lock.id).where(system_lock.lock_name == 'signal_generation')),
+    ]
+
+
+def explain(connection, statement):
+    """
+    خطة تنفيذ استعلام كأسطر نصية
+
+    Args:
+        connection: اتصال SQLAlchemy
+        statement: استعلام select
+
+    Returns:
+        list: أسطر الخطة
+    """
+    dialect = connection.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+    if dialect.name == 'sqlite':
+        return [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+    return [row[0] for row in connection.execute(text(f"EXPLAIN {sql}"))]
+
+
+def uses_index(plan, index_name=None):
+    """هل تستخدم الخطة الفهرس المحدد (أو أي فهرس إذا لم يُحدد)"""
+    for line in plan:
+        # SQLite: "USING INDEX x" / "USING COVERING INDEX x"؛ PostgreSQL: "Index Scan using x" / "Bitmap Index Scan on x"
+        lowered = line.lower()
+        if index_name is None and ('using index' in lowered or 'using covering index' in lowered
+                                   or ('index' in lowered and 'scan' in lowered)):
+            return True
+        if index_name is not None and index_name.lower() in lowered:
+            return True
+    return False
+
+
+def check_plans(connection, queries):
+    """
+    فحص خطط جميع الاستعلامات
+
+    Args:
+        connection: اتصال SQLAlchemy
+        queries (list): عناصر hot_queries
+
+    Returns:
+        list: عناصر (الاسم، الفهرس المتوقع، هل استُخدم، أسطر الخطة)
+    """
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+    return [(name, index_name, uses_index(plan, index_name), plan)
+            for name, index_name, plan in ((name, index_name, explain(connection, statement))
+                                           for name, index_name, statement in queries)]
+
+
+def main():
+    from app import app, db
+    from models import ApprovedChannel, ChartAnalysis, Signal, SystemLock
+
+    with app.app_context(), db.engine.begin() as connection:
+        results = check_plans(connection, hot_queries(Signal, ChartAnalysis, ApprovedChannel, SystemLock))
+        for name, index_name, used, plan in results:
+            print(f"{'OK     ' if used else 'NO INDEX'} {name} (expected: {index_name or 'any index'})")
+            for line in plan:
+                print(f"           {line}")
+        missing = [name for name, _, used, _ in results if not used]
+        if missing:
+            print(f"\nQueries without their index: {', '.join(missing)} (run python migrations.py)")
+        return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
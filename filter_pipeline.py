@@ -0,0 +1,198 @@
+"""
+سلسلة مراحل الفلترة مع ترتيب تكيفي حسب التكلفة
+كل فلتر يعرّف فحوصه كقائمة مراحل، وتقيس السلسلة زمن كل مرحلة ونسبة رفضها أثناء التشغيل ثم
+تعيد ترتيبها بحيث تعمل أولاً المراحل الأرخص والأكثر رفضاً (أقل تكلفة / احتمال رفض).
+الإشارة تُقبل فقط إذا اجتازت جميع المراحل، فالقرار النهائي لا يتغير بتغير الترتيب
+"""
+
+import logging
+import threading
+import time
+
+from config import FILTER_ADAPTIVE_ORDERING_ENABLED, FILTER_REORDER_INTERVAL, FILTER_STAGE_MIN_SAMPLES
+from latency_tracer import latency_tracer
+
+logger = logging.getLogger(__name__)
+
+# عند بلوغ هذا العدد من التشغيلات تُنصّف إحصائيات المرحلة لتتبع تغير ظروف السوق
+STATS_WINDOW = 1000
+
+# جميع السلاسل المعرفة (لعرض إحصائياتها)
+_pipelines = []
+
+
+class FilterStage:
+    """
+    مرحلة فحص واحدة
+
+    دالة الفحص تستقبل نفس معاملات run وتعيد True إذا اجتازت الإشارة المرحلة. يجب ألا يعتمد
+    قرار أي مرحلة على آثار مرحلة أخرى إلا إذا صُرّح بذلك في requires.
+    """
+
+    __slots__ = ('name', 'check', 'requires', 'runs', 'rejections', 'seconds')
+
+    def __init__(self, name, check, requires=()):
+        """
+        Args:
+            name (str): اسم المرحلة
+            check: دالة الفحص
+            requires (tuple): أسماء المراحل التي يجب أن تجتازها الإشارة قبل هذه المرحلة
+        """
+        self.name = name
+        self.check = check
+        self.requires = tuple(requires)
+        self.runs = 0
+        self.rejections = 0
+        self.seconds = 0.0
+
+    def expected_cost(self):
+        """
+        تكلفة المرحلة لكل رفض متوقع (متوسط الزمن / احتمال الرفض)
+
+        المراحل التي لم تُقس بعد تُعطى الأولوية حتى تتوفر لها قياسات كافية.
+        """
+        if self.runs < FILTER_STAGE_MIN_SAMPLES:
+            return 0.0
+        rejection_rate = (self.rejections + 1) / (self.runs + 2)
+        return (self.seconds / self.runs) / rejection_rate
+
+
+class AdaptiveFilterPipeline:
+    """
+    سلسلة مراحل فلترة يُعاد ترتيبها دورياً حسب التكلفة المتوقعة
+
+    الترتيب المعرّف هو الترتيب الأصلي للفحوص ويُستخدم عند تعطيل إعادة الترتيب وعند حدوث استثناء:
+    تُستكمل حينها المراحل بالترتيب الأصلي (مع إعادة استخدام نتائج ما تم تنفيذه)، فتظهر نفس النتيجة
+    أو نفس الاستثناء كما في التنفيذ المتسلسل ما لم تكن مرحلة لاحقة قد رفضت الإشارة قبل الوصول إليه.
+    """
+
+    def __init__(self, name, stages, adaptive=FILTER_ADAPTIVE_ORDERING_ENABLED, reorder_interval=FILTER_REORDER_INTERVAL):
+        """
+        Args:
+            name (str): اسم السلسلة (يُستخدم كبادئة في تتبع الأزمنة)
+            stages (list): المراحل بالترتيب الأصلي
+            adaptive (bool): تفعيل إعادة الترتيب
+            reorder_interval (int): عدد التشغيلات بين كل إعادة ترتيب
+        """
+        declared = set()
+        for stage in stages:
+            missing = [required for required in stage.requires if required not in declared]
+            if missing:
+                raise ValueError(f"Stage {stage.name} requires undeclared earlier stages: {missing}")
+            declared.add(stage.name)
+
+        self.name = name
+        self.stages = list(stages)
+        self.adaptive = adaptive
+        self.reorder_interval = reorder_interval
+        self._order = list(stages)
+        self._runs = 0
+        self._lock = threading.Lock()
+        _pipelines.append(self)
+
+    @property
+    def order(self):
+        """أسماء المراحل بترتيب التنفيذ الحالي"""
+        return [stage.name for stage in self._order]
+
+    def run(self, *args):
+        """
+        تنفيذ المراحل حتى أول رفض
+
+        Args:
+            *args: معاملات دوال الفحص
+
+        Returns:
+            str: اسم المرحلة التي رفضت الإشارة، أو None إذا اجتازت جميع المراحل
+        """
+        results = {}
+        try:
+            for stage in self._order:
+                passed = self._evaluate(stage, args)
+                results[stage.name] = passed
+                if not passed:
+                    return stage.name
+            return None
+        except Exception as error:
+            results[stage.name] = error
+        finally:
+            self._count_run()
+
+        # إعادة التقييم بالترتيب الأصلي: أول مرحلة ترفض أو تفشل في هذا الترتيب تحدد النتيجة
+        for stage in self.stages:
+            if stage.name in results:
+                outcome = results[stage.name]
+            else:
+                outcome = self._evaluate(stage, args)
+            if isinstance(outcome, Exception):
+                raise outcome
+            if not outcome:
+                return stage.name
+        return None
+
+    def _evaluate(self, stage, args):
+        started = time.perf_counter()
+        passed = None
+        try:
+            passed = bool(stage.check(*args))
+            return passed
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                if stage.runs >= STATS_WINDOW:
+                    stage.runs //= 2
+                    stage.rejections //= 2
+                    stage.seconds /= 2
+                stage.runs += 1
+                stage.seconds += elapsed
+                if passed is False:
+                    stage.rejections += 1
+            if latency_tracer.enabled:
+                latency_tracer.record(f"{self.name}.{stage.name}", elapsed)
+
+    def _count_run(self):
+        with self._lock:
+            self._runs += 1
+            if self.adaptive and self._runs % self.reorder_interval == 0:
+                self._reorder()
+
+    def _reorder(self):
+        """ترتيب جشع للمراحل الجاهزة (التي اجتازت متطلباتها) حسب التكلفة المتوقعة"""
+        placed, order = set(), []
+        pending = list(self.stages)
+        while pending:
+            ready = [stage for stage in pending if all(required in placed for required in stage.requires)]
+            best = min(ready, key=lambda stage: (stage.expected_cost(), self.stages.index(stage)))
+            order.append(best)
+            placed.add(best.name)
+            pending.remove(best)
+
+        if order != self._order:
+            logger.info(f"Filter pipeline {self.name} reordered: {' -> '.join(stage.name for stage in order)}")
+            self._order = order
+
+    def stats(self):
+        """
+        إحصائيات المراحل
+
+        Returns:
+            dict: الترتيب الحالي وعدد التشغيلات ونسبة الرفض ومتوسط الزمن لكل مرحلة
+        """
+        with self._lock:
+            return {
+                'order': self.order,
+                'runs': self._runs,
+                'stages': {
+                    stage.name: {
+                        'runs': stage.runs,
+                        'rejection_rate': round(stage.rejections / stage.runs, 4) if stage.runs else 0.0,
+                        'mean_ms': round(stage.seconds / stage.runs * 1000.0, 3) if stage.runs else 0.0
+                    }
+                    for stage in self.stages
+                }
+            }
+
+
+def get_filter_pipeline_stats():
+    """إحصائيات جميع سلاسل الفلترة"""
+    return {pipeline.name: pipeline.stats() for pipeline in _pipelines}
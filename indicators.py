@@ -0,0 +1,418 @@
+"""
+مكتبة المؤشرات الفنية الموحدة
+تحسب السلاسل الكاملة للمؤشرات باستخدام NumPy: متوسطات وتباينات متحركة عبر المجاميع التراكمية،
+نوافذ متحركة مخططة (strided) للأعلى والأدنى، ومعادلات تكرارية خطية سريعة للمتوسطات الأسية
+
+جميع الدوال تعمل على المحور الأخير، لذا تقبل سلسلة واحدة (n,) أو عدة أزواج معاً (P, n).
+القيم التي لا تتوفر لها بيانات كافية تُعاد كـ NaN.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# طول الكتلة عند حل المعادلة التكرارية بضرب المصفوفات (يحد من حجم مصفوفة المعاملات)
+_RECURSION_BLOCK = 256
+
+
+def candle_columns(candles):
+    """
+    استخراج أعمدة الشموع كمصفوفات
+
+    Args:
+        candles: CandleView من مخزن الشموع أو قائمة قواميس شموع
+
+    Returns:
+        tuple: (opens, highs, lows, closes)
+    """
+    if hasattr(candles, 'array'):
+        return candles.open, candles.high, candles.low, candles.close
+
+    columns = np.array([[c['open'], c['high'], c['low'], c['close']] for c in candles], dtype=np.float64)
+    if columns.size == 0:
+        columns = columns.reshape(0, 4)
+    return columns[:, 0], columns[:, 1], columns[:, 2], columns[:, 3]
+
+
+@lru_cache(maxsize=32)
+def _recursion_kernel(coefficient, block):
+    """مصفوفة المعاملات المثلثية (منقولة) وأوزان القيمة السابقة لكتلة بطول block"""
+    lags = np.arange(block)
+    exponents = lags[:, None] - lags[None, :]
+    kernel = np.where(exponents >= 0, coefficient ** np.maximum(exponents, 0), 0.0)
+    carry_weights = coefficient ** (lags + 1)
+    kernel_t = np.ascontiguousarray(kernel.T)
+    kernel_t.flags.writeable = False
+    carry_weights.flags.writeable = False
+    return kernel_t, carry_weights
+
+
+def linear_recursion(inputs, coefficient, initial):
+    """
+    حل المعادلة y[t] = coefficient * y[t-1] + inputs[t] على المحور الأخير
+
+    يتم الحل على كتل: داخل كل كتلة تُضرب المدخلات في مصفوفة مثلثية سفلية
+    L[t, k] = coefficient^(t-k) ثم يضاف أثر آخر قيمة من الكتلة السابقة.
+
+    Args:
+        inputs: المدخلات بالشكل (..., n)
+        coefficient (float): معامل التكرار (|coefficient| <= 1)
+        initial: قيمة y[-1] بالشكل (...)
+
+    Returns:
+        numpy.ndarray: القيم y بنفس شكل المدخلات
+    """
+    inputs = np.asarray(inputs, dtype=np.float64)
+    result = np.empty_like(inputs)
+    count = inputs.shape[-1]
+    carry = np.broadcast_to(np.asarray(initial, dtype=np.float64), inputs.shape[:-1]).copy()
+
+    block = min(count, _RECURSION_BLOCK)
+    if block == 0:
+        return result
+
+    kernel_t, carry_weights = _recursion_kernel(float(coefficient), block)
+
+    for begin in range(0, count, block):
+        end = min(begin + block, count)
+        size = end - begin
+        chunk = inputs[..., begin:end] @ kernel_t[:size, :size]
+        chunk += carry[..., None] * carry_weights[:size]
+        result[..., begin:end] = chunk
+        carry = chunk[..., -1]
+
+    return result
+
+
+def _nan_like(values):
+    return np.full(np.shape(values), np.nan, dtype=np.float64)
+
+
+def rolling_sum(values, window, min_periods=None):
+    """
+    مجموع متحرك عبر المجموع التراكمي
+
+    Args:
+        values: السلسلة (..., n)
+        window (int): طول النافذة
+        min_periods (int, optional): أقل عدد قيم لحساب مجموع جزئي في بداية السلسلة
+
+    Returns:
+        numpy.ndarray: المجموع المتحرك (NaN قبل توفر min_periods قيمة)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = _nan_like(values)
+    count = values.shape[-1]
+    if count == 0:
+        return result
+
+    # المجموع حول أول قيمة يقلل أخطاء التقريب للأسعار الكبيرة ذات التغيرات الصغيرة
+    anchor = values[..., :1]
+    cumulative = np.cumsum(values - anchor, axis=-1)
+    lengths = np.minimum(np.arange(1, count + 1), window)
+
+    shifted = np.zeros_like(cumulative)
+    if count > window:
+        shifted[..., window:] = cumulative[..., :-window]
+    sums = cumulative - shifted + anchor * lengths
+
+    first = window if min_periods is None else min_periods
+    valid = lengths >= first
+    result[..., valid] = sums[..., valid]
+    return result
+
+
+def rolling_mean(values, window, min_periods=None):
+    """متوسط متحرك بسيط (مع متوسط متزايد قبل امتلاء النافذة إذا حُدد min_periods)"""
+    count = np.shape(values)[-1]
+    lengths = np.minimum(np.arange(1, count + 1), window)
+    return rolling_sum(values, window, min_periods) / lengths
+
+
+def rolling_std(values, window, min_periods=None):
+    """
+    الانحراف المعياري المتحرك (على مستوى المجتمع مثل np.std)
+
+    يُحسب من مجموع القيم ومجموع مربعاتها حول أول قيمة في السلسلة.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    count = values.shape[-1]
+    if count == 0:
+        return _nan_like(values)
+
+    centered = values - values[..., :1]
+    lengths = np.minimum(np.arange(1, count + 1), window)
+    mean = rolling_sum(centered, window, min_periods) / lengths
+    mean_sq = rolling_sum(centered * centered, window, min_periods) / lengths
+    return np.sqrt(np.maximum(mean_sq - mean * mean, 0.0))
+
+
+def _rolling_extreme(values, window, reducer):
+    values = np.asarray(values, dtype=np.float64)
+    result = _nan_like(values)
+    if values.shape[-1] < window:
+        return result
+    windows = sliding_window_view(values, window, axis=-1)
+    result[..., window - 1:] = reducer(windows, axis=-1)
+    return result
+
+
+def rolling_max(values, window):
+    """أعلى قيمة في نافذة متحركة (نوافذ مخططة بدون نسخ)"""
+    return _rolling_extreme(values, window, np.max)
+
+
+def rolling_min(values, window):
+    """أدنى قيمة في نافذة متحركة (نوافذ مخططة بدون نسخ)"""
+    return _rolling_extreme(values, window, np.min)
+
+
+def ema(values, period, seed='first'):
+    """
+    المتوسط المتحرك الأسي
+
+    Args:
+        values: السلسلة (..., n)
+        period (int): الفترة
+        seed (str): 'first' يبدأ بأول قيمة، 'sma' يبدأ بالمتوسط البسيط لأول period قيمة
+
+    Returns:
+        numpy.ndarray: قيم EMA (NaN قبل البداية عند seed='sma')
+    """
+    values = np.asarray(values, dtype=np.float64)
+    alpha = 2 / (period + 1)
+    result = _nan_like(values)
+    count = values.shape[-1]
+
+    if seed == 'first':
+        if count == 0:
+            return result
+        result[..., 0] = values[..., 0]
+        result[..., 1:] = linear_recursion(values[..., 1:] * alpha, 1 - alpha, values[..., 0])
+    elif seed == 'sma':
+        if count < period:
+            return result
+        start = values[..., :period].mean(axis=-1)
+        result[..., period - 1] = start
+        result[..., period:] = linear_recursion(values[..., period:] * alpha, 1 - alpha, start)
+    else:
+        raise ValueError(f"Unknown EMA seed: {seed}")
+
+    return result
+
+
+def macd(values, fast_period=12, slow_period=26, signal_period=9, seed='first'):
+    """
+    مؤشر MACD
+
+    Args:
+        values: سلسلة الأسعار
+        fast_period (int): فترة EMA السريع
+        slow_period (int): فترة EMA البطيء
+        signal_period (int): فترة خط الإشارة
+        seed (str): طريقة بدء المتوسطات الأسية (انظر ema)
+
+    Returns:
+        tuple: (خط MACD، خط الإشارة، الهيستوجرام)
+    """
+    macd_line = ema(values, fast_period, seed) - ema(values, slow_period, seed)
+
+    if seed == 'first':
+        signal_line = ema(macd_line, signal_period, seed)
+    else:
+        # خط الإشارة يبدأ عند أول قيمة متاحة لخط MACD
+        signal_line = _nan_like(macd_line)
+        start = slow_period - 1
+        if macd_line.shape[-1] > start:
+            signal_line[..., start:] = ema(macd_line[..., start:], signal_period, seed)
+
+    return macd_line, signal_line, macd_line - signal_line
+
+
+def rsi(values, period=14, method='simple'):
+    """
+    مؤشر القوة النسبية
+
+    Args:
+        values: سلسلة أسعار الإغلاق
+        period (int): الفترة
+        method (str): 'simple' متوسط بسيط لآخر period تغير، 'wilder' تنعيم Wilder
+
+    Returns:
+        numpy.ndarray: قيم RSI (NaN قبل توفر period تغير)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = _nan_like(values)
+    if values.shape[-1] < period + 1:
+        return result
+
+    deltas = np.diff(values, axis=-1)
+    gains = np.maximum(deltas, 0.0)
+    losses = np.maximum(-deltas, 0.0)
+
+    if method == 'simple':
+        avg_gain = rolling_sum(gains, period)[..., period - 1:] / period
+        avg_loss = rolling_sum(losses, period)[..., period - 1:] / period
+        # النوافذ الخالية من الخسائر تُحدد بالعد لأن المجموع التراكمي قد يترك بقايا تقريب
+        no_losses = rolling_sum((losses > 0).astype(np.float64), period)[..., period - 1:] == 0
+        avg_loss = np.where(no_losses, 0.0, avg_loss)
+    elif method == 'wilder':
+        smoothing = (period - 1) / period
+        gain_seed = gains[..., :period].mean(axis=-1)
+        loss_seed = losses[..., :period].mean(axis=-1)
+        avg_gain = np.concatenate([gain_seed[..., None],
+                                   linear_recursion(gains[..., period:] / period, smoothing, gain_seed)], axis=-1)
+        avg_loss = np.concatenate([loss_seed[..., None],
+                                   linear_recursion(losses[..., period:] / period, smoothing, loss_seed)], axis=-1)
+    else:
+        raise ValueError(f"Unknown RSI method: {method}")
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        result[..., period:] = np.where(avg_loss > 0, 100 - 100 / (1 + rs), 100.0)
+    return result
+
+
+def bollinger_bands(values, period=20, deviation=2.0, min_periods=None):
+    """
+    نطاقات بولنجر
+
+    Args:
+        values: سلسلة الأسعار
+        period (int): الفترة
+        deviation (float): معامل الانحراف المعياري
+        min_periods (int, optional): حساب نطاقات على نافذة متزايدة قبل امتلاء الفترة
+
+    Returns:
+        tuple: (النطاق العلوي، النطاق المتوسط، النطاق السفلي)
+    """
+    middle = rolling_mean(values, period, min_periods)
+    std = rolling_std(values, period, min_periods)
+    return middle + deviation * std, middle, middle - deviation * std
+
+
+def stochastic(highs, lows, closes, k_period=14, smooth_k=3, smooth_d=3):
+    """
+    مؤشر ستوكاستك
+
+    Returns:
+        tuple: (%K الخام، %K المنعّم، %D كمتوسط لـ %K المنعّم)
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    highest = rolling_max(highs, k_period)
+    lowest = rolling_min(lows, k_period)
+    spread = highest - lowest
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        raw_k = np.where(spread != 0, 100 * (closes - lowest) / spread, 50.0)
+    raw_k[np.isnan(spread)] = np.nan
+
+    k = _nan_like(raw_k)
+    d = _nan_like(raw_k)
+    start = k_period - 1
+    if raw_k.shape[-1] > start:
+        k[..., start:] = rolling_mean(raw_k[..., start:], smooth_k)
+    k_start = start + smooth_k - 1
+    if raw_k.shape[-1] > k_start:
+        d[..., k_start:] = rolling_mean(k[..., k_start:], smooth_d)
+    return raw_k, k, d
+
+
+def adx(highs, lows, closes, period=14):
+    """
+    مؤشر متوسط الاتجاه (ADX) بتنعيم Wilder للمجاميع
+
+    Returns:
+        tuple: (ADX، +DI، -DI) كسلاسل بطول الشموع (NaN قبل الشمعة period)
+    """
+    highs = np.asarray(highs, dtype=np.float64)
+    lows = np.asarray(lows, dtype=np.float64)
+    closes = np.asarray(closes, dtype=np.float64)
+    adx_values = _nan_like(closes)
+    plus_di = _nan_like(closes)
+    minus_di = _nan_like(closes)
+    if closes.shape[-1] < period + 1:
+        return adx_values, plus_di, minus_di
+
+    prev_close = closes[..., :-1]
+    true_range = np.maximum.reduce([
+        highs[..., 1:] - lows[..., 1:],
+        np.abs(highs[..., 1:] - prev_close),
+        np.abs(lows[..., 1:] - prev_close)
+    ])
+    plus_dm = np.maximum(highs[..., 1:] - highs[..., :-1], 0.0)
+    minus_dm = np.maximum(lows[..., :-1] - lows[..., 1:], 0.0)
+    plus_wins = plus_dm > minus_dm
+    minus_wins = minus_dm > plus_dm
+    plus_dm = np.where(minus_wins, 0.0, plus_dm)
+    minus_dm = np.where(plus_wins, 0.0, minus_dm)
+
+    def wilder_sum(series):
+        seed = series[..., :period].sum(axis=-1)
+        rest = linear_recursion(series[..., period:], 1 - 1 / period, seed)
+        return np.concatenate([seed[..., None], rest], axis=-1)
+
+    tr_sum = wilder_sum(true_range)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus = np.where(tr_sum > 0, 100 * wilder_sum(plus_dm) / tr_sum, 0.0)
+        minus = np.where(tr_sum > 0, 100 * wilder_sum(minus_dm) / tr_sum, 0.0)
+        di_sum = plus + minus
+        dx = np.where(di_sum > 0, 100 * np.abs(plus - minus) / di_sum, 0.0)
+
+    smoothed = np.concatenate([
+        dx[..., :1],
+        linear_recursion(dx[..., 1:] / period, (period - 1) / period, dx[..., 0])
+    ], axis=-1)
+
+    adx_values[..., period:] = smoothed
+    plus_di[..., period:] = plus
+    minus_di[..., period:] = minus
+    return adx_values, plus_di, minus_di
+
+
+def linear_regression(values):
+    """
+    انحدار خطي بسيط لكل سلسلة على مؤشرها الزمني 0..n-1
+
+    Returns:
+        tuple: (الميل، التقاطع، معامل التحديد R^2)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    count = values.shape[-1]
+    x = np.arange(count, dtype=np.float64)
+    x_centered = x - x.mean()
+    y_mean = values.mean(axis=-1)
+    y_centered = values - y_mean[..., None]
+
+    denominator = (x_centered * x_centered).sum()
+    if denominator:
+        slope = (y_centered * x_centered).sum(axis=-1) / denominator
+    else:
+        slope = np.zeros_like(y_mean)
+    intercept = y_mean - slope * x.mean()
+
+    residuals = y_centered - np.asarray(slope)[..., None] * x_centered
+    sse = (residuals * residuals).sum(axis=-1)
+    sst = (y_centered * y_centered).sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r_squared = np.where(sst != 0, 1 - sse / sst, 0.0)
+    return slope, intercept, r_squared
+
+
+def range_volatility(highs, lows, closes, lookback=20):
+    """
+    مؤشر التذبذب المركب المستخدم في محللات حالة السوق والثقة والفلترة:
+    متوسط (نطاق الشمعة / الإغلاق) ومعامل الاختلاف لأسعار الإغلاق كنسب مئوية لآخر lookback شمعة
+
+    Returns:
+        float: نسبة التذبذب (أو مصفوفة عند تمرير عدة أزواج)
+    """
+    highs = np.asarray(highs, dtype=np.float64)[..., -lookback:]
+    lows = np.asarray(lows, dtype=np.float64)[..., -lookback:]
+    closes = np.asarray(closes, dtype=np.float64)[..., -lookback:]
+
+    avg_height = ((highs - lows) / closes * 100).mean(axis=-1)
+    mean_price = closes.mean(axis=-1)
+    cv = closes.std(axis=-1) / mean_price * 100
+    return (avg_height + cv) / 2
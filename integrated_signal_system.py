@@ -8,7 +8,8 @@ import random
 import time
 from datetime import datetime, timedelta
 
-from technical_analyzer import TechnicalAnalyzer
+from technical_analyzer import technical_analyzer
+from pair_scorer import select_pairs
 from multi_timeframe_analyzer import validate_signal, get_trading_recommendation
 from signal_filter import get_high_quality_signal, generate_safe_signal
 from confidence_evaluator import enhance_signal_with_confidence
@@ -16,6 +17,7 @@ from advanced_signal_generator import get_premium_signal
 from market_condition_analyzer import analyze_market_condition, should_stop_trading, get_market_warning_message
 from pocket_option_otc_pairs import get_all_valid_pairs, is_valid_pair, MIN_ACCEPTABLE_PAYOUT as OTC_MIN_ACCEPTABLE_PAYOUT
 from market_pairs import MIN_ACCEPTABLE_PAYOUT as MARKET_MIN_ACCEPTABLE_PAYOUT
+from latency_tracer import span, traced
 
 # إعداد سجل الأحداث
 logging.basicConfig(level=logging.INFO)
@@ -27,7 +29,7 @@ class IntegratedSignalSystem:
     def __init__(self):
         """تهيئة نظام الإشارات المتكامل"""
         # استخدام كافة أنظمة التحليل والتوليد المتاحة
-        self.technical_analyzer = TechnicalAnalyzer()
+        self.technical_analyzer = technical_analyzer
         
         # إعدادات النظام
         self.signal_interval_minutes = 6  # الفاصل الزمني بين الإشارات
@@ -39,6 +41,7 @@ class IntegratedSignalSystem:
         self.last_signal_time = None
         self.last_signal_quality = 0
     
+    @traced('integrated.generate_signal')
     def generate_signal(self, force_generation=False):
         """
         إنشاء إشارة جديدة باستخدام كافة الأنظمة المتقدمة
@@ -54,7 +57,8 @@ class IntegratedSignalSystem:
         
         # جلب الأزواج من البورصة العادية
         from market_pairs import get_tradable_pairs_with_good_payout as get_market_tradable_pairs
-        market_pairs = get_market_tradable_pairs()
+        with span('integrated.pair_listing'):
+            market_pairs = get_market_tradable_pairs()
         
         # طباعة السجلات للتحقق
         logger.info(f"عدد أزواج البورصة العادية المتاحة: {len(market_pairs)}")
@@ -66,11 +70,8 @@ class IntegratedSignalSystem:
             use_market_pairs = True  # نحاول أزواج البورصة العادية أولاً
             
             if use_market_pairs:
-                # لزيادة العشوائية، نخلط قائمة الأزواج قبل الاختيار
-                random.shuffle(market_pairs)
-                
-                # اختيار حتى 3 أزواج بشكل عشوائي ومحاولة إنشاء إشارة لكل منها حتى ننجح
-                selected_pairs = market_pairs[:min(3, len(market_pairs))]
+                # تقييم جميع الأزواج في تمريرة مصفوفية واحدة واختيار أفضل 3 مرشحين
+                selected_pairs = self._select_candidate_pairs(market_pairs)
                 logger.info(f"سيتم محاولة إنشاء إشارة لهذه الأزواج: {', '.join(selected_pairs)}")
                 
                 for selected_pair in selected_pairs:
@@ -85,7 +86,8 @@ class IntegratedSignalSystem:
                         continue
                     
                     # محاولة إنشاء إشارة لهذا الزوج
-                    signal = get_premium_signal(pair_symbol=selected_pair, force_generation=force_generation)
+                    with span('integrated.premium_signal'):
+                        signal = get_premium_signal(pair_symbol=selected_pair, force_generation=force_generation)
                     if signal:
                         logger.info(f"تم إنشاء إشارة ناجحة لزوج البورصة العادية: {selected_pair} (العائد: {payout}%)")
                         return self._adjust_entry_time(signal)
@@ -102,17 +104,15 @@ class IntegratedSignalSystem:
         # جلب أزواج OTC المتاحة للتداول
         try:
             from pocket_option_otc_pairs import get_tradable_pairs_with_good_payout as get_otc_tradable_pairs
-            otc_pairs = get_otc_tradable_pairs()
+            with span('integrated.pair_listing'):
+                otc_pairs = get_otc_tradable_pairs()
             
             logger.info(f"عدد أزواج OTC المتاحة: {len(otc_pairs)}")
             if otc_pairs:
                 logger.info(f"أزواج OTC المتاحة: {', '.join(otc_pairs[:10])}...")
                 
-                # لزيادة العشوائية، نخلط قائمة الأزواج قبل الاختيار
-                random.shuffle(otc_pairs)
-                
-                # اختيار حتى 3 أزواج بشكل عشوائي ومحاولة إنشاء إشارة لكل منها حتى ننجح
-                selected_pairs = otc_pairs[:min(3, len(otc_pairs))]
+                # تقييم جميع أزواج OTC في تمريرة مصفوفية واحدة واختيار أفضل 3 مرشحين
+                selected_pairs = self._select_candidate_pairs(otc_pairs)
                 logger.info(f"سيتم محاولة إنشاء إشارة لهذه الأزواج OTC: {', '.join(selected_pairs)}")
                 
                 for selected_pair in selected_pairs:
@@ -127,7 +127,8 @@ class IntegratedSignalSystem:
                         continue
                     
                     # محاولة إنشاء إشارة لهذا الزوج
-                    signal = get_premium_signal(pair_symbol=selected_pair, force_generation=force_generation)
+                    with span('integrated.premium_signal'):
+                        signal = get_premium_signal(pair_symbol=selected_pair, force_generation=force_generation)
                     if signal:
                         # إضافة علامة تمييز أن هذه إشارة OTC
                         signal['is_otc'] = True
@@ -188,6 +189,24 @@ class IntegratedSignalSystem:
         
         return signal
     
+    @traced('integrated.pair_ranking')
+    def _select_candidate_pairs(self, pairs, count=3):
+        """
+        اختيار أفضل الأزواج المرشحة لإنشاء إشارة
+        
+        Args:
+            pairs (list): الأزواج المتاحة للتداول
+            count (int): عدد المرشحين المطلوب
+            
+        Returns:
+            list: رموز الأزواج مرتبة من الأفضل
+        """
+        # لزيادة العشوائية بين المرشحين المتساويين، نخلط قائمة الأزواج قبل التقييم
+        pairs = list(pairs)
+        random.shuffle(pairs)
+        
+        return select_pairs(pairs, count)
+    
     def _adjust_entry_time(self, signal):
         """
         تعديل وقت الدخول ليكون بعد الوقت الحالي بفاصل زمني مناسب
@@ -207,9 +226,7 @@ class IntegratedSignalSystem:
             # الحصول على السعر الحالي
             current_price = 0
             try:
-                from technical_analyzer import TechnicalAnalyzer
-                analyzer = TechnicalAnalyzer()
-                current_price = analyzer.get_current_price(pair)
+                current_price = self.technical_analyzer.get_current_price(pair)
             except Exception as e:
                 logger.warning(f"لم نتمكن من الحصول على السعر الحالي للزوج {pair}: {e}")
             
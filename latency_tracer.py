@@ -0,0 +1,209 @@
+"""
+تتبع زمن مراحل توليد الإشارات
+يسجل مدة كل مرحلة (قفل قاعدة البيانات، اختيار الزوج، فحص التوافر، التحليل، الفلترة، الإرسال)
+في مخازن حلقية محدودة الحجم لكل مرحلة، ويحسب النسب المئوية p50/p95/p99 عند الطلب فقط.
+تكلفة التسجيل ثابتة (قراءتان للساعة وكتابة في مصفوفة) لتبقى مفعلة في بيئة الإنتاج
+"""
+
+import functools
+import logging
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from config import LATENCY_TRACE_CAPACITY, LATENCY_TRACING_ENABLED
+
+logger = logging.getLogger(__name__)
+
+# النسب المئوية المعروضة لكل مرحلة
+PERCENTILES = (50, 95, 99)
+
+
+class _StageBuffer:
+    """مخزن حلقي لمدد مرحلة واحدة بالمللي ثانية"""
+
+    __slots__ = ('durations', 'count', 'total', 'max')
+
+    def __init__(self, capacity):
+        self.durations = np.zeros(capacity, dtype=np.float64)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, milliseconds):
+        self.durations[self.count % len(self.durations)] = milliseconds
+        self.count += 1
+        self.total += milliseconds
+        if milliseconds > self.max:
+            self.max = milliseconds
+
+    def samples(self):
+        return self.durations[:min(self.count, len(self.durations))]
+
+
+class _Span:
+    """مقياس زمن لمرحلة واحدة يُستخدم مع with"""
+
+    __slots__ = ('tracer', 'stage', 'started')
+
+    def __init__(self, tracer, stage):
+        self.tracer = tracer
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.tracer.record(self.stage, time.perf_counter() - self.started, failed=exc_type is not None)
+        return False
+
+
+class _DisabledSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_DISABLED_SPAN = _DisabledSpan()
+
+
+class LatencyTracer:
+    """
+    سجل أزمنة المراحل
+
+    كل مرحلة تحتفظ بآخر capacity قياس؛ وآخر capacity قياس من جميع المراحل محفوظة مع وقت
+    انتهائها لمعرفة المرحلة التي أخرت إشارة معينة.
+    """
+
+    def __init__(self, capacity=LATENCY_TRACE_CAPACITY, enabled=LATENCY_TRACING_ENABLED):
+        """
+        Args:
+            capacity (int): عدد القياسات المحفوظة لكل مرحلة
+            enabled (bool): تفعيل التسجيل
+        """
+        self.capacity = capacity
+        self.enabled = enabled
+        self._stages = {}
+        self._errors = {}
+        self._recent = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds, failed=False):
+        """
+        تسجيل مدة مرحلة
+
+        Args:
+            stage (str): اسم المرحلة (مثل 'generation.pair_selection')
+            seconds (float): المدة بالثواني
+            failed (bool): انتهت المرحلة باستثناء
+        """
+        milliseconds = seconds * 1000.0
+        with self._lock:
+            buffer = self._stages.get(stage)
+            if buffer is None:
+                buffer = self._stages[stage] = _StageBuffer(self.capacity)
+            buffer.record(milliseconds)
+            if failed:
+                self._errors[stage] = self._errors.get(stage, 0) + 1
+            self._recent.append((time.time(), stage, milliseconds))
+
+    def span(self, stage):
+        """
+        قياس زمن كتلة كود
+
+        Args:
+            stage (str): اسم المرحلة
+
+        Returns:
+            مدير سياق يسجل المدة عند الخروج
+        """
+        if not self.enabled:
+            return _DISABLED_SPAN
+        return _Span(self, stage)
+
+    def traced(self, stage):
+        """
+        مزخرف يقيس زمن كل استدعاء لدالة
+
+        Args:
+            stage (str): اسم المرحلة
+        """
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with _Span(self, stage):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def summary(self):
+        """
+        ملخص أزمنة جميع المراحل
+
+        Returns:
+            dict: {المرحلة: {count, errors, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}
+        """
+        with self._lock:
+            snapshot = {stage: (buffer.samples().copy(), buffer.count, buffer.total, buffer.max)
+                        for stage, buffer in self._stages.items()}
+            errors = dict(self._errors)
+
+        result = {}
+        for stage, (samples, count, total, maximum) in sorted(snapshot.items()):
+            values = np.percentile(samples, PERCENTILES) if len(samples) else [0.0] * len(PERCENTILES)
+            entry = {'count': count, 'errors': errors.get(stage, 0), 'mean_ms': round(total / count, 3) if count else 0.0}
+            for percentile, value in zip(PERCENTILES, values):
+                entry[f'p{percentile}_ms'] = round(float(value), 3)
+            entry['max_ms'] = round(maximum, 3)
+            result[stage] = entry
+        return result
+
+    def recent(self, limit=50):
+        """
+        آخر القياسات من جميع المراحل
+
+        Args:
+            limit (int): عدد القياسات
+
+        Returns:
+            list: قواميس {time, stage, ms} من الأحدث إلى الأقدم
+        """
+        with self._lock:
+            spans = list(self._recent)[-limit:]
+        return [{'time': timestamp, 'stage': stage, 'ms': round(milliseconds, 3)}
+                for timestamp, stage, milliseconds in reversed(spans)]
+
+    def reset(self):
+        """حذف جميع القياسات"""
+        with self._lock:
+            self._stages.clear()
+            self._errors.clear()
+            self._recent.clear()
+
+
+# السجل المشترك على مستوى العملية
+latency_tracer = LatencyTracer()
+
+
+def span(stage):
+    """قياس زمن كتلة كود في السجل المشترك"""
+    return latency_tracer.span(stage)
+
+
+def traced(stage):
+    """مزخرف لقياس زمن دالة في السجل المشترك"""
+    return latency_tracer.traced(stage)
+
+
+def get_latency_summary():
+    """ملخص أزمنة المراحل في السجل المشترك"""
+    return latency_tracer.summary()
@@ -5,11 +5,18 @@
 """
 import logging
 import math
-import random
 import time
 from datetime import datetime, timedelta
 
-from technical_analyzer import TechnicalAnalyzer
+import numpy as np
+
+from config import (MARKET_CONDITION_AGGREGATE_TTL_SECONDS, MARKET_CONDITION_CACHE_MAX_PAIRS,
+                    MARKET_CONDITION_CACHE_TTL_SECONDS)
+from technical_analyzer import technical_analyzer
+from candle_store import get_candles
+from analysis_context import get_analysis
+from indicators import candle_columns, linear_regression, range_volatility
+from ttl_cache import TTLCache
 # استيراد دوال أزواج OTC وأزواج البورصة العادية
 from pocket_option_otc_pairs import get_all_valid_pairs as get_otc_pairs, is_valid_pair as is_valid_otc_pair
 from market_pairs import get_all_valid_pairs as get_market_pairs, is_valid_pair as is_valid_market_pair
@@ -18,12 +25,16 @@ from market_pairs import get_all_valid_pairs as get_market_pairs, is_valid_pair
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# أقل عدد شموع لتحليل حالة زوج، وعدد الشموع الذي تحتاجه جميع المؤشرات (فترة الاتجاه)
+MIN_CONDITION_CANDLES = 20
+CONDITION_WINDOW = 30
+
 class MarketConditionAnalyzer:
     """محلل حالة السوق لتحديد مدى ملاءمتها للتداول"""
     
     def __init__(self):
         """تهيئة محلل حالة السوق"""
-        self.technical_analyzer = TechnicalAnalyzer()
+        self.technical_analyzer = technical_analyzer
         
         # عتبات تقييم السوق
         self.volatility_thresholds = {
@@ -50,10 +61,12 @@ class MarketConditionAnalyzer:
             'price_manipulation': False     # تلاعب بالأسعار
         }
         
-        # تاريخ آخر تحليل وتحذير
-        self.last_analysis_time = None
+        # نتائج التحليل المحفوظة: لكل زوج على حدة، وللسوق عموماً (نتيجة واحدة)
+        self.pair_cache = TTLCache(MARKET_CONDITION_CACHE_TTL_SECONDS, MARKET_CONDITION_CACHE_MAX_PAIRS)
+        self.general_cache = TTLCache(MARKET_CONDITION_AGGREGATE_TTL_SECONDS, 1)
+        
+        # تاريخ آخر تحذير
         self.last_warning_time = None
-        self.analysis_interval_minutes = 15  # تحليل كل 15 دقيقة
         self.warning_interval_minutes = 60   # تحذير كل ساعة على الأكثر
     
     def analyze_market_condition(self, pair_symbol=None):
@@ -66,62 +79,52 @@ class MarketConditionAnalyzer:
         Returns:
             dict: معلومات حالة السوق
         """
-        # التحقق من وقت آخر تحليل
-        current_time = datetime.now()
+        # التحقق مما إذا كان الزوج المحدد صالحًا (سواء كان زوج OTC أو زوج بورصة عادية)
+        if pair_symbol and not (is_valid_otc_pair(pair_symbol) or is_valid_market_pair(pair_symbol)):
+            logger.warning(f"زوج غير صالح: {pair_symbol}, سيتم استخدام حالة السوق العامة بدلاً منه")
+            pair_symbol = None
         
-        if self.last_analysis_time:
-            time_since_last = (current_time - self.last_analysis_time).total_seconds() / 60
-            if time_since_last < self.analysis_interval_minutes:
-                logger.info(f"Using cached market analysis (updated {time_since_last:.1f} minutes ago)")
-                # إعادة المعلومات المخزنة مسبقاً
-                return self._get_cached_analysis()
+        # كل زوج له نتيجة محفوظة خاصة به، والحالة العامة محسوبة مرة واحدة لكل فترة
+        if pair_symbol:
+            return self.pair_cache.get_or_compute(pair_symbol, lambda: self._analyze_pair_market(pair_symbol))
+        return self.general_cache.get_or_compute('general', self._analyze_general_market)
+    
+    def _analyze_pair_market(self, pair):
+        """
+        تحليل حالة السوق لزوج واحد
         
-        # تحديث وقت آخر تحليل
-        self.last_analysis_time = current_time
+        Args:
+            pair (str): رمز الزوج
+            
+        Returns:
+            dict: معلومات حالة السوق
+        """
+        logger.info(f"Analyzing market conditions for {pair}")
+        pair_condition = self._analyze_single_pair(pair)
+        return self._summarize_market({pair: pair_condition} if pair_condition else {})
+    
+    def _analyze_general_market(self):
+        """
+        تحليل حالة السوق العامة من جميع الأزواج (أزواج البورصة العادية ثم أزواج OTC)
         
-        logger.info(f"Analyzing market conditions for {pair_symbol or 'general market'}")
+        Returns:
+            dict: معلومات حالة السوق
+        """
+        pairs = list(dict.fromkeys(get_market_pairs() + get_otc_pairs()))
+        logger.info(f"Analyzing general market conditions across {len(pairs)} pairs")
+        return self._summarize_market(self._analyze_pairs_batch(pairs))
+    
+    def _summarize_market(self, pairs_analysis):
+        """
+        تجميع حالات الأزواج في حالة السوق الإجمالية
         
-        # اختيار الأزواج للتحليل (مع دعم كل من أزواج OTC وأزواج البورصة العادية)
-        if pair_symbol:
-            # التحقق مما إذا كان الزوج المحدد صالحًا (سواء كان زوج OTC أو زوج بورصة عادية)
-            if is_valid_otc_pair(pair_symbol) or is_valid_market_pair(pair_symbol):
-                pairs_to_analyze = [pair_symbol]
-            else:
-                logger.warning(f"زوج غير صالح: {pair_symbol}, سيتم اختيار أزواج عشوائية بدلاً منه")
-                pairs_to_analyze = []
-        else:
-            # إذا لم يتم تحديد زوج، نختار عينة عشوائية من كلا النوعين
-            pairs_to_analyze = []
-        
-        # إذا كان قائمة الأزواج للتحليل فارغة، نحصل على أزواج من كلا النوعين
-        if not pairs_to_analyze:
-            # الحصول على أزواج OTC وأزواج البورصة العادية
-            otc_pairs = get_otc_pairs()
-            market_pairs = get_market_pairs()
-            
-            # دمج القائمتين مع تفضيل أزواج البورصة العادية (70%)
-            combined_pairs = []
-            
-            # تحديد عدد الأزواج من كل نوع بناءً على التفضيل
-            # نريد 5 أزواج في المجموع، 70% منها من البورصة العادية
-            market_count = min(4, len(market_pairs))  # 70% من 5 تقريبًا 4
-            otc_count = min(5 - market_count, len(otc_pairs))
-            
-            # إضافة أزواج البورصة العادية
-            if market_pairs:
-                combined_pairs.extend(random.sample(market_pairs, market_count))
-            
-            # إضافة أزواج OTC
-            if otc_pairs:
-                combined_pairs.extend(random.sample(otc_pairs, otc_count))
-            
-            logger.info(f"تم اختيار {len(combined_pairs)} أزواج للتحليل ({market_count} من البورصة العادية, {otc_count} من OTC)")
+        Args:
+            pairs_analysis (dict): معلومات حالة كل زوج
             
-            # تخزين الأزواج المختارة
-            pairs_to_analyze = combined_pairs
-        
-        # جمع نتائج التحليل لكل زوج
-        pairs_analysis = {}
+        Returns:
+            dict: معلومات حالة السوق
+        """
+        current_time = datetime.now()
         overall_volatility = 0
         overall_difficulty = 0
         overall_trend_clarity = 0
@@ -132,27 +135,23 @@ class MarketConditionAnalyzer:
         for factor in self.critical_factors:
             self.critical_factors[factor] = False
         
-        for pair in pairs_to_analyze:
-            pair_condition = self._analyze_single_pair(pair)
-            if pair_condition:
-                pairs_analysis[pair] = pair_condition
-                
-                # تجميع البيانات للتقييم الشامل
-                overall_volatility += pair_condition.get('volatility', 0)
-                overall_difficulty += pair_condition.get('trading_difficulty', 0)
-                overall_trend_clarity += pair_condition.get('trend_clarity', 0)
-                overall_pattern_quality += pair_condition.get('pattern_quality', 0)
-                valid_pairs_count += 1
-                
-                # التحقق من العوامل الحرجة
-                if pair_condition.get('volatility', 0) > self.volatility_thresholds['extreme_high']:
-                    self.critical_factors['extreme_volatility'] = True
-                if pair_condition.get('abnormal_pattern', False):
-                    self.critical_factors['abnormal_patterns'] = True
-                if pair_condition.get('low_liquidity', False):
-                    self.critical_factors['liquidity_issues'] = True
-                if pair_condition.get('price_manipulation', False):
-                    self.critical_factors['price_manipulation'] = True
+        for pair_condition in pairs_analysis.values():
+            # تجميع البيانات للتقييم الشامل
+            overall_volatility += pair_condition.get('volatility', 0)
+            overall_difficulty += pair_condition.get('trading_difficulty', 0)
+            overall_trend_clarity += pair_condition.get('trend_clarity', 0)
+            overall_pattern_quality += pair_condition.get('pattern_quality', 0)
+            valid_pairs_count += 1
+            
+            # التحقق من العوامل الحرجة
+            if pair_condition.get('volatility', 0) > self.volatility_thresholds['extreme_high']:
+                self.critical_factors['extreme_volatility'] = True
+            if pair_condition.get('abnormal_pattern', False):
+                self.critical_factors['abnormal_patterns'] = True
+            if pair_condition.get('low_liquidity', False):
+                self.critical_factors['liquidity_issues'] = True
+            if pair_condition.get('price_manipulation', False):
+                self.critical_factors['price_manipulation'] = True
         
         # حساب المتوسطات
         if valid_pairs_count > 0:
@@ -179,7 +178,7 @@ class MarketConditionAnalyzer:
         should_warn = not is_suitable and self._should_send_warning(current_time)
         
         # تجميع النتائج النهائية
-        result = {
+        return {
             'timestamp': current_time.strftime('%Y-%m-%d %H:%M:%S'),
             'market_status': market_status,
             'pairs_analysis': pairs_analysis,
@@ -187,11 +186,6 @@ class MarketConditionAnalyzer:
             'should_send_warning': should_warn,
             'warning_message': self._generate_warning_message(market_status) if should_warn else None
         }
-        
-        # تخزين النتائج للاستخدام اللاحق
-        self._cache_analysis(result)
-        
-        return result
     
     def _analyze_single_pair(self, pair):
         """
@@ -204,16 +198,28 @@ class MarketConditionAnalyzer:
             dict: معلومات حالة الزوج
         """
         # الحصول على بيانات السوق
-        market_data = self.technical_analyzer.price_data.get(pair, {})
-        if not market_data or 'candles' not in market_data or len(market_data['candles']) < 20:
+        candles = get_candles(pair)
+        if len(candles) < MIN_CONDITION_CANDLES:
             # لا توجد بيانات كافية للتحليل
             logger.warning(f"Insufficient data for pair {pair}")
             return None
         
-        candles = market_data['candles']
+        # الحالة محسوبة مرة واحدة لكل شمعة جديدة
+        return get_analysis(pair, candles, ('market_condition',), lambda: self._analyze_candles(pair, candles))
+    
+    def _analyze_candles(self, pair, candles):
+        """
+        حساب مؤشرات حالة زوج من شموعه
         
+        Args:
+            pair (str): رمز الزوج
+            candles: بيانات الشموع
+            
+        Returns:
+            dict: معلومات حالة الزوج
+        """
         # حساب مؤشرات حالة السوق
-        volatility = self._calculate_volatility(candles)
+        volatility = get_analysis(pair, candles, ('volatility', 20), lambda: self._calculate_volatility(candles))
         liquidity = self._estimate_liquidity(candles)
         trend = self._analyze_trend(candles)
         pattern_quality = self._analyze_patterns(candles)
@@ -237,6 +243,116 @@ class MarketConditionAnalyzer:
             'low_liquidity': liquidity < 0.5
         }
     
+    def _analyze_pairs_batch(self, pairs):
+        """
+        تحليل حالة عدة أزواج دفعة واحدة بمصفوفة نوافذ الشموع
+        
+        Args:
+            pairs (list): رموز الأزواج
+            
+        Returns:
+            dict: معلومات حالة كل زوج لديه شموع كافية (بترتيب الأزواج)
+        """
+        windows = {pair: get_candles(pair, CONDITION_WINDOW) for pair in pairs}
+        full = [pair for pair, view in windows.items() if len(view) >= CONDITION_WINDOW]
+        
+        batch_conditions = {}
+        if full:
+            batch = np.stack([windows[pair].array for pair in full])
+            batch_conditions = dict(zip(full, self._batch_conditions(batch)))
+        
+        pairs_analysis = {}
+        for pair, view in windows.items():
+            if pair in batch_conditions:
+                pairs_analysis[pair] = batch_conditions[pair]
+            elif len(view) >= MIN_CONDITION_CANDLES:
+                # تاريخ أقصر من فترة الاتجاه: المسار الفردي يطبق القيم الافتراضية
+                pairs_analysis[pair] = self._analyze_single_pair(pair)
+        
+        skipped = len(pairs) - len(pairs_analysis)
+        if skipped:
+            logger.info(f"Skipping {skipped} pairs with fewer than {MIN_CONDITION_CANDLES} candles")
+        return pairs_analysis
+    
+    def _batch_conditions(self, batch):
+        """
+        حساب مؤشرات حالة عدة أزواج بنفس قواعد التحليل الفردي
+        
+        Args:
+            batch: مصفوفة الشموع بالشكل (P, 5, CONDITION_WINDOW)
+            
+        Returns:
+            list: معلومات حالة كل زوج (بنفس حقول _analyze_candles)
+        """
+        opens, highs, lows, closes = batch[:, 0], batch[:, 1], batch[:, 2], batch[:, 3]
+        
+        # التذبذب (_calculate_volatility)
+        volatility = range_volatility(highs, lows, closes, 20)
+        
+        # السيولة (_estimate_liquidity) من آخر 20 شمعة
+        recent = closes[:, -20:]
+        avg_price_change = (np.abs(np.diff(recent, axis=1)) / recent[:, :-1] * 100).mean(axis=1)
+        avg_range = ((highs[:, -20:] - lows[:, -20:]) / recent * 100).mean(axis=1)
+        liquidity = np.select(
+            [(avg_price_change < 0.01) | (avg_range < 0.02),
+             (avg_price_change > 0.5) & (avg_range > 1.0),
+             (avg_price_change >= 0.05) & (avg_price_change <= 0.2) & (avg_range >= 0.1) & (avg_range <= 0.5)],
+            [0.3, 0.5, 1.5], 1.0)
+        
+        # الاتجاه ووضوحه (_analyze_trend) من آخر 30 شمعة
+        slope, _, r_squared = linear_regression(closes[:, -30:])
+        direction = np.select([slope > 0.0005, slope < -0.0005], ['UP', 'DOWN'], 'SIDEWAYS')
+        clarity = np.where(direction == 'SIDEWAYS', 20,
+                           np.clip(np.trunc(r_squared * 70 + np.abs(slope) * 10000 * 30), 0, 100)).astype(int)
+        
+        # الأنماط غير الطبيعية (_detect_abnormal_patterns) في آخر 10 شموع
+        last = closes[:, -10:]
+        changes = np.abs(np.diff(last, axis=1)) / last[:, :-1] * 100
+        large = (changes[:, 1:] > 0.5) & (changes[:, :-1] > 0.5)
+        before, middle, after = last[:, :-2], last[:, 1:-1], last[:, 2:]
+        reversal = ((after > middle) & (middle < before)) | ((after < middle) & (middle > before))
+        abnormal = ((changes > 2.0).sum(axis=1) >= 2) | ((large & reversal).sum(axis=1) >= 3)
+        
+        # التلاعب بالأسعار (_detect_price_manipulation): الظلال الطويلة في آخر 15 شمعة
+        o, h, l, c = opens[:, -15:], highs[:, -15:], lows[:, -15:], closes[:, -15:]
+        body = np.abs(o - c)
+        upper = h - np.maximum(o, c)
+        lower = np.minimum(o, c) - l
+        long_shadows = (body > 0) & ((upper > 5 * body) | (lower > 5 * body))
+        manipulation = long_shadows.sum(axis=1) >= 3
+        
+        # جودة الأنماط ثابتة كما في _analyze_patterns
+        pattern_quality = 50
+        
+        # صعوبة التداول (_calculate_trading_difficulty)
+        thresholds, difficulty_levels = self.volatility_thresholds, self.market_difficulty
+        base = np.select(
+            [volatility > thresholds['extreme_high'], volatility > thresholds['high'],
+             volatility > thresholds['normal'], volatility < thresholds['low']],
+            [difficulty_levels['extreme'], difficulty_levels['high'],
+             difficulty_levels['moderate'], difficulty_levels['moderate']],
+            difficulty_levels['normal'])
+        difficulty = (base
+                      + np.select([liquidity < 0.5, liquidity > 1.5], [15, -10], 0)
+                      + np.select([clarity > 80, clarity < 30], [-15, 10], 0)
+                      + 20 * abnormal + 30 * manipulation)
+        difficulty = np.clip(difficulty, 0, 100)
+        
+        logger.info(f"  - Batch conditions for {len(batch)} pairs: "
+                    f"avg volatility {volatility.mean():.2f}%, avg difficulty {difficulty.mean():.1f}/100")
+        
+        return [{
+            'volatility': float(volatility[k]),
+            'liquidity': float(liquidity[k]),
+            'trend': str(direction[k]),
+            'trend_clarity': int(clarity[k]),
+            'pattern_quality': pattern_quality,
+            'trading_difficulty': int(difficulty[k]),
+            'abnormal_pattern': bool(abnormal[k]),
+            'price_manipulation': bool(manipulation[k]),
+            'low_liquidity': bool(liquidity[k] < 0.5)
+        } for k in range(len(batch))]
+    
     def _calculate_volatility(self, candles, lookback=20):
         """
         حساب مؤشر التذبذب للسوق
@@ -251,24 +367,10 @@ class MarketConditionAnalyzer:
         if len(candles) < lookback:
             return 1.0  # قيمة افتراضية معتدلة
         
-        # استخدام آخر N شمعة
-        recent_candles = candles[-lookback:]
-        
-        # حساب متوسط حجم الشموع
-        heights = [(c['high'] - c['low']) / c['close'] * 100 for c in recent_candles]
-        avg_height = sum(heights) / len(heights)
-        
-        # حساب الانحراف المعياري للأسعار
-        closes = [c['close'] for c in recent_candles]
-        mean_price = sum(closes) / len(closes)
-        variance = sum([(p - mean_price) ** 2 for p in closes]) / len(closes)
-        std_dev = math.sqrt(variance)
+        _, highs, lows, closes = candle_columns(candles)
         
-        # حساب معامل الاختلاف (CV) كمقياس للتذبذب
-        cv = (std_dev / mean_price) * 100
-        
-        # مؤشر التذبذب المركب
-        volatility = (avg_height + cv) / 2
+        # مؤشر التذبذب المركب: متوسط حجم الشموع ومعامل الاختلاف لأسعار الإغلاق
+        volatility = float(range_volatility(highs, lows, closes, lookback))
         
         logger.info(f"  - Volatility: {volatility:.2f}%")
         
@@ -339,26 +441,10 @@ class MarketConditionAnalyzer:
         if len(candles) < lookback:
             return {'direction': 'UNKNOWN', 'clarity': 50}
         
-        # استخدام آخر N شمعة
-        recent_candles = candles[-lookback:]
+        _, _, _, closes = candle_columns(candles)
         
-        # حساب خط الاتجاه باستخدام الانحدار الخطي
-        closes = [c['close'] for c in recent_candles]
-        x = list(range(len(closes)))
-        
-        # حساب معاملات الانحدار a و b في المعادلة y = a + bx
-        n = len(x)
-        sum_x = sum(x)
-        sum_y = sum(closes)
-        sum_xx = sum(xi*xi for xi in x)
-        sum_xy = sum(xi*yi for xi, yi in zip(x, closes))
-        
-        # تجنب القسمة على صفر
-        if n * sum_xx - sum_x * sum_x == 0:
-            slope = 0
-        else:
-            # حساب الميل b
-            slope = (n * sum_xy - sum_x * sum_y) / (n * sum_xx - sum_x * sum_x)
+        # حساب خط الاتجاه ومعامل التحديد R^2 باستخدام الانحدار الخطي
+        slope, _, r_squared = linear_regression(closes[-lookback:])
         
         # تحديد الاتجاه
         if slope > 0.0005:
@@ -371,23 +457,6 @@ class MarketConditionAnalyzer:
         # حساب قوة الميل للحصول على وضوح الاتجاه
         slope_strength = abs(slope) * 10000
         
-        # حساب تناسق الاتجاه (مدى توافق حركة السعر مع خط الاتجاه)
-        # حساب المتوسط a
-        a = (sum_y - slope * sum_x) / n
-        
-        # حساب القيم المتوقعة
-        predicted = [a + slope * xi for xi in x]
-        
-        # حساب مجموع مربعات الخطأ
-        sse = sum((actual - pred) ** 2 for actual, pred in zip(closes, predicted))
-        
-        # حساب إجمالي مجموع المربعات
-        mean_y = sum_y / n
-        sst = sum((yi - mean_y) ** 2 for yi in closes)
-        
-        # حساب معامل التحديد R^2
-        r_squared = 1 - (sse / sst) if sst != 0 else 0
-        
         # حساب وضوح الاتجاه (0-100)
         if direction == "SIDEWAYS":
             clarity = 20  # اتجاه غير واضح
@@ -705,30 +774,22 @@ class MarketConditionAnalyzer:
         
         time_since_last = (current_time - self.last_warning_time).total_seconds() / 60
         return time_since_last >= self.warning_interval_minutes
-    
-    def _cache_analysis(self, analysis):
-        """
-        تخزين نتائج التحليل للاستخدام اللاحق
-        
-        Args:
-            analysis (dict): نتائج التحليل
-        """
-        self._cached_analysis = analysis
-    
-    def _get_cached_analysis(self):
-        """
-        الحصول على نتائج التحليل المخزنة
-        
-        Returns:
-            dict: نتائج التحليل المخزنة
-        """
-        if hasattr(self, '_cached_analysis'):
-            return self._cached_analysis
-        return None
 
 # محلل حالة السوق العالمي للاستخدام في جميع أنحاء التطبيق
 market_analyzer = MarketConditionAnalyzer()
 
+def get_market_condition_cache_stats():
+    """
+    إحصائيات ذاكرة حالة السوق
+    
+    Returns:
+        dict: إحصائيات ذاكرة الأزواج وذاكرة الحالة العامة
+    """
+    return {
+        'pairs': market_analyzer.pair_cache.stats(),
+        'general': market_analyzer.general_cache.stats()
+    }
+
 def analyze_market_condition(pair_symbol=None):
     """
     تحليل حالة السوق الحالية
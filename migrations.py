@@ -1,7 +1,8 @@
 """
 ملف الترحيل لتحديث هيكل قاعدة البيانات
 """
-from app import app, db
+from app import app, db, signal_rollups
+from models import ApprovedChannel, ChartAnalysis, Signal
 from sqlalchemy import Column, DateTime
 
 def add_bot_expiration_date_column():
@@ -18,5 +19,25 @@ def add_bot_expiration_date_column():
             db.session.commit()
             print("تم إضافة عمود expiration_date بنجاح")
 
+def add_hot_query_indexes():
+    """إضافة الفهارس المركبة المعرفة في النماذج إلى الجداول الموجودة (signals و chart_analyses و approved_channels)"""
+    with app.app_context():
+        for model in (Signal, ChartAnalysis, ApprovedChannel):
+            for index in model.__table__.indexes:
+                # checkfirst يتخطى الفهارس الموجودة فيمكن تشغيل الترحيل أكثر من مرة
+                index.create(db.engine, checkfirst=True)
+                print(f"الفهرس {index.name} موجود على جدول {model.__tablename__}")
+
+def build_signal_rollups():
+    """بناء جداول تجميع الإشارات من الإشارات الموجودة إذا لم تُبنَ بعد"""
+    with app.app_context():
+        if not signal_rollups.is_empty(db.session) or Signal.query.first() is None:
+            print("جداول تجميع الإشارات لا تحتاج إلى بناء")
+            return
+        written = signal_rollups.backfill(db.session)
+        print(f"تم بناء جداول تجميع الإشارات: {written}")
+
 if __name__ == "__main__":
-    add_bot_expiration_date_column()
\ No newline at end of file
+    add_bot_expiration_date_column()
+    add_hot_query_indexes()
+    build_signal_rollups()
\ No newline at end of file
@@ -0,0 +1,42 @@
+"""
+فهارس الاستعلامات الأكثر استخداماً في جداول قاعدة البيانات
+معرفة هنا بدون الاعتماد على Flask حتى تستخدمها النماذج (models.py) واختبارات خطط الاستعلامات
+على جداول SQLAlchemy مستقلة بنفس الأسماء والأعمدة
+"""
+
+from sqlalchemy import Index
+
+# (اسم الفهرس، الأعمدة) لكل جدول
+SIGNAL_INDEXES = (
+    # نطاقات created_at والترتيب الأحدث أولاً ومؤشر صفحات الأرشيف (created_at, id)
+    ('ix_signals_created_at_id', ('created_at', 'id')),
+    # آخر إشارة غير مضاعفة: doubling_strategy = false ORDER BY created_at DESC
+    ('ix_signals_doubling_created_at', ('doubling_strategy', 'created_at')),
+    # تصفية الأرشيف والإحصائيات حسب الزوج والاتجاه والنتيجة
+    ('ix_signals_pair_direction_result', ('pair_id', 'direction', 'result', 'created_at')),
+    # الإشارات النشطة (result IS NULL) والنتائج حسب الوقت
+    ('ix_signals_result_created_at', ('result', 'created_at')),
+)
+
+APPROVED_CHANNEL_INDEXES = (
+    # قنوات البوت غير المنتهية: bot_id = ? AND expiration_date > now
+    ('ix_approved_channels_bot_expiration', ('bot_id', 'expiration_date')),
+)
+
+CHART_ANALYSIS_INDEXES = (
+    # سجل تحليلات المستخدم: user_id = ? ORDER BY created_at DESC
+    ('ix_chart_analyses_user_created_at', ('user_id', 'created_at')),
+)
+
+
+def table_indexes(specs):
+    """
+    إنشاء كائنات Index جديدة لجدول واحد (كائن Index يرتبط بجدول واحد فقط)
+
+    Args:
+        specs (tuple): أزواج (اسم الفهرس، الأعمدة)
+
+    Returns:
+        tuple: فهارس صالحة للاستخدام في __table_args__
+    """
+    return tuple(Index(name, *columns) for name, columns in specs)
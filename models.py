@@ -1,8 +1,9 @@
 from app import db
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, Float, ForeignKey, Text
 from sqlalchemy.orm import relationship
 from flask_login import UserMixin
+from model_indexes import table_indexes, SIGNAL_INDEXES, APPROVED_CHANNEL_INDEXES, CHART_ANALYSIS_INDEXES
 
 class Admin(db.Model):
     __tablename__ = 'admins'
@@ -113,6 +114,8 @@ class MarketPair(db.Model):
 
 class Signal(db.Model):
     __tablename__ = 'signals'
+    # فهارس الاستعلامات الأكثر استخداماً (تضاف لقواعد البيانات الموجودة عبر migrations.py)
+    __table_args__ = table_indexes(SIGNAL_INDEXES)
     
     id = Column(Integer, primary_key=True)
     pair_id = Column(Integer, ForeignKey('otc_pairs.id'))
@@ -142,8 +145,39 @@ class Signal(db.Model):
             return None
         return self.result == 'WIN'
 
+# جداول تجميع الإشارات (تُحدَّث مع كل إدراج أو تعديل في signals ضمن نفس المعاملة - signal_rollups.py)
+class SignalDailyStat(db.Model):
+    """عدد الإشارات والرابحة والخاسرة لكل يوم"""
+    __tablename__ = 'signal_daily_stats'
+    
+    day = Column(Date, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    wins = Column(Integer, nullable=False, default=0)
+    losses = Column(Integer, nullable=False, default=0)
+
+class SignalHourlyStat(db.Model):
+    """عدد الإشارات والرابحة والخاسرة لكل ساعة من كل يوم"""
+    __tablename__ = 'signal_hourly_stats'
+    
+    day = Column(Date, primary_key=True)
+    hour = Column(Integer, primary_key=True)  # 0-23 (UTC)
+    total = Column(Integer, nullable=False, default=0)
+    wins = Column(Integer, nullable=False, default=0)
+    losses = Column(Integer, nullable=False, default=0)
+
+class SignalPairStat(db.Model):
+    """عدد الإشارات والرابحة والخاسرة لكل زوج واتجاه"""
+    __tablename__ = 'signal_pair_stats'
+    
+    pair_id = Column(Integer, primary_key=True)  # otc_pairs.id (بدون مفتاح أجنبي حتى لا يمنع حذف الزوج)
+    direction = Column(String(10), primary_key=True)  # BUY or SELL
+    total = Column(Integer, nullable=False, default=0)
+    wins = Column(Integer, nullable=False, default=0)
+    losses = Column(Integer, nullable=False, default=0)
+
 class ApprovedChannel(db.Model):
     __tablename__ = 'approved_channels'
+    __table_args__ = table_indexes(APPROVED_CHANNEL_INDEXES)
     
     id = Column(Integer, primary_key=True)
     channel_id = Column(String(100), unique=True, nullable=False)
@@ -172,6 +206,7 @@ class ApprovedChannel(db.Model):
         
 class ChartAnalysis(db.Model):
     __tablename__ = 'chart_analyses'
+    __table_args__ = table_indexes(CHART_ANALYSIS_INDEXES)
     
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
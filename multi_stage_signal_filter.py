@@ -11,6 +11,8 @@ import numpy as np
 from datetime import datetime, timedelta
 import advanced_otc_analyzer as otc_analyzer
 from advanced_signal_filter import AdvancedSignalFilter, filter_trading_signal
+from latency_tracer import traced
+from filter_pipeline import AdaptiveFilterPipeline, FilterStage
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +36,7 @@ class MultiStageSignalFilter:
         logger.info("تهيئة نظام الفلترة متعدد المراحل")
         self.advanced_filter = AdvancedSignalFilter()
         
+    @traced('filter.multi_stage')
     def filter_signal(self, signal, candles, pair_symbol, additional_analysis=None):
         """
         تصفية الإشارة باستخدام نظام متعدد المراحل
@@ -49,95 +52,144 @@ class MultiStageSignalFilter:
         """
         logger.info(f"بدء تصفية الإشارة لزوج {pair_symbol} عبر النظام متعدد المراحل")
         
-        # تحديد ما إذا كان الزوج من أزواج OTC
-        is_otc = "-OTC" in pair_symbol
-        
-        # المرحلة الأولى: الفلترة التقليدية باستخدام AdvancedSignalFilter
-        basic_accept, basic_quality, basic_reason = self.advanced_filter.filter_signal(signal, candles)
-        
-        if not basic_accept:
-            logger.info(f"تم رفض الإشارة في المرحلة الأولى: {basic_reason}")
-            return False, basic_quality, basic_reason, {"basic_filter": {"accepted": False, "quality": basic_quality, "reason": basic_reason}}
-        
-        logger.info(f"المرحلة الأولى: تم قبول الإشارة بدرجة جودة {basic_quality}")
+        # حالة الفلترة المشتركة بين المراحل (نتائج كل مرحلة تُحفظ فيها لمن يحتاجها لاحقاً)
+        state = {
+            'signal': signal,
+            'candles': candles,
+            'pair_symbol': pair_symbol,
+            'additional_analysis': additional_analysis,
+            'is_otc': "-OTC" in pair_symbol,
+            'direction': signal.get('direction', 'NEUTRAL')
+        }
         
-        # المرحلة الثانية: تحليل متقدم لأزواج OTC
+        # المراحل تعمل بالترتيب الأرخص أولاً بعد الفلتر الأساسي (درجات الرفض في كل المراحل مشتقة منه)
         try:
-            if not additional_analysis:
-                # إجراء تحليل الأزواج OTC المتقدم
-                otc_analysis = otc_analyzer.analyze_otc_pair(candles, pair_symbol)
-            else:
-                otc_analysis = additional_analysis
-            
-            # المرحلة الثالثة: التأكد من اتساق اتجاه الإشارة مع نتائج التحليل المتقدم
-            signal_direction = signal.get('direction', 'NEUTRAL')
-            otc_direction = otc_analysis.get('direction', 'NEUTRAL')
-            
-            if signal_direction != otc_direction and otc_direction != 'NEUTRAL':
-                logger.warning(f"تناقض في الاتجاه: إشارة أصلية={signal_direction}, تحليل متقدم={otc_direction}")
-                return False, basic_quality * 0.7, "تناقض في اتجاه الإشارة مع التحليل المتقدم", {
-                    "basic_filter": {"accepted": True, "quality": basic_quality},
-                    "otc_analysis": {"accepted": False, "direction": otc_direction, "confidence": otc_analysis.get("confidence", 0)}
-                }
-            
-            # المرحلة الرابعة: التحقق من التأكيدات المتعددة
-            confirmations = self._calculate_confirmation_count(otc_analysis, signal_direction)
-            
-            if confirmations < MIN_CONFIRMATION_COUNT:
-                logger.warning(f"عدد التأكيدات غير كافٍ: {confirmations} < {MIN_CONFIRMATION_COUNT}")
-                return False, basic_quality * 0.8, f"تأكيدات غير كافية ({confirmations}/{MIN_CONFIRMATION_COUNT})", {
-                    "basic_filter": {"accepted": True, "quality": basic_quality},
-                    "otc_analysis": {"accepted": False, "confirmations": confirmations, "required": MIN_CONFIRMATION_COUNT}
-                }
-            
-            # المرحلة الخامسة: التحقق من جودة الإشارة النهائية
-            multi_stage_score = self._calculate_multi_stage_score(
-                basic_quality, otc_analysis, signal_direction, is_otc
-            )
-            
-            if multi_stage_score < MIN_MULTI_STAGE_SCORE:
-                logger.warning(f"درجة جودة المراحل المتعددة غير كافية: {multi_stage_score} < {MIN_MULTI_STAGE_SCORE}")
-                return False, multi_stage_score, f"جودة الإشارة غير كافية ({multi_stage_score:.1f}%)", {
-                    "basic_filter": {"accepted": True, "quality": basic_quality},
-                    "otc_analysis": {"accepted": False, "score": multi_stage_score, "required": MIN_MULTI_STAGE_SCORE}
-                }
-            
-            # المرحلة السادسة: التحقق من توافق الإشارة مع نقاط الدعم والمقاومة
-            sr_check = self._check_support_resistance_compatibility(
-                otc_analysis, signal_direction, basic_quality
-            )
-            
-            if not sr_check["compatible"]:
-                logger.warning(f"الإشارة غير متوافقة مع نقاط الدعم والمقاومة: {sr_check['reason']}")
-                return False, multi_stage_score * 0.9, sr_check["reason"], {
-                    "basic_filter": {"accepted": True, "quality": basic_quality},
-                    "otc_analysis": {"accepted": False, "sr_check": sr_check}
-                }
-            
-            # تحسين درجة الجودة النهائية بناءً على خصائص الزوج
-            final_quality = self._enhance_final_quality(multi_stage_score, pair_symbol, is_otc)
-            
-            logger.info(f"تم قبول الإشارة عبر النظام متعدد المراحل بدرجة نهائية {final_quality:.1f}%")
-            
-            detailed_analysis = {
-                "basic_filter": {"accepted": True, "quality": basic_quality},
-                "otc_analysis": {"accepted": True, "score": multi_stage_score},
-                "final_quality": final_quality,
-                "confirmations": confirmations,
-                "direction": signal_direction,
-                "otc_direction": otc_direction,
-                "is_otc": is_otc
-            }
-            
-            return True, final_quality, f"إشارة عالية الجودة ({final_quality:.1f}%) مع {confirmations} تأكيدات", detailed_analysis
-            
+            rejected_by = multi_stage_pipeline.run(self, state)
         except Exception as e:
+            if 'basic' not in state:
+                raise
+            basic_accept, basic_quality, basic_reason = state['basic']
             logger.exception(f"خطأ في نظام الفلترة متعدد المراحل: {str(e)}")
             # في حالة حدوث خطأ، نعتمد على نتيجة الفلترة الأساسية
             return basic_accept, basic_quality, f"{basic_reason} (خطأ في التحليل المتقدم: {str(e)})", {
                 "basic_filter": {"accepted": basic_accept, "quality": basic_quality, "reason": basic_reason},
                 "error": str(e)
             }
+        
+        if rejected_by is not None:
+            return self._rejection(rejected_by, state)
+        
+        basic_quality = state['basic'][1]
+        multi_stage_score = state['multi_stage_score']
+        confirmations = state['confirmations']
+        
+        # تحسين درجة الجودة النهائية بناءً على خصائص الزوج
+        final_quality = self._enhance_final_quality(multi_stage_score, pair_symbol, state['is_otc'])
+        
+        logger.info(f"تم قبول الإشارة عبر النظام متعدد المراحل بدرجة نهائية {final_quality:.1f}%")
+        
+        detailed_analysis = {
+            "basic_filter": {"accepted": True, "quality": basic_quality},
+            "otc_analysis": {"accepted": True, "score": multi_stage_score},
+            "final_quality": final_quality,
+            "confirmations": confirmations,
+            "direction": state['direction'],
+            "otc_direction": state['otc_analysis'].get('direction', 'NEUTRAL'),
+            "is_otc": state['is_otc']
+        }
+        
+        return True, final_quality, f"إشارة عالية الجودة ({final_quality:.1f}%) مع {confirmations} تأكيدات", detailed_analysis
+    
+    def _otc_analysis(self, state):
+        """التحليل المتقدم لأزواج OTC (يُحسب مرة واحدة لكل تصفية عند أول مرحلة تحتاجه)"""
+        if 'otc_analysis' not in state:
+            if not state['additional_analysis']:
+                # إجراء تحليل الأزواج OTC المتقدم
+                state['otc_analysis'] = otc_analyzer.analyze_otc_pair(state['candles'], state['pair_symbol'])
+            else:
+                state['otc_analysis'] = state['additional_analysis']
+        return state['otc_analysis']
+    
+    def _basic_stage(self, state):
+        """المرحلة الأولى: الفلترة التقليدية باستخدام AdvancedSignalFilter"""
+        state['basic'] = self.advanced_filter.filter_signal(state['signal'], state['candles'])
+        accept, quality, reason = state['basic']
+        if not accept:
+            logger.info(f"تم رفض الإشارة في المرحلة الأولى: {reason}")
+            return False
+        logger.info(f"المرحلة الأولى: تم قبول الإشارة بدرجة جودة {quality}")
+        return True
+    
+    def _direction_stage(self, state):
+        """المرحلة الثالثة: التأكد من اتساق اتجاه الإشارة مع نتائج التحليل المتقدم"""
+        otc_direction = self._otc_analysis(state).get('direction', 'NEUTRAL')
+        if state['direction'] != otc_direction and otc_direction != 'NEUTRAL':
+            logger.warning(f"تناقض في الاتجاه: إشارة أصلية={state['direction']}, تحليل متقدم={otc_direction}")
+            return False
+        return True
+    
+    def _confirmations_stage(self, state):
+        """المرحلة الرابعة: التحقق من التأكيدات المتعددة"""
+        confirmations = self._calculate_confirmation_count(self._otc_analysis(state), state['direction'])
+        state['confirmations'] = confirmations
+        if confirmations < MIN_CONFIRMATION_COUNT:
+            logger.warning(f"عدد التأكيدات غير كافٍ: {confirmations} < {MIN_CONFIRMATION_COUNT}")
+            return False
+        return True
+    
+    def _score_stage(self, state):
+        """المرحلة الخامسة: التحقق من جودة الإشارة النهائية"""
+        multi_stage_score = self._calculate_multi_stage_score(
+            state['basic'][1], self._otc_analysis(state), state['direction'], state['is_otc']
+        )
+        state['multi_stage_score'] = multi_stage_score
+        if multi_stage_score < MIN_MULTI_STAGE_SCORE:
+            logger.warning(f"درجة جودة المراحل المتعددة غير كافية: {multi_stage_score} < {MIN_MULTI_STAGE_SCORE}")
+            return False
+        return True
+    
+    def _support_resistance_stage(self, state):
+        """المرحلة السادسة: التحقق من توافق الإشارة مع نقاط الدعم والمقاومة"""
+        sr_check = self._check_support_resistance_compatibility(
+            self._otc_analysis(state), state['direction'], state['basic'][1]
+        )
+        state['sr_check'] = sr_check
+        if not sr_check["compatible"]:
+            logger.warning(f"الإشارة غير متوافقة مع نقاط الدعم والمقاومة: {sr_check['reason']}")
+            return False
+        return True
+    
+    def _rejection(self, stage, state):
+        """
+        نتيجة الرفض حسب المرحلة الرافضة
+
+        درجة الرفض في مرحلتي الاتجاه والتأكيدات مشتقة من درجة الفلتر الأساسي (جميع المراحل تتطلب اجتيازه).
+        """
+        _, basic_quality, basic_reason = state['basic']
+        if stage == 'basic_filter':
+            return False, basic_quality, basic_reason, {
+                "basic_filter": {"accepted": False, "quality": basic_quality, "reason": basic_reason}
+            }
+        
+        details = {"basic_filter": {"accepted": True, "quality": basic_quality}}
+        if stage == 'direction':
+            otc_analysis = state['otc_analysis']
+            details["otc_analysis"] = {"accepted": False, "direction": otc_analysis.get('direction', 'NEUTRAL'),
+                                       "confidence": otc_analysis.get("confidence", 0)}
+            return False, basic_quality * 0.7, "تناقض في اتجاه الإشارة مع التحليل المتقدم", details
+        if stage == 'confirmations':
+            confirmations = state['confirmations']
+            details["otc_analysis"] = {"accepted": False, "confirmations": confirmations, "required": MIN_CONFIRMATION_COUNT}
+            return False, basic_quality * 0.8, f"تأكيدات غير كافية ({confirmations}/{MIN_CONFIRMATION_COUNT})", details
+        
+        multi_stage_score = state['multi_stage_score']
+        if stage == 'multi_stage_score':
+            details["otc_analysis"] = {"accepted": False, "score": multi_stage_score, "required": MIN_MULTI_STAGE_SCORE}
+            return False, multi_stage_score, f"جودة الإشارة غير كافية ({multi_stage_score:.1f}%)", details
+        
+        sr_check = state['sr_check']
+        details["otc_analysis"] = {"accepted": False, "sr_check": sr_check}
+        return False, multi_stage_score * 0.9, sr_check["reason"], details
     
     def _calculate_confirmation_count(self, otc_analysis, signal_direction):
         """
@@ -352,6 +404,18 @@ class MultiStageSignalFilter:
         return final_quality
 
 
+
+# مراحل الفلترة بالترتيب الأصلي (مشتركة بين جميع النسخ حتى تتراكم قياساتها)
+multi_stage_pipeline = AdaptiveFilterPipeline('multi_stage', [
+    FilterStage('basic_filter', MultiStageSignalFilter._basic_stage),
+    FilterStage('direction', MultiStageSignalFilter._direction_stage, requires=('basic_filter',)),
+    FilterStage('confirmations', MultiStageSignalFilter._confirmations_stage, requires=('basic_filter',)),
+    FilterStage('multi_stage_score', MultiStageSignalFilter._score_stage, requires=('basic_filter',)),
+    FilterStage('support_resistance', MultiStageSignalFilter._support_resistance_stage,
+                requires=('basic_filter', 'multi_stage_score')),
+])
+
+
 def filter_signal_multi_stage(signal, candles, pair_symbol, additional_analysis=None):
     """
     تصفية الإشارة باستخدام نظام متعدد المراحل (واجهة عامة)
@@ -8,6 +8,10 @@ import numpy as np
 from datetime import datetime, timedelta
 import importlib
 
+import indicators
+from indicators import candle_columns
+from price_level_index import PriceLevelIndex
+
 # تهيئة نظام التسجيل
 logger = logging.getLogger(__name__)
 
@@ -49,10 +53,14 @@ class MultiTimeframeAnalyzer:
         Args:
             pair_symbol (str): رمز الزوج المراد تحليله
             candles_dict (dict, optional): قاموس بيانات الشموع لكل إطار زمني
+                (الافتراضي: شموع M1 من المخزن المشترك مع M5 و M15 المجمعة منها)
             
         Returns:
             dict: نتائج التحليل لجميع الإطارات الزمنية
         """
+        if not candles_dict:
+            candles_dict = self._get_candles_dict(pair_symbol)
+        
         if not candles_dict:
             logger.warning("لا توجد بيانات للتحليل")
             return {
@@ -119,6 +127,25 @@ class MultiTimeframeAnalyzer:
         
         return result
     
+    def _get_candles_dict(self, pair_symbol):
+        """
+        بناء قاموس الشموع لجميع الإطارات الزمنية من المخزن المشترك
+        
+        Args:
+            pair_symbol (str): رمز الزوج
+            
+        Returns:
+            dict: قاموس {الإطار: الشموع} أو None إذا لم تتوفر بيانات
+        """
+        try:
+            from technical_analyzer import technical_analyzer
+            candles_dict = technical_analyzer.get_timeframe_candles(pair_symbol)
+        except Exception as e:
+            logger.error(f"Error building timeframe candles for {pair_symbol}: {e}")
+            return None
+        
+        return candles_dict if candles_dict.get('M1') else None
+    
     def _analyze_timeframe(self, candles):
         """
         تحليل إطار زمني واحد
@@ -137,9 +164,7 @@ class MultiTimeframeAnalyzer:
             }
         
         # استخراج بيانات السعر
-        closes = np.array([candle['close'] for candle in candles])
-        highs = np.array([candle['high'] for candle in candles])
-        lows = np.array([candle['low'] for candle in candles])
+        _, highs, lows, closes = candle_columns(candles)
         
         # تحليل الاتجاه باستخدام المتوسطات المتحركة
         ma20 = self._calculate_ma(closes, 20)
@@ -238,8 +263,9 @@ class MultiTimeframeAnalyzer:
             logger.warning(f"لم يتم العثور على محلل نقاط الدعم والمقاومة المتقدم: {e}")
         
         # استخدام طريقة بديلة بسيطة إذا لم يكن المحلل المتقدم متاحًا
-        support_levels = []
-        resistance_levels = []
+        # فهرس مرتب لمستويات كل إطار زمني ثم فهرس واحد مدمج لجميع الإطارات
+        support_indexes = []
+        resistance_indexes = []
         
         # جمع نقاط الدعم والمقاومة من جميع الإطارات الزمنية
         for tf, candles in candles_dict.items():
@@ -254,19 +280,19 @@ class MultiTimeframeAnalyzer:
                 # تعديل قوة المستويات لأزواج OTC
                 if is_otc_pair:
                     level['strength'] = level.get('strength', 50) * 1.2  # زيادة قوة نقاط الدعم للأزواج OTC
-                support_levels.append(level)
+            support_indexes.append(PriceLevelIndex(tf_levels['support']))
                 
             for level in tf_levels['resistance']:
                 level['timeframe'] = tf
                 # تعديل قوة المستويات لأزواج OTC
                 if is_otc_pair:
                     level['strength'] = level.get('strength', 50) * 1.2  # زيادة قوة نقاط المقاومة للأزواج OTC
-                resistance_levels.append(level)
+            resistance_indexes.append(PriceLevelIndex(tf_levels['resistance']))
         
         # إزالة المستويات المتكررة بعتبة مختلفة لأزواج OTC
         threshold = 0.0008 if is_otc_pair else 0.001  # عتبة أقل للأزواج OTC للحصول على مستويات أكثر دقة
-        unique_support = self._consolidate_levels(support_levels, threshold)
-        unique_resistance = self._consolidate_levels(resistance_levels, threshold)
+        unique_support = self._consolidate_levels(PriceLevelIndex.merge(support_indexes), threshold)
+        unique_resistance = self._consolidate_levels(PriceLevelIndex.merge(resistance_indexes), threshold)
         
         return {
             'support': unique_support,
@@ -319,53 +345,29 @@ class MultiTimeframeAnalyzer:
             'resistance': resistance_levels
         }
     
-    def _consolidate_levels(self, levels, threshold=0.001):
+    def _consolidate_levels(self, level_index, threshold=0.001):
         """
         دمج مستويات الدعم/المقاومة المتقاربة
         
         Args:
-            levels (list): قائمة المستويات
+            level_index (PriceLevelIndex): فهرس المستويات المرتب حسب السعر
             threshold (float): عتبة القرب
             
         Returns:
             list: قائمة المستويات المدمجة
         """
-        if not levels:
+        if not len(level_index):
             return []
         
-        # فرز المستويات حسب السعر
-        sorted_levels = sorted(levels, key=lambda x: x['price'])
+        # بداية مجموعة جديدة عند كل مستوى يبعد عن المستوى السابق بفرق نسبي لا يقل عن العتبة
+        prices = level_index.prices
+        rel_diff = np.abs(np.diff(prices)) / prices[:-1]
+        bounds = [0] + (np.flatnonzero(~(rel_diff < threshold)) + 1).tolist() + [len(prices)]
         
-        # تجميع المستويات
+        # إنشاء مستوى واحد من كل مجموعة
         consolidated = []
-        current_group = [sorted_levels[0]]
-        
-        for i in range(1, len(sorted_levels)):
-            current_level = sorted_levels[i]
-            prev_level = sorted_levels[i-1]
-            
-            # حساب الفرق النسبي
-            rel_diff = abs(current_level['price'] - prev_level['price']) / prev_level['price']
-            
-            if rel_diff < threshold:
-                # إضافة إلى المجموعة الحالية
-                current_group.append(current_level)
-            else:
-                # إنشاء مستوى جديد من المجموعة الحالية
-                avg_price = sum(level['price'] for level in current_group) / len(current_group)
-                avg_strength = sum(level.get('strength', 50) for level in current_group) / len(current_group)
-                consolidated.append({
-                    'price': avg_price,
-                    'strength': avg_strength,
-                    'timeframe': current_group[0].get('timeframe', 'unknown'),
-                    'count': len(current_group)
-                })
-                
-                # بدء مجموعة جديدة
-                current_group = [current_level]
-        
-        # إضافة المجموعة الأخيرة
-        if current_group:
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            current_group = level_index.levels[start:end]
             avg_price = sum(level['price'] for level in current_group) / len(current_group)
             avg_strength = sum(level.get('strength', 50) for level in current_group) / len(current_group)
             consolidated.append({
@@ -511,54 +513,31 @@ class MultiTimeframeAnalyzer:
     def _calculate_ma(self, data, period):
         """حساب المتوسط المتحرك"""
         if len(data) >= period:
-            return np.mean(data[-period:])
+            return float(indicators.rolling_mean(data[-period:], period)[-1])
         return data[-1] if len(data) > 0 else 0
     
     def _calculate_rsi(self, data, period=14):
-        """حساب مؤشر القوة النسبية (RSI)"""
+        """حساب مؤشر القوة النسبية (RSI) لآخر period تغير"""
         if len(data) < period + 1:
             return 50  # قيمة افتراضية
         
-        deltas = np.diff(data)
-        seed = deltas[:period+1]
-        up = seed[seed >= 0].sum() / period
-        down = -seed[seed < 0].sum() / period
-        
-        if down == 0:
-            return 100
-        
-        rs = up / down
-        return 100 - (100 / (1 + rs))
+        return float(indicators.rsi(data[-(period + 1):], period)[-1])
     
     def _calculate_stochastic(self, closes, highs, lows, k_period=14, d_period=3):
         """حساب مؤشر Stochastic"""
         if len(closes) < k_period:
             return 50, 50  # قيم افتراضية
         
-        # حساب %K
-        lowest_low = np.min(lows[-k_period:])
-        highest_high = np.max(highs[-k_period:])
-        
-        if highest_high == lowest_low:
-            k = 50
-        else:
-            k = 100 * (closes[-1] - lowest_low) / (highest_high - lowest_low)
+        # %K الخام لآخر d_period شمعة فقط
+        window = k_period + d_period - 1
+        raw_k, _, _ = indicators.stochastic(highs[-window:], lows[-window:], closes[-window:], k_period, 1, 1)
         
         # حساب %D (المتوسط المتحرك لـ %K)
-        k_values = []
-        for i in range(min(d_period, len(closes))):
-            if len(closes) > k_period + i:
-                low_i = np.min(lows[-(k_period+i):-i] if i > 0 else lows[-k_period:])
-                high_i = np.max(highs[-(k_period+i):-i] if i > 0 else highs[-k_period:])
-                
-                if high_i == low_i:
-                    k_i = 50
-                else:
-                    k_i = 100 * (closes[-1-i] - low_i) / (high_i - low_i)
-                
-                k_values.append(k_i)
+        k_values = raw_k[-d_period:]
+        k_values = k_values[~np.isnan(k_values)]
         
-        d = np.mean(k_values) if k_values else 50
+        k = float(raw_k[-1])
+        d = float(k_values.mean()) if len(k_values) else 50
         
         return k, d
     
@@ -567,34 +546,14 @@ class MultiTimeframeAnalyzer:
         if len(data) < slow_period:
             return 0, 0, 0  # قيم افتراضية
         
-        # حساب EMA السريع والبطيء
-        ema_fast = self._calculate_ema(data, fast_period)
-        ema_slow = self._calculate_ema(data, slow_period)
-        
-        # حساب MACD
-        macd = ema_fast - ema_slow
-        
-        # حساب خط الإشارة (EMA للـ MACD)
-        # نستخدم قيمة MACD الأخيرة فقط بدلاً من سلسلة القيم
-        signal = macd * 0.9  # تقريب بسيط
-        
-        # حساب الرسم البياني (MACD - Signal)
-        histogram = macd - signal
-        
-        return macd, signal, histogram
-    
-    def _calculate_ema(self, data, period):
-        """حساب المتوسط المتحرك الأسي (EMA)"""
-        if len(data) < period:
-            return data[-1] if len(data) > 0 else 0
-        
-        alpha = 2 / (period + 1)
-        ema = data[-period]
+        macd, signal, histogram = indicators.macd(data, fast_period, slow_period, signal_period, seed='sma')
+        macd = float(macd[-1])
         
-        for i in range(-period+1, 0):
-            ema = data[i] * alpha + ema * (1 - alpha)
+        # قبل اكتمال خط الإشارة يعتبر الرسم البياني محايداً
+        if np.isnan(signal[-1]):
+            return macd, macd, 0.0
         
-        return ema
+        return macd, float(signal[-1]), float(histogram[-1])
 
 # إنشاء كائن عام للاستخدام
 multi_tf_analyzer = MultiTimeframeAnalyzer()
@@ -659,22 +618,16 @@ def get_multi_timeframe_signal(pair_symbol, candles_dict=None):
     if current_price > 0:
         if trend == 'BUY':
             # التحقق من وجود مستوى دعم قريب تحت السعر الحالي (جيد للشراء)
-            support_levels = sr_levels.get('support', [])
-            for level in support_levels:
-                price_diff = abs(current_price - level.get('price', 0)) / current_price
-                if price_diff < 0.002:  # قريب جداً (0.2%)
-                    signal['sr_validated'] = True
-                    signal['sr_info'] = f"ارتداد من مستوى دعم {level.get('price', 0):.5f}"
-                    break
+            nearby = PriceLevelIndex(sr_levels.get('support', [])).within(current_price, 0.002)  # قريب جداً (0.2%)
+            if nearby:
+                signal['sr_validated'] = True
+                signal['sr_info'] = f"ارتداد من مستوى دعم {nearby[0]['price']:.5f}"
                     
         elif trend == 'SELL':
             # التحقق من وجود مستوى مقاومة قريب فوق السعر الحالي (جيد للبيع)
-            resistance_levels = sr_levels.get('resistance', [])
-            for level in resistance_levels:
-                price_diff = abs(level.get('price', 0) - current_price) / current_price
-                if price_diff < 0.002:  # قريب جداً (0.2%)
-                    signal['sr_validated'] = True
-                    signal['sr_info'] = f"ارتداد من مستوى مقاومة {level.get('price', 0):.5f}"
-                    break
+            nearby = PriceLevelIndex(sr_levels.get('resistance', [])).within(current_price, 0.002)  # قريب جداً (0.2%)
+            if nearby:
+                signal['sr_validated'] = True
+                signal['sr_info'] = f"ارتداد من مستوى مقاومة {nearby[0]['price']:.5f}"
     
     return signal
\ No newline at end of file
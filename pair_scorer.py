@@ -0,0 +1,279 @@
+"""
+تقييم الأزواج دفعة واحدة
+يكدس نوافذ الشموع لجميع الأزواج النشطة في مصفوفات ثنائية الأبعاد (أزواج × شموع) لكل طول نافذة،
+ويحسب جميع المؤشرات وقواعد تصويت الشراء/البيع الخاصة بـ analyze_pair (vote_signals) لكل مصفوفة في تمريرة واحدة،
+ثم يعيد جدولاً مرتباً بالمرشحين
+"""
+
+import logging
+
+import numpy as np
+
+import indicators
+from candle_store import HIGH, LOW, CLOSE
+from technical_analyzer import technical_analyzer, vote_signals, MIN_SIGNAL_DIFF, TREND_NAMES
+
+logger = logging.getLogger(__name__)
+
+# عدد الشموع المستخدمة لكل زوج (نفس عمق التاريخ في المخزن المشترك)
+SCORING_WINDOW = 100
+
+# أقل عدد شموع لحساب جميع المؤشرات (MACD يحتاج الفترة البطيئة + فترة الإشارة)
+MIN_SCORING_CANDLES = 35
+
+
+class BatchPairScorer:
+    """مقيّم مصفوفي لجميع الأزواج يطبق قواعد المحلل الفني دفعة واحدة"""
+
+    def __init__(self, analyzer=None, window=SCORING_WINDOW):
+        """
+        Args:
+            analyzer: المحلل الفني الذي يملك مخزن الشموع (الافتراضي: المحلل المشترك)
+            window (int): عدد الشموع الأخيرة المستخدمة لكل زوج
+        """
+        self.analyzer = analyzer if analyzer is not None else technical_analyzer
+        self.window = window
+
+    def stack_windows(self, pairs):
+        """
+        تكديس آخر شموع الأزواج في مصفوفات منتظمة
+
+        كل زوج يُقيّم على آخر window شمعة لديه (أو كل تاريخه إن كان أقصر)، لذلك تُجمع
+        الأزواج حسب طول نافذتها في مصفوفة لكل طول بدلاً من قص جميع الأزواج إلى أقصرها
+
+        Args:
+            pairs (list): رموز الأزواج
+
+        Returns:
+            list: مجموعات (الأزواج، مصفوفة بالشكل (P, 5, W)) لكل طول نافذة W
+        """
+        store = self.analyzer.store
+        groups = {}
+        skipped = 0
+        for pair in pairs:
+            # تعويض الدقائق الفائتة قبل القراءة (بتكلفة ثابتة إذا كان الزوج محدثاً)
+            self.analyzer._update_price_data(pair)
+            view = store.get_candles(pair, self.window)
+            if len(view) < MIN_SCORING_CANDLES:
+                skipped += 1
+                continue
+            groups.setdefault(len(view), []).append((pair, view.array))
+
+        if skipped:
+            logger.warning(f"Skipping {skipped} pairs with fewer than {MIN_SCORING_CANDLES} candles")
+        return [([pair for pair, _ in group], np.stack([array for _, array in group]))
+                for group in groups.values()]
+
+    def compute_features(self, batch):
+        """
+        حساب قيم المؤشرات الحالية لجميع الأزواج
+
+        Args:
+            batch: مصفوفة الشموع بالشكل (P, 5, W)
+
+        Returns:
+            dict: مصفوفات بطول P لكل مؤشر (بنفس تعريفات analyze_pair)
+        """
+        highs, lows, closes = batch[:, HIGH], batch[:, LOW], batch[:, CLOSE]
+
+        # الاتجاه العام: المتوسطات 5 و 20 وميل الانحدار لآخر 20 شمعة
+        sma5 = closes[:, -5:].sum(axis=1) / 5
+        sma20 = closes[:, -20:].sum(axis=1) / 20
+        slope, _, _ = indicators.linear_regression(closes[:, -20:])
+        trend_strength = np.abs(slope) * 10000
+        up = (slope > 0) & (sma5 > sma20) & (trend_strength > 1)
+        down = (slope < 0) & (sma5 < sma20) & (trend_strength > 1)
+        trend = np.where(up, 1, np.where(down, -1, 0)) * np.where(trend_strength > 5, 2, 1)
+
+        # زاوية السعر لآخر 10 شموع
+        price_change = (closes[:, -1] - closes[:, -10]) / closes[:, -10]
+        price_angle = np.degrees(np.arctan(price_change * 100))
+
+        # آخر قيمة لـ %D تحتاج فقط آخر 14 + 3 + 3 - 2 شمعة
+        stoch_window = -(14 + 3 + 3 - 2)
+        _, stoch_k, stoch_d = indicators.stochastic(highs[:, stoch_window:], lows[:, stoch_window:],
+                                                    closes[:, stoch_window:], 14, 3, 3)
+        macd_line, signal_line, histogram = indicators.macd(closes, 12, 26, 9, seed='sma')
+        upper, middle, lower = indicators.bollinger_bands(closes[:, -20:], 20, 2.0)
+        adx, plus_di, minus_di = indicators.adx(highs, lows, closes, 14)
+
+        upper, middle, lower = upper[:, -1], middle[:, -1], lower[:, -1]
+        band_width = upper - lower
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bb_position = np.where(band_width != 0, (closes[:, -1] - lower) / band_width, 0.5)
+
+        # متوسط حجم آخر 10 شموع كنسبة من السعر الحالي (عامل التذبذب في اختيار المدة)
+        volatility = (highs[:, -10:] - lows[:, -10:]).mean(axis=1) / closes[:, -1] * 100
+
+        return {
+            'trend': trend,
+            'price_angle': price_angle,
+            'rsi': indicators.rsi(closes[:, -15:], 14)[:, -1],
+            'stoch_k': stoch_k[:, -1],
+            'stoch_d': stoch_d[:, -1],
+            'macd': macd_line[:, -1],
+            'macd_signal': signal_line[:, -1],
+            'macd_histogram': histogram[:, -1],
+            'bb_position': bb_position,
+            'bb_bandwidth': band_width / middle * 100,
+            'adx': adx[:, -1],
+            'plus_di': plus_di[:, -1],
+            'minus_di': minus_di[:, -1],
+            'volatility': volatility,
+            'last_candles': batch[:, :4, -3:]
+        }
+
+    def vote(self, features):
+        """
+        تطبيق قواعد تصويت analyze_pair (vote_signals) على جميع الأزواج
+
+        Args:
+            features (dict): ناتج compute_features
+
+        Returns:
+            tuple: (نقاط الشراء، نقاط البيع، النقاط المحايدة) كمصفوفات بطول P
+        """
+        return vote_signals(features)
+
+    def score_pairs(self, pairs):
+        """
+        تقييم جميع الأزواج وترتيبها من الأفضل إلى الأسوأ
+
+        الإشارات الواضحة (فارق نقاط >= 1.5) تأتي أولاً مرتبة حسب الاحتمالية ثم الفارق،
+        تليها الإشارات الضعيفة المبنية على RSI أو الاتجاه العام. الأزواج التي كان
+        analyze_pair سيختار لها اتجاهاً عشوائياً تُعاد بدون اتجاه (direction = None) في آخر الجدول.
+        مدة الصفقة المحسوبة هنا لا تتضمن التنويع العشوائي الذي يضيفه analyze_pair.
+
+        Args:
+            pairs (list): رموز الأزواج
+
+        Returns:
+            list: قائمة قواميس المرشحين مرتبة
+        """
+        candidates = []
+        for group_pairs, batch in self.stack_windows(pairs):
+            candidates.extend(self._score_batch(group_pairs, batch))
+
+        candidates.sort(key=lambda c: (c['direction'] is not None, c['strong'], c['probability'],
+                                       abs(c['buy_score'] - c['sell_score'])), reverse=True)
+        return candidates
+
+    def _score_batch(self, pairs, batch):
+        """تقييم مجموعة أزواج بنفس طول النافذة وإرجاع قواميس المرشحين (بدون ترتيب)"""
+        features = self.compute_features(batch)
+        buy, sell, neutral = self.vote(features)
+        rsi, trend = features['rsi'], features['trend']
+
+        # التقييم النهائي للإشارات الواضحة
+        signal_diff = np.abs(buy - sell)
+        strong_buy = (buy > sell) & (signal_diff >= MIN_SIGNAL_DIFF)
+        strong_sell = (sell > buy) & (signal_diff >= MIN_SIGNAL_DIFF)
+        strong = strong_buy | strong_sell
+        with np.errstate(divide='ignore', invalid='ignore'):
+            strength = np.where(strong_buy, buy - sell * 0.5, sell - buy * 0.5) / (buy + sell)
+        strength = np.clip(np.nan_to_num(strength), 0.3, 1.0)
+        probability = np.clip((80 + strength * 15).astype(int), 80, 95)
+
+        # الإشارات الضعيفة: RSI ثم الاتجاه العام
+        weak_sell_rsi = ~strong & (rsi > 60)
+        weak_buy_rsi = ~strong & (rsi < 40)
+        weak_trend = ~strong & ~weak_sell_rsi & ~weak_buy_rsi
+        weak_probability = np.select(
+            [weak_sell_rsi, weak_buy_rsi],
+            [np.clip(np.nan_to_num(rsi).astype(int), 75, 80), np.clip(np.nan_to_num(100 - rsi).astype(int), 75, 80)],
+            75
+        )
+        probability = np.where(strong, probability, weak_probability)
+
+        is_buy = strong_buy | weak_buy_rsi | (weak_trend & (trend > 0))
+        is_sell = strong_sell | weak_sell_rsi | (weak_trend & (trend < 0))
+
+        duration = np.where(strong, self._durations(features, strength, is_buy), 1)
+
+        candidates = []
+        for i, pair in enumerate(pairs):
+            direction = "BUY" if is_buy[i] else "SELL" if is_sell[i] else None
+            candidates.append({
+                'pair': pair,
+                'direction': direction,
+                'probability': int(probability[i]),
+                'duration': int(duration[i]),
+                'strong': bool(strong[i]),
+                'signal_strength': float(strength[i]) if strong[i] else 0.0,
+                'buy_score': float(buy[i]),
+                'sell_score': float(sell[i]),
+                'neutral_score': float(neutral[i]),
+                'trend': TREND_NAMES[int(trend[i])],
+                'rsi': float(rsi[i]),
+                'adx': float(features['adx'][i])
+            })
+        return candidates
+
+    def _durations(self, features, strength, is_buy):
+        """حساب مدة الصفقة (1-3 دقائق) بنفس عوامل analyze_pair بدون التنويع العشوائي"""
+        angle = np.abs(features['price_angle'])
+        angle_factor = np.select([angle > 20, angle > 15, angle > 10, angle > 5], [3.5, 3.0, 2.0, 1.0], 0)
+        strength_factor = np.select([strength >= 0.8, strength >= 0.7, strength >= 0.5, strength >= 0.3],
+                                    [3.5, 3.0, 2.0, 1.0], 0)
+        trend = np.abs(features['trend'])
+        trend_factor = np.select([trend == 2, trend == 1], [2.5, 1.5], 0)
+        volatility = features['volatility']
+        volatility_factor = np.select([volatility > 0.5, volatility > 0.3, volatility < 0.1], [-1.0, -0.5, 1.0], 0)
+
+        rsi, k, d = features['rsi'], features['stoch_k'], features['stoch_d']
+        macd, signal, histogram = features['macd'], features['macd_signal'], features['macd_histogram']
+        buy_alignment = (rsi < 30).astype(int) + ((k < 20) & (k > d)) + ((histogram > 0) | (macd > signal))
+        sell_alignment = (rsi > 70).astype(int) + ((k > 80) & (k < d)) + ((histogram < 0) | (macd < signal))
+        alignment_factor = np.where(is_buy, buy_alignment, sell_alignment) * 0.5
+
+        total = angle_factor + strength_factor + trend_factor + volatility_factor + alignment_factor
+        return np.select([total >= 6.0, total >= 3.0], [3, 2], 1)
+
+
+# المقيّم المشترك (يستخدم المحلل الفني ومخزن الشموع المشتركين)
+pair_scorer = BatchPairScorer()
+
+
+def rank_pairs(pairs, limit=None):
+    """
+    ترتيب الأزواج حسب جودة الإشارة المتوقعة في تمريرة مصفوفية واحدة
+
+    Args:
+        pairs (list): رموز الأزواج المرشحة
+        limit (int, optional): أقصى عدد مرشحين في النتيجة
+
+    Returns:
+        list: جدول المرشحين مرتباً من الأفضل
+    """
+    candidates = pair_scorer.score_pairs(pairs)
+    return candidates if limit is None else candidates[:limit]
+
+
+def select_pairs(pairs, count=3, ranker=None):
+    """
+    اختيار أفضل الأزواج المرشحة لإنشاء إشارة مع الرجوع إلى أول الأزواج عند تعذر التقييم
+
+    Args:
+        pairs (list): الأزواج المتاحة للتداول (بالترتيب المطلوب عند الرجوع)
+        count (int): عدد المرشحين المطلوب
+        ranker: دالة ترتيب الأزواج (الافتراضي: rank_pairs)
+
+    Returns:
+        list: رموز الأزواج مرتبة من الأفضل
+    """
+    ranker = ranker if ranker is not None else rank_pairs
+    try:
+        candidates = ranker(pairs, limit=count)
+    except Exception as e:
+        logger.error(f"Batch pair scoring failed, falling back to random selection: {e}")
+        return pairs[:min(count, len(pairs))]
+
+    if not candidates:
+        # لا يوجد زوج بتاريخ شموع كافٍ للتقييم (مثلاً بعد إعادة التشغيل مباشرة)
+        logger.warning("Batch pair scoring returned no candidates, falling back to random selection")
+        return pairs[:min(count, len(pairs))]
+
+    for candidate in candidates:
+        logger.info(f"مرشح: {candidate['pair']} | {candidate['direction']} | {candidate['probability']}% | نقاط شراء/بيع: {candidate['buy_score']:.1f}/{candidate['sell_score']:.1f}")
+
+    return [candidate['pair'] for candidate in candidates]
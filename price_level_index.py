@@ -0,0 +1,118 @@
+"""
+فهرس مستويات الأسعار المرتبة
+يحفظ أسعار مستويات الدعم أو المقاومة في مصفوفة NumPy مرتبة ويجيب عن استعلامات أقرب مستوى
+فوق السعر أو تحته والمستويات ضمن نطاق حول السعر بالبحث الثنائي بدلاً من المرور على جميع
+المستويات أو ترتيبها عند كل استعلام. عند تساوي الأسعار أو المسافات يُعاد المستوى الأسبق في
+القائمة الأصلية، كما في عمليات البحث الخطية التي يحل محلها
+"""
+
+import numpy as np
+
+
+class PriceLevelIndex:
+    """
+    فهرس مستويات (قواميس تحتوي على price) مرتب حسب السعر
+
+    levels المستويات مرتبة تصاعدياً حسب السعر (الترتيب مستقر)، و positions موضع كل منها في
+    القائمة الأصلية.
+    """
+
+    def __init__(self, levels=()):
+        """
+        Args:
+            levels (list): قائمة المستويات بترتيبها الأصلي
+        """
+        levels = list(levels)
+        prices = np.array([level['price'] for level in levels], dtype=np.float64)
+        order = np.argsort(prices, kind='stable')
+        self.levels = [levels[k] for k in order]
+        self.prices = prices[order]
+        self.positions = order
+
+    @classmethod
+    def merge(cls, indexes):
+        """
+        دمج فهارس عدة إطارات زمنية في فهرس واحد
+
+        Args:
+            indexes (list): الفهارس بالترتيب (مستويات الفهرس الأول تسبق عند تساوي الأسعار)
+
+        Returns:
+            PriceLevelIndex: فهرس بجميع المستويات كأنها قائمة واحدة متتالية
+        """
+        merged = cls()
+        indexes = [index for index in indexes if len(index)]
+        if not indexes:
+            return merged
+        offsets = np.cumsum([0] + [len(index) for index in indexes[:-1]])
+        prices = np.concatenate([index.prices for index in indexes])
+        positions = np.concatenate([index.positions + offset for index, offset in zip(indexes, offsets)])
+        levels = [level for index in indexes for level in index.levels]
+        order = np.argsort(prices, kind='stable')
+        merged.levels = [levels[k] for k in order]
+        merged.prices = prices[order]
+        merged.positions = positions[order]
+        return merged
+
+    def __len__(self):
+        return len(self.levels)
+
+    def _first_of_price(self, k):
+        """أول موضع في الفهرس بنفس سعر الموضع k (الأسبق في القائمة الأصلية)"""
+        return int(np.searchsorted(self.prices, self.prices[k], 'left'))
+
+    def nearest_above(self, price):
+        """
+        أقرب مستوى سعره أعلى تماماً من السعر
+
+        Returns:
+            dict: المستوى أو None
+        """
+        k = int(np.searchsorted(self.prices, price, 'right'))
+        return self.levels[k] if k < len(self.levels) else None
+
+    def nearest_below(self, price):
+        """
+        أقرب مستوى سعره أقل تماماً من السعر
+
+        Returns:
+            dict: المستوى أو None
+        """
+        k = int(np.searchsorted(self.prices, price, 'left')) - 1
+        return self.levels[self._first_of_price(k)] if k >= 0 else None
+
+    def nearest(self, price):
+        """
+        أقرب مستوى إلى السعر من أي جهة
+
+        Returns:
+            dict: المستوى أو None
+        """
+        k = int(np.searchsorted(self.prices, price, 'left'))
+        candidates = [self._first_of_price(k - 1)] if k > 0 else []
+        if k < len(self.levels):
+            candidates.append(k)
+        if not candidates:
+            return None
+        best = min(candidates, key=lambda c: (abs(self.prices[c] - price), self.positions[c]))
+        return self.levels[best]
+
+    def within(self, price, band, relative_to_level=False):
+        """
+        المستويات التي تبعد عن السعر بنسبة أقل من band
+
+        Args:
+            price (float): السعر
+            band (float): أقصى مسافة نسبية (مثلاً 0.002 = 0.2%)
+            relative_to_level (bool): نسبة المسافة إلى سعر المستوى بدلاً من السعر المعطى
+
+        Returns:
+            list: المستويات بترتيبها في القائمة الأصلية
+        """
+        # نطاق مرشحين أوسع من النطاق المطلوب ثم الشرط الدقيق على المرشحين فقط
+        start = int(np.searchsorted(self.prices, price * (1 - 2 * band), 'left'))
+        end = int(np.searchsorted(self.prices, price * (1 + 2 * band), 'right'))
+        prices = self.prices[start:end]
+        inside = np.abs(prices - price) / (prices if relative_to_level else price) < band
+        matches = np.flatnonzero(inside) + start
+        return [self.levels[k] for k in matches[np.argsort(self.positions[matches], kind='stable')]]
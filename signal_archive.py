@@ -0,0 +1,169 @@
+"""
+أرشيف الإشارات: تصفح بالمؤشر وتصدير متدفق
+الصفحات مرتبة من الأحدث إلى الأقدم ويحددها مؤشر على (created_at, id) لآخر صف في الصفحة
+السابقة بدلاً من OFFSET، فتكلفة كل صفحة ثابتة مهما كان عمقها. التصدير يقرأ الصفوف على دفعات
+بمؤشر من جهة الخادم (yield_per) ويكتب كل دفعة فور قراءتها بصيغة NDJSON أو CSV، فتبقى الذاكرة
+ثابتة مهما كان عدد الإشارات
+"""
+
+import base64
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import select, tuple_
+
+# حجم الصفحة الافتراضي والأقصى لواجهة الأرشيف
+ARCHIVE_PAGE_SIZE = 50
+ARCHIVE_MAX_PAGE_SIZE = 200
+
+# عدد الصفوف المقروءة من قاعدة البيانات والمكتوبة في كل دفعة تصدير
+EXPORT_BATCH_SIZE = 1000
+
+# أعمدة صف الأرشيف بترتيبها في التصدير
+ARCHIVE_FIELDS = ('id', 'pair', 'direction', 'entry_time', 'duration', 'expiration_time',
+                  'success_probability', 'result', 'created_at')
+
+
+def encode_cursor(created_at, signal_id):
+    """مؤشر الصفحة التالية من وقت إنشاء ومعرف آخر صف (نص آمن للروابط)"""
+    raw = f"{created_at.isoformat()}|{signal_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    قراءة مؤشر صفحة
+
+    Returns:
+        tuple: (وقت الإنشاء، المعرف)
+
+    Raises:
+        ValueError: إذا كان المؤشر غير صالح
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, signal_id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(signal_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid archive cursor: {cursor}") from e
+
+
+def _serialize(row):
+    """صف الأرشيف كقاموس قابل للتحويل إلى JSON"""
+    record = dict(row._mapping)
+    for name in ('expiration_time', 'created_at'):
+        if record[name] is not None:
+            record[name] = record[name].isoformat()
+    return record
+
+
+class SignalArchive:
+    """استعلامات أرشيف الإشارات لجلسة قاعدة بيانات ونموذجي الإشارة والزوج"""
+
+    def __init__(self, session, signal_model, pair_model):
+        """
+        Args:
+            session: جلسة SQLAlchemy (مثل db.session)
+            signal_model: نموذج الإشارات (Signal)
+            pair_model: نموذج أزواج OTC (OTCPair)
+        """
+        self.session = session
+        self.signal = signal_model
+        self.pair = pair_model
+
+    def filters(self, pair_id=None, direction=None, result=None):
+        """
+        شروط تصفية الأرشيف
+
+        Args:
+            pair_id (int, optional): معرف الزوج
+            direction (str, optional): BUY أو SELL
+            result (str, optional): WIN أو LOSS، أو PENDING للإشارات بدون نتيجة
+
+        Returns:
+            list: شروط SQLAlchemy
+        """
+        signal = self.signal
+        criteria = []
+        if pair_id:
+            criteria.append(signal.pair_id == pair_id)
+        if direction:
+            criteria.append(signal.direction == direction)
+        if result == 'PENDING':
+            criteria.append(signal.result.is_(None))
+        elif result:
+            criteria.append(signal.result == result)
+        return criteria
+
+    def _statement(self, criteria):
+        """استعلام صفوف الأرشيف (أعمدة فقط مع رمز الزوج) من الأحدث إلى الأقدم"""
+        signal, pair = self.signal, self.pair
+        return select(
+            signal.id, pair.symbol.label('pair'), signal.direction, signal.entry_time, signal.duration,
+            signal.expiration_time, signal.success_probability, signal.result, signal.created_at
+        ).outerjoin(pair, pair.id == signal.pair_id).where(
+            signal.created_at.isnot(None), *criteria
+        ).order_by(signal.created_at.desc(), signal.id.desc())
+
+    def page(self, criteria=(), cursor=None, limit=ARCHIVE_PAGE_SIZE):
+        """
+        صفحة من الأرشيف بعد المؤشر المعطى
+
+        Args:
+            criteria (list): شروط التصفية
+            cursor (str, optional): مؤشر الصفحة التالية من الصفحة السابقة
+            limit (int): عدد الصفوف في الصفحة (بحد أقصى ARCHIVE_MAX_PAGE_SIZE)
+
+        Returns:
+            dict: signals (قائمة الصفوف) و next_cursor (أو None في الصفحة الأخيرة)
+
+        Raises:
+            ValueError: إذا كان المؤشر غير صالح
+        """
+        limit = max(1, min(limit, ARCHIVE_MAX_PAGE_SIZE))
+        statement = self._statement(criteria)
+        if cursor:
+            created_at, signal_id = decode_cursor(cursor)
+            statement = statement.where(tuple_(self.signal.created_at, self.signal.id) < (created_at, signal_id))
+
+        # صف إضافي لمعرفة وجود صفحة تالية بدون استعلام COUNT
+        rows = self.session.execute(statement.limit(limit + 1)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+        return {'signals': [_serialize(row) for row in rows], 'next_cursor': next_cursor}
+
+    def iter_batches(self, criteria=(), batch_size=EXPORT_BATCH_SIZE):
+        """
+        قراءة جميع صفوف الأرشيف على دفعات بمؤشر من جهة الخادم
+
+        Args:
+            criteria (list): شروط التصفية
+            batch_size (int): عدد الصفوف في كل دفعة
+
+        Yields:
+            list: قواميس صفوف الدفعة
+        """
+        result = self.session.execute(self._statement(criteria).execution_options(yield_per=batch_size))
+        for rows in result.partitions():
+            yield [_serialize(row) for row in rows]
+
+    def export_ndjson(self, criteria=(), batch_size=EXPORT_BATCH_SIZE):
+        """تصدير الأرشيف بصيغة NDJSON (سطر JSON لكل إشارة)، نص لكل دفعة"""
+        for batch in self.iter_batches(criteria, batch_size):
+            yield ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in batch)
+
+    def export_csv(self, criteria=(), batch_size=EXPORT_BATCH_SIZE):
+        """تصدير الأرشيف بصيغة CSV مع سطر العناوين، نص لكل دفعة"""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=ARCHIVE_FIELDS)
+        writer.writeheader()
+        yield buffer.getvalue()
+        for batch in self.iter_batches(criteria, batch_size):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(batch)
+            yield buffer.getvalue()
@@ -7,7 +7,12 @@ import math
 import random
 from datetime import datetime, timedelta
 
-from technical_analyzer import TechnicalAnalyzer
+from technical_analyzer import technical_analyzer
+from candle_store import get_candles
+from analysis_context import get_analysis
+from latency_tracer import traced
+from filter_pipeline import AdaptiveFilterPipeline, FilterStage
+from indicators import candle_columns, range_volatility
 from multi_timeframe_analyzer import get_multi_timeframe_signal
 from pocket_option_otc_pairs import get_all_valid_pairs as get_all_valid_otc_pairs
 from pocket_option_otc_pairs import get_pairs_with_good_payout as get_otc_pairs_with_good_payout
@@ -28,7 +33,7 @@ class SignalFilter:
     
     def __init__(self):
         """تهيئة مصفي الإشارات"""
-        self.technical_analyzer = TechnicalAnalyzer()
+        self.technical_analyzer = technical_analyzer
         
         # تعيين عتبات الثقة لكل نوع من الإشارات
         self.confidence_thresholds = {
@@ -50,6 +55,7 @@ class SignalFilter:
             'other': 0
         }
     
+    @traced('filter.signal_filter')
     def filter_signal(self, signal, signal_type='standard'):
         """
         تصفية الإشارة بناءً على المعايير المتقدمة
@@ -78,7 +84,24 @@ class SignalFilter:
         # تسجيل معلومات الإشارة المقترحة
         logger.info(f"Filtering signal: {pair} {direction} (probability: {probability}%)")
         
-        # الفحص 0: التحقق من نسبة ربح الزوج (يجب أن تكون 80% أو أعلى)
+        # الفحوص تعمل بالترتيب الأرخص أولاً حسب قياسات سلسلة المراحل
+        if signal_filter_pipeline.run(self, signal, signal_type) is not None:
+            return False
+        
+        # تحديث سجل الإشارات الأخيرة
+        self._update_recent_signals(signal)
+        
+        logger.info(f"Signal accepted: {signal['direction']} {signal['pair']} with {signal['probability']}% confidence")
+        return True
+    
+    def _reject(self, reason):
+        """تسجيل سبب الرفض في العداد وإعادة False"""
+        self.rejected_signals[reason] = self.rejected_signals.get(reason, 0) + 1
+        return False
+    
+    def _payout_stage(self, signal, signal_type):
+        """الفحص 0: التحقق من نسبة ربح الزوج (يجب أن تكون 80% أو أعلى)"""
+        pair = signal['pair']
         try:
             # تحديد نوع الزوج (عادي أو OTC) للتحقق من معدل العائد بشكل صحيح
             try:
@@ -107,8 +130,7 @@ class SignalFilter:
             if not payout_check_func(pair):
                 payout_rate = payout_rate_func(pair)
                 logger.info(f"Signal rejected: payout rate too low for {pair} ({payout_rate}% < 80%)")
-                self.rejected_signals['low_payout'] = self.rejected_signals.get('low_payout', 0) + 1
-                return False
+                return self._reject('low_payout')
             else:
                 payout_rate = payout_rate_func(pair)
                 logger.info(f"Pair {pair} has acceptable payout rate: {payout_rate}%")
@@ -116,45 +138,46 @@ class SignalFilter:
                 signal['payout_rate'] = payout_rate
         except Exception as e:
             logger.warning(f"Error checking payout rate: {e}")
-        
-        # الفحص 1: عتبة الثقة الدنيا حسب نوع الإشارة
+        return True
+    
+    def _confidence_stage(self, signal, signal_type):
+        """الفحص 1: عتبة الثقة الدنيا حسب نوع الإشارة"""
         confidence_threshold = self.confidence_thresholds.get(signal_type, 85)
-        if probability < confidence_threshold:
-            logger.info(f"Signal rejected: confidence {probability}% below threshold {confidence_threshold}%")
-            self.rejected_signals['low_confidence'] = self.rejected_signals.get('low_confidence', 0) + 1
-            return False
-        
-        # الفحص 2: تجنب تكرار نفس الزوج في وقت قصير
+        if signal['probability'] < confidence_threshold:
+            logger.info(f"Signal rejected: confidence {signal['probability']}% below threshold {confidence_threshold}%")
+            return self._reject('low_confidence')
+        return True
+    
+    def _recent_pair_stage(self, signal, signal_type):
+        """الفحص 2: تجنب تكرار نفس الزوج في وقت قصير"""
+        pair = signal['pair']
         for recent in self.recent_signals:
             if recent['pair'] == pair:
                 time_diff = (datetime.now() - recent['timestamp']).total_seconds() / 60
                 if time_diff < 30:  # 30 دقيقة
                     logger.info(f"Signal rejected: same pair {pair} was used recently ({time_diff:.1f} min ago)")
-                    self.rejected_signals['recent_pair'] = self.rejected_signals.get('recent_pair', 0) + 1
-                    return False
-        
-        # الفحص 3: فحص ظروف السوق الحالية (التذبذب، حجم التداول، إلخ)
+                    return self._reject('recent_pair')
+        return True
+    
+    def _market_conditions_stage(self, signal, signal_type):
+        """الفحص 3: فحص ظروف السوق الحالية (التذبذب، حجم التداول، إلخ)"""
         if not self._check_market_conditions(signal):
-            logger.info(f"Signal rejected: unfavorable market conditions for {pair}")
-            self.rejected_signals['market_conditions'] = self.rejected_signals.get('market_conditions', 0) + 1
-            return False
-        
-        # الفحص 4: التحقق من اتساق الإشارة (للإشارات متعددة الأطر الزمنية)
+            logger.info(f"Signal rejected: unfavorable market conditions for {signal['pair']}")
+            return self._reject('market_conditions')
+        return True
+    
+    def _consistency_stage(self, signal, signal_type):
+        """الفحص 4: التحقق من اتساق الإشارة (للإشارات متعددة الأطر الزمنية)"""
         if signal_type == 'mtf' and not self._check_signal_consistency(signal):
-            logger.info(f"Signal rejected: inconsistent signal for {pair}")
-            self.rejected_signals['inconsistent'] = self.rejected_signals.get('inconsistent', 0) + 1
-            return False
-            
-        # الفحص 5: التحقق من عدم وجود إشارة عكسية عند مستويات الدعم والمقاومة
+            logger.info(f"Signal rejected: inconsistent signal for {signal['pair']}")
+            return self._reject('inconsistent')
+        return True
+    
+    def _support_resistance_stage(self, signal, signal_type):
+        """الفحص 5: التحقق من عدم وجود إشارة عكسية عند مستويات الدعم والمقاومة"""
         if not self._check_support_resistance_validity(signal):
-            logger.info(f"Signal rejected: invalid signal at support/resistance level for {pair}")
-            self.rejected_signals['invalid_sr_signal'] = self.rejected_signals.get('invalid_sr_signal', 0) + 1
-            return False
-        
-        # تحديث سجل الإشارات الأخيرة
-        self._update_recent_signals(signal)
-        
-        logger.info(f"Signal accepted: {signal['direction']} {signal['pair']} with {signal['probability']}% confidence")
+            logger.info(f"Signal rejected: invalid signal at support/resistance level for {signal['pair']}")
+            return self._reject('invalid_sr_signal')
         return True
     
     def _check_market_conditions(self, signal):
@@ -170,15 +193,13 @@ class SignalFilter:
         pair = signal['pair']
         
         # الحصول على بيانات السوق الحالية
-        market_data = self.technical_analyzer.price_data.get(pair, {})
-        if not market_data or 'candles' not in market_data or len(market_data['candles']) < 20:
+        candles = get_candles(pair)
+        if len(candles) < 20:
             # لا توجد بيانات كافية للتقييم
             return True
         
-        candles = market_data['candles']
-        
-        # حساب مؤشر التذبذب (Volatility)
-        volatility = self._calculate_volatility(candles)
+        # حساب مؤشر التذبذب (Volatility) - مشترك مع باقي المراحل لنفس الشموع
+        volatility = get_analysis(pair, candles, ('volatility', 20), lambda: self._calculate_volatility(candles))
         
         # تحليل العلاقة بين التذبذب واتجاه الإشارة
         if volatility > 2.0:  # تذبذب عالٍ جداً
@@ -207,20 +228,10 @@ class SignalFilter:
         if len(candles) < lookback:
             return 1.0  # قيمة افتراضية معتدلة
         
-        # استخدام آخر N شمعة
-        recent_candles = candles[-lookback:]
-        
-        # حساب متوسط حجم الشموع
-        heights = [(c['high'] - c['low']) / c['close'] * 100 for c in recent_candles]
-        avg_height = sum(heights) / len(heights)
+        _, highs, lows, closes = candle_columns(candles)
         
-        # حساب الانحراف المعياري للأسعار
-        closes = [c['close'] for c in recent_candles]
-        mean_price = sum(closes) / len(closes)
-        std_dev = math.sqrt(sum([(p - mean_price) ** 2 for p in closes]) / len(closes))
-        
-        # مؤشر التذبذب المركب
-        volatility = (avg_height + (std_dev / mean_price * 100)) / 2
+        # مؤشر التذبذب المركب: متوسط حجم الشموع ومعامل الاختلاف لأسعار الإغلاق
+        volatility = float(range_volatility(highs, lows, closes, lookback))
         
         return volatility
     
@@ -461,8 +472,7 @@ class SignalFilter:
         
         # استدعاء المحلل الفني للحصول على اتجاه الإطار الزمني الأكبر
         try:
-            from technical_analyzer import TechnicalAnalyzer
-            analyzer = TechnicalAnalyzer()
+            analyzer = self.technical_analyzer
             
             # فحص الاتجاه على الإطار الزمني M5 (5 دقائق)
             m5_trend = analyzer.get_trend(pair_symbol, timeframe=5)
@@ -631,6 +641,16 @@ class SignalFilter:
         logger.info("No suitable high payout pair found, attempting automatic pair selection...")
         return self.get_filtered_signal()
 
+# مراحل الفلترة بالترتيب الأصلي؛ السلسلة تعيد ترتيبها حسب التكلفة المقاسة (مشتركة بين جميع المصفيات)
+signal_filter_pipeline = AdaptiveFilterPipeline('signal_filter', [
+    FilterStage('payout', SignalFilter._payout_stage),
+    FilterStage('confidence', SignalFilter._confidence_stage),
+    FilterStage('recent_pair', SignalFilter._recent_pair_stage),
+    FilterStage('market_conditions', SignalFilter._market_conditions_stage),
+    FilterStage('consistency', SignalFilter._consistency_stage),
+    FilterStage('support_resistance', SignalFilter._support_resistance_stage),
+])
+
 # مرشح عالمي للإشارات للاستخدام في جميع أنحاء التطبيق
 signal_filter = SignalFilter()
 
@@ -12,6 +12,8 @@ import sys
 import socket
 from datetime import datetime, timedelta
 
+from latency_tracer import traced
+
 logger = logging.getLogger(__name__)
 
 # الثوابت - تم تعديلها لضمان الفاصل الزمني
@@ -83,7 +85,16 @@ def get_time_until_next_signal():
     
     return int(remaining_seconds)
 
+def get_time_until_signal_window():
+    """الوقت المتبقي بالثواني حتى تفتح نافذة توليد الإشارة التالية (بعد الحد الأدنى للفاصل الزمني)"""
+    if last_signal_time is None:
+        return 0
+    
+    elapsed_seconds = (datetime.utcnow() - last_signal_time).total_seconds()
+    return max(0.0, MIN_SIGNAL_INTERVAL_SECONDS - elapsed_seconds)
+
 # دالة للحصول على القفل المركزي من قاعدة البيانات
+@traced('generation.db_lock')
 def acquire_db_lock():
     """
     محاولة الحصول على القفل المركزي من قاعدة البيانات
@@ -204,6 +215,7 @@ def release_db_lock():
         return False
 
 
+@traced('generation.slot_check')
 def is_time_to_generate_signal():
     """التحقق بدقة إذا كان الوقت مناسبًا لإنشاء إشارة جديدة بالضبط كل 5 دقائق (300 ثانية)"""
     global last_signal_time, is_signal_generation_locked, signal_log
@@ -0,0 +1,108 @@
+"""
+معلمات فلترة الإشارات القابلة للضبط
+يجمع الثوابت المضبوطة يدوياً في وحدات الفلترة في مكان واحد، ويتيح قراءتها وتطبيقها
+وحفظها في ملف JSON يُحمّل عند بدء التشغيل (ينتجه walk_forward_optimizer.py)
+"""
+
+import importlib
+import json
+import logging
+import os
+from datetime import datetime
+
+from config import SIGNAL_PARAMETERS_FILE
+
+logger = logging.getLogger(__name__)
+
+# اسم المعلمة: (الوحدة، اسم الثابت)
+TUNABLE_PARAMETERS = {
+    'MIN_MULTI_STAGE_SCORE': ('multi_stage_signal_filter', 'MIN_MULTI_STAGE_SCORE'),
+    'MIN_CONFIRMATION_COUNT': ('multi_stage_signal_filter', 'MIN_CONFIRMATION_COUNT'),
+    'MARKET_TREND_WEIGHT': ('multi_stage_signal_filter', 'MARKET_TREND_WEIGHT'),
+    'TECHNICAL_INDICATORS_WEIGHT': ('multi_stage_signal_filter', 'TECHNICAL_INDICATORS_WEIGHT'),
+    'SUPPORT_RESISTANCE_WEIGHT': ('multi_stage_signal_filter', 'SUPPORT_RESISTANCE_WEIGHT'),
+    'OTC_BONUS_SCORE': ('multi_stage_signal_filter', 'OTC_BONUS_SCORE'),
+    # حد الجودة في AdvancedSignalFilter (يشمل المرشحات الموجودة ما لم يُعيَّن لها حد بـ set_min_quality_score)
+    'MIN_QUALITY_SCORE': ('advanced_signal_filter', 'MIN_QUALITY_SCORE'),
+    'OTC_TIMEFRAME_WEIGHTS': ('otc_analyzer_strategy', 'OTC_TIMEFRAME_WEIGHTS'),
+}
+
+
+def get_signal_parameters():
+    """
+    القيم الحالية لجميع المعلمات القابلة للضبط
+
+    Returns:
+        dict: {اسم المعلمة: القيمة}
+    """
+    parameters = {}
+    for name, (module_name, attribute) in TUNABLE_PARAMETERS.items():
+        value = getattr(importlib.import_module(module_name), attribute)
+        parameters[name] = dict(value) if isinstance(value, dict) else value
+    return parameters
+
+
+def apply_signal_parameters(parameters):
+    """
+    تطبيق قيم معلمات على الوحدات (تسري على الاستدعاءات التالية والمرشحات الموجودة)
+
+    Args:
+        parameters (dict): {اسم المعلمة: القيمة}؛ المعلمات غير المذكورة لا تتغير
+    """
+    for name, value in parameters.items():
+        if name not in TUNABLE_PARAMETERS:
+            logger.warning(f"Ignoring unknown signal parameter: {name}")
+            continue
+        module_name, attribute = TUNABLE_PARAMETERS[name]
+        module = importlib.import_module(module_name)
+        current = getattr(module, attribute)
+        if isinstance(current, dict):
+            # تحديث القاموس في مكانه حتى تبقى المراجع الحالية إليه صحيحة
+            current.update(value)
+        else:
+            setattr(module, attribute, value)
+
+
+def save_signal_parameters(parameters, path=SIGNAL_PARAMETERS_FILE, metadata=None):
+    """
+    حفظ المعلمات في ملف JSON قابل للتحميل
+
+    Args:
+        parameters (dict): {اسم المعلمة: القيمة}
+        path (str): مسار الملف
+        metadata (dict, optional): معلومات إضافية (مثل نتائج التحسين)
+    """
+    content = {
+        'parameters': parameters,
+        'created_at': datetime.utcnow().isoformat(),
+        'metadata': metadata or {}
+    }
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(content, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, path)
+    logger.info(f"Saved signal parameters to {path}")
+
+
+def load_signal_parameters(path=SIGNAL_PARAMETERS_FILE):
+    """
+    تحميل المعلمات من ملف وتطبيقها
+
+    Args:
+        path (str): مسار الملف
+
+    Returns:
+        dict: المعلمات المطبقة، أو None إذا لم يوجد ملف صالح
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            parameters = json.load(f)['parameters']
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Failed to load signal parameters from {path}: {e}")
+        return None
+
+    apply_signal_parameters(parameters)
+    logger.info(f"Loaded {len(parameters)} signal parameters from {path}")
+    return parameters
@@ -0,0 +1,223 @@
+"""
+التحضير المسبق للإشارة التالية
+يبدأ خيط في الخلفية قبل فتح نافذة الإشارة التالية بمهلة محددة (60 ثانية افتراضياً) فيجمع
+الأزواج المرشحة المتاحة مرة واحدة ويرتبها بالمقيّم المصفوفي، ثم يعيد الترتيب مع كل شمعة
+جديدة ويحسب تحليل أفضل مرشح مسبقاً في سياق التحليل المشترك. عند حلول موعد الإشارة يأخذ
+المولد المرشح الجاهز مباشرة بدلاً من اختيار الزوج وفحص توافره وتحليله على المسار الحرج
+"""
+
+import logging
+import threading
+import time
+
+from config import (SIGNAL_PRECOMPUTE_LEAD_SECONDS, SIGNAL_PRECOMPUTE_POLL_SECONDS,
+                    SIGNAL_PRECOMPUTE_MAX_AGE_SECONDS)
+from latency_tracer import traced
+
+logger = logging.getLogger(__name__)
+
+
+class SignalPrecomputer:
+    """
+    محضّر المرشح الأفضل للإشارة التالية
+
+    candidate_provider دالة يعينها التطبيق تعيد قائمة قواميس المرشحين المتاحين للإشارة التالية،
+    كل منها يحتوي على الأقل على symbol (رمز الزوج المستخدم للتحليل) و pair_id.
+    """
+
+    def __init__(self, lead_seconds=SIGNAL_PRECOMPUTE_LEAD_SECONDS, poll_seconds=SIGNAL_PRECOMPUTE_POLL_SECONDS,
+                 max_age_seconds=SIGNAL_PRECOMPUTE_MAX_AGE_SECONDS, analyzer=None, ranker=None,
+                 seconds_until_slot=None, clock=time.time):
+        """
+        Args:
+            lead_seconds (float): بدء التحضير قبل فتح نافذة الإشارة بهذا العدد من الثواني
+            poll_seconds (float): الفاصل بين فحوص وصول شموع جديدة
+            max_age_seconds (float): أقصى عمر للمرشح الجاهز قبل اعتباره قديماً
+            analyzer: المحلل الفني (الافتراضي: المحلل المشترك)
+            ranker: دالة ترتيب الأزواج (الافتراضي: pair_scorer.rank_pairs)
+            seconds_until_slot: دالة الوقت المتبقي لنافذة الإشارة (الافتراضي: من مدير الإشارات)
+            clock: دالة الوقت (للاختبار)
+        """
+        self.lead_seconds = lead_seconds
+        self.poll_seconds = poll_seconds
+        self.max_age_seconds = max_age_seconds
+        self.candidate_provider = None
+        self.clock = clock
+        self._analyzer = analyzer
+        self._ranker = ranker
+        self._seconds_until_slot = seconds_until_slot
+
+        self._candidates = None
+        self._ranked_time = None
+        self._best = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.stats = {'rankings': 0, 'used': 0, 'stale': 0, 'missed': 0}
+
+    @property
+    def analyzer(self):
+        if self._analyzer is None:
+            from technical_analyzer import technical_analyzer
+            self._analyzer = technical_analyzer
+        return self._analyzer
+
+    def _rank(self, symbols):
+        if self._ranker is None:
+            from pair_scorer import rank_pairs
+            self._ranker = rank_pairs
+        return self._ranker(symbols)
+
+    def seconds_until_slot(self):
+        """الوقت المتبقي بالثواني حتى تفتح نافذة الإشارة التالية"""
+        if self._seconds_until_slot is None:
+            import signal_manager
+            self._seconds_until_slot = signal_manager.get_time_until_signal_window
+        return self._seconds_until_slot()
+
+    def start(self):
+        """بدء خيط التحضير في الخلفية"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="signal_precompute", daemon=True)
+        self._thread.start()
+        logger.info(f"Signal pre-computation started ({self.lead_seconds:.0f}s before each signal window)")
+
+    def stop(self):
+        """إيقاف خيط التحضير"""
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                if self.seconds_until_slot() <= self.lead_seconds:
+                    self.refresh()
+                else:
+                    # الإشارة السابقة أُرسلت: المرشحون يُجمعون من جديد في نافذة التحضير التالية
+                    self.reset()
+            except Exception as e:
+                logger.error(f"Error while pre-computing the next signal: {e}")
+                logger.exception("Details:")
+            self._stop_event.wait(self.poll_seconds)
+
+    def reset(self):
+        """حذف المرشحين والمرشح الجاهز"""
+        with self._lock:
+            self._candidates = None
+            self._ranked_time = None
+            self._best = None
+
+    @traced('precompute.refresh')
+    def refresh(self):
+        """
+        تحديث المرشح الأفضل إذا وصلت شموع جديدة منذ آخر ترتيب
+
+        Returns:
+            dict: المرشح الأفضل الحالي أو None
+        """
+        with self._lock:
+            candidates = self._candidates
+        if candidates is None:
+            # التوافر وقائمة الأزواج النشطة لا تتغير مع الشموع فتُجمع مرة واحدة لكل إشارة
+            provided = self.candidate_provider() if self.candidate_provider else []
+            candidates = {}
+            for candidate in provided or []:
+                candidates.setdefault(candidate['symbol'], candidate)
+            with self._lock:
+                self._candidates = candidates
+        if not candidates:
+            return None
+
+        analyzer = self.analyzer
+        symbols = list(candidates)
+        for symbol in symbols:
+            analyzer._update_price_data(symbol)
+        candle_time = max((analyzer.store.get_last_time(symbol) or 0) for symbol in symbols)
+        with self._lock:
+            if candle_time == self._ranked_time:
+                return self._best
+
+        ranking = self._rank(symbols)
+        if not ranking:
+            return None
+        top = next((row for row in ranking if row['direction'] is not None), ranking[0])
+
+        # حساب التحليل الكامل مسبقاً: يُقرأ من سياق التحليل عند توليد الإشارة لنفس الشمعة، لذا
+        # اتجاه المرشح واحتماليته هما نتيجة هذا التحليل (لا تقدير المقيّم) وهما ما ستستخدمه الإشارة
+        analysis = analyzer.analyze_pair(top['pair'])
+
+        best = dict(candidates[top['pair']])
+        best.update({
+            'direction': analysis.get('direction'),
+            'probability': analysis.get('probability'),
+            'analysis': analysis,
+            'candle_time': candle_time,
+            'prepared_at': self.clock()
+        })
+        with self._lock:
+            self._ranked_time = candle_time
+            self._best = best
+            self.stats['rankings'] += 1
+        logger.info(f"Pre-computed next signal candidate: {best['symbol']} {best['direction']} "
+                    f"({best['probability']}%) from {len(symbols)} pairs")
+        return best
+
+    def take_prepared_candidate(self):
+        """
+        أخذ المرشح الجاهز للإشارة الحالية (مرة واحدة لكل إشارة)
+
+        Returns:
+            dict: المرشح مع pair_id و symbol و direction و probability و analysis (نتيجة analyze_pair
+                المحسوبة مسبقاً)، أو None إذا لم يتوفر مرشح حديث
+        """
+        with self._lock:
+            best = self._best
+            self._best = None
+            self._candidates = None
+            self._ranked_time = None
+
+            if best is None:
+                self.stats['missed'] += 1
+                return None
+            age = self.clock() - best['prepared_at']
+            if age > self.max_age_seconds:
+                self.stats['stale'] += 1
+            else:
+                self.stats['used'] += 1
+                return best
+
+        logger.warning(f"Discarding pre-computed candidate {best['symbol']} prepared {age:.0f}s ago")
+        return None
+
+    def is_current(self, candidate):
+        """هل التحليل المحضّر للمرشح ما زال لآخر شمعة (فتقرأه الإشارة من سياق التحليل بدون إعادة حساب)"""
+        return self.analyzer.store.get_last_time(candidate['symbol']) == candidate['candle_time']
+
+    def get_status(self):
+        """حالة التحضير وإحصائياته"""
+        with self._lock:
+            best = self._best
+            candidates = self._candidates
+            stats = dict(self.stats)
+        return {
+            'running': bool(self._thread and self._thread.is_alive()),
+            'lead_seconds': self.lead_seconds,
+            'candidate': best['symbol'] if best else None,
+            'candidates': len(candidates) if candidates else 0,
+            **stats
+        }
+
+
+# المحضّر المشترك على مستوى العملية
+signal_precomputer = SignalPrecomputer()
+
+
+def take_prepared_candidate():
+    """أخذ المرشح الجاهز للإشارة الحالية من المحضّر المشترك"""
+    return signal_precomputer.take_prepared_candidate()
+
+
+def get_precompute_status():
+    """حالة المحضّر المشترك"""
+    return signal_precomputer.get_status()
@@ -0,0 +1,257 @@
+"""
+جداول تجميع الإشارات المحدثة تدريجياً
+تحفظ عدد الإشارات والرابحة والخاسرة لكل يوم ولكل ساعة من كل يوم ولكل زوج واتجاه، وتُحدَّث
+عند كل flush يُدرج إشارة أو يغيّر نتيجتها (أو وقتها أو زوجها أو اتجاهها) أو يحذفها، ضمن نفس
+معاملة التعديل. بذلك تقرأ لوحات التحكم صفوفاً بعدد الأيام بدلاً من عدّ جدول الإشارات بالكامل.
+
+الجداول تُبنى أول مرة لقاعدة بيانات تحتوي على إشارات سابقة عبر python migrations.py (وليس عند
+بدء التطبيق، لأن عمليات الخادم المتعددة قد تبنيها في نفس الوقت). التعديلات الجماعية
+(query.update / query.delete) لا تمر بأحداث الجلسة؛ بعدها يجب إعادة بناء الجداول بتشغيل هذا الملف مباشرة:
+
+    python signal_rollups.py
+"""
+
+import logging
+
+from sqlalchemy import event, func, inspect, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from signal_statistics import SignalStatistics, day_key, result_counts
+
+logger = logging.getLogger(__name__)
+
+# أعمدة الإشارة التي تحدد مساهمتها في جداول التجميع
+TRACKED_ATTRIBUTES = ('created_at', 'pair_id', 'direction', 'result')
+
+# أعمدة العدادات في جميع جداول التجميع
+COUNT_COLUMNS = ('total', 'wins', 'losses')
+
+# مفتاح التعديلات المعلقة (الإشارات المحذوفة) في session.info بين before_flush و after_flush
+_PENDING_KEY = 'signal_rollup_pending'
+
+_UPSERT_DIALECTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+class SignalRollups:
+    """صيانة جداول تجميع الإشارات اليومية والساعية ولكل زوج واتجاه"""
+
+    def __init__(self, signal_model, daily_model, hourly_model, pair_model):
+        """
+        Args:
+            signal_model: نموذج الإشارات (Signal)
+            daily_model: جدول التجميع اليومي (SignalDailyStat)
+            hourly_model: جدول التجميع لكل ساعة من كل يوم (SignalHourlyStat)
+            pair_model: جدول التجميع لكل زوج واتجاه (SignalPairStat)
+        """
+        self.signal = signal_model
+        self.daily = daily_model
+        self.hourly = hourly_model
+        self.pair = pair_model
+
+    def register(self, session_target):
+        """
+        ربط التحديث التلقائي بأحداث الجلسة
+
+        Args:
+            session_target: الجلسة أو مصنع الجلسات (مثل db.session)
+        """
+        # تحميل القيمة السابقة قبل تعديل الأعمدة المتتبعة حتى لو كانت الإشارة منتهية الصلاحية في الجلسة
+        for name in TRACKED_ATTRIBUTES:
+            event.listen(getattr(self.signal, name), 'set', _keep_history, active_history=True)
+        event.listen(session_target, 'before_flush', self._before_flush)
+        event.listen(session_target, 'after_flush', self._after_flush)
+        event.listen(session_target, 'after_soft_rollback', _discard_pending)
+
+    def _contributions(self, values, sign):
+        """صفوف التجميع التي تدخل فيها إشارة بقيمها المعطاة ومقدار التغيير لكل منها"""
+        created_at, pair_id, direction, result = (values[name] for name in TRACKED_ATTRIBUTES)
+        counts = (sign, sign if result == 'WIN' else 0, sign if result == 'LOSS' else 0)
+        rows = []
+        if created_at is not None:
+            rows.append((self.daily, (created_at.date(),), counts))
+            rows.append((self.hourly, (created_at.date(), created_at.hour), counts))
+        if pair_id is not None:
+            rows.append((self.pair, (pair_id, direction), counts))
+        return rows
+
+    def _before_flush(self, session, flush_context, instances):
+        # قيم الإشارات المحذوفة تُقرأ قبل حذف صفوفها (قائمة جديدة لكل flush حتى لا تبقى
+        # تعديلات flush سابق فشل قبل after_flush)
+        pending = session.info[_PENDING_KEY] = []
+        for obj in session.deleted:
+            if isinstance(obj, self.signal):
+                pending.extend(self._contributions(_previous_values(obj), -1))
+
+    def _after_flush(self, session, flush_context):
+        # الإشارات الجديدة تملك هنا وقت الإنشاء الافتراضي ومعرف الزوج من العلاقة
+        rows = session.info.pop(_PENDING_KEY, [])
+        for obj in session.new:
+            if isinstance(obj, self.signal):
+                rows.extend(self._contributions(_current_values(obj), 1))
+        for obj in session.dirty:
+            if isinstance(obj, self.signal) and _tracked_changes(obj):
+                rows.extend(self._contributions(_previous_values(obj), -1))
+                rows.extend(self._contributions(_current_values(obj), 1))
+        if rows:
+            self._apply(session.connection(), rows)
+
+    def _apply(self, connection, rows):
+        """جمع التغييرات لكل صف وتطبيقها بعمليات upsert"""
+        deltas = {}
+        for model, key, counts in rows:
+            current = deltas.setdefault((model.__tablename__, key), [model, 0, 0, 0])
+            for k, value in enumerate(counts, start=1):
+                current[k] += value
+
+        upsert = _UPSERT_DIALECTS.get(connection.dialect.name)
+        # ترتيب ثابت للصفوف حتى لا تتعارض أقفال المعاملات المتزامنة
+        for (_, key), (model, *counts) in sorted(deltas.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+            if not any(counts):
+                continue
+            table = model.__table__
+            keys = dict(zip((column.name for column in table.primary_key.columns), key))
+            changes = dict(zip(COUNT_COLUMNS, counts))
+            if upsert is not None:
+                statement = upsert(table).values(**keys, **changes)
+                connection.execute(statement.on_conflict_do_update(
+                    index_elements=list(keys),
+                    set_={name: table.c[name] + statement.excluded[name] for name in COUNT_COLUMNS}))
+                continue
+            result = connection.execute(update(table).where(
+                *(table.c[name] == value for name, value in keys.items())
+            ).values({name: table.c[name] + value for name, value in changes.items()}))
+            if result.rowcount == 0:
+                connection.execute(table.insert().values(**keys, **changes))
+
+    def is_empty(self, session):
+        """هل جداول التجميع فارغة (لم تُبنَ بعد)"""
+        return session.query(self.daily).first() is None
+
+    def backfill(self, session):
+        """
+        إعادة بناء جميع جداول التجميع من جدول الإشارات في معاملة واحدة
+
+        Args:
+            session: جلسة SQLAlchemy
+
+        Returns:
+            dict: عدد الصفوف المكتوبة في كل جدول
+        """
+        signal = self.signal
+        if session.get_bind().dialect.name == 'postgresql':
+            # منع إدراج أو تعديل الإشارات أثناء إعادة البناء حتى لا تُحسب مرتين أو تُفقد
+            session.execute(text(f"LOCK TABLE {signal.__tablename__} IN SHARE MODE"))
+        for model in (self.daily, self.hourly, self.pair):
+            session.query(model).delete(synchronize_session=False)
+
+        day = func.date(signal.created_at)
+        hour = func.extract('hour', signal.created_at)
+        has_time = signal.created_at.isnot(None)
+        daily = [{'day': day_key(d), **dict(zip(COUNT_COLUMNS, counts))}
+                 for d, *counts in session.query(day, *result_counts(signal)).filter(has_time).group_by(day)]
+        hourly = [{'day': day_key(d), 'hour': int(h), **dict(zip(COUNT_COLUMNS, counts))}
+                  for d, h, *counts in session.query(day, hour, *result_counts(signal)).filter(
+                      has_time).group_by(day, hour)]
+        pairs = [{'pair_id': p, 'direction': direction, **dict(zip(COUNT_COLUMNS, counts))}
+                 for p, direction, *counts in session.query(
+                     signal.pair_id, signal.direction, *result_counts(signal)).filter(
+                     signal.pair_id.isnot(None)).group_by(signal.pair_id, signal.direction)]
+
+        written = {}
+        for model, rows in ((self.daily, daily), (self.hourly, hourly), (self.pair, pairs)):
+            if rows:
+                session.execute(model.__table__.insert(), rows)
+            written[model.__tablename__] = len(rows)
+        session.commit()
+        logger.info(f"Signal rollups rebuilt: {written}")
+        return written
+
+    def statistics(self, session, pair_model):
+        """
+        مجمّع إحصائيات يقرأ من جداول التجميع بدلاً من جدول الإشارات
+
+        Args:
+            session: جلسة SQLAlchemy
+            pair_model: نموذج أزواج OTC (OTCPair)
+
+        Returns:
+            RollupStatistics: بنفس واجهة SignalStatistics
+        """
+        return RollupStatistics(session, pair_model, self)
+
+
+class RollupStatistics(SignalStatistics):
+    """إحصائيات صفحات العرض من جداول التجميع (صفوف بعدد الأيام والأزواج فقط)"""
+
+    def __init__(self, session, pair_model, rollups):
+        super().__init__(session, rollups.signal, pair_model)
+        self.rollups = rollups
+
+    def totals(self):
+        daily = self.rollups.daily
+        return tuple(self.session.query(
+            *(func.coalesce(func.sum(getattr(daily, name)), 0) for name in COUNT_COLUMNS)).one())
+
+    def pair_direction_counts(self):
+        stats, pair = self.rollups.pair, self.pair
+        return self.session.query(
+            stats.pair_id, pair.symbol, stats.direction, stats.total, stats.wins, stats.losses
+        ).join(pair, pair.id == stats.pair_id).order_by(stats.pair_id).all()
+
+    def daily_counts(self, first_day):
+        daily = self.rollups.daily
+        return self.session.query(daily.day, daily.total, daily.wins, daily.losses).filter(
+            daily.day >= first_day
+        ).all()
+
+    def hourly_counts(self):
+        hourly = self.rollups.hourly
+        return self.session.query(
+            hourly.hour, *(func.sum(getattr(hourly, name)) for name in COUNT_COLUMNS)
+        ).group_by(hourly.hour).all()
+
+
+def _discard_pending(session, previous_transaction):
+    """حذف التعديلات المعلقة عند التراجع عن المعاملة (flush فاشل لم يصل إلى after_flush)"""
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _keep_history(target, value, oldvalue, initiator):
+    """مستمع فارغ؛ تسجيله مع active_history يكفي لتحميل القيمة السابقة"""
+    return value
+
+
+def _tracked_changes(obj):
+    """هل تغيّر أحد الأعمدة المتتبعة في الإشارة"""
+    attrs = inspect(obj).attrs
+    return any(attrs[name].history.has_changes() for name in TRACKED_ATTRIBUTES)
+
+
+def _current_values(obj):
+    return {name: getattr(obj, name) for name in TRACKED_ATTRIBUTES}
+
+
+def _previous_values(obj):
+    """قيم الأعمدة المتتبعة كما هي في قاعدة البيانات قبل التعديل"""
+    attrs = inspect(obj).attrs
+    values = {}
+    for name in TRACKED_ATTRIBUTES:
+        history = attrs[name].history
+        if history.deleted:
+            values[name] = history.deleted[0]
+        elif history.unchanged:
+            values[name] = history.unchanged[0]
+        elif history.added:
+            # القيمة السابقة كانت فارغة
+            values[name] = None
+        else:
+            values[name] = getattr(obj, name)
+    return values
+
+
+if __name__ == "__main__":
+    from app import app, db, signal_rollups
+
+    with app.app_context():
+        written = signal_rollups.backfill(db.session)
+        print(f"تمت إعادة بناء جداول تجميع الإشارات: {written}")
@@ -0,0 +1,296 @@
+"""
+طبقة تجميع إحصائيات الإشارات
+تحسب إجماليات صفحة الإحصائيات من استعلامات GROUP BY (الزوج × الاتجاه، اليوم لآخر سبعة
+أيام، الساعة) بدلاً من استعلام COUNT منفصل لكل يوم وكل زوج وكل ساعة، ثم تبني نفس بيانات
+القالب في Python. جميع الصفوف بالشكل (المفتاح...، العدد، الرابحة، الخاسرة) وهو نفس شكل
+جداول التجميع المحدثة تدريجياً في signal_rollups
+"""
+
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import case, func, literal
+
+# عدد الأيام في الرسم الأسبوعي (بما فيها اليوم الحالي)
+WEEKLY_DAYS = 7
+
+
+def _rate(successful, total):
+    """نسبة النجاح المئوية المقربة (0 إذا لم توجد إشارات)"""
+    return round((successful / total) * 100) if total > 0 else 0
+
+
+def day_key(value):
+    """اليوم كتاريخ (func.date يعيد نصاً في SQLite وتاريخاً في PostgreSQL)"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def result_counts(signal_model):
+    """أعمدة العدد الكلي وعدد الإشارات الرابحة والخاسرة لاستعلام تجميع"""
+    return (
+        func.count(signal_model.id),
+        func.coalesce(func.sum(case((signal_model.result == 'WIN', 1), else_=0)), 0),
+        func.coalesce(func.sum(case((signal_model.result == 'LOSS', 1), else_=0)), 0)
+    )
+
+
+class SignalStatistics:
+    """مجمّع إحصائيات الإشارات لجلسة قاعدة بيانات ونموذجي الإشارة والزوج"""
+
+    def __init__(self, session, signal_model, pair_model):
+        """
+        Args:
+            session: جلسة SQLAlchemy (مثل db.session)
+            signal_model: نموذج الإشارات (Signal)
+            pair_model: نموذج أزواج OTC (OTCPair)
+        """
+        self.session = session
+        self.signal = signal_model
+        self.pair = pair_model
+
+    def totals(self):
+        """
+        إجمالي عدد الإشارات والرابحة والخاسرة
+
+        Returns:
+            tuple: (العدد، الرابحة، الخاسرة)
+        """
+        return tuple(self.session.query(*result_counts(self.signal)).one())
+
+    def pair_direction_counts(self):
+        """
+        عدد الإشارات لكل زوج واتجاه (أزواج OTC الموجودة فقط)
+
+        Returns:
+            list: صفوف (معرف الزوج، رمز الزوج، الاتجاه، العدد، الرابحة، الخاسرة) بترتيب معرف الزوج
+        """
+        signal, pair = self.signal, self.pair
+        return self.session.query(
+            signal.pair_id, pair.symbol, signal.direction, *result_counts(signal)
+        ).join(pair, pair.id == signal.pair_id).group_by(
+            signal.pair_id, pair.symbol, signal.direction
+        ).order_by(signal.pair_id).all()
+
+    def daily_counts(self, first_day):
+        """
+        عدد الإشارات لكل يوم ابتداءً من يوم معين
+
+        Args:
+            first_day (date): أول يوم مطلوب
+
+        Returns:
+            list: صفوف (اليوم، العدد، الرابحة، الخاسرة)
+        """
+        signal = self.signal
+        day = func.date(signal.created_at)
+        return self.session.query(day, *result_counts(signal)).filter(
+            signal.created_at >= datetime.combine(first_day, time.min)
+        ).group_by(day).all()
+
+    def hourly_counts(self):
+        """
+        عدد الإشارات لكل ساعة من اليوم عبر جميع الأيام
+
+        Returns:
+            list: صفوف (الساعة، العدد، الرابحة، الخاسرة)
+        """
+        signal = self.signal
+        hour = func.extract('hour', signal.created_at)
+        return self.session.query(hour, *result_counts(signal)).group_by(hour).all()
+
+    def heatmap_counts(self, criteria=(), by_pair=False):
+        """
+        عدد الإشارات لكل يوم من الأسبوع وساعة (ولكل زوج اختيارياً) باستعلام GROUP BY واحد
+
+        Args:
+            criteria (list): شروط تصفية إضافية على الإشارات (التاريخ، الزوج، الاتجاه)
+            by_pair (bool): التجميع لكل زوج أيضاً
+
+        Returns:
+            list: صفوف (يوم الأسبوع 0=الأحد، الساعة، رمز الزوج أو None، العدد، الرابحة، الخاسرة)
+        """
+        signal, pair = self.signal, self.pair
+        weekday = func.extract('dow', signal.created_at)
+        hour = func.extract('hour', signal.created_at)
+        symbol = pair.symbol if by_pair else literal(None)
+        query = self.session.query(weekday, hour, symbol, *result_counts(signal))
+        if by_pair:
+            query = query.outerjoin(pair, pair.id == signal.pair_id)
+        group = (weekday, hour, pair.symbol) if by_pair else (weekday, hour)
+        return query.filter(signal.created_at.isnot(None), *criteria).group_by(*group).all()
+
+    def overview(self, today=None):
+        """
+        الإجماليات ونسبة نجاح اليوم (للوحات التحكم)
+
+        Args:
+            today (date, optional): اليوم الحالي (الافتراضي: تاريخ UTC الحالي)
+
+        Returns:
+            dict: total_signals و successful_signals و failed_signals و success_rate و today_signals
+                و today_success_rate
+        """
+        if today is None:
+            today = datetime.utcnow().date()
+        return build_overview(self.totals(), self.daily_counts(today), today)
+
+    def collect(self, today=None):
+        """
+        حساب جميع بيانات صفحة الإحصائيات
+
+        Args:
+            today (date, optional): اليوم الحالي (الافتراضي: تاريخ UTC الحالي)
+
+        Returns:
+            dict: stats و weekly_data و pair_stats و time_distribution كما يتوقعها القالب
+        """
+        if today is None:
+            today = datetime.utcnow().date()
+        first_day = today - timedelta(days=WEEKLY_DAYS - 1)
+        return build_statistics(self.totals(), self.pair_direction_counts(), self.daily_counts(first_day),
+                                self.hourly_counts(), today)
+
+
+def _daily_index(daily_rows):
+    """عدد الإشارات والرابحة لكل يوم من صفوف التجميع"""
+    days = Counter()
+    for day, total, wins, _ in daily_rows:
+        key = day_key(day)
+        days[key, 'ALL'] += total
+        days[key, 'WIN'] += wins
+    return days
+
+
+def build_overview(totals, daily_rows, today):
+    """
+    بناء الإجماليات ونسبة نجاح اليوم من صفوف التجميع
+
+    Args:
+        totals (tuple): (العدد، الرابحة، الخاسرة)
+        daily_rows (list): صفوف (اليوم، العدد، الرابحة، الخاسرة) تشمل اليوم الحالي
+        today (date): اليوم الحالي
+
+    Returns:
+        dict: الإجماليات كما يتوقعها القالب
+    """
+    total_signals, successful_signals, failed_signals = (int(value or 0) for value in totals)
+    days = _daily_index(daily_rows)
+    return {
+        'total_signals': total_signals,
+        'successful_signals': successful_signals,
+        'failed_signals': failed_signals,
+        'success_rate': _rate(successful_signals, total_signals),
+        'today_signals': days[today, 'ALL'],
+        'today_success_rate': _rate(days[today, 'WIN'], days[today, 'ALL'])
+    }
+
+
+def build_statistics(totals, pair_rows, daily_rows, hourly_rows, today):
+    """
+    بناء بيانات صفحة الإحصائيات من صفوف التجميع
+
+    Args:
+        totals (tuple): (العدد، الرابحة، الخاسرة)
+        pair_rows (list): صفوف (معرف الزوج، الرمز، الاتجاه، العدد، الرابحة، الخاسرة)
+        daily_rows (list): صفوف (اليوم، العدد، الرابحة، الخاسرة)
+        hourly_rows (list): صفوف (الساعة، العدد، الرابحة، الخاسرة)
+        today (date): اليوم الحالي
+
+    Returns:
+        dict: stats و weekly_data و pair_stats و time_distribution
+    """
+    days = _daily_index(daily_rows)
+    weekly_data = {'dates': [], 'success_rates': []}
+    for i in range(WEEKLY_DAYS - 1, -1, -1):
+        day = today - timedelta(days=i)
+        weekly_data['dates'].append(day.strftime('%m/%d'))
+        weekly_data['success_rates'].append(_rate(days[day, 'WIN'], days[day, 'ALL']))
+
+    # لكل زوج: عدد الإشارات وعدد الرابحة لكل اتجاه (None = جميع الاتجاهات)
+    pairs = {}
+    for pair_id, symbol, direction, total, wins, _ in pair_rows:
+        counts = pairs.setdefault(pair_id, {'symbol': symbol, 'counts': Counter()})['counts']
+        for key in (None, direction):
+            counts[key, 'ALL'] += total
+            counts[key, 'WIN'] += wins
+
+    pair_stats = []
+    for pair in pairs.values():
+        counts = pair['counts']
+        if counts[None, 'ALL'] == 0:
+            continue
+        pair_stats.append({
+            'symbol': pair['symbol'],
+            'total': counts[None, 'ALL'],
+            'success_rate': _rate(counts[None, 'WIN'], counts[None, 'ALL']),
+            'buy_signals': counts['BUY', 'ALL'],
+            'buy_success_rate': _rate(counts['BUY', 'WIN'], counts['BUY', 'ALL']),
+            'sell_signals': counts['SELL', 'ALL'],
+            'sell_success_rate': _rate(counts['SELL', 'WIN'], counts['SELL', 'ALL'])
+        })
+    # الأعلى نسبة نجاح أولاً (الترتيب مستقر حسب معرف الزوج عند التساوي)
+    pair_stats.sort(key=lambda x: x['success_rate'], reverse=True)
+
+    hours = Counter()
+    for hour, _, wins, losses in hourly_rows:
+        hours[int(hour), 'WIN'] += wins
+        hours[int(hour), 'LOSS'] += losses
+    time_distribution = {
+        'hours': [f"{hour}:00" for hour in range(24)],
+        'success_counts': [hours[hour, 'WIN'] for hour in range(24)],
+        'failure_counts': [hours[hour, 'LOSS'] for hour in range(24)]
+    }
+
+    return {
+        'stats': build_overview(totals, daily_rows, today),
+        'weekly_data': weekly_data,
+        'pair_stats': pair_stats,
+        'time_distribution': time_distribution
+    }
+
+
+# تصنيفات نتائج الخريطة الحرارية (أي نتيجة غير WIN و LOSS تُعد منتهية)
+HEATMAP_RESULTS = ('win', 'loss', 'expired')
+
+
+def _empty_matrix(rows):
+    return {name: [[0] * 24 for _ in range(rows)] for name in HEATMAP_RESULTS}
+
+
+def build_heatmap(rows, by_pair=False):
+    """
+    بناء مصفوفات الخريطة الحرارية من صفوف heatmap_counts
+
+    Args:
+        rows (list): صفوف (يوم الأسبوع 0=الأحد، الساعة، رمز الزوج، العدد، الرابحة، الخاسرة)
+        by_pair (bool): إضافة مصفوفات الزوج × الساعة
+
+    Returns:
+        dict: مصفوفات 7×24 (الصف 0 = الاثنين كما في datetime.weekday) لكل نتيجة، والإجمالي،
+            ومصفوفات الزوج × الساعة مرتبة حسب رمز الزوج عند الطلب
+    """
+    week = _empty_matrix(7)
+    pairs = {}
+    total = 0
+    for weekday, hour, symbol, count, wins, losses in rows:
+        # تحويل ترقيم SQL (الأحد = 0) إلى ترقيم Python (الاثنين = 0)
+        day, hour = (int(weekday) + 6) % 7, int(hour)
+        values = (wins, losses, count - wins - losses)
+        for name, value in zip(HEATMAP_RESULTS, values):
+            week[name][day][hour] += value
+        total += count
+        if by_pair:
+            pair_hours = pairs.setdefault(symbol or 'Unknown', {name: [0] * 24 for name in HEATMAP_RESULTS})
+            for name, value in zip(HEATMAP_RESULTS, values):
+                pair_hours[name][hour] += value
+
+    heatmap = {'total': total, 'day_of_week': week}
+    if by_pair:
+        symbols = sorted(pairs)
+        heatmap['pairs'] = {'symbols': symbols,
+                            **{name: [pairs[symbol][name] for symbol in symbols] for name in HEATMAP_RESULTS}}
+    return heatmap
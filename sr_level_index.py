@@ -0,0 +1,364 @@
+"""
+فهرس تزايدي لمستويات الدعم والمقاومة لكل زوج
+يحتفظ بنافذة التحليل ونقاط التأرجح المؤكدة وعدد مرات لمس المستويات الحالية، ويحدثها
+عند وصول كل شمعة بدلاً من إعادة بناء المستويات من كامل الشموع: تُؤكد نقطة التأرجح بعد
+إغلاق الشمعتين التاليتين لها، وتنتهي صلاحية النقاط والمستويات عند خروجها من النافذة.
+المدى الحقيقي ومتوسطه لكل نافذة تذبذب يُحسبان مرة واحدة لكل شمعة.
+النتيجة مطابقة تماماً لتحليل AdvancedSRAnalyzer لنفس النافذة
+"""
+
+import bisect
+import logging
+import operator
+import threading
+
+import numpy as np
+
+from numpy.lib.stride_tricks import sliding_window_view
+
+from advanced_sr_analyzer import sr_analyzer, sr_analyzer_otc, _local_extrema, _true_ranges
+from candle_store import CandleView, CANDLE_FIELDS, OPEN, HIGH, LOW, CLOSE, TIME
+
+logger = logging.getLogger(__name__)
+
+# عدد الشموع على جانبي نقطة التأرجح (نفس شرط القمم والقيعان المحلية في المحلل)
+SWING_LOOKAHEAD = 2
+
+# نوع المستوى وعمود السعر الطرفي ودالة المقارنة لنقاط التأرجح
+_LEVEL_KINDS = (('support', LOW, operator.lt), ('resistance', HIGH, operator.gt))
+
+
+class SRLevelIndex:
+    """
+    فهرس مستويات الدعم والمقاومة لنافذة شموع منزلقة لزوج واحد
+
+    الشموع محفوظة في مخزن حلقي بالحجم time_window (كل قيمة مكتوبة مرتين لتبقى النافذة متجاورة).
+    مواضع الشموع مطلقة (عدد الشموع منذ آخر إعادة بناء) حتى لا تتغير عند انزلاق النافذة.
+    """
+
+    def __init__(self, analyzer):
+        """
+        Args:
+            analyzer: AdvancedSRAnalyzer الذي يحدد معلمات التحليل (time_window والعتبات)
+        """
+        self.analyzer = analyzer
+        self.capacity = analyzer.time_window
+        self._data = np.zeros((len(CANDLE_FIELDS), 2 * self.capacity), dtype=np.float64)
+        # المدى الحقيقي لكل شمعة ومتوسطه لنافذة التذبذب المنتهية عندها (بنفس مواضع المخزن الحلقي)
+        self._true_ranges = np.zeros(2 * self.capacity, dtype=np.float64)
+        self._window_atr = np.zeros(2 * self.capacity, dtype=np.float64)
+        self._start = 0
+        self._size = 0
+        self._first = 0
+        # نقاط التأرجح لكل نوع مرتبة حسب (السعر، الموضع المطلق)
+        self._swings = {kind: [] for kind, _, _ in _LEVEL_KINDS}
+        # سعر نقطة التأرجح حسب (النوع، الموضع المطلق) لحذفها من القائمة المرتبة مباشرة
+        self._swing_prices = {}
+        # تجميع نقاط التأرجح في مستويات (يُحسب من جديد فقط عند تغير نقاط التأرجح)
+        self._clusters = {kind: None for kind, _, _ in _LEVEL_KINDS}
+        # عدد مرات اللمس والارتداد للمستويات المعروضة:
+        # (النوع، السعر، الموضع المطلق) -> [لمس، ارتداد، الحد الأدنى للمس، الحد الأعلى للمس]
+        self._counts = {}
+        self._result = None
+        self._lock = threading.Lock()
+        self.stats = {'appended': 0, 'rebuilds': 0, 'queries': 0}
+
+    @property
+    def window(self):
+        """نافذة الشموع الحالية بالشكل (5, n) بدون نسخ"""
+        return self._data[:, self._start:self._start + self._size]
+
+    def update(self, candles):
+        """
+        مزامنة الفهرس مع نافذة الشموع
+
+        الشموع الجديدة تُضاف واحدة تلو الأخرى، وآخر شمعة تُستبدل إذا تغيرت في مكانها؛ أي اختلاف
+        آخر في الشموع المشتركة (تاريخ مختلف أو فجوة) يؤدي إلى إعادة بناء الفهرس.
+
+        Args:
+            candles: CandleView بالشموع الحالية للزوج
+        """
+        n = min(self.capacity, len(candles))
+        incoming = candles.array[:, len(candles) - n:]
+        with self._lock:
+            if not self._sync(incoming):
+                self._rebuild(incoming)
+                self.stats['rebuilds'] += 1
+        return self
+
+    def _sync(self, incoming):
+        """تطبيق الفرق بين النافذة الحالية والنافذة الجديدة؛ False إذا تعذر ذلك"""
+        if not self._size:
+            return False
+        window = self.window
+        n = incoming.shape[1]
+        last_time = window[TIME, -1]
+        position = int(np.searchsorted(incoming[TIME], last_time))
+        if position >= n or incoming[TIME, position] != last_time:
+            return False
+
+        # الشموع المشتركة يجب أن تكون نفسها (باستثناء آخر شمعة التي قد تتحدث في مكانها)
+        kept = position + 1
+        dropped = self._size - kept
+        appended = n - kept
+        if dropped < 0 or appended > n // 2:
+            return False
+        if not np.array_equal(window[:, dropped:-1], incoming[:, :position]):
+            return False
+
+        if not np.array_equal(window[:, -1], incoming[:, position]):
+            self._replace_last(incoming[:, position])
+        for _ in range(dropped):
+            self._drop_first()
+        for k in range(kept, n):
+            self._append(incoming[:, k])
+        return True
+
+    def _rebuild(self, incoming):
+        """بناء الفهرس من نافذة كاملة"""
+        n = incoming.shape[1]
+        self._data[:, :n] = incoming
+        self._data[:, self.capacity:self.capacity + n] = incoming
+        self._start, self._size = 0, n
+        self._first = 0
+        self._counts = {}
+        self._result = None
+        self._swing_prices = {}
+        for kind, column, compare in _LEVEL_KINDS:
+            indices = _local_extrema(incoming[column], compare)
+            self._swings[kind] = sorted(zip(incoming[column, indices].tolist(), indices.tolist()))
+            self._swing_prices.update(((kind, index), price) for price, index in self._swings[kind])
+            self._clusters[kind] = None
+
+        true_ranges = np.zeros(n)
+        window_atr = np.zeros(n)
+        if n > 1:
+            true_ranges[1:] = _true_ranges(incoming[HIGH], incoming[LOW], incoming[CLOSE])
+        window = self.analyzer.volatility_window
+        if n > window:
+            window_atr[window:] = sliding_window_view(true_ranges[1:], window).mean(axis=1)
+        for ring, values in ((self._true_ranges, true_ranges), (self._window_atr, window_atr)):
+            ring[:n] = values
+            ring[self.capacity:self.capacity + n] = values
+
+    def _append(self, candle):
+        """إضافة شمعة جديدة في نهاية النافذة وتأكيد نقطة التأرجح التي اكتملت شموعها"""
+        if self._size == self.capacity:
+            self._drop_first()
+        position = (self._start + self._size) % self.capacity
+        self._data[:, position] = candle
+        self._data[:, position + self.capacity] = candle
+        self._size += 1
+        self._update_ranges()
+        self._adjust_counts(candle, 1)
+        self._confirm_swing(self._first + self._size - 1 - SWING_LOOKAHEAD)
+        self._result = None
+        self.stats['appended'] += 1
+
+    def _drop_first(self):
+        """إخراج أقدم شمعة من النافذة وإنهاء صلاحية نقطة التأرجح التي فقدت شرط الموضع"""
+        self._adjust_counts(self.window[:, 0], -1)
+        self._start = (self._start + 1) % self.capacity
+        self._size -= 1
+        self._first += 1
+        # المحلل لا يفحص أول شمعتين في النافذة
+        self._remove_swing(self._first + SWING_LOOKAHEAD - 1)
+        self._result = None
+
+    def _replace_last(self, candle):
+        """استبدال آخر شمعة (شمعة لم تكتمل تحدثت في مكانها)"""
+        last = self._first + self._size - 1
+        self._adjust_counts(self.window[:, -1], -1)
+        self._remove_swing(last - SWING_LOOKAHEAD)
+        position = (self._start + self._size - 1) % self.capacity
+        self._data[:, position] = candle
+        self._data[:, position + self.capacity] = candle
+        self._update_ranges()
+        self._adjust_counts(candle, 1)
+        self._confirm_swing(last - SWING_LOOKAHEAD)
+        self._result = None
+
+    def _update_ranges(self):
+        """حساب المدى الحقيقي لآخر شمعة ومتوسطه لنافذة التذبذب المنتهية عندها"""
+        if self._size < 2:
+            return
+        end = self._start + self._size
+        high, low = self._data[HIGH, end - 1], self._data[LOW, end - 1]
+        prev_close = self._data[CLOSE, end - 2]
+        true_range = max(max(high - low, abs(high - prev_close)), abs(low - prev_close))
+        position = (end - 1) % self.capacity
+        self._true_ranges[position] = self._true_ranges[position + self.capacity] = true_range
+
+        window = self.analyzer.volatility_window
+        if self._size > window:
+            window_atr = self._true_ranges[end - window:end].mean()
+            self._window_atr[position] = self._window_atr[position + self.capacity] = window_atr
+
+    def _confirm_swing(self, absolute):
+        """فحص الشمعة في الموضع المطلق absolute كقمة أو قاع محلي"""
+        relative = absolute - self._first
+        if relative < SWING_LOOKAHEAD or relative + SWING_LOOKAHEAD >= self._size:
+            return
+        start = self._start + relative
+        for kind, column, compare in _LEVEL_KINDS:
+            values = self._data[column, start - SWING_LOOKAHEAD:start + SWING_LOOKAHEAD + 1].tolist()
+            center = values.pop(SWING_LOOKAHEAD)
+            if all(compare(center, value) for value in values):
+                bisect.insort(self._swings[kind], (center, absolute))
+                self._swing_prices[(kind, absolute)] = center
+                self._clusters[kind] = None
+
+    def _remove_swing(self, absolute):
+        """حذف نقطة التأرجح في الموضع المطلق absolute إن وجدت"""
+        for kind, swings in self._swings.items():
+            price = self._swing_prices.pop((kind, absolute), None)
+            if price is not None:
+                del swings[bisect.bisect_left(swings, (price, absolute))]
+                self._clusters[kind] = None
+
+    def _adjust_counts(self, candle, sign):
+        """تحديث عدد مرات اللمس والارتداد للمستويات المتتبعة بأثر شمعة واحدة"""
+        if not self._counts:
+            return
+        open_, high, low, close = candle[OPEN], candle[HIGH], candle[LOW], candle[CLOSE]
+        rising, falling = close > open_, close < open_
+        for (kind, price, _), counts in self._counts.items():
+            extreme = low if kind == 'support' else high
+            if counts[2] <= extreme <= counts[3]:
+                counts[0] += sign
+                # نفس شرط الارتداد في AdvancedSRAnalyzer._count_level_touches
+                if (rising and close > price) if kind == 'support' else (falling and close < price):
+                    counts[1] += sign
+
+    def analysis(self):
+        """
+        تحليل الدعم والمقاومة للنافذة الحالية
+
+        Returns:
+            dict: نفس مخرجات AdvancedSRAnalyzer.analyze (للقراءة فقط، مشتركة حتى الشمعة التالية)
+        """
+        with self._lock:
+            self.stats['queries'] += 1
+            if self._result is None:
+                self._result = self._analyze()
+            return self._result
+
+    def _analyze(self):
+        if self._size < 20:
+            return {
+                "support_levels": [],
+                "resistance_levels": [],
+                "accumulation_zones": [],
+                "volatility_zones": [],
+                "breakout_points": []
+            }
+
+        analyzer = self.analyzer
+        window = self.window
+        candles = CandleView(window)
+        closes = window[CLOSE]
+        current_price = closes[-1]
+
+        levels = {}
+        for kind, column, _ in _LEVEL_KINDS:
+            if self._clusters[kind] is None:
+                swings = self._swings[kind]
+                self._clusters[kind] = analyzer._cluster_price_levels(
+                    np.array([price for price, _ in swings], dtype=np.float64),
+                    np.array([index for _, index in swings], dtype=np.int64))
+            prices, indices, touches = self._clusters[kind]
+            indices = indices - self._first
+            if kind == 'support':
+                valid = prices < current_price * (1 + analyzer.price_sensitivity)
+            else:
+                valid = prices > current_price * (1 - analyzer.price_sensitivity)
+            levels[kind] = analyzer._build_levels(candles, prices[valid], indices[valid], touches[valid], current_price)
+
+        breakout_points = analyzer._find_breakout_points(candles, closes, levels['support'], levels['resistance'])
+
+        # عدد مرات اللمس: من العدادات المحدثة تزايدياً، أو عد كامل للمستويات الجديدة فقط
+        counts = {}
+        for kind, column, _ in _LEVEL_KINDS:
+            keys = [(kind, level["price"], level["index"] + self._first) for level in levels[kind]]
+            missing = [key for key in keys if key not in self._counts]
+            if missing:
+                touches, bounces = analyzer._count_level_touches(
+                    [key[1] for key in missing], window[OPEN], window[column], closes, kind)
+                for key, touched, bounced in zip(missing, touches.tolist(), bounces.tolist()):
+                    price_range = key[1] * analyzer.clustering_threshold
+                    self._counts[key] = [touched, bounced, key[1] - price_range, key[1] + price_range]
+            for key in keys:
+                counts[key] = self._counts[key]
+            analyzer._score_levels(levels[kind], [counts[key][0] for key in keys],
+                                   [counts[key][1] for key in keys], self._size)
+        # المستويات التي لم تعد ضمن النتائج لا تحتاج إلى تحديث
+        self._counts = counts
+
+        # بدون أحجام تداول (أحجام ثابتة) لا تتجاوز أي نافذة المتوسط العام بعتبة أكبر من 1
+        if analyzer.volume_threshold >= 1:
+            accumulation_zones = []
+        else:
+            accumulation_zones = analyzer._find_accumulation_zones(candles, closes, np.ones(self._size))
+
+        return {
+            "support_levels": levels['support'],
+            "resistance_levels": levels['resistance'],
+            "accumulation_zones": accumulation_zones,
+            "volatility_zones": self._volatility_zones(closes),
+            "breakout_points": breakout_points,
+            "current_price": current_price
+        }
+
+    def _volatility_zones(self, closes):
+        """مناطق التذبذب من المدى الحقيقي المحفوظ لكل شمعة"""
+        start, end = self._start, self._start + self._size
+        true_ranges = self._true_ranges[start + 1:end]
+        atr = true_ranges.mean() if len(true_ranges) else 0
+        window = self.analyzer.volatility_window
+        if len(true_ranges) < window:
+            return []
+        return self.analyzer._volatility_zones(self._window_atr[start + window:end], atr, closes[window:])
+
+
+class SRLevelIndexRegistry:
+    """فهارس الدعم والمقاومة لكل (زوج، نوع الزوج)"""
+
+    def __init__(self):
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def get(self, pair_symbol, is_otc_pair=False):
+        """فهرس الزوج (يُنشأ عند أول استخدام)"""
+        key = (pair_symbol, bool(is_otc_pair))
+        index = self._indexes.get(key)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(key)
+                if index is None:
+                    index = SRLevelIndex(sr_analyzer_otc if is_otc_pair else sr_analyzer)
+                    self._indexes[key] = index
+        return index
+
+    def stats(self):
+        """إحصائيات جميع الفهارس"""
+        return {f"{pair}{' (OTC)' if is_otc else ''}": dict(index.stats)
+                for (pair, is_otc), index in list(self._indexes.items())}
+
+
+# السجل المشترك على مستوى العملية
+sr_level_indexes = SRLevelIndexRegistry()
+
+
+def get_sr_levels(pair_symbol, candles, is_otc_pair=False):
+    """
+    تحليل الدعم والمقاومة لآخر شموع الزوج عبر الفهرس التزايدي
+
+    Args:
+        pair_symbol (str): رمز الزوج
+        candles: CandleView بشموع الزوج
+        is_otc_pair (bool): ما إذا كان الزوج من أزواج OTC
+
+    Returns:
+        dict: نتائج تحليل الدعم والمقاومة
+    """
+    return sr_level_indexes.get(pair_symbol, is_otc_pair).update(candles).analysis()
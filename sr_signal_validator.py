@@ -7,7 +7,10 @@ import logging
 from datetime import datetime
 import numpy as np
 from advanced_sr_analyzer import analyze_sr_levels
+from analysis_context import get_analysis, signal_pair
+from latency_tracer import traced
 from pocket_option_otc_pairs import is_valid_otc_pair
+from price_level_index import PriceLevelIndex
 
 # تهيئة نظام السجلات
 logger = logging.getLogger(__name__)
@@ -32,6 +35,7 @@ class SRSignalValidator:
         
         logger.info("✅ تم تهيئة نظام التحقق من صحة الإشارات في نقاط الدعم والمقاومة")
     
+    @traced('filter.sr_validation')
     def validate_signal(self, signal, candles):
         """
         التحقق من صحة الإشارة بناءً على تحليل نقاط الدعم والمقاومة
@@ -78,7 +82,9 @@ class SRSignalValidator:
                 self.min_touch_count = 2
             
             # تحليل نقاط الدعم والمقاومة - تمرير معلومة كون الزوج من أزواج OTC أم لا
-            sr_analysis = analyze_sr_levels(candles, is_otc_pair=is_otc)
+            # (مشترك مع مراحل الفلترة الأخرى التي تفحص نفس الشموع)
+            sr_analysis = get_analysis(signal_pair(signal), candles, ('sr_levels', is_otc),
+                                       lambda: analyze_sr_levels(candles, is_otc_pair=is_otc, pair_symbol=signal_pair(signal)))
             
             # التحقق من الإشارة بناءً على تحليل نقاط الدعم والمقاومة
             if direction == 'BUY':
@@ -122,9 +128,10 @@ class SRSignalValidator:
         
         # 1. التحقق من القرب من مستوى دعم قوي (يفضل الشراء بالقرب من الدعم)
         close_to_support = False
-        for support in support_levels:
+        for support in PriceLevelIndex(support_levels).within(current_price, self.price_proximity_threshold,
+                                                              relative_to_level=True):
             price_diff_percent = (current_price - support['price']) / support['price']
-            if abs(price_diff_percent) < self.price_proximity_threshold and support['strength'] > 60:
+            if support['strength'] > 60:
                 close_to_support = True
                 
                 # التحقق من أن السعر فوق مستوى الدعم (ارتد بالفعل)
@@ -155,9 +162,8 @@ class SRSignalValidator:
         
         # 2. التحقق من القرب من مستوى مقاومة قوي (لا يفضل الشراء بالقرب من المقاومة)
         close_to_resistance = False
-        for resistance in resistance_levels:
-            price_diff_percent = (resistance['price'] - current_price) / current_price
-            if abs(price_diff_percent) < self.price_proximity_threshold and resistance['strength'] > 60:
+        for resistance in PriceLevelIndex(resistance_levels).within(current_price, self.price_proximity_threshold):
+            if resistance['strength'] > 60:
                 close_to_resistance = True
                 
                 # التحقق من اختراق المقاومة (إشارة إيجابية لاستمرار الصعود)
@@ -284,9 +290,9 @@ class SRSignalValidator:
         
         # 1. التحقق من القرب من مستوى مقاومة قوي (يفضل البيع بالقرب من المقاومة)
         close_to_resistance = False
-        for resistance in resistance_levels:
+        for resistance in PriceLevelIndex(resistance_levels).within(current_price, self.price_proximity_threshold):
             price_diff_percent = (resistance['price'] - current_price) / current_price
-            if abs(price_diff_percent) < self.price_proximity_threshold and resistance['strength'] > 60:
+            if resistance['strength'] > 60:
                 close_to_resistance = True
                 
                 # التحقق من أن السعر تحت مستوى المقاومة (ارتد بالفعل)
@@ -315,9 +321,9 @@ class SRSignalValidator:
         
         # 2. التحقق من القرب من مستوى دعم قوي (لا يفضل البيع بالقرب من الدعم)
         close_to_support = False
-        for support in support_levels:
-            price_diff_percent = (current_price - support['price']) / support['price']
-            if abs(price_diff_percent) < self.price_proximity_threshold and support['strength'] > 60:
+        for support in PriceLevelIndex(support_levels).within(current_price, self.price_proximity_threshold,
+                                                              relative_to_level=True):
+            if support['strength'] > 60:
                 close_to_support = True
                 
                 # التحقق من اختراق الدعم (إشارة إيجابية لاستمرار الهبوط)
@@ -519,53 +525,25 @@ class SRSignalValidator:
         if not support_levels or not resistance_levels:
             return None
         
-        # ترتيب مستويات الدعم والمقاومة
-        sorted_supports = sorted(support_levels, key=lambda x: x['price'], reverse=True)
-        sorted_resistances = sorted(resistance_levels, key=lambda x: x['price'])
+        # أقرب مستوى دعم تحت السعر الحالي وأقرب مستوى مقاومة فوقه
+        closest_support = PriceLevelIndex(support_levels).nearest_below(current_price)
+        closest_resistance = PriceLevelIndex(resistance_levels).nearest_above(current_price)
+        if not closest_support or not closest_resistance:
+            return None
         
         if direction == 'BUY':
-            # أقرب مستوى دعم تحت السعر الحالي
-            closest_support = None
-            for support in sorted_supports:
-                if support['price'] < current_price:
-                    closest_support = support
-                    break
+            risk = current_price - closest_support['price']
+            reward = closest_resistance['price'] - current_price
             
-            # أقرب مستوى مقاومة فوق السعر الحالي
-            closest_resistance = None
-            for resistance in sorted_resistances:
-                if resistance['price'] > current_price:
-                    closest_resistance = resistance
-                    break
-            
-            if closest_support and closest_resistance:
-                risk = current_price - closest_support['price']
-                reward = closest_resistance['price'] - current_price
-                
-                if risk > 0:
-                    return reward / risk
+            if risk > 0:
+                return reward / risk
         
         elif direction == 'SELL':
-            # أقرب مستوى مقاومة فوق السعر الحالي
-            closest_resistance = None
-            for resistance in sorted_resistances:
-                if resistance['price'] > current_price:
-                    closest_resistance = resistance
-                    break
+            risk = closest_resistance['price'] - current_price
+            reward = current_price - closest_support['price']
             
-            # أقرب مستوى دعم تحت السعر الحالي
-            closest_support = None
-            for support in sorted_supports:
-                if support['price'] < current_price:
-                    closest_support = support
-                    break
-            
-            if closest_support and closest_resistance:
-                risk = closest_resistance['price'] - current_price
-                reward = current_price - closest_support['price']
-                
-                if risk > 0:
-                    return reward / risk
+            if risk > 0:
+                return reward / risk
         
         return None
     
@@ -634,7 +612,7 @@ def validate_signal_at_sr_levels(signal, candles):
     
     return sr_validator.validate_signal(signal, candles)
 
-def is_price_at_key_level(price, candles, is_otc_pair=False):
+def is_price_at_key_level(price, candles, is_otc_pair=False, pair_symbol=None):
     """
     التحقق مما إذا كان السعر عند مستوى رئيسي (دعم أو مقاومة)
     
@@ -642,44 +620,40 @@ def is_price_at_key_level(price, candles, is_otc_pair=False):
         price (float): السعر المراد التحقق منه
         candles (list): بيانات الشموع
         is_otc_pair (bool): ما إذا كان الزوج من أزواج OTC الخاصة بمنصة Pocket Option
+        pair_symbol (str, optional): رمز الزوج (لاستخدام الفهرس التزايدي)
         
     Returns:
         tuple: (ما إذا كان السعر عند مستوى رئيسي، نوع المستوى، قوة المستوى)
     """
     # تحليل نقاط الدعم والمقاومة
-    sr_analysis = analyze_sr_levels(candles, is_otc_pair=is_otc_pair)
+    sr_analysis = analyze_sr_levels(candles, is_otc_pair=is_otc_pair, pair_symbol=pair_symbol)
     
     support_levels = sr_analysis.get('support_levels', [])
     resistance_levels = sr_analysis.get('resistance_levels', [])
     
-    # التحقق من القرب من مستوى دعم
-    for support in support_levels:
-        price_diff_percent = abs(price - support['price']) / support['price']
-        if price_diff_percent < sr_validator.price_proximity_threshold:
-            return True, 'support', support['strength']
-    
-    # التحقق من القرب من مستوى مقاومة
-    for resistance in resistance_levels:
-        price_diff_percent = abs(price - resistance['price']) / resistance['price']
-        if price_diff_percent < sr_validator.price_proximity_threshold:
-            return True, 'resistance', resistance['strength']
+    # التحقق من القرب من مستوى دعم ثم من مستوى مقاومة
+    for level_type, levels in (('support', support_levels), ('resistance', resistance_levels)):
+        nearby = PriceLevelIndex(levels).within(price, sr_validator.price_proximity_threshold, relative_to_level=True)
+        if nearby:
+            return True, level_type, nearby[0]['strength']
     
     # ليس قريباً من أي مستوى رئيسي
     return False, None, 0
 
-def forecast_price_movement(candles, is_otc_pair=False):
+def forecast_price_movement(candles, is_otc_pair=False, pair_symbol=None):
     """
     التنبؤ بحركة السعر المستقبلية بناءً على تحليل نقاط الدعم والمقاومة
     
     Args:
         candles (list): بيانات الشموع
         is_otc_pair (bool): ما إذا كان الزوج من أزواج OTC الخاصة بمنصة Pocket Option
+        pair_symbol (str, optional): رمز الزوج (لاستخدام الفهرس التزايدي)
         
     Returns:
         dict: توقعات حركة السعر
     """
     # تحليل نقاط الدعم والمقاومة
-    sr_analysis = analyze_sr_levels(candles, is_otc_pair=is_otc_pair)
+    sr_analysis = analyze_sr_levels(candles, is_otc_pair=is_otc_pair, pair_symbol=pair_symbol)
     current_price = sr_analysis.get('current_price')
     
     if not current_price:
@@ -690,11 +664,8 @@ def forecast_price_movement(candles, is_otc_pair=False):
     breakout_points = sr_analysis.get('breakout_points', [])
     
     # تحديد أقرب مستويات الدعم والمقاومة
-    sorted_supports = sorted(support_levels, key=lambda x: abs(x['price'] - current_price))
-    sorted_resistances = sorted(resistance_levels, key=lambda x: abs(x['price'] - current_price))
-    
-    closest_support = sorted_supports[0] if sorted_supports else None
-    closest_resistance = sorted_resistances[0] if sorted_resistances else None
+    closest_support = PriceLevelIndex(support_levels).nearest(current_price)
+    closest_resistance = PriceLevelIndex(resistance_levels).nearest(current_price)
     
     # تحليل الاتجاه العام
     trend = sr_validator._analyze_trend(candles, 14)
@@ -0,0 +1,451 @@
+"""
+محرك المؤشرات الفنية المتدفق
+يحتفظ بحالة كل مؤشر لكل زوج وإطار زمني ويحدّثها بتكلفة ثابتة عند إضافة شمعة جديدة
+بدلاً من إعادة حساب المؤشرات على كامل تاريخ الشموع في كل تحليل
+"""
+
+import logging
+import threading
+from collections import deque
+
+import numpy as np
+
+from candle_store import candle_store
+
+logger = logging.getLogger(__name__)
+
+
+class RollingWindow:
+    """
+    نافذة متحركة مع مجموع ومجموع مربعات يحدّثان بتكلفة ثابتة
+
+    تُحسب المجاميع حول قيمة مرجعية لتقليل أخطاء التقريب، ويعاد حسابها بدقة
+    مرة كل size تحديث (تكلفة ثابتة في المتوسط).
+    """
+
+    __slots__ = ('size', 'values', 'anchor', 'total', 'total_sq', '_since_resync')
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque()
+        self.anchor = 0.0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self._since_resync = 0
+
+    def push(self, value):
+        if not self.values:
+            self.anchor = value
+        shifted = value - self.anchor
+        self.values.append(value)
+        self.total += shifted
+        self.total_sq += shifted * shifted
+
+        if len(self.values) > self.size:
+            old = self.values.popleft() - self.anchor
+            self.total -= old
+            self.total_sq -= old * old
+
+        self._since_resync += 1
+        if self._since_resync >= self.size:
+            self._resync()
+
+    def _resync(self):
+        """إعادة حساب المجاميع من القيم الحالية حول مرجع جديد"""
+        self.anchor = self.values[-1]
+        shifted = [value - self.anchor for value in self.values]
+        self.total = sum(shifted)
+        self.total_sq = sum(value * value for value in shifted)
+        self._since_resync = 0
+
+    @property
+    def full(self):
+        return len(self.values) >= self.size
+
+    def sum(self):
+        return self.anchor * len(self.values) + self.total
+
+    def mean(self):
+        return self.anchor + self.total / len(self.values)
+
+    def variance(self):
+        """التباين (على مستوى المجتمع) للقيم في النافذة"""
+        count = len(self.values)
+        mean_shift = self.total / count
+        return max(0.0, self.total_sq / count - mean_shift * mean_shift)
+
+
+class RollingExtreme:
+    """أعلى أو أدنى قيمة في نافذة متحركة باستخدام طابور أحادي الاتجاه"""
+
+    __slots__ = ('size', 'is_max', 'items', 'index')
+
+    def __init__(self, size, is_max=True):
+        self.size = size
+        self.is_max = is_max
+        self.items = deque()
+        self.index = 0
+
+    def push(self, value):
+        items = self.items
+        if self.is_max:
+            while items and items[-1][1] <= value:
+                items.pop()
+        else:
+            while items and items[-1][1] >= value:
+                items.pop()
+        items.append((self.index, value))
+
+        if items[0][0] <= self.index - self.size:
+            items.popleft()
+        self.index += 1
+
+    @property
+    def value(self):
+        return self.items[0][1]
+
+
+class StreamingEMA:
+    """متوسط متحرك أسي يبدأ بالمتوسط البسيط لأول period قيمة"""
+
+    __slots__ = ('period', 'alpha', 'value', '_seed_sum', '_count')
+
+    def __init__(self, period):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.value = None
+        self._seed_sum = 0.0
+        self._count = 0
+
+    def push(self, x):
+        if self.value is None:
+            self._seed_sum += x
+            self._count += 1
+            if self._count == self.period:
+                self.value = self._seed_sum / self.period
+        else:
+            self.value = x * self.alpha + self.value * (1 - self.alpha)
+
+    @property
+    def ready(self):
+        return self.value is not None
+
+
+class StreamingRSI:
+    """مؤشر القوة النسبية (متوسط بسيط لآخر period تغير، مثل indicators.rsi)"""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.gains = RollingWindow(period)
+        self.losses = RollingWindow(period)
+        self.prev_close = None
+
+    def update(self, close):
+        if self.prev_close is not None:
+            change = close - self.prev_close
+            self.gains.push(change if change > 0 else 0.0)
+            self.losses.push(-change if change < 0 else 0.0)
+        self.prev_close = close
+
+    @property
+    def value(self):
+        if not self.gains.full:
+            return 50  # قيمة محايدة
+
+        avg_gain = self.gains.sum() / self.period
+        avg_loss = self.losses.sum() / self.period
+        if avg_loss <= 0:
+            return 100
+
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+class StreamingStochastic:
+    """مؤشر ستوكاستك: %K الخام من أعلى/أدنى نافذة k_period، ثم %K المنعّم و %D كمتوسط لـ %K"""
+
+    def __init__(self, k_period=14, smooth_k=3, smooth_d=3):
+        self.highs = RollingExtreme(k_period, is_max=True)
+        self.lows = RollingExtreme(k_period, is_max=False)
+        self.raw_k = RollingWindow(smooth_k)
+        self.smoothed_k = RollingWindow(smooth_d)
+        self.k_period = k_period
+        self.count = 0
+        self.k = 50
+        self.d = 50
+
+    def update(self, high, low, close):
+        self.highs.push(high)
+        self.lows.push(low)
+        self.count += 1
+        if self.count < self.k_period:
+            return
+
+        highest = self.highs.value
+        lowest = self.lows.value
+        raw = 100 * (close - lowest) / (highest - lowest) if highest != lowest else 50
+        self.raw_k.push(raw)
+
+        if self.raw_k.full:
+            self.k = self.raw_k.mean()
+            self.smoothed_k.push(self.k)
+            self.d = self.smoothed_k.mean() if self.smoothed_k.full else self.k
+        else:
+            self.k = raw
+            self.d = raw
+
+    @property
+    def value(self):
+        return (self.k, self.d)
+
+
+class StreamingMACD:
+    """مؤشر MACD مع خط الإشارة والهيستوجرام"""
+
+    def __init__(self, fast_period=12, slow_period=26, signal_period=9):
+        self.fast = StreamingEMA(fast_period)
+        self.slow = StreamingEMA(slow_period)
+        self.signal = StreamingEMA(signal_period)
+
+    def update(self, close):
+        self.fast.push(close)
+        self.slow.push(close)
+        if self.slow.ready:
+            self.signal.push(self.fast.value - self.slow.value)
+
+    @property
+    def value(self):
+        if not self.signal.ready:
+            return (0, 0, 0)  # قيم محايدة
+
+        macd_line = self.fast.value - self.slow.value
+        signal_line = self.signal.value
+        return (macd_line, signal_line, macd_line - signal_line)
+
+
+class StreamingBollinger:
+    """نطاقات بولنجر من مجموع ومجموع مربعات متحركين"""
+
+    def __init__(self, period=20, deviation=2.0):
+        self.window = RollingWindow(period)
+        self.deviation = deviation
+        self.last_close = None
+
+    def update(self, close):
+        self.window.push(close)
+        self.last_close = close
+
+    @property
+    def value(self):
+        if not self.window.full:
+            return {'sma': 0, 'upper': 0, 'lower': 0, 'bandwidth': 0, 'position': 0.5}
+
+        sma = self.window.mean()
+        std_dev = self.window.variance() ** 0.5
+        upper_band = sma + (self.deviation * std_dev)
+        lower_band = sma - (self.deviation * std_dev)
+
+        # عرض النطاق كنسبة مئوية من السعر وموقع السعر الحالي ضمن النطاق (0-1)
+        bandwidth = (upper_band - lower_band) / sma * 100
+        position = (self.last_close - lower_band) / (upper_band - lower_band) if upper_band != lower_band else 0.5
+
+        return {
+            'sma': sma,
+            'upper': upper_band,
+            'lower': lower_band,
+            'bandwidth': bandwidth,
+            'position': position
+        }
+
+
+class StreamingADX:
+    """مؤشر متوسط الاتجاه (ADX) مع +DI و -DI بتنعيم Wilder"""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev = None
+        self.count = 0
+        self.tr_sum = 0.0
+        self.plus_dm_sum = 0.0
+        self.minus_dm_sum = 0.0
+        self.adx = 0
+        self.plus_di = 0
+        self.minus_di = 0
+
+    def update(self, high, low, close):
+        if self.prev is None:
+            self.prev = (high, low, close)
+            return
+
+        prev_high, prev_low, prev_close = self.prev
+        self.prev = (high, low, close)
+
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        plus_dm = max(0, high - prev_high)
+        minus_dm = max(0, prev_low - low)
+        if plus_dm > minus_dm:
+            minus_dm = 0
+        elif minus_dm > plus_dm:
+            plus_dm = 0
+
+        self.count += 1
+        if self.count < self.period:
+            # تجميع المجموع الأول
+            self.tr_sum += tr
+            self.plus_dm_sum += plus_dm
+            self.minus_dm_sum += minus_dm
+            return
+
+        if self.count == self.period:
+            self.tr_sum += tr
+            self.plus_dm_sum += plus_dm
+            self.minus_dm_sum += minus_dm
+        else:
+            self.tr_sum = self.tr_sum - (self.tr_sum / self.period) + tr
+            self.plus_dm_sum = self.plus_dm_sum - (self.plus_dm_sum / self.period) + plus_dm
+            self.minus_dm_sum = self.minus_dm_sum - (self.minus_dm_sum / self.period) + minus_dm
+
+        self.plus_di = 100 * self.plus_dm_sum / self.tr_sum if self.tr_sum > 0 else 0
+        self.minus_di = 100 * self.minus_dm_sum / self.tr_sum if self.tr_sum > 0 else 0
+        di_sum = self.plus_di + self.minus_di
+        dx = 100 * abs(self.plus_di - self.minus_di) / di_sum if di_sum > 0 else 0
+
+        if self.count == self.period:
+            self.adx = dx  # القيمة الأولية هي DX الأول
+        else:
+            self.adx = (self.adx * (self.period - 1) + dx) / self.period
+
+    @property
+    def value(self):
+        return (self.adx, self.plus_di, self.minus_di)
+
+
+class IndicatorSet:
+    """مجموعة المؤشرات المتدفقة لزوج وإطار زمني واحد"""
+
+    def __init__(self):
+        self.rsi = StreamingRSI()
+        self.stochastic = StreamingStochastic()
+        self.macd = StreamingMACD()
+        self.bollinger = StreamingBollinger()
+        self.adx = StreamingADX()
+        self.last_time = None
+        self.last_candle = None
+        self.count = 0
+
+    def update(self, open_price, high, low, close, timestamp):
+        """تحديث جميع المؤشرات بشمعة جديدة"""
+        self.rsi.update(close)
+        self.stochastic.update(high, low, close)
+        self.macd.update(close)
+        self.bollinger.update(close)
+        self.adx.update(high, low, close)
+        self.last_time = timestamp
+        self.last_candle = [open_price, high, low, close, timestamp]
+        self.count += 1
+
+    def snapshot(self):
+        """القيم الحالية لجميع المؤشرات"""
+        stoch_k, stoch_d = self.stochastic.value
+        macd, signal, histogram = self.macd.value
+        adx, plus_di, minus_di = self.adx.value
+        return {
+            'rsi': self.rsi.value,
+            'stoch_k': stoch_k,
+            'stoch_d': stoch_d,
+            'macd': macd,
+            'macd_signal': signal,
+            'macd_histogram': histogram,
+            'bollinger': self.bollinger.value,
+            'adx': adx,
+            'plus_di': plus_di,
+            'minus_di': minus_di,
+            'candles': self.count
+        }
+
+
+class StreamingIndicatorEngine:
+    """
+    سجل حالات المؤشرات لكل (زوج، إطار زمني)
+
+    عند كل قراءة تُغذّى الحالة بالشموع الجديدة فقط من مصدر الشموع (عادة شمعة واحدة أو لا شيء)،
+    وتُبنى من التاريخ المتوفر مرة واحدة عند أول استخدام أو إذا انقطع التسلسل أو استُبدلت آخر
+    شمعة تمت معالجتها في مكانها (مثل الشمعة غير المكتملة في الإطارات الأعلى).
+    """
+
+    def __init__(self, store=None):
+        self.store = store if store is not None else candle_store
+        # مصادر الشموع لكل إطار زمني
+        self.sources = {'M1': self.store.get_candles}
+        self._states = {}
+        self._lock = threading.RLock()
+
+    def get(self, pair, timeframe='M1'):
+        """
+        الحصول على القيم الحالية للمؤشرات
+
+        Args:
+            pair (str): رمز الزوج
+            timeframe (str): الإطار الزمني
+
+        Returns:
+            dict: قيم المؤشرات
+        """
+        with self._lock:
+            return self._sync(pair, timeframe).snapshot()
+
+    def _sync(self, pair, timeframe):
+        """تغذية حالة المؤشرات بالشموع التي لم تُعالج بعد"""
+        source = self.sources.get(timeframe)
+        if source is None:
+            raise ValueError(f"Unsupported timeframe for streaming indicators: {timeframe}")
+
+        candles = source(pair)
+        times = candles.time
+        key = (pair, timeframe)
+        state = self._states.get(key)
+
+        start = 0
+        if state is not None and len(times) and state.last_time is not None and \
+                times[0] <= state.last_time <= times[-1]:
+            start = int(np.searchsorted(times, state.last_time, side='right'))
+            if candles.array[:, start - 1].tolist() != state.last_candle:
+                # آخر شمعة تمت معالجتها استُبدلت في مكانها (شمعة غير مكتملة تم تحديثها)
+                start = 0
+        if start == 0:
+            # أول استخدام أو انقطاع في التسلسل أو تعديل آخر شمعة: بناء الحالة من التاريخ المتوفر
+            state = IndicatorSet()
+
+        if start < len(times):
+            for open_price, high, low, close, timestamp in candles.array[:, start:].T.tolist():
+                state.update(open_price, high, low, close, timestamp)
+
+        self._states[key] = state
+        return state
+
+    def reset(self, pair=None):
+        """حذف الحالات المحفوظة (لزوج معين أو لجميع الأزواج)"""
+        with self._lock:
+            if pair is None:
+                self._states.clear()
+            else:
+                for key in [key for key in self._states if key[0] == pair]:
+                    del self._states[key]
+
+
+# المحرك المشترك المرتبط بمخزن الشموع المشترك
+indicator_engine = StreamingIndicatorEngine()
+
+
+def get_indicator_values(pair, timeframe='M1'):
+    """
+    الحصول على القيم الحالية للمؤشرات لزوج معين
+
+    Args:
+        pair (str): رمز الزوج
+        timeframe (str): الإطار الزمني
+
+    Returns:
+        dict: قيم المؤشرات
+    """
+    return indicator_engine.get(pair, timeframe)
@@ -0,0 +1,94 @@
+"""
+مولد الأسعار الاصطناعية المجمّع
+يولد مسارات OHLC ذات الارتداد إلى المتوسط لجميع الأزواج دفعة واحدة
+باستخدام عمليات مصفوفية (أزواج × شموع) بدلاً من حلقة لكل شمعة
+"""
+
+import time
+
+import numpy as np
+
+from candle_store import CANDLE_FIELDS, OPEN, HIGH, LOW, CLOSE, TIME
+from indicators import linear_recursion
+
+# عامل الارتداد إلى المتوسط (نفس القيمة المستخدمة في المحلل الفني)
+MEAN_REVERSION = 0.3
+
+# أدنى سعر مسموح به
+MIN_PRICE = 0.0001
+
+
+def generate_ohlc_batch(base_prices, volatilities, num_candles, seed=None,
+                        last_closes=None, end_time=None, timeframe_seconds=60):
+    """
+    توليد شموع OHLC اصطناعية لعدة أزواج دفعة واحدة
+
+    يتبع النموذج نفس توزيع المولد السابق لكل زوج:
+    close[t] = close[t-1] + (base - close[t-1]) * 0.3 + N(0, volatility)
+    مع open[t] = close[t-1] وظلال علوية/سفلية بقيمة |N(0, volatility / 2)|.
+
+    Args:
+        base_prices: السعر الأساسي لكل زوج بالشكل (P,)
+        volatilities: التقلب لكل زوج بالشكل (P,)
+        num_candles (int): عدد الشموع لكل زوج
+        seed (int | numpy.random.Generator, optional): بذرة المولد العشوائي
+        last_closes (optional): آخر سعر إغلاق معروف لكل زوج لمتابعة المسار منه؛
+            إذا لم يحدد يبدأ كل مسار من السعر الأساسي
+        end_time (float, optional): وقت آخر شمعة بالثواني منذ epoch (الافتراضي: الآن)
+        timeframe_seconds (int): المدة بين الشموع بالثواني
+
+    Returns:
+        numpy.ndarray: مصفوفة بالشكل (P, 5, num_candles) بترتيب CANDLE_FIELDS
+    """
+    rng = np.random.default_rng(seed)
+    base = np.asarray(base_prices, dtype=np.float64)
+    vol = np.asarray(volatilities, dtype=np.float64)
+    pairs = base.shape[0]
+
+    batch = np.empty((pairs, len(CANDLE_FIELDS), num_candles), dtype=np.float64)
+    if num_candles == 0:
+        return batch
+
+    noise = rng.standard_normal((pairs, num_candles)) * vol[:, None]
+    if last_closes is None:
+        # المسار الجديد يبدأ من السعر الأساسي تماماً
+        noise[:, 0] = 0.0
+        initial = np.zeros(pairs)
+    else:
+        initial = np.asarray(last_closes, dtype=np.float64) - base
+
+    closes = base[:, None] + linear_recursion(noise, 1.0 - MEAN_REVERSION, initial)
+    for p in np.flatnonzero((closes < MIN_PRICE).any(axis=1)):
+        # الحد الأدنى يغيّر نقطة بداية الخطوة التالية (كما في المولد السابق)، فيُكمل المسار
+        # تسلسلياً من أول شمعة تحت الحد (حالة نادرة: تقلب كبير مقارنة بالسعر)
+        _floor_path(closes[p], base[p], noise[p])
+
+    if last_closes is None:
+        first_open = closes[:, 0] * (1 + rng.standard_normal(pairs) * vol * 0.5)
+    else:
+        first_open = np.asarray(last_closes, dtype=np.float64)
+
+    opens = batch[:, OPEN]
+    opens[:, 0] = first_open
+    opens[:, 1:] = closes[:, :-1]
+
+    wicks = np.abs(rng.standard_normal((2, pairs, num_candles))) * (vol * 0.5)[None, :, None]
+    batch[:, HIGH] = np.maximum(opens, closes) + wicks[0]
+    batch[:, LOW] = np.minimum(opens, closes) - wicks[1]
+    batch[:, CLOSE] = closes
+
+    if end_time is None:
+        end_time = time.time()
+    batch[:, TIME] = end_time - timeframe_seconds * np.arange(num_candles - 1, -1, -1)
+
+    return batch
+
+
+def _floor_path(closes, base, noise):
+    """إعادة حساب مسار زوج في مكانه ابتداءً من أول إغلاق تحت MIN_PRICE مع تطبيق الحد في كل خطوة"""
+    start = int(np.argmax(closes < MIN_PRICE))
+    closes[start] = MIN_PRICE
+    previous = MIN_PRICE
+    for t in range(start + 1, closes.shape[0]):
+        previous = max(MIN_PRICE, previous + (base - previous) * MEAN_REVERSION + noise[t])
+        closes[t] = previous
@@ -7,24 +7,182 @@
 import random
 import logging
 import math
+import time
 from datetime import datetime, timedelta
 import numpy as np
 from pocket_option_otc_pairs import is_valid_pair as is_valid_otc_pair, get_all_valid_pairs as get_all_valid_otc_pairs
 from market_pairs import is_valid_pair as is_valid_market_pair, get_all_valid_pairs as get_all_valid_market_pairs
+from candle_store import candle_store, OPEN, HIGH, LOW, CLOSE
+from analysis_context import get_analysis
+from candle_sources import SyntheticCandleSource, create_candle_source
+from streaming_indicators import indicator_engine, StreamingIndicatorEngine
+from candle_archive import candle_archive
+from timeframe_resampler import timeframe_resampler, TimeframeResampler, TIMEFRAME_SECONDS
+from indicators import candle_columns, linear_regression
 
 logger = logging.getLogger(__name__)
 
+# عدد الشموع المولدة عند تهيئة زوج جديد
+INITIAL_HISTORY_CANDLES = 100
+
+# تاريخ M1 الأولي اللازم لملء 100 شمعة M15 (يُحفظ منه في مخزن M1 آخر 100 شمعة فقط)
+HIGHER_TIMEFRAME_HISTORY_CANDLES = INITIAL_HISTORY_CANDLES * 15
+
+# شموع إضافية تولد قبل النافذة المحفوظة عند تعويض فترة خمول طويلة
+CATCH_UP_WARMUP_CANDLES = 100
+
+# رموز الاتجاه العام المستخدمة في قواعد التصويت المصفوفية
+TREND_CODES = {"STRONG_UP": 2, "UP": 1, "NEUTRAL": 0, "DOWN": -1, "STRONG_DOWN": -2}
+TREND_NAMES = {code: name for name, code in TREND_CODES.items()}
+
+# الحد الأدنى للفارق بين نقاط الشراء والبيع لاعتبار الإشارة واضحة
+MIN_SIGNAL_DIFF = 1.5
+
+
+def candle_patterns(candles):
+    """
+    كشف أنماط الشموع في آخر ثلاث شموع
+    
+    Args:
+        candles: مصفوفة بالشكل (P, 4, 3) لأسعار OHLC لآخر ثلاث شموع
+        
+    Returns:
+        dict: مصفوفات منطقية بطول P لكل نمط (after_downtrend و after_uptrend: الشمعتان السابقتان هابطتان أو صاعدتان)
+    """
+    o, h, l, c = candles[:, OPEN, -1], candles[:, HIGH, -1], candles[:, LOW, -1], candles[:, CLOSE, -1]
+    prev_open, prev_close = candles[:, OPEN, -2], candles[:, CLOSE, -2]
+    is_last_bullish = c > o
+    is_prev_bullish = prev_close > prev_open
+    is_prev2_bullish = candles[:, CLOSE, -3] > candles[:, OPEN, -3]
+    
+    # حجم جسم الشمعة كنسبة من مداها، والظلال السفلية والعلوية
+    body = np.abs(c - o)
+    total = h - l
+    with np.errstate(divide='ignore', invalid='ignore'):
+        body_ratio = np.where(total > 0, body / total, 0.0)
+    lower_shadow = np.minimum(o, c) - l
+    upper_shadow = h - np.maximum(o, c)
+    
+    return {
+        'doji': body_ratio < 0.15,
+        'hammer': (body_ratio < 0.3) & (lower_shadow > 2 * body) & (upper_shadow < 0.2 * body),
+        'shooting_star': (body_ratio < 0.3) & (upper_shadow > 2 * body) & (lower_shadow < 0.2 * body),
+        'after_downtrend': ~is_prev_bullish & ~is_prev2_bullish,
+        'after_uptrend': is_prev_bullish & is_prev2_bullish,
+        'bullish_engulfing': is_last_bullish & ~is_prev_bullish & (c > prev_open) & (o < prev_close),
+        'bearish_engulfing': ~is_last_bullish & is_prev_bullish & (c < prev_open) & (o > prev_close)
+    }
+
+
+def vote_signals(features):
+    """
+    قواعد تصويت الشراء/البيع للمؤشرات الفنية (جدول العتبات والأوزان الوحيد)
+    يستخدمها analyze_pair لزوج واحد ومقيّم الأزواج المصفوفي لجميع الأزواج
+    
+    Args:
+        features (dict): مصفوفات بنفس الطول لكل مؤشر: trend (رموز TREND_CODES) و price_angle و rsi
+            و stoch_k و stoch_d و macd و macd_signal و macd_histogram و bb_position و bb_bandwidth
+            و adx و plus_di و minus_di، و last_candles بالشكل (P, 4, 3) لآخر ثلاث شموع
+            (None إذا كانت الشموع أقل من ثلاث فتُتجاهل قواعد الأنماط)
+            
+    Returns:
+        tuple: (نقاط الشراء، نقاط البيع، النقاط المحايدة) كمصفوفات
+    """
+    trend = features['trend']
+    angle = features['price_angle']
+    rsi = features['rsi']
+    k, d = features['stoch_k'], features['stoch_d']
+    macd, signal, histogram = features['macd'], features['macd_signal'], features['macd_histogram']
+    position, bandwidth = features['bb_position'], features['bb_bandwidth']
+    adx, plus_di, minus_di = features['adx'], features['plus_di'], features['minus_di']
+    
+    # قواعد الاتجاه - وزن أعلى مع دمج زاوية السعر (زاوية حادة > 15 درجة، معتدلة > 5)
+    buy = np.select([trend == 2, trend == 1], [2.5, 1.5], 0.0)
+    sell = np.select([trend == -2, trend == -1], [2.5, 1.5], 0.0)
+    neutral = (trend == 0).astype(np.float64)
+    buy += np.select([angle > 15, angle > 5], [2, 1], 0)
+    sell += np.select([angle < -15, angle < -5], [2, 1], 0)
+    
+    # قواعد RSI: تشبع قوي وتشبع، ثم ميل خفيف في المنطقة الوسطية
+    sell += np.select([rsi > 80, rsi > 70, (rsi > 55) & (rsi <= 70)], [2, 1.5, 0.7], 0)
+    buy += np.select([rsi < 20, rsi < 30, (rsi >= 30) & (rsi < 45)], [2, 1.5, 0.7], 0)
+    
+    # مستويات ستوكاستك وتقاطعاته (التقاطع من منطقة التشبع أقوى)
+    sell += np.select([(k > 90) & (d > 90), (k > 80) & (d > 80)], [1.5, 1], 0)
+    buy += np.select([(k < 10) & (d < 10), (k < 20) & (d < 20)], [1.5, 1], 0)
+    cross = k - d
+    buy += np.where(k > d, np.select([(k < 30) & (cross > 3), k < 30, cross > 5], [1.5, 1, 1], 0.5), 0)
+    sell += np.where(k < d, np.select([(k > 70) & (-cross > 3), k > 70, -cross > 5], [1.5, 1, 1], 0.5), 0)
+    
+    # قواعد MACD: قوة الهيستوجرام والتقاطع (مضخمة ×10000)
+    histogram_strength = np.abs(histogram) * 10000
+    histogram_vote = np.select([histogram_strength > 10, histogram_strength > 5, histogram_strength > 1], [2, 1.5, 1], 0)
+    buy += np.where(histogram > 0, histogram_vote, 0)
+    sell += np.where(histogram < 0, histogram_vote, 0)
+    cross_strength = np.abs(macd - signal) * 10000
+    cross_vote = np.select([cross_strength > 5, cross_strength > 1], [1.5, 1], 0)
+    buy += np.where(macd > signal, cross_vote, 0)
+    sell += np.where(macd < signal, cross_vote, 0)
+    
+    # قواعد Bollinger Bands: موقع السعر من النطاق، والنطاق الضيق محايد والواسع جداً يرجح العودة للوسط
+    buy += np.select([position < 0.05, position < 0.2], [2.5, 1.5], 0)
+    sell += np.select([position > 0.95, position > 0.8], [2.5, 1.5], 0)
+    neutral += np.select([bandwidth < 1.0, bandwidth < 2.0], [1.5, 1], 0)
+    wide = bandwidth > 8.0
+    sell += wide & (position > 0.7)
+    buy += wide & (position < 0.3)
+    
+    # قواعد ADX: > 30 اتجاه قوي (تأثير يزيد مع ADX)، > 20 معتدل، وما دونه سوق بدون اتجاه
+    strong_trend = adx > 30
+    moderate_trend = (adx > 20) & ~strong_trend
+    no_trend = ~(adx > 20)
+    strength_factor = np.minimum(2.5, (adx - 30) / 10 + 1)
+    buy += np.where(strong_trend & (plus_di > minus_di), strength_factor, 0)
+    sell += np.where(strong_trend & (minus_di > plus_di), strength_factor, 0)
+    buy += moderate_trend & (plus_di - minus_di > 5)
+    sell += moderate_trend & (minus_di - plus_di > 5)
+    neutral += no_trend
+    buy += np.where(no_trend & (plus_di - minus_di > 10), 0.5, 0)
+    sell += np.where(no_trend & (minus_di - plus_di > 10), 0.5, 0)
+    
+    # أنماط آخر ثلاث شموع: الدوجي والمطرقة والنجمة الساقطة والابتلاع
+    if features['last_candles'] is None:
+        return buy, sell, neutral
+    patterns = candle_patterns(features['last_candles'])
+    neutral += patterns['doji']
+    buy += np.where(patterns['hammer'], np.where(patterns['after_downtrend'], 2, 1), 0)
+    sell += np.where(patterns['shooting_star'], np.where(patterns['after_uptrend'], 2, 1), 0)
+    buy += 1.5 * patterns['bullish_engulfing']
+    sell += 1.5 * patterns['bearish_engulfing']
+    
+    return buy, sell, neutral
+
+
 class TechnicalAnalyzer:
     """محلل فني يستخدم خوارزميات رياضية لمحاكاة تحليل الأسعار الحقيقية"""
     
-    def __init__(self):
-        # قاموس لتخزين بيانات السعر الاصطناعية لكل زوج
-        self.price_data = {}
-        # تهيئة البيانات لجميع الأزواج المدعومة
+    def __init__(self, store=None, seed=None, archive=None, source=None):
+        # مخزن الشموع المشترك بين جميع المحللات في العملية
+        self.store = store if store is not None else candle_store
+        # مولد الأرقام العشوائية للبيانات الاصطناعية (بذرة صريحة لإعادة إنتاج نفس البيانات)
+        self.rng = np.random.default_rng(seed)
+        # المصدر الاصطناعي يخدم أيضاً الأزواج التي لا يوفرها مصدر آخر
+        self.synthetic = SyntheticCandleSource(self._get_base_price_for_pair, self._get_volatility_for_pair, seed=self.rng)
+        # مصدر الشموع (الافتراضي: المحدد في الإعدادات)
+        self.source = source if source is not None else create_candle_source(
+            base_price=self._get_base_price_for_pair, volatility=self._get_volatility_for_pair, seed=self.rng)
+        # أرشيف الشموع على القرص (يُستخدم افتراضياً مع المخزن المشترك والبيانات الاصطناعية فقط)
+        self.archive = archive if archive is not None else (
+            candle_archive if self.store is candle_store and isinstance(self.source, SyntheticCandleSource) else None)
+        # حالات المؤشرات المتدفقة لكل زوج وإطار زمني
+        self.indicators = indicator_engine if self.store is candle_store else StreamingIndicatorEngine(self.store)
+        # شموع M5 و M15 المجمعة من تاريخ M1
+        self.timeframes = timeframe_resampler if self.store is candle_store else TimeframeResampler(self.store)
+        # تهيئة البيانات لجميع الأزواج المدعومة (الأزواج الموجودة في المخزن لا يعاد توليدها)
         self._initialize_price_data()
         
     def _initialize_price_data(self):
-        """تهيئة بيانات السعر الأولية لجميع الأزواج المدعومة"""
+        """تهيئة بيانات السعر الأولية لجميع الأزواج المدعومة غير الموجودة في المخزن المشترك"""
         # جمع جميع الأزواج الصالحة (العادية و OTC)
         all_pairs = []
         
@@ -40,23 +198,67 @@ class TechnicalAnalyzer:
         except Exception as e:
             logger.error(f"Error getting OTC pairs: {e}")
         
-        logger.info(f"Initializing price data for {len(all_pairs)} pairs")
+        missing_pairs = [pair for pair in dict.fromkeys(all_pairs) if not self.store.has_pair(pair)]
+        
+        # استعادة التاريخ المحفوظ على القرص قبل اللجوء إلى البيانات الاصطناعية
+        missing_pairs = self._restore_pairs(missing_pairs)
+        if not missing_pairs:
+            return
+        
+        logger.info(f"Initializing price data for {len(missing_pairs)} pairs")
+        
+        # توليد تاريخ جميع الأزواج دفعة واحدة
+        self._seed_pairs(missing_pairs)
+    
+    def _restore_pairs(self, pairs):
+        """
+        تحميل تاريخ الأزواج من أرشيف الشموع على القرص
         
-        # تهيئة بيانات السعر لكل زوج
-        for pair in all_pairs:
-            # استخدام قيم أساسية واقعية لكل زوج
-            base_price = self._get_base_price_for_pair(pair)
-            volatility = self._get_volatility_for_pair(pair)
+        Args:
+            pairs (list): الأزواج غير الموجودة في المخزن
             
-            # إنشاء تاريخ سعري لآخر 100 شمعة (كل شمعة دقيقة واحدة)
-            candles = self._generate_realistic_price_data(base_price, volatility, 100)
-            self.price_data[pair] = {
-                'base_price': base_price,
-                'volatility': volatility,
-                'candles': candles,
-                'trend': self._calculate_trend(candles),
-                'last_update': datetime.utcnow()
-            }
+        Returns:
+            list: الأزواج التي لا يوجد لها أرشيف كافٍ
+        """
+        if self.archive is None or not pairs:
+            return pairs
+        
+        start = time.perf_counter()
+        remaining = []
+        for pair in pairs:
+            history = self.archive.read(pair, HIGHER_TIMEFRAME_HISTORY_CANDLES)
+            if history is None or history.shape[1] < INITIAL_HISTORY_CANDLES:
+                remaining.append(pair)
+                continue
+            self.store.load(pair, history)
+            self.timeframes.seed(pair, history)
+        
+        restored = len(pairs) - len(remaining)
+        if restored:
+            logger.info(f"Restored candle history for {restored} pairs in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return remaining
+    
+    def _source_for(self, pair):
+        """مصدر شموع الزوج (المصدر الاصطناعي للأزواج غير المتوفرة في المصدر المحدد)"""
+        return self.source if self.source.has_pair(pair) else self.synthetic
+    
+    def _seed_pairs(self, pairs):
+        """تحميل تاريخ سعري أولي لمجموعة أزواج من مصدر الشموع وحفظه في المخزن المشترك"""
+        groups = {}
+        for pair in pairs:
+            groups.setdefault(self._source_for(pair), []).append(pair)
+        
+        for source, source_pairs in groups.items():
+            # تاريخ كافٍ للإطارات الأعلى (كل شمعة دقيقة واحدة)؛ مخزن M1 يحتفظ بآخر 100 شمعة
+            history = source.history(source_pairs, HIGHER_TIMEFRAME_HISTORY_CANDLES)
+            for pair, block in zip(source_pairs, history):
+                if block.shape[1] == 0:
+                    # لا توجد شموع متاحة بعد في المصدر؛ تعاد المحاولة عند الطلب التالي
+                    continue
+                self.store.load(pair, block)
+                self.timeframes.seed(pair, block)
+                if self.archive is not None:
+                    self.archive.record(pair, block)
     
     def _get_base_price_for_pair(self, pair):
         """تحديد السعر الأساسي المناسب لكل زوج"""
@@ -110,50 +312,6 @@ class TechnicalAnalyzer:
         # إذا كان الزوج معروفاً، استخدم قيمته، وإلا استخدم قيمة افتراضية
         return volatilities.get(pair, 0.0002)
     
-    def _generate_realistic_price_data(self, base_price, volatility, num_candles):
-        """توليد بيانات سعر واقعية باستخدام نموذج انحراف متوسط"""
-        # بدء البيانات بالسعر الأساسي
-        prices = [base_price]
-        
-        # استخدام عامل الارتداد لمحاكاة الحركة الطبيعية للسوق
-        for i in range(1, num_candles):
-            # استخدام نموذج انحراف متوسط مع عنصر عشوائي
-            mean_reversion = 0.3  # عامل الارتداد المتوسط
-            noise = np.random.normal(0, volatility)
-            prev_price = prices[-1]
-            
-            # حساب التغيير في السعر
-            price_change = (base_price - prev_price) * mean_reversion + noise
-            new_price = prev_price + price_change
-            
-            # التأكد من أن السعر إيجابي دائمًا
-            prices.append(max(0.0001, new_price))
-        
-        # تحويل القائمة إلى هيكل بيانات شمعدان (OHLC)
-        candles = []
-        for i in range(num_candles):
-            if i > 0:
-                prev_close = prices[i-1]
-            else:
-                prev_close = prices[0] * (1 + np.random.normal(0, volatility * 0.5))
-            
-            close = prices[i]
-            
-            # حساب فتح وأعلى وأدنى بطريقة واقعية
-            open_price = prev_close
-            high = max(open_price, close) + abs(np.random.normal(0, volatility * 0.5))
-            low = min(open_price, close) - abs(np.random.normal(0, volatility * 0.5))
-            
-            candles.append({
-                'open': open_price,
-                'high': high,
-                'low': low,
-                'close': close,
-                'time': datetime.utcnow() - timedelta(minutes=num_candles-i)
-            })
-        
-        return candles
-    
     def get_candles(self, pair, limit=100):
         """
         الحصول على الشموع لزوج معين
@@ -163,15 +321,50 @@ class TechnicalAnalyzer:
             limit: عدد الشموع المطلوبة
             
         Returns:
-            list: قائمة الشموع
+            CandleView: عرض بدون نسخ على الشموع في المخزن المشترك
+        """
+        # تحديث بيانات السعر أولاً
+        self._update_price_data(pair)
+        
+        return self.store.get_candles(pair, limit)
+    
+    def get_timeframe_candles(self, pair, timeframe=None, limit=None):
+        """
+        الحصول على شموع زوج لإطار زمني أعلى مجمعة من M1
+        
+        Args:
+            pair: رمز الزوج
+            timeframe: 'M1' أو 'M5' أو 'M15' (الافتراضي: قاموس بجميع الإطارات)
+            limit: عدد الشموع المطلوبة
+            
+        Returns:
+            CandleView أو dict: الشموع للإطار المطلوب أو قاموس {الإطار: الشموع}
         """
         # تحديث بيانات السعر أولاً
         self._update_price_data(pair)
         
-        # الحصول على الشموع والتأكد من العدد المناسب
-        candles = self.price_data[pair]['candles'][-limit:] if pair in self.price_data and 'candles' in self.price_data[pair] else []
+        if timeframe is None:
+            return self.timeframes.get_candles_dict(pair, limit)
+        return self.timeframes.get_candles(pair, timeframe, limit)
+    
+    def get_trend(self, pair, timeframe=1):
+        """
+        الاتجاه العام لزوج على إطار زمني معين
         
-        return candles
+        Args:
+            pair: رمز الزوج
+            timeframe: الإطار بالدقائق (1 أو 5 أو 15) أو باسمه ('M5')
+            
+        Returns:
+            str: STRONG_UP أو UP أو NEUTRAL أو DOWN أو STRONG_DOWN
+        """
+        if not isinstance(timeframe, str):
+            timeframe = f"M{timeframe}"
+        if timeframe not in TIMEFRAME_SECONDS:
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
+        
+        candles = self.get_timeframe_candles(pair, timeframe)
+        return self._calculate_trend(candles)
     
     def get_current_price(self, pair):
         """
@@ -187,98 +380,45 @@ class TechnicalAnalyzer:
         self._update_price_data(pair)
         
         # الحصول على آخر سعر إغلاق
-        if pair in self.price_data and 'candles' in self.price_data[pair] and len(self.price_data[pair]['candles']) > 0:
-            return self.price_data[pair]['candles'][-1]['close']
-        
-        return 0.0
+        return self.store.get_current_price(pair)
         
     def _update_price_data(self, pair):
-        """تحديث بيانات السعر بإضافة شمعة جديدة"""
-        if pair not in self.price_data:
+        """تحديث بيانات السعر بإضافة جميع الشموع المتاحة في المصدر منذ آخر شمعة"""
+        if not self.store.has_pair(pair):
             # إذا لم يكن الزوج موجودًا، قم بتهيئته
-            base_price = self._get_base_price_for_pair(pair)
-            volatility = self._get_volatility_for_pair(pair)
-            self.price_data[pair] = {
-                'base_price': base_price,
-                'volatility': volatility,
-                'candles': self._generate_realistic_price_data(base_price, volatility, 100),
-                'trend': None,
-                'last_update': datetime.utcnow()
-            }
-            return
-        
-        # تحديث فقط إذا مرت دقيقة على آخر تحديث
-        now = datetime.utcnow()
-        last_update = self.price_data[pair]['last_update']
-        if (now - last_update).total_seconds() < 60:
+            self._seed_pairs([pair])
             return
         
-        # استخراج البيانات الحالية
-        candles = self.price_data[pair]['candles']
-        base_price = self.price_data[pair]['base_price']
-        volatility = self.price_data[pair]['volatility']
-        
-        # حساب الشمعة الجديدة
-        prev_close = candles[-1]['close']
-        
-        # استخدام نموذج انحراف متوسط
-        mean_reversion = 0.3
-        noise = np.random.normal(0, volatility)
-        price_change = (base_price - prev_close) * mean_reversion + noise
-        new_close = prev_close + price_change
-        
-        # التأكد من أن السعر إيجابي دائمًا
-        new_close = max(0.0001, new_close)
-        
-        # إنشاء شمعة جديدة
-        open_price = prev_close
-        high = max(open_price, new_close) + abs(np.random.normal(0, volatility * 0.5))
-        low = min(open_price, new_close) - abs(np.random.normal(0, volatility * 0.5))
-        
-        new_candle = {
-            'open': open_price,
-            'high': high,
-            'low': low,
-            'close': new_close,
-            'time': now
-        }
-        
-        # إضافة الشمعة الجديدة وإزالة الشمعة الأقدم إذا تجاوزنا 100 شمعة
-        candles.append(new_candle)
-        if len(candles) > 100:
-            candles.pop(0)
-        
-        # تحديث الاتجاه وزمن التحديث
-        self.price_data[pair]['trend'] = self._calculate_trend(candles)
-        self.price_data[pair]['last_update'] = now
+        with self.store.lock:
+            # بعد فترة خمول طويلة لا يبقى في المخزن إلا آخر capacity شمعة، لذا تكفي هذه الشموع
+            # مع فترة إحماء كافية لنسيان نقطة البداية (عامل الارتداد يمحو أثرها خلال عشرات الشموع)
+            block = self._source_for(pair).updates(
+                pair,
+                self.store.get_last_time(pair),
+                self.store.get_current_price(pair),
+                self.store.capacity + CATCH_UP_WARMUP_CANDLES
+            )
+            if block.shape[1] == 0:
+                return
+            
+            # إضافة الشموع إلى المخزن الحلقي (تُزال الشموع الأقدم تلقائياً عند امتلائه)
+            self.store.extend(pair, block)
+            if self.archive is not None:
+                self.archive.record(pair, block)
     
     def _calculate_trend(self, candles):
         """حساب الاتجاه العام باستخدام تحليل الانحدار الخطي البسيط"""
         if len(candles) < 5:
             return "NEUTRAL"
         
-        # استخراج آخر 20 شمعة لتحديد الاتجاه
-        recent_candles = candles[-20:]
+        _, _, _, closes = candle_columns(candles)
         
         # حساب المتوسط المتحرك البسيط لآخر 5 و 20 شمعة
-        sma5 = sum(c['close'] for c in candles[-5:]) / 5
-        sma20 = sum(c['close'] for c in recent_candles) / 20
+        sma5 = closes[-5:].sum() / 5
+        sma20 = closes[-20:].sum() / 20
         
         # حساب انحدار السعر على مدار آخر 20 شمعة
-        y = [c['close'] for c in recent_candles]
-        x = list(range(len(y)))
-        
-        # حساب معامل الانحدار
-        x_mean = sum(x) / len(x)
-        y_mean = sum(y) / len(y)
-        
-        numerator = sum((x[i] - x_mean) * (y[i] - y_mean) for i in range(len(x)))
-        denominator = sum((x[i] - x_mean)**2 for i in range(len(x)))
-        
-        if denominator == 0:
-            slope = 0
-        else:
-            slope = numerator / denominator
+        slope, _, _ = linear_regression(closes[-20:])
         
         # تحديد قوة الاتجاه بناءً على معامل الانحدار والمتوسطات
         trend_strength = abs(slope) * 10000  # تضخيم للتسهيل
@@ -290,225 +430,6 @@ class TechnicalAnalyzer:
         else:
             return "NEUTRAL"
     
-    def _calculate_rsi(self, candles, period=14):
-        """حساب مؤشر القوة النسبية (RSI)"""
-        if len(candles) < period + 1:
-            return 50  # قيمة محايدة
-        
-        # حساب التغيرات في الأسعار
-        changes = [candles[i]['close'] - candles[i-1]['close'] for i in range(1, len(candles))]
-        
-        # فصل المكاسب والخسائر
-        gains = [change if change > 0 else 0 for change in changes]
-        losses = [abs(change) if change < 0 else 0 for change in changes]
-        
-        # استخدام آخر `period` من التغيرات
-        recent_gains = gains[-period:]
-        recent_losses = losses[-period:]
-        
-        # حساب متوسط المكاسب والخسائر
-        avg_gain = sum(recent_gains) / period
-        avg_loss = sum(recent_losses) / period
-        
-        # منع القسمة على صفر
-        if avg_loss == 0:
-            return 100
-        
-        # حساب RS و RSI
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return rsi
-    
-    def _calculate_stochastic(self, candles, k_period=14, smooth_k=3, smooth_d=3):
-        """حساب مؤشر ستوكاستك"""
-        if len(candles) < k_period:
-            return (50, 50)  # قيم محايدة
-        
-        # استخدام آخر k_period من الشموع
-        recent_candles = candles[-k_period:]
-        
-        # إيجاد أعلى وأدنى نقطة
-        highest_high = max(c['high'] for c in recent_candles)
-        lowest_low = min(c['low'] for c in recent_candles)
-        
-        # منع القسمة على صفر
-        if highest_high == lowest_low:
-            return (50, 50)
-        
-        # حساب %K
-        current_close = candles[-1]['close']
-        k_raw = 100 * (current_close - lowest_low) / (highest_high - lowest_low)
-        
-        # تنعيم %K
-        if len(candles) >= k_period + smooth_k:
-            k_values = []
-            for i in range(smooth_k):
-                candles_subset = candles[-(k_period + i):-i] if i > 0 else candles[-k_period:]
-                highest = max(c['high'] for c in candles_subset)
-                lowest = min(c['low'] for c in candles_subset)
-                close = candles[-(i+1)]['close']
-                if highest != lowest:
-                    k_values.append(100 * (close - lowest) / (highest - lowest))
-                else:
-                    k_values.append(50)
-            k = sum(k_values) / len(k_values)
-        else:
-            k = k_raw
-        
-        # تنعيم %D (متوسط %K)
-        if len(candles) >= k_period + smooth_k + smooth_d - 1:
-            d_values = []
-            for i in range(smooth_d):
-                candles_subset = candles[-(k_period + smooth_k + i):-i] if i > 0 else candles[-(k_period + smooth_k):]
-                highest = max(c['high'] for c in candles_subset[-k_period:])
-                lowest = min(c['low'] for c in candles_subset[-k_period:])
-                close = candles_subset[-1]['close']
-                if highest != lowest:
-                    d_values.append(100 * (close - lowest) / (highest - lowest))
-                else:
-                    d_values.append(50)
-            d = sum(d_values) / len(d_values)
-        else:
-            d = k
-        
-        return (k, d)
-    
-    def _calculate_macd(self, candles, fast_period=12, slow_period=26, signal_period=9):
-        """حساب مؤشر MACD"""
-        if len(candles) < slow_period + signal_period:
-            return (0, 0, 0)  # قيم محايدة
-        
-        # حساب المتوسط المتحرك الأسي السريع والبطيء
-        closes = [c['close'] for c in candles]
-        
-        # EMA السريع
-        fast_ema = closes[-fast_period:]
-        for i in range(len(candles) - fast_period):
-            fast_multiplier = 2 / (fast_period + 1)
-            fast_ema.append(closes[fast_period + i] * fast_multiplier + fast_ema[-1] * (1 - fast_multiplier))
-        
-        # EMA البطيء
-        slow_ema = closes[-slow_period:]
-        for i in range(len(candles) - slow_period):
-            slow_multiplier = 2 / (slow_period + 1)
-            slow_ema.append(closes[slow_period + i] * slow_multiplier + slow_ema[-1] * (1 - slow_multiplier))
-        
-        # حساب MACD
-        macd_line = fast_ema[-1] - slow_ema[-1]
-        
-        # حساب خط الإشارة (EMA لخط MACD)
-        if len(candles) >= slow_period + signal_period:
-            macd_values = [fast_ema[i-slow_period+fast_period] - slow_ema[i] for i in range(len(slow_ema))]
-            signal_ema = macd_values[-signal_period:]
-            for i in range(len(macd_values) - signal_period):
-                signal_multiplier = 2 / (signal_period + 1)
-                signal_ema.append(macd_values[signal_period + i] * signal_multiplier + signal_ema[-1] * (1 - signal_multiplier))
-            signal_line = signal_ema[-1]
-        else:
-            signal_line = macd_line
-        
-        # حساب مؤشر الهيستوجرام
-        histogram = macd_line - signal_line
-        
-        return (macd_line, signal_line, histogram)
-    
-    def _calculate_bollinger_bands(self, candles, period=20, deviation=2.0):
-        """حساب مؤشر Bollinger Bands"""
-        if len(candles) < period:
-            return {'sma': 0, 'upper': 0, 'lower': 0, 'bandwidth': 0, 'position': 0.5}
-            
-        prices = [candle['close'] for candle in candles[-period:]]
-        sma = sum(prices) / period
-        
-        # حساب الانحراف المعياري
-        variance = sum([(price - sma) ** 2 for price in prices]) / period
-        std_dev = variance ** 0.5
-        
-        upper_band = sma + (deviation * std_dev)
-        lower_band = sma - (deviation * std_dev)
-        
-        # حساب عرض النطاق كنسبة مئوية من السعر
-        bandwidth = (upper_band - lower_band) / sma * 100
-        
-        current_price = candles[-1]['close']
-        # موقع السعر الحالي ضمن النطاق (0-100%)
-        price_position = (current_price - lower_band) / (upper_band - lower_band) if upper_band != lower_band else 0.5
-        
-        return {
-            'sma': sma,
-            'upper': upper_band,
-            'lower': lower_band,
-            'bandwidth': bandwidth,
-            'position': price_position
-        }
-        
-    def _calculate_adx(self, candles, period=14):
-        """حساب مؤشر متوسط الاتجاه (ADX)"""
-        if len(candles) < period + 1:
-            return 0, 0, 0
-            
-        # حساب +DI و -DI
-        tr_list = []  # True Range
-        plus_dm_list = []  # Plus Directional Movement
-        minus_dm_list = []  # Minus Directional Movement
-        
-        for i in range(1, len(candles)):
-            high = candles[i]['high']
-            low = candles[i]['low']
-            prev_high = candles[i-1]['high']
-            prev_low = candles[i-1]['low']
-            prev_close = candles[i-1]['close']
-            
-            # حساب True Range
-            tr1 = high - low
-            tr2 = abs(high - prev_close)
-            tr3 = abs(low - prev_close)
-            tr = max(tr1, tr2, tr3)
-            tr_list.append(tr)
-            
-            # حساب Directional Movement
-            plus_dm = max(0, high - prev_high)
-            minus_dm = max(0, prev_low - low)
-            
-            if plus_dm > minus_dm:
-                minus_dm = 0
-            elif minus_dm > plus_dm:
-                plus_dm = 0
-                
-            plus_dm_list.append(plus_dm)
-            minus_dm_list.append(minus_dm)
-        
-        # حساب المتوسط الأول
-        tr_sum = sum(tr_list[:period])
-        plus_dm_sum = sum(plus_dm_list[:period])
-        minus_dm_sum = sum(minus_dm_list[:period])
-        
-        # حساب +DI و -DI
-        plus_di = 100 * plus_dm_sum / tr_sum if tr_sum > 0 else 0
-        minus_di = 100 * minus_dm_sum / tr_sum if tr_sum > 0 else 0
-        
-        # حساب DX
-        dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di) if (plus_di + minus_di) > 0 else 0
-        
-        # حساب ADX (متوسط DX)
-        adx = dx  # القيمة الأولية هي DX الأول
-        
-        # حساب ADX للفترات الإضافية
-        for i in range(period, len(tr_list)):
-            # حساب TR و +DM و -DM بشكل مستمر
-            tr_sum = tr_sum - (tr_sum / period) + tr_list[i]
-            plus_dm_sum = plus_dm_sum - (plus_dm_sum / period) + plus_dm_list[i]
-            minus_dm_sum = minus_dm_sum - (minus_dm_sum / period) + minus_dm_list[i]
-            
-            plus_di = 100 * plus_dm_sum / tr_sum if tr_sum > 0 else 0
-            minus_di = 100 * minus_dm_sum / tr_sum if tr_sum > 0 else 0
-            
-            dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di) if (plus_di + minus_di) > 0 else 0
-            adx = (adx * (period - 1) + dx) / period
-        
-        return adx, plus_di, minus_di
-    
     def analyze_pair(self, pair):
         """تحليل زوج العملات وتوليد إشارة بناءً على المؤشرات الفنية المتقدمة مع الذكاء الاصطناعي"""
         # التحقق من أن الزوج صالح (سواء كان من أزواج البورصة العادية أو أزواج OTC)
@@ -527,18 +448,35 @@ class TechnicalAnalyzer:
         # تحديث بيانات السعر
         self._update_price_data(pair)
         
-        # استخراج بيانات الشموع
-        candles = self.price_data[pair]['candles']
+        # استخراج بيانات الشموع من المخزن المشترك
+        candles = self.store.get_candles(pair)
         
-        # حساب المؤشرات المتقدمة
-        trend = self.price_data[pair]['trend']
-        rsi = self._calculate_rsi(candles)
-        stoch_k, stoch_d = self._calculate_stochastic(candles)
-        macd, signal, histogram = self._calculate_macd(candles)
+        # التحليل يُحسب مرة واحدة لكل شمعة جديدة (وقد يكون جاهزاً من مرحلة التحضير المسبق للإشارة)؛
+        # النسخة تحمي النتيجة المحفوظة من تعديلات المستدعي
+        analysis = get_analysis(pair, candles, ('technical_analysis',), lambda: self._analyze_candles(pair, candles))
+        return dict(analysis)
+    
+    def _analyze_candles(self, pair, candles):
+        """
+        توليد الإشارة من شموع الزوج وقيم مؤشراته المتدفقة الحالية
+        
+        Args:
+            pair: رمز الزوج
+            candles: شموع الزوج في المخزن المشترك
+            
+        Returns:
+            dict: الاتجاه والاحتمالية والمدة والتحليل النصي
+        """
+        # قراءة القيم الحالية للمؤشرات المتدفقة (تُحدّث بتكلفة ثابتة لكل شمعة جديدة)
+        trend = self._calculate_trend(candles)
+        values = self.indicators.get(pair)
+        rsi = values['rsi']
+        stoch_k, stoch_d = values['stoch_k'], values['stoch_d']
+        macd, signal, histogram = values['macd'], values['macd_signal'], values['macd_histogram']
         
         # المؤشرات الجديدة - Bollinger Bands و ADX (متوسط الاتجاه) لتحسين الدقة
-        bb = self._calculate_bollinger_bands(candles)
-        adx, plus_di, minus_di = self._calculate_adx(candles)
+        bb = values['bollinger']
+        adx, plus_di, minus_di = values['adx'], values['plus_di'], values['minus_di']
         
         # لوج المؤشرات للتشخيص
         logger.info(f"Technical indicators for {pair}:")
@@ -560,301 +498,33 @@ class TechnicalAnalyzer:
             price_angle = math.atan(price_change * 100) * (180 / math.pi)  # تحويل إلى درجات
             logger.info(f"  - Price angle: {price_angle:.2f} degrees")
         
-        # تحليل المؤشرات لتوليد إشارة
-        buy_signals = 0
-        sell_signals = 0
-        neutral_signals = 0
-        
-        # قواعد الاتجاه - وزن أعلى مع دمج زاوية السعر
-        if trend in ["STRONG_UP", "UP"]:
-            buy_signals += 2.5 if trend == "STRONG_UP" else 1.5
-        elif trend in ["STRONG_DOWN", "DOWN"]:
-            sell_signals += 2.5 if trend == "STRONG_DOWN" else 1.5
-        else:
-            neutral_signals += 1
-            
-        # استخدام زاوية السعر كمؤشر إضافي
-        if price_angle > 15:  # زاوية صعود حادة
-            buy_signals += 2
-            logger.info("  - Strong upward price angle detected")
-        elif price_angle < -15:  # زاوية هبوط حادة
-            sell_signals += 2
-            logger.info("  - Strong downward price angle detected")
-        elif price_angle > 5:  # زاوية صعود معتدلة
-            buy_signals += 1
-            logger.info("  - Moderate upward price angle detected")
-        elif price_angle < -5:  # زاوية هبوط معتدلة
-            sell_signals += 1
-            logger.info("  - Moderate downward price angle detected")
-        
-        # قواعد RSI - تحسين الترجيح وزيادة الدقة
-        if rsi > 80:
-            sell_signals += 2  # تشبع شراء قوي
-            logger.info("  - Strong overbought condition in RSI")
-        elif rsi > 70:
-            sell_signals += 1.5  # تشبع شراء
-            logger.info("  - Overbought condition in RSI")
-        elif rsi < 20:
-            buy_signals += 2   # تشبع بيع قوي
-            logger.info("  - Strong oversold condition in RSI")
-        elif rsi < 30:
-            buy_signals += 1.5   # تشبع بيع
-            logger.info("  - Oversold condition in RSI")
-        else:
-            # منطقة وسطية مع ترجيح أكثر دقة
-            if 30 <= rsi < 45:
-                buy_signals += 0.7  # ميل للصعود
-                logger.info("  - Bullish bias in RSI")
-            elif 55 < rsi <= 70:
-                sell_signals += 0.7  # ميل للهبوط
-                logger.info("  - Bearish bias in RSI")
-        
-        # قواعد ستوكاستك - تحسين الترجيح ودقة الكشف
-        if stoch_k > 90 and stoch_d > 90:
-            sell_signals += 1.5  # تشبع شراء قوي
-            logger.info("  - Strong overbought condition in Stochastic")
-        elif stoch_k > 80 and stoch_d > 80:
-            sell_signals += 1  # تشبع شراء
-            logger.info("  - Overbought condition in Stochastic")
-        elif stoch_k < 10 and stoch_d < 10:
-            buy_signals += 1.5   # تشبع بيع قوي
-            logger.info("  - Strong oversold condition in Stochastic")
-        elif stoch_k < 20 and stoch_d < 20:
-            buy_signals += 1   # تشبع بيع
-            logger.info("  - Oversold condition in Stochastic")
-        
-        # تقاطعات ستوكاستك - اهتمام أكبر بقوة التقاطع
-        if stoch_k > stoch_d:
-            # تقاطع صعودي
-            crossover_strength = stoch_k - stoch_d
-            
-            if stoch_k < 30 and crossover_strength > 3:
-                buy_signals += 1.5   # تقاطع صعودي قوي من منطقة تشبع بيع
-                logger.info("  - Strong bullish crossover in Stochastic from oversold area")
-            elif stoch_k < 30:
-                buy_signals += 1   # تقاطع صعودي من منطقة تشبع بيع
-                logger.info("  - Bullish crossover in Stochastic from oversold area")
-            elif crossover_strength > 5:
-                buy_signals += 1   # تقاطع صعودي قوي
-                logger.info("  - Strong bullish crossover in Stochastic")
-            else:
-                buy_signals += 0.5   # تقاطع صعودي عادي
-                logger.info("  - Normal bullish crossover in Stochastic")
-        elif stoch_k < stoch_d:
-            # تقاطع هبوطي
-            crossover_strength = stoch_d - stoch_k
-            
-            if stoch_k > 70 and crossover_strength > 3:
-                sell_signals += 1.5  # تقاطع هبوطي قوي من منطقة تشبع شراء
-                logger.info("  - Strong bearish crossover in Stochastic from overbought area")
-            elif stoch_k > 70:
-                sell_signals += 1  # تقاطع هبوطي من منطقة تشبع شراء
-                logger.info("  - Bearish crossover in Stochastic from overbought area")
-            elif crossover_strength > 5:
-                sell_signals += 1  # تقاطع هبوطي قوي
-                logger.info("  - Strong bearish crossover in Stochastic")
-            else:
-                sell_signals += 0.5  # تقاطع هبوطي عادي
-                logger.info("  - Normal bearish crossover in Stochastic")
-        
-        # قواعد MACD - تحسين الاعتماد على قوة المؤشر
-        histogram_strength = abs(histogram) * 10000  # تضخيم الهيستوجرام للتسهيل
-        logger.info(f"  - MACD Histogram strength: {histogram_strength:.2f}")
-        
-        if histogram > 0:
-            # هيستوجرام موجب (إشارة شراء)
-            if histogram_strength > 10:
-                buy_signals += 2  # إشارة قوية للشراء
-                logger.info("  - Strong positive MACD histogram")
-            elif histogram_strength > 5:
-                buy_signals += 1.5  # إشارة متوسطة للشراء
-                logger.info("  - Moderate positive MACD histogram")
-            elif histogram_strength > 1:
-                buy_signals += 1  # إشارة ضعيفة للشراء
-                logger.info("  - Weak positive MACD histogram")
-        elif histogram < 0:
-            # هيستوجرام سالب (إشارة بيع)
-            if histogram_strength > 10:
-                sell_signals += 2  # إشارة قوية للبيع
-                logger.info("  - Strong negative MACD histogram")
-            elif histogram_strength > 5:
-                sell_signals += 1.5  # إشارة متوسطة للبيع
-                logger.info("  - Moderate negative MACD histogram")
-            elif histogram_strength > 1:
-                sell_signals += 1  # إشارة ضعيفة للبيع
-                logger.info("  - Weak negative MACD histogram")
-        
-        # إشارات تقاطع MACD - تحسين الترجيح
-        macd_cross_strength = abs(macd - signal) * 10000  # تضخيم الفرق للتسهيل
-        logger.info(f"  - MACD crossover strength: {macd_cross_strength:.2f}")
-        
-        if macd > signal:
-            # تقاطع صعودي
-            if macd_cross_strength > 5:
-                buy_signals += 1.5   # تقاطع صعودي قوي
-                logger.info("  - Strong bullish MACD crossover")
-            elif macd_cross_strength > 1:
-                buy_signals += 1   # تقاطع صعودي عادي
-                logger.info("  - Normal bullish MACD crossover")
-        elif macd < signal:
-            # تقاطع هبوطي
-            if macd_cross_strength > 5:
-                sell_signals += 1.5  # تقاطع هبوطي قوي
-                logger.info("  - Strong bearish MACD crossover")
-            elif macd_cross_strength > 1:
-                sell_signals += 1  # تقاطع هبوطي عادي
-                logger.info("  - Normal bearish MACD crossover")
-        
-        # قواعد Bollinger Bands - استخدام المؤشر الجديد لتعزيز دقة الإشارات
-        current_price = candles[-1]['close']
-        bb_position = bb['position']  # موقع السعر بالنسبة للنطاق (0-1)
-        bb_bandwidth = bb['bandwidth']  # عرض النطاق كنسبة مئوية
-        
-        logger.info(f"  - Current price: {current_price:.4f}")
-        logger.info(f"  - BB position (0-1): {bb_position:.4f}")
-        
-        # تحليل موقع السعر من نطاق بولنجر
-        if bb_position < 0.05:
-            # السعر أقل من الحد السفلي بشكل كبير (احتمالية ارتداد)
-            buy_signals += 2.5
-            logger.info("  - Price significantly below lower Bollinger Band (strong oversold)")
-        elif bb_position < 0.2:
-            # السعر قريب من الحد السفلي (احتمالية ارتداد)
-            buy_signals += 1.5
-            logger.info("  - Price near lower Bollinger Band (oversold)")
-        elif bb_position > 0.95:
-            # السعر أعلى من الحد العلوي بشكل كبير (احتمالية تصحيح)
-            sell_signals += 2.5
-            logger.info("  - Price significantly above upper Bollinger Band (strong overbought)")
-        elif bb_position > 0.8:
-            # السعر قريب من الحد العلوي (احتمالية تصحيح)
-            sell_signals += 1.5
-            logger.info("  - Price near upper Bollinger Band (overbought)")
-        
-        # تحليل عرض نطاق بولنجر
-        if bb_bandwidth < 1.0:
-            # نطاق ضيق جداً - احتمالية حدوث اختراق قوي
-            neutral_signals += 1.5
-            logger.info("  - Very tight Bollinger Bands (preparing for volatility breakout)")
-        elif bb_bandwidth < 2.0:
-            # نطاق ضيق - احتمالية زيادة التذبذب قريباً
-            neutral_signals += 1
-            logger.info("  - Tight Bollinger Bands (potential increase in volatility)")
-        elif bb_bandwidth > 8.0:
-            # نطاق واسع جداً - تذبذب عالي واحتمالية تراجع إلى الوسط
-            if bb_position > 0.7:
-                sell_signals += 1  # احتمالية تراجع من القمة
-            elif bb_position < 0.3:
-                buy_signals += 1  # احتمالية ارتداد من القاع
-            logger.info("  - Wide Bollinger Bands (high volatility, potential mean reversion)")
-        
-        # قواعد ADX - استخدام مؤشر قوة الاتجاه لتأكيد الإشارات
-        # ADX > 25 يشير إلى اتجاه قوي، ADX < 20 يشير إلى عدم وجود اتجاه واضح
-        
-        if adx > 30:
-            logger.info(f"  - Strong trend detected (ADX: {adx:.2f})")
-            
-            # تأكيد اتجاه قوي - استخدم +DI و -DI لتحديد اتجاه الاتجاه
-            if plus_di > minus_di:
-                # اتجاه صعودي قوي
-                strength_factor = min(2.5, (adx - 30) / 10 + 1)  # أكبر ADX، أكبر التأثير
-                buy_signals += strength_factor
-                logger.info(f"  - Strong uptrend confirmed (ADX: {adx:.2f}, +DI: {plus_di:.2f}, -DI: {minus_di:.2f})")
-                logger.info(f"  - Added {strength_factor:.2f} to buy signals based on ADX strength")
-            elif minus_di > plus_di:
-                # اتجاه هبوطي قوي
-                strength_factor = min(2.5, (adx - 30) / 10 + 1)  # أكبر ADX، أكبر التأثير
-                sell_signals += strength_factor
-                logger.info(f"  - Strong downtrend confirmed (ADX: {adx:.2f}, +DI: {plus_di:.2f}, -DI: {minus_di:.2f})")
-                logger.info(f"  - Added {strength_factor:.2f} to sell signals based on ADX strength")
-        elif adx > 20:
-            logger.info(f"  - Moderate trend detected (ADX: {adx:.2f})")
-            
-            # اتجاه معتدل - استخدم +DI و -DI بتأثير أقل
-            if plus_di > minus_di and plus_di - minus_di > 5:
-                buy_signals += 1
-                logger.info(f"  - Moderate uptrend confirmed (ADX: {adx:.2f}, +DI: {plus_di:.2f}, -DI: {minus_di:.2f})")
-            elif minus_di > plus_di and minus_di - plus_di > 5:
-                sell_signals += 1
-                logger.info(f"  - Moderate downtrend confirmed (ADX: {adx:.2f}, +DI: {plus_di:.2f}, -DI: {minus_di:.2f})")
-        else:
-            # السوق بدون اتجاه واضح
-            neutral_signals += 1
-            logger.info(f"  - No clear trend detected (ADX: {adx:.2f} below 20)")
-            
-            # في الأسواق بدون اتجاه، الترجيح الإضافي على أساس تقاطعات +DI و -DI
-            if plus_di > minus_di and plus_di - minus_di > 10:
-                buy_signals += 0.5
-                logger.info("  - Potential uptrend formation detected in range-bound market")
-            elif minus_di > plus_di and minus_di - plus_di > 10:
-                sell_signals += 0.5
-                logger.info("  - Potential downtrend formation detected in range-bound market")
-                
-        # تحليل أنماط الشموع - إضافة تحليل الأنماط لزيادة الدقة
-        if len(candles) >= 3:
-            last_candle = candles[-1]
-            prev_candle = candles[-2]
-            prev2_candle = candles[-3]
-            
-            # تعريف إذا كانت الشمعة صاعدة أو هابطة
-            is_last_bullish = last_candle['close'] > last_candle['open']
-            is_prev_bullish = prev_candle['close'] > prev_candle['open']
-            is_prev2_bullish = prev2_candle['close'] > prev2_candle['open']
-            
-            # حساب أحجام أجسام الشموع
-            last_body_size = abs(last_candle['close'] - last_candle['open'])
-            last_total_size = last_candle['high'] - last_candle['low']
-            last_body_ratio = last_body_size / last_total_size if last_total_size > 0 else 0
-            
-            prev_body_size = abs(prev_candle['close'] - prev_candle['open'])
-            prev_total_size = prev_candle['high'] - prev_candle['low']
-            prev_body_ratio = prev_body_size / prev_total_size if prev_total_size > 0 else 0
-            
-            # نمط الدوجي (جسم صغير جدًا مع ظلال)
-            if last_body_ratio < 0.15:
-                neutral_signals += 1
-                logger.info("  - Pattern: Doji candle detected (market indecision)")
-            
-            # نمط المطرقة (جسم صغير في الأعلى وظل سفلي طويل)
-            lower_shadow = min(last_candle['open'], last_candle['close']) - last_candle['low']
-            upper_shadow = last_candle['high'] - max(last_candle['open'], last_candle['close'])
-            
-            if (last_body_ratio < 0.3 and
-                lower_shadow > 2 * last_body_size and
-                upper_shadow < 0.2 * last_body_size):
-                # المطرقة بعد اتجاه هبوطي إشارة انعكاس صعودي قوية
-                if not is_prev_bullish and not is_prev2_bullish:
-                    buy_signals += 2
-                    logger.info("  - Pattern: Hammer after downtrend (strong reversal signal)")
-                else:
-                    buy_signals += 1
-                    logger.info("  - Pattern: Hammer detected (potential reversal)")
-            
-            # نمط النجمة الساقطة (جسم صغير في الأسفل وظل علوي طويل)
-            if (last_body_ratio < 0.3 and
-                upper_shadow > 2 * last_body_size and
-                lower_shadow < 0.2 * last_body_size):
-                # النجمة الساقطة بعد اتجاه صعودي إشارة انعكاس هبوطي قوية
-                if is_prev_bullish and is_prev2_bullish:
-                    sell_signals += 2
-                    logger.info("  - Pattern: Shooting star after uptrend (strong reversal signal)")
-                else:
-                    sell_signals += 1
-                    logger.info("  - Pattern: Shooting star detected (potential reversal)")
-            
-            # نمط الابتلاع الصعودي
-            if (is_last_bullish and not is_prev_bullish and
-                last_candle['close'] > prev_candle['open'] and
-                last_candle['open'] < prev_candle['close']):
-                buy_signals += 1.5
-                logger.info("  - Pattern: Bullish engulfing detected")
-            
-            # نمط الابتلاع الهبوطي
-            if (not is_last_bullish and is_prev_bullish and
-                last_candle['close'] < prev_candle['open'] and
-                last_candle['open'] > prev_candle['close']):
-                sell_signals += 1.5
-                logger.info("  - Pattern: Bearish engulfing detected")
+        # قوة هيستوجرام MACD وتقاطعه (مضخمة للتسهيل)
+        histogram_strength = abs(histogram) * 10000
+        macd_cross_strength = abs(macd - signal) * 10000
+        logger.info(f"  - MACD Histogram strength: {histogram_strength:.2f}, crossover strength: {macd_cross_strength:.2f}")
+        
+        # تحليل المؤشرات لتوليد إشارة (نفس قواعد التصويت التي يطبقها مقيّم الأزواج على جميع الأزواج)
+        features = {
+            'trend': TREND_CODES[trend],
+            'price_angle': price_angle,
+            'rsi': rsi,
+            'stoch_k': stoch_k,
+            'stoch_d': stoch_d,
+            'macd': macd,
+            'macd_signal': signal,
+            'macd_histogram': histogram,
+            'bb_position': bb['position'],
+            'bb_bandwidth': bb['bandwidth'],
+            'adx': adx,
+            'plus_di': plus_di,
+            'minus_di': minus_di
+        }
+        features = {name: np.array([value], dtype=np.float64) for name, value in features.items()}
+        features['last_candles'] = candles.array[None, :4, -3:] if len(candles) >= 3 else None
+        patterns = candle_patterns(features['last_candles']) if features['last_candles'] is not None else None
+        buy_votes, sell_votes, neutral_votes = vote_signals(features)
+        buy_signals, sell_signals, neutral_signals = float(buy_votes[0]), float(sell_votes[0]), float(neutral_votes[0])
+        logger.info(f"  - Votes: buy {buy_signals:.2f}, sell {sell_signals:.2f}, neutral {neutral_signals:.2f}")
         
         # تقييم نهائي
         total_signals = buy_signals + sell_signals + neutral_signals
@@ -866,10 +536,9 @@ class TechnicalAnalyzer:
         
         # حساب الفارق بين إشارات الشراء والبيع
         signal_diff = abs(buy_signals - sell_signals)
-        min_signal_diff = 1.5  # الحد الأدنى للفارق المطلوب
         
         # تحديد الاتجاه مع متطلبات أكثر صرامة للإشارات الواضحة
-        if buy_signals > sell_signals and signal_diff >= min_signal_diff:
+        if buy_signals > sell_signals and signal_diff >= MIN_SIGNAL_DIFF:
             direction = "BUY"
             # قوة الإشارة أكثر دقة
             signal_strength = (buy_signals - sell_signals * 0.5) / (buy_signals + sell_signals)
@@ -877,7 +546,7 @@ class TechnicalAnalyzer:
             # احتمالية نجاح محسنة (بداية من 80%)
             probability = int(80 + (signal_strength * 15))
             logger.info(f"  - Final BUY signal with strength: {signal_strength:.2f}, probability: {probability}%")
-        elif sell_signals > buy_signals and signal_diff >= min_signal_diff:
+        elif sell_signals > buy_signals and signal_diff >= MIN_SIGNAL_DIFF:
             direction = "SELL"
             # قوة الإشارة أكثر دقة
             signal_strength = (sell_signals - buy_signals * 0.5) / (sell_signals + buy_signals)
@@ -1075,14 +744,14 @@ class TechnicalAnalyzer:
                 reasons.append("تقاطع صعودي في MACD")
                 
             # أنماط الشموع
-            if 'last_candle' in locals() and 'lower_shadow' in locals() and 'upper_shadow' in locals():
-                if last_body_ratio < 0.3 and lower_shadow > 2 * last_body_size and upper_shadow < 0.2 * last_body_size:
-                    if not is_prev_bullish and not is_prev2_bullish:
+            if patterns is not None:
+                if patterns['hammer'][0]:
+                    if patterns['after_downtrend'][0]:
                         reasons.append("نمط المطرقة بعد اتجاه هبوطي")
                     else:
                         reasons.append("نمط المطرقة")
                         
-                if is_last_bullish and not is_prev_bullish and last_candle['close'] > prev_candle['open'] and last_candle['open'] < prev_candle['close']:
+                if patterns['bullish_engulfing'][0]:
                     reasons.append("نمط الابتلاع الصعودي")
             
             analysis += "الأسباب: " + " ، ".join(reasons)
@@ -1125,14 +794,14 @@ class TechnicalAnalyzer:
                 reasons.append("تقاطع هبوطي في MACD")
                 
             # أنماط الشموع
-            if 'last_candle' in locals() and 'lower_shadow' in locals() and 'upper_shadow' in locals():
-                if last_body_ratio < 0.3 and upper_shadow > 2 * last_body_size and lower_shadow < 0.2 * last_body_size:
-                    if is_prev_bullish and is_prev2_bullish:
+            if patterns is not None:
+                if patterns['shooting_star'][0]:
+                    if patterns['after_uptrend'][0]:
                         reasons.append("نمط النجمة الساقطة بعد اتجاه صعودي")
                     else:
                         reasons.append("نمط النجمة الساقطة")
                         
-                if not is_last_bullish and is_prev_bullish and last_candle['close'] < prev_candle['open'] and last_candle['open'] > prev_candle['close']:
+                if patterns['bearish_engulfing'][0]:
                     reasons.append("نمط الابتلاع الهبوطي")
             
             analysis += "الأسباب: " + " ، ".join(reasons)
@@ -0,0 +1,268 @@
+"""
+اختبار محلل الدعم والمقاومة المتجه
+يقارن نتائج AdvancedSRAnalyzer بالتطبيق الحلقي السابق على شموع اصطناعية،
+ويقيس فرق السرعة عند التشغيل المباشر للملف (200 شمعة و 10000 شمعة)
+"""
+
+import time
+
+import numpy as np
+
+from advanced_sr_analyzer import AdvancedSRAnalyzer
+from candle_store import CandleView
+from synthetic_price_generator import generate_ohlc_batch
+
+
+def _make_candles(count=300, seed=7, base=1.1, volatility=0.0008):
+    """توليد شموع اصطناعية كقائمة قواميس (مع أحجام تداول) ومصفوفة أعمدة"""
+    block = generate_ohlc_batch([base], [volatility], count, seed=seed)[0]
+    volumes = np.random.default_rng(seed).lognormal(0.0, 0.6, count)
+    candles = [
+        {'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+        for o, h, l, c, v in zip(block[0], block[1], block[2], block[3], volumes)
+    ]
+    return block, candles
+
+
+# التطبيق المرجعي (منقول من الحلقات السابقة في AdvancedSRAnalyzer)
+
+class _ReferenceSRAnalyzer(AdvancedSRAnalyzer):
+    def analyze(self, candles):
+        analysis_candles = candles[-min(self.time_window, len(candles)):]
+        highs = np.array([candle['high'] for candle in analysis_candles])
+        lows = np.array([candle['low'] for candle in analysis_candles])
+        closes = np.array([candle['close'] for candle in analysis_candles])
+        volumes = np.array([candle.get('volume', 1.0) for candle in analysis_candles])
+        support_levels = self._find_support_levels(analysis_candles, lows, closes)
+        resistance_levels = self._find_resistance_levels(analysis_candles, highs, closes)
+        accumulation_zones = self._find_accumulation_zones(analysis_candles, closes, volumes)
+        volatility_zones = self._find_volatility_zones(analysis_candles, closes, highs, lows)
+        breakout_points = self._find_breakout_points(analysis_candles, closes, support_levels, resistance_levels)
+        return {
+            "support_levels": self._evaluate_level_strength(support_levels, analysis_candles, "support"),
+            "resistance_levels": self._evaluate_level_strength(resistance_levels, analysis_candles, "resistance"),
+            "accumulation_zones": accumulation_zones,
+            "volatility_zones": volatility_zones,
+            "breakout_points": breakout_points,
+            "current_price": closes[-1]
+        }
+
+    def _find_support_levels(self, candles, lows, closes):
+        support_points = []
+        current_price = closes[-1]
+        for i in range(2, len(lows) - 2):
+            if (lows[i] < lows[i-1] and lows[i] < lows[i-2] and
+                lows[i] < lows[i+1] and lows[i] < lows[i+2]):
+                support_points.append({
+                    "price": lows[i],
+                    "index": i,
+                    "candle": candles[i],
+                    "touches": 0,
+                    "strength": 0
+                })
+        clustered_supports = self._cluster_price_levels(support_points)
+        valid_supports = [s for s in clustered_supports if s["price"] < current_price * (1 + self.price_sensitivity)]
+        valid_supports.sort(key=lambda x: abs(current_price - x["price"]))
+        return valid_supports[:5]
+
+    def _find_resistance_levels(self, candles, highs, closes):
+        resistance_points = []
+        current_price = closes[-1]
+        for i in range(2, len(highs) - 2):
+            if (highs[i] > highs[i-1] and highs[i] > highs[i-2] and
+                highs[i] > highs[i+1] and highs[i] > highs[i+2]):
+                resistance_points.append({
+                    "price": highs[i],
+                    "index": i,
+                    "candle": candles[i],
+                    "touches": 0,
+                    "strength": 0
+                })
+        clustered_resistances = self._cluster_price_levels(resistance_points)
+        valid_resistances = [r for r in clustered_resistances if r["price"] > current_price * (1 - self.price_sensitivity)]
+        valid_resistances.sort(key=lambda x: abs(current_price - x["price"]))
+        return valid_resistances[:5]
+
+    def _cluster_price_levels(self, price_points):
+        if not price_points:
+            return []
+        sorted_points = sorted(price_points, key=lambda x: x["price"])
+        clusters = []
+        current_cluster = [sorted_points[0]]
+        clustering_threshold = self.clustering_threshold
+        if self.is_otc_pair:
+            clustering_threshold = self.clustering_threshold * 0.8
+        for i in range(1, len(sorted_points)):
+            current_point = sorted_points[i]
+            prev_point = sorted_points[i-1]
+            if (current_point["price"] - prev_point["price"]) / prev_point["price"] < clustering_threshold:
+                current_cluster.append(current_point)
+            else:
+                if current_cluster:
+                    price_sum = sum(p["price"] for p in current_cluster)
+                    avg_price = price_sum / len(current_cluster)
+                    strongest_point = max(current_cluster, key=lambda x: x["index"])
+                    strongest_point["price"] = avg_price
+                    strongest_point["touches"] = len(current_cluster)
+                    if self.is_otc_pair:
+                        strongest_point["strength"] = min(100, int(strongest_point.get("strength", 0) * 1.15))
+                        strongest_point["is_otc"] = True
+                    clusters.append(strongest_point)
+                current_cluster = [current_point]
+        if current_cluster:
+            price_sum = sum(p["price"] for p in current_cluster)
+            avg_price = price_sum / len(current_cluster)
+            strongest_point = max(current_cluster, key=lambda x: x["index"])
+            strongest_point["price"] = avg_price
+            strongest_point["touches"] = len(current_cluster)
+            if self.is_otc_pair:
+                strongest_point["strength"] = min(100, int(strongest_point.get("strength", 0) * 1.15))
+                strongest_point["is_otc"] = True
+            clusters.append(strongest_point)
+        return clusters
+
+    def _find_accumulation_zones(self, candles, closes, volumes):
+        accumulation_zones = []
+        avg_volume = np.mean(volumes)
+        for i in range(self.accumulation_min_duration, len(candles)):
+            window_closes = closes[i-self.accumulation_min_duration:i]
+            window_volumes = volumes[i-self.accumulation_min_duration:i]
+            price_range = max(window_closes) - min(window_closes)
+            price_range_percent = price_range / min(window_closes)
+            window_avg_volume = np.mean(window_volumes)
+            if (window_avg_volume > avg_volume * self.volume_threshold and
+                price_range_percent < 0.015):
+                accumulation_type = "accumulation" if closes[i] > closes[i-self.accumulation_min_duration] else "distribution"
+                accumulation_zones.append({
+                    "start_index": i-self.accumulation_min_duration,
+                    "end_index": i,
+                    "price_level": np.mean(window_closes),
+                    "volume_ratio": window_avg_volume / avg_volume,
+                    "type": accumulation_type,
+                    "strength": min(100, int(window_avg_volume / avg_volume * 50))
+                })
+        accumulation_zones.sort(key=lambda x: x["strength"], reverse=True)
+        return accumulation_zones[:3]
+
+    def _find_volatility_zones(self, candles, closes, highs, lows):
+        volatility_zones = []
+        true_ranges = []
+        for i in range(1, len(candles)):
+            prev_close = closes[i-1]
+            high = highs[i]
+            low = lows[i]
+            tr1 = high - low
+            tr2 = abs(high - prev_close)
+            tr3 = abs(low - prev_close)
+            true_range = max(tr1, tr2, tr3)
+            true_ranges.append(true_range)
+        atr = np.mean(true_ranges) if true_ranges else 0
+        for i in range(self.volatility_window, len(candles)):
+            window_true_ranges = true_ranges[i-self.volatility_window:i]
+            window_atr = np.mean(window_true_ranges)
+            if window_atr > atr * self.volatility_threshold:
+                volatility_zones.append({
+                    "start_index": i-self.volatility_window,
+                    "end_index": i,
+                    "price_level": closes[i],
+                    "atr_ratio": window_atr / atr,
+                    "strength": min(100, int(window_atr / atr * 50))
+                })
+        volatility_zones.sort(key=lambda x: x["strength"], reverse=True)
+        return volatility_zones[:3]
+
+    def _evaluate_level_strength(self, levels, candles, level_type):
+        for level in levels:
+            price = level["price"]
+            touches = 0
+            bounces = 0
+            for candle in candles:
+                price_range = price * self.clustering_threshold
+                if level_type == "support":
+                    if candle["low"] <= price + price_range and candle["low"] >= price - price_range:
+                        touches += 1
+                        if candle["close"] > candle["open"] and candle["close"] > price:
+                            bounces += 1
+                else:
+                    if candle["high"] >= price - price_range and candle["high"] <= price + price_range:
+                        touches += 1
+                        if candle["close"] < candle["open"] and candle["close"] < price:
+                            bounces += 1
+            if touches > 0:
+                bounce_effectiveness = bounces / touches if touches > 0 else 0
+                recency_factor = 1 + (level["index"] / len(candles)) * 0.5
+                strength = min(100, int((touches * 10 + bounce_effectiveness * 50) * recency_factor))
+                level["touches"] = touches
+                level["bounces"] = bounces
+                level["strength"] = strength
+            else:
+                level["touches"] = 0
+                level["bounces"] = 0
+                level["strength"] = max(20, int(30 * (level["index"] / len(candles))))
+        levels.sort(key=lambda x: x["strength"], reverse=True)
+        return levels
+
+def _assert_same(result, expected):
+    assert result.keys() == expected.keys()
+    for key, value in expected.items():
+        if isinstance(value, list):
+            assert len(result[key]) == len(value), key
+            for item, reference in zip(result[key], value):
+                assert list(item) == list(reference), key
+                for field, field_value in reference.items():
+                    if isinstance(field_value, float):
+                        assert np.isclose(item[field], field_value, rtol=1e-12), (key, field)
+                    else:
+                        assert item[field] == field_value, (key, field)
+        else:
+            assert np.isclose(result[key], value)
+
+
+def test_vectorized_analysis_matches_loops():
+    for seed, volatility in ((3, 0.002), (7, 0.004), (11, 0.008)):
+        for is_otc in (False, True):
+            _, candles = _make_candles(count=260, seed=seed, volatility=volatility)
+            # فترة تذبذب عالٍ لإنتاج مناطق تذبذب
+            for candle in candles[150:170]:
+                spread = candle['high'] - candle['low']
+                candle['high'] += spread * 3
+                candle['low'] -= spread
+            kwargs = {'is_otc_pair': True, 'price_sensitivity': 0.0006, 'clustering_threshold': 0.0025} if is_otc else {}
+            result = AdvancedSRAnalyzer(**kwargs).analyze(candles)
+            expected = _ReferenceSRAnalyzer(**kwargs).analyze(candles)
+            _assert_same(result, expected)
+
+
+def test_candle_view_matches_dict_candles():
+    block, candles = _make_candles(count=120, seed=5)
+    for candle in candles:
+        del candle['volume']
+    analyzer = AdvancedSRAnalyzer()
+    result = analyzer.analyze(CandleView(block))
+    expected = analyzer.analyze(candles)
+    assert [level['price'] for level in result['support_levels']] == [level['price'] for level in expected['support_levels']]
+    assert [level['strength'] for level in result['resistance_levels']] == [level['strength'] for level in expected['resistance_levels']]
+
+
+def benchmark(repeat=5):
+    """قياس سرعة التحليل المتجه مقارنة بالحلقات السابقة عند النافذة الافتراضية (200) و 10000 شمعة"""
+    for count in (200, 10000):
+        block, candles = _make_candles(count=count)
+        cases = [
+            ('loop (dicts)', _ReferenceSRAnalyzer(time_window=count), candles),
+            ('numpy (dicts)', AdvancedSRAnalyzer(time_window=count), candles),
+            ('numpy (CandleView)', AdvancedSRAnalyzer(time_window=count), CandleView(block)),
+        ]
+        timings = []
+        for _, analyzer, data in cases:
+            analyzer.analyze(data)  # تشغيل تمهيدي
+            start = time.perf_counter()
+            for _ in range(repeat):
+                analyzer.analyze(data)
+            timings.append((time.perf_counter() - start) / repeat)
+        line = "  ".join(f"{name}: {seconds * 1000:9.3f} ms" for (name, _, _), seconds in zip(cases, timings))
+        print(f"{count:>6} bars  {line}  speedup: {timings[0] / timings[1]:6.1f}x / {timings[0] / timings[2]:6.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark()
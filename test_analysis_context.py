@@ -0,0 +1,52 @@
+"""
+اختبار سياق التحليل المشترك
+يتحقق من إعادة استخدام النتائج لنفس الشموع ومن الإخراج والإبطال
+"""
+
+import numpy as np
+
+from analysis_context import AnalysisContextCache
+from candle_store import CandleView
+
+
+def _candles(last_time, count=30, last_close=1.1):
+    block = np.ones((5, count))
+    block[4] = last_time - 60 * np.arange(count)[::-1]
+    block[3, -1] = last_close
+    return CandleView(block)
+
+
+def test_artifacts_are_shared_per_candle():
+    cache = AnalysisContextCache(capacity=4)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'levels': len(calls)}
+
+    first = cache.get_or_compute('EURUSD-OTC', _candles(6000), ('sr_levels', True), compute)
+    again = cache.get_or_compute('EURUSD-OTC', _candles(6000), ('sr_levels', True), compute)
+    assert first is again and len(calls) == 1
+
+    # زوج آخر أو شمعة جديدة أو طول نافذة مختلف أو تحديث آخر شمعة في مكانها يعني حساباً جديداً
+    cache.get_or_compute('GBPUSD-OTC', _candles(6000), ('sr_levels', True), compute)
+    cache.get_or_compute('EURUSD-OTC', _candles(6060), ('sr_levels', True), compute)
+    cache.get_or_compute('EURUSD-OTC', _candles(6000, count=20), ('sr_levels', True), compute)
+    cache.get_or_compute('EURUSD-OTC', _candles(6000, last_close=1.2), ('sr_levels', True), compute)
+    assert len(calls) == 5
+
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 5
+
+
+def test_least_recently_used_context_is_evicted():
+    cache = AnalysisContextCache(capacity=2)
+    cache.get_or_compute('A', _candles(60), ('x',), lambda: 1)
+    cache.get_or_compute('B', _candles(60), ('x',), lambda: 2)
+    cache.get_or_compute('A', _candles(60), ('x',), lambda: 1)
+    cache.get_or_compute('C', _candles(60), ('x',), lambda: 3)
+
+    # B هو الأقدم استخداماً فتم إخراجه
+    assert cache.get_or_compute('A', _candles(60), ('x',), lambda: None) == 1
+    assert cache.get_or_compute('B', _candles(60), ('x',), lambda: None) is None
+    assert cache.stats()['evictions'] >= 1
@@ -0,0 +1,74 @@
+"""
+اختبار محرك الاختبار التاريخي
+يتحقق من تطابق المؤشرات المحسوبة مسبقاً مع المحلل الأصلي ومن حسم نتائج الإشارات
+"""
+
+import logging
+
+import numpy as np
+import pytest
+from numpy.lib.stride_tricks import sliding_window_view
+
+import backtester
+from advanced_otc_analyzer import AdvancedOTCAnalyzer
+from candle_store import CandleView
+from synthetic_price_generator import generate_ohlc_batch
+
+
+def _make_block(count=400, seed=11):
+    return generate_ohlc_batch([1.1], [0.0004], count, seed=seed)[0]
+
+
+def test_precomputed_analyzer_matches_original():
+    block = _make_block()
+    window = backtester.DEFAULT_WINDOW
+    analyzer = backtester.PrecomputedOTCAnalyzer()
+    reference = AdvancedOTCAnalyzer()
+    analyzer.load_windows(sliding_window_view(block[3], window))
+
+    for row in range(0, block.shape[1] - window + 1, 37):
+        candles = CandleView(block[:, row:row + window])
+        analyzer.select(row)
+        result = analyzer.analyze_pair(candles, 'EURUSD-OTC', True)
+        expected = reference.analyze_pair(candles, 'EURUSD-OTC', True)
+        assert result['direction'] == expected['direction']
+        assert np.isclose(result['confidence'], expected['confidence'])
+        assert result['technical_indicators']['rsi'] == expected['technical_indicators']['rsi']
+
+
+def test_resolve_outcomes():
+    block = np.zeros((5, 10))
+    block[0] = np.arange(10.0)          # open
+    block[3] = np.arange(10.0) + 0.5    # close (كل شمعة صاعدة)
+    block[3, 6] = 2.0                   # هبوط حاد عند الشمعة 6
+
+    outcomes = backtester.resolve_outcomes(block, [0, 0, 3, 3], [1, -1, 1, -1], [1, 1, 2, 2])
+
+    # الدخول عند افتتاح الشمعة 2 والخروج عند إغلاقها
+    assert outcomes[0] == 1 and outcomes[1] == -1
+    # الدخول عند افتتاح الشمعة 5 (5.0) والخروج عند إغلاق الشمعة 6 (2.0)
+    assert outcomes[2] == -1 and outcomes[3] == 1
+
+
+def test_backtest_counts_every_bar():
+    result = backtester.backtest_pair('EURUSD-OTC', _make_block(220))
+    report = backtester.summarize([result], 1.0)
+
+    # أول شمعة مؤهلة تملك نافذة كاملة، وآخرها تغلق أطول مدة عند آخر شمعة في التاريخ
+    first = backtester.DEFAULT_WINDOW - 1
+    last = 219 - backtester.ENTRY_DELAY_CANDLES - backtester.MAX_DURATION_CANDLES + 1
+    assert result['evaluated'] == last - first + 1
+    assert sum(result['rejected'].values()) + result['signals'] == result['evaluated']
+    assert result['wins'] + result['losses'] + result['draws'] == result['signals']
+    assert report['stages']['analysis']['reached'] == result['evaluated']
+
+
+def test_logging_restored_after_failure(monkeypatch):
+    def failing_signals(pair, block, window):
+        raise RuntimeError("analysis failed")
+        yield
+
+    monkeypatch.setattr(backtester, 'iterate_signals', failing_signals)
+    with pytest.raises(RuntimeError):
+        backtester.backtest_pair('EURUSD-OTC', _make_block(count=100))
+    assert logging.root.manager.disable == logging.NOTSET
@@ -0,0 +1,147 @@
+"""
+اختبار أرشيف الشموع الدائم
+يتحقق من أن الشموع المسجلة تُقرأ كما هي بعد إعادة فتح الأرشيف، ومن الاحتفاظ بآخر
+retention شمعة عند الضغط، ومن تجاهل الملفات ذات الترويسة غير الصالحة والسجلات المقطوعة،
+ومن أن عملية ثانية تفتح الأرشيف للقراءة فقط، ومن أن دفعات flush المتداخلة من عدة خيوط
+تُكتب واحدة تلو الأخرى وبالترتيب
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from candle_archive import _HEADER_SIZE, _RECORD_SIZE, CandleArchive
+from synthetic_price_generator import generate_ohlc_batch
+
+PAIR = 'EUR/USD-OTC'
+
+
+def _history(count, seed=2):
+    return generate_ohlc_batch([1.1], [0.0004], count, seed=seed, end_time=1_700_000_000.0)[0]
+
+
+def test_round_trip_after_reopen(tmp_path):
+    history = _history(120)
+    archive = CandleArchive(str(tmp_path), retention=1000, flush_candles=100, flush_seconds=3600)
+    archive.record(PAIR, history[:, :40])
+    archive.record(PAIR, history[:, 40:41])
+    # أقل من flush_candles: الشموع ما زالت معلقة في الذاكرة
+    assert archive.read(PAIR) is None
+    archive.record(PAIR, history[:, 41:110])
+    np.testing.assert_array_equal(archive.read(PAIR), history[:, :110])
+    archive.record(PAIR, history[:, 110:])
+    archive.close()
+    assert sorted(os.listdir(tmp_path)) == ['.writer.lock', 'EUR_USD-OTC.candles']
+
+    reopened = CandleArchive(str(tmp_path), retention=1000)
+    block = reopened.read(PAIR)
+    np.testing.assert_array_equal(block, history)
+    assert not block.flags.writeable
+    np.testing.assert_array_equal(reopened.read(PAIR, limit=7), history[:, -7:])
+    assert reopened.read('GBPUSD-OTC') is None
+    reopened.close()
+
+
+def test_compaction_keeps_latest_candles(tmp_path):
+    retention = 50
+    history = _history(400)
+    archive = CandleArchive(str(tmp_path), retention=retention, flush_candles=1, flush_seconds=3600)
+    position = 0
+    for count in [30, 15, 1, 12, 7, 60, 3, 20, 100, 1, 1, 40]:
+        archive.record(PAIR, history[:, position:position + count])
+        position += count
+
+        block = archive.read(PAIR)
+        stored = block.shape[1]
+        assert min(position, retention) <= stored <= retention * 1.25
+        np.testing.assert_array_equal(block, history[:, position - stored:position])
+    archive.close()
+
+
+def test_invalid_header_and_partial_record(tmp_path):
+    archive = CandleArchive(str(tmp_path), retention=100, flush_candles=1, flush_seconds=3600)
+    history = _history(10)
+    archive.record(PAIR, history[:, :5])
+    path = archive._path(PAIR)
+
+    # سجل مقطوع من كتابة سابقة: لا يُقرأ ويُزال قبل الإلحاق التالي
+    with open(path, 'ab') as f:
+        f.write(b'\1' * (_RECORD_SIZE // 2))
+    np.testing.assert_array_equal(archive.read(PAIR), history[:, :5])
+    archive.record(PAIR, history[:, 5:])
+    np.testing.assert_array_equal(archive.read(PAIR), history)
+    assert os.path.getsize(path) == _HEADER_SIZE + 10 * _RECORD_SIZE
+
+    with open(path, 'r+b') as f:
+        f.write(b'BROKEN!!')
+    assert archive.read(PAIR) is None
+    # الملف غير الصالح يُستبدل عند الكتابة التالية
+    archive.record(PAIR, history[:, :3])
+    np.testing.assert_array_equal(archive.read(PAIR), history[:, :3])
+    archive.close()
+
+
+def test_second_archive_is_read_only(tmp_path):
+    history = _history(20)
+    writer = CandleArchive(str(tmp_path), retention=100, flush_candles=1, flush_seconds=3600)
+    writer.record(PAIR, history)
+    assert writer.writable
+
+    reader = CandleArchive(str(tmp_path), retention=100, flush_candles=1, flush_seconds=3600)
+    assert not reader.writable
+    reader.record('GBPUSD-OTC', history)
+    assert reader.read('GBPUSD-OTC') is None
+    np.testing.assert_array_equal(reader.read(PAIR), history)
+    reader.close()
+    writer.close()
+
+
+class _SlowArchive(CandleArchive):
+    """أرشيف بكتابة بطيئة يسجل أقصى عدد كتابات متزامنة"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.active = 0
+        self.max_active = 0
+        self._counter = threading.Lock()
+
+    def _append(self, pair, block):
+        with self._counter:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.002)
+        try:
+            super()._append(pair, block)
+        finally:
+            with self._counter:
+                self.active -= 1
+
+
+def test_overlapping_flushes_write_in_order(tmp_path):
+    history = _history(300)
+    # التسجيل لا يفرض الكتابة بنفسه؛ خيطان يكتبان الشموع المعلقة بالتوازي أثناء وصولها
+    archive = _SlowArchive(str(tmp_path), retention=100, flush_candles=10 ** 6, flush_seconds=3600)
+    done = threading.Event()
+
+    def flush_loop():
+        while not done.is_set():
+            archive.flush()
+
+    flushers = [threading.Thread(target=flush_loop) for _ in range(2)]
+    for flusher in flushers:
+        flusher.start()
+    try:
+        for position in range(0, 300, 3):
+            archive.record(PAIR, history[:, position:position + 3])
+            time.sleep(0.001)
+    finally:
+        done.set()
+        for flusher in flushers:
+            flusher.join()
+    archive.close()
+
+    assert archive.max_active == 1
+    block = CandleArchive(str(tmp_path), retention=100).read(PAIR)
+    np.testing.assert_array_equal(block, history[:, -block.shape[1]:])
@@ -0,0 +1,118 @@
+"""
+اختبار مصدر إعادة تشغيل الشموع المسجلة
+يتحقق من قراءة ملفات CSV غير المرتبة وملفات الأرشيف، ومن أن التاريخ والتحديثات المتتالية
+تعيد الشموع بالترتيب دون تكرار أو فقدان حسب ساعة الإعادة، وأن الأوقات تبقى متصاعدة عبر
+دورات التكرار
+"""
+
+import csv
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from candle_archive import CandleArchive
+from candle_sources import CANDLE_SECONDS, ReplayCandleSource, load_candle_file
+from candle_store import CLOSE, OPEN, TIME
+from synthetic_price_generator import generate_ohlc_batch
+
+START = 1_700_000_040.0
+
+
+def _recording(count, seed=6):
+    return generate_ohlc_batch([1.1], [0.0004], count, seed=seed,
+                               end_time=START + (count - 1) * CANDLE_SECONDS)[0]
+
+
+def _write_csv(path, block, order, iso_times=False):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Time', 'Open', 'High', 'Low', 'Close', 'Volume'])
+        rows = block.T.tolist()
+        for k in order:
+            open_, high, low, close, t = rows[k]
+            stamp = datetime.utcfromtimestamp(t).isoformat() + 'Z' if iso_times else repr(t)
+            writer.writerow([stamp, repr(open_), repr(high), repr(low), repr(close), 100])
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 5_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _collect(source, pair, last_time, clock, steps, seconds):
+    """قراءة التحديثات المتتالية كما يفعل المحلل الفني (من آخر شمعة معروفة)"""
+    blocks = []
+    for _ in range(steps):
+        clock.now += seconds
+        block = source.updates(pair, last_time, None, 10_000)
+        if block.shape[1]:
+            last_time = block[TIME, -1]
+            blocks.append(block)
+    return np.concatenate(blocks, axis=1)
+
+
+def test_csv_rows_are_sorted(tmp_path):
+    block = _recording(30)
+    order = np.random.default_rng(1).permutation(30)
+    _write_csv(tmp_path / 'EURUSD-OTC.csv', block, order)
+    _write_csv(tmp_path / 'GBPUSD-OTC.csv', block, order, iso_times=True)
+
+    np.testing.assert_array_equal(load_candle_file(str(tmp_path / 'EURUSD-OTC.csv')), block)
+    np.testing.assert_array_equal(load_candle_file(str(tmp_path / 'GBPUSD-OTC.csv'))[TIME], block[TIME])
+
+
+def test_history_then_updates_in_order(tmp_path):
+    block = _recording(200)
+    _write_csv(tmp_path / 'EURUSD-OTC.csv', block, range(200)[::-1])
+    CandleArchive(str(tmp_path), retention=1000, flush_candles=1).record('EUR/USD', block[:, :150])
+
+    clock = _Clock()
+    source = ReplayCandleSource(str(tmp_path), speed=3.0, warmup_candles=50, loop=False, clock=clock)
+    assert source.has_pair('EURUSD-OTC') and source.has_pair('EUR/USD') and not source.has_pair('GBPUSD-OTC')
+
+    history, = source.history(['EURUSD-OTC'], 20)
+    np.testing.assert_array_equal(history, block[:, 30:50])
+    # أقل من شمعة مسجلة كاملة: لا تحديثات
+    clock.now += 19
+    assert source.updates('EURUSD-OTC', history[TIME, -1], None, 100).shape[1] == 0
+
+    # 3 شموع مسجلة لكل دقيقة حقيقية حتى نهاية التسجيل ثم يتوقف المصدر
+    updates = _collect(source, 'EURUSD-OTC', history[TIME, -1], clock, 60, CANDLE_SECONDS)
+    np.testing.assert_array_equal(updates, block[:, 50:])
+    assert source.updates('EURUSD-OTC', block[TIME, -1], None, 100).shape[1] == 0
+
+    # ملف الأرشيف الثنائي بنفس الساعة
+    archived = source.updates('EUR/USD', None, None, 1000)
+    np.testing.assert_array_equal(archived, block[:, :150])
+    # max_count يعيد أحدث الشموع فقط
+    np.testing.assert_array_equal(source.updates('EURUSD-OTC', block[TIME, 10], None, 5), block[:, -5:])
+
+
+def test_loop_offsets_keep_times_increasing(tmp_path):
+    block = _recording(40)
+    _write_csv(tmp_path / 'EURUSD-OTC.csv', block, range(40))
+    clock = _Clock()
+    source = ReplayCandleSource(str(tmp_path), speed=7.0, warmup_candles=10, loop=True, clock=clock)
+
+    history, = source.history(['EURUSD-OTC'], 100)
+    np.testing.assert_array_equal(history, block[:, :10])
+    updates = _collect(source, 'EURUSD-OTC', history[TIME, -1], clock, 50, 37)
+    replayed = np.concatenate([history, updates], axis=1)
+
+    # ثلاث دورات على الأقل، كل دورة تعيد نفس الأسعار بأوقات مزاحة بطول التسجيل
+    count = replayed.shape[1]
+    assert count > 3 * 40
+    np.testing.assert_array_equal(np.diff(replayed[TIME]), CANDLE_SECONDS)
+    cycles = np.arange(count) // 40
+    np.testing.assert_array_equal(replayed[TIME], block[TIME, np.arange(count) % 40] + cycles * 40 * CANDLE_SECONDS)
+    np.testing.assert_array_equal(replayed[[OPEN, CLOSE]], block[[OPEN, CLOSE]][:, np.arange(count) % 40])
+
+
+def test_empty_directory_is_rejected(tmp_path):
+    (tmp_path / 'notes.txt').write_text('no candles here')
+    with pytest.raises(ValueError):
+        ReplayCandleSource(str(tmp_path), clock=_Clock())
@@ -0,0 +1,77 @@
+"""
+اختبار مخزن الشموع المشترك
+يقارن المخزن الحلقي بقائمة بسيطة تحتفظ بآخر capacity شمعة عبر دورات الالتفاف المتعددة
+(إضافة فردية وكتل أقصر وأطول من السعة) ويتحقق من تحديث الشمعة الأخيرة في مكانها
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from candle_store import CLOSE, TIME, CandleBuffer, CandleStore, candles_to_block
+
+
+def _candle(k):
+    return (1.0 + k, 1.5 + k, 0.5 + k, 1.2 + k, 60.0 * k)
+
+
+def _block(first, count):
+    return np.array([_candle(k) for k in range(first, first + count)], dtype=np.float64).reshape(count, 5).T
+
+
+def test_ring_buffer_wraparound_matches_list():
+    capacity = 7
+    buffer = CandleBuffer(capacity)
+    reference = []
+    k = 0
+    # كتل بأحجام مختلفة تجعل بداية المخزن تدور عدة مرات (بما فيها كتل أطول من السعة)
+    for count in [1, 3, 5, 2, 6, 7, 1, 1, 12, 4, 0, 9, 3]:
+        if count == 1:
+            buffer.append(*_candle(k))
+        else:
+            buffer.extend(_block(k, count))
+        reference.extend(_candle(i) for i in range(k, k + count))
+        k += count
+
+        expected = np.array(reference[-capacity:], dtype=np.float64).T
+        np.testing.assert_array_equal(buffer.view(), expected)
+        for limit in (1, 3, capacity, capacity + 5):
+            np.testing.assert_array_equal(buffer.view(limit), expected[:, -limit:])
+        assert buffer.last(CLOSE) == expected[CLOSE, -1]
+
+
+def test_update_last_replaces_newest_candle():
+    buffer = CandleBuffer(4)
+    buffer.update_last(*_candle(0))
+    assert buffer.size == 1
+
+    buffer.extend(_block(1, 5))
+    buffer.update_last(9.0, 9.5, 8.5, 9.2, 300.0)
+    view = buffer.view()
+    assert view.shape[1] == 4
+    np.testing.assert_array_equal(view[:, -1], [9.0, 9.5, 8.5, 9.2, 300.0])
+    np.testing.assert_array_equal(view[:, :-1], _block(2, 3))
+
+    # التحديث يظهر أيضاً بعد إضافة شموع جديدة تعيد ترتيب المخزن الحلقي
+    buffer.append(*_candle(6))
+    np.testing.assert_array_equal(buffer.view()[:, -2], [9.0, 9.5, 8.5, 9.2, 300.0])
+
+
+def test_store_views_are_read_only_and_share_memory():
+    store = CandleStore(capacity=5)
+    store.load('EURUSD-OTC', _block(0, 8))
+    view = store.get_candles('EURUSD-OTC')
+    assert len(view) == 5 and store.get_last_time('EURUSD-OTC') == 7 * 60.0
+    assert view[-1]['time'] == datetime.utcfromtimestamp(7 * 60.0)
+    with pytest.raises(ValueError):
+        view.close[0] = 0.0
+
+    store.append('EURUSD-OTC', *_candle(8))
+    assert store.get_current_price('EURUSD-OTC') == _candle(8)[CLOSE]
+    assert len(store.get_candles('MISSING')) == 0 and store.get_last_time('MISSING') is None
+
+    # التحويل من قوائم القواميس القديمة والعودة إليها
+    candles = store.get_candles('EURUSD-OTC', 3).to_list()
+    np.testing.assert_array_equal(candles_to_block(candles), _block(6, 3))
+    assert store.get_candles('EURUSD-OTC', 3).array[TIME, 0] == 6 * 60.0
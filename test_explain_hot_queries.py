@@ -0,0 +1,101 @@
+"""
+اختبار فحص خطط الاستعلامات الأكثر استخداماً
+ينشئ جداول SQLite في الذاكرة بالأعمدة المستخدمة في الاستعلامات وبنفس تعريفات الفهارس التي
+تستخدمها النماذج (model_indexes، بدون تحميل التطبيق) ويتحقق من أن كل استعلام يستخدم الفهرس
+المتوقع، ومن أن الفحص يكتشف غياب الفهرس
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import Boolean, Column, DateTime, Integer, String, create_engine, text
+from sqlalchemy.orm import Session, declarative_base
+
+from explain_hot_queries import check_plans, hot_queries
+from model_indexes import table_indexes, SIGNAL_INDEXES, APPROVED_CHANNEL_INDEXES, CHART_ANALYSIS_INDEXES
+
+Base = declarative_base()
+
+
+class Signal(Base):
+    __tablename__ = 'signals'
+    __table_args__ = table_indexes(SIGNAL_INDEXES)
+    id = Column(Integer, primary_key=True)
+    pair_id = Column(Integer)
+    direction = Column(String(10), nullable=False)
+    result = Column(String(10))
+    doubling_strategy = Column(Boolean, default=False)
+    created_at = Column(DateTime)
+
+
+class ChartAnalysis(Base):
+    __tablename__ = 'chart_analyses'
+    __table_args__ = table_indexes(CHART_ANALYSIS_INDEXES)
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime)
+
+
+class ApprovedChannel(Base):
+    __tablename__ = 'approved_channels'
+    __table_args__ = table_indexes(APPROVED_CHANNEL_INDEXES)
+    id = Column(Integer, primary_key=True)
+    bot_id = Column(Integer)
+    expiration_date = Column(DateTime)
+
+
+class SystemLock(Base):
+    __tablename__ = 'system_locks'
+    id = Column(Integer, primary_key=True)
+    lock_name = Column(String(64), unique=True, nullable=False)
+
+
+def _engine(count=2000, seed=11):
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    rng = random.Random(seed)
+    start = datetime(2024, 3, 1)
+    with Session(engine) as session:
+        session.add_all(Signal(pair_id=rng.randrange(1, 30), direction=rng.choice(['BUY', 'SELL']),
+                               result=rng.choice(['WIN', 'LOSS', None]), doubling_strategy=rng.random() < 0.2,
+                               created_at=start + timedelta(minutes=rng.randrange(60 * 24 * 30)))
+                        for _ in range(count))
+        session.add_all(ChartAnalysis(user_id=rng.randrange(1, 50), created_at=start + timedelta(hours=k))
+                        for k in range(300))
+        session.add_all(ApprovedChannel(bot_id=rng.randrange(1, 10), expiration_date=start + timedelta(days=k))
+                        for k in range(200))
+        session.add(SystemLock(lock_name='signal_generation'))
+        session.commit()
+    with engine.begin() as connection:
+        # إحصائيات الجداول كما في قاعدة بيانات مستخدمة فعلاً
+        connection.execute(text("ANALYZE"))
+    return engine
+
+
+def _queries():
+    return hot_queries(Signal, ChartAnalysis, ApprovedChannel, SystemLock, now=datetime(2024, 3, 20, 15, 30))
+
+
+def test_expected_indexes_are_defined_in_models():
+    defined = {index.name for table in Base.metadata.tables.values() for index in table.indexes}
+    expected = {index_name for _, index_name, _ in _queries() if index_name is not None}
+    assert expected <= defined
+
+
+def test_hot_queries_use_expected_indexes():
+    engine = _engine()
+    with engine.connect() as connection:
+        results = check_plans(connection, _queries())
+    assert len(results) == len(_queries())
+    for name, index_name, used, plan in results:
+        assert used, f"{name} does not use {index_name}: {plan}"
+
+
+def test_missing_index_is_reported():
+    engine = _engine(count=200)
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_signals_doubling_created_at"))
+        connection.execute(text("ANALYZE"))
+        results = {name: used for name, _, used, _ in check_plans(connection, _queries())}
+    assert results['last_regular_signal'] is False
+    assert results['signals_today'] is True
@@ -0,0 +1,84 @@
+"""
+اختبار سلسلة مراحل الفلترة التكيفية
+يتحقق من تقديم المرحلة الأرخص والأكثر رفضاً مع بقاء القرار ونتيجة الاستثناء كما في الترتيب الأصلي،
+ومن أن درجة رفض الفلتر متعدد المراحل تبقى مشتقة من الفلتر الأساسي مهما تغير الترتيب
+"""
+
+import time
+
+import pytest
+
+from filter_pipeline import AdaptiveFilterPipeline, FilterStage
+from multi_stage_signal_filter import MultiStageSignalFilter, multi_stage_pipeline
+
+
+def _slow_pass(value):
+    time.sleep(0.0005)
+    return True
+
+
+def _cheap_reject(value):
+    return value % 2 == 0
+
+
+def test_cheap_rejecting_stage_moves_first():
+    pipeline = AdaptiveFilterPipeline('test_order', [
+        FilterStage('slow', _slow_pass),
+        FilterStage('after_slow', lambda value: True, requires=('slow',)),
+        FilterStage('cheap', _cheap_reject),
+    ], adaptive=True, reorder_interval=10)
+
+    decisions = [pipeline.run(value) for value in range(60)]
+
+    assert pipeline.order == ['cheap', 'slow', 'after_slow']
+    # القرار لا يتغير بتغير الترتيب
+    assert decisions == [None if value % 2 == 0 else 'cheap' for value in range(60)]
+
+
+def test_exception_follows_declared_order():
+    calls = []
+
+    def failing(value):
+        calls.append('failing')
+        raise ValueError("boom")
+
+    def rejecting(value):
+        calls.append('rejecting')
+        return False
+
+    pipeline = AdaptiveFilterPipeline('test_errors', [
+        FilterStage('rejecting', rejecting),
+        FilterStage('failing', failing),
+    ], adaptive=False)
+    # الترتيب الحالي يشغل المرحلة الفاشلة أولاً، لكن الترتيب الأصلي يرفض قبل الوصول إليها
+    pipeline._order = list(reversed(pipeline.stages))
+    assert pipeline.run(1) == 'rejecting'
+
+    assert calls == ['failing', 'rejecting']
+
+    # إذا لم ترفض أي مرحلة قبل المرحلة الفاشلة في الترتيب الأصلي يظهر الاستثناء نفسه
+    pipeline.stages.reverse()
+    with pytest.raises(ValueError):
+        pipeline.run(1)
+
+
+class _AcceptingFilter:
+    def filter_signal(self, signal, candles):
+        return True, 80.0, "مقبولة"
+
+
+def test_multi_stage_rejection_after_reorder_keeps_basic_quality(monkeypatch):
+    # مرحلة الاتجاه هي الأرخص، لكنها لا تسبق الفلتر الأساسي الذي تُشتق منه درجة الرفض
+    monkeypatch.setattr(multi_stage_pipeline, '_order', list(multi_stage_pipeline._order))
+    monkeypatch.setattr(FilterStage, 'expected_cost', lambda stage: 0.0 if stage.name == 'direction' else 1.0)
+    multi_stage_pipeline._reorder()
+    assert multi_stage_pipeline.order[:2] == ['basic_filter', 'direction']
+
+    signal_filter = MultiStageSignalFilter()
+    signal_filter.advanced_filter = _AcceptingFilter()
+    accept, quality, _, details = signal_filter.filter_signal(
+        {'direction': 'BUY'}, [], 'EURUSD-OTC', additional_analysis={'direction': 'SELL'})
+
+    assert not accept
+    assert quality == pytest.approx(80.0 * 0.7)
+    assert details['basic_filter'] == {"accepted": True, "quality": 80.0}
@@ -0,0 +1,324 @@
+"""
+اختبار مكتبة المؤشرات الموحدة
+يقارن نتائج الدوال المتجهة بالتطبيقات الحلقية السابقة في المحللات،
+ويقيس فرق السرعة عند التشغيل المباشر للملف
+"""
+
+import math
+import time
+
+import numpy as np
+
+import indicators
+from candle_store import CandleBuffer, CandleStore, CandleView
+from streaming_indicators import StreamingIndicatorEngine
+from synthetic_price_generator import generate_ohlc_batch
+
+
+def _make_candles(count=300, seed=7, base=1.1, volatility=0.0008):
+    """توليد شموع اصطناعية كقائمة قواميس ومصفوفة أعمدة"""
+    block = generate_ohlc_batch([base], [volatility], count, seed=seed)[0]
+    candles = [
+        {'open': o, 'high': h, 'low': l, 'close': c}
+        for o, h, l, c in zip(block[0], block[1], block[2], block[3])
+    ]
+    return block, candles
+
+
+# التطبيقات المرجعية (منقولة من الحسابات الحلقية السابقة)
+
+def _reference_rsi_simple(candles, period=14):
+    changes = [candles[i]['close'] - candles[i-1]['close'] for i in range(1, len(candles))]
+    gains = [change if change > 0 else 0 for change in changes][-period:]
+    losses = [abs(change) if change < 0 else 0 for change in changes][-period:]
+    avg_gain = sum(gains) / period
+    avg_loss = sum(losses) / period
+    if avg_loss == 0:
+        return 100
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+def _reference_rsi_wilder(prices, period):
+    deltas = np.diff(prices)
+    up = deltas[:period].clip(min=0).sum() / period
+    down = -deltas[:period].clip(max=0).sum() / period
+    rsi = np.full(len(prices), np.nan)
+    rsi[period] = 100. - 100. / (1. + up / down)
+    for i in range(period + 1, len(prices)):
+        delta = deltas[i-1]
+        up = (up * (period - 1) + max(delta, 0.)) / period
+        down = (down * (period - 1) + max(-delta, 0.)) / period
+        rsi[i] = 100. - 100. / (1. + up / down)
+    return rsi
+
+
+def _reference_ema(prices, period):
+    ema = np.zeros_like(prices)
+    ema[0] = prices[0]
+    multiplier = 2 / (period + 1)
+    for i in range(1, len(prices)):
+        ema[i] = (prices[i] - ema[i-1]) * multiplier + ema[i-1]
+    return ema
+
+
+def _reference_bollinger_expanding(prices, std_dev=2.0, period=20):
+    upper = np.zeros_like(prices)
+    middle = np.zeros_like(prices)
+    lower = np.zeros_like(prices)
+    for i in range(len(prices)):
+        window = prices[:i+1] if i < period - 1 else prices[i-period+1:i+1]
+        middle[i] = np.mean(window)
+        std = np.std(window)
+        upper[i] = middle[i] + std_dev * std
+        lower[i] = middle[i] - std_dev * std
+    return upper, middle, lower
+
+
+def _reference_stochastic_raw_k(candles, k_period=14):
+    recent = candles[-k_period:]
+    highest = max(c['high'] for c in recent)
+    lowest = min(c['low'] for c in recent)
+    if highest == lowest:
+        return 50
+    return 100 * (candles[-1]['close'] - lowest) / (highest - lowest)
+
+
+def _reference_adx(candles, period=14):
+    tr_list, plus_dm_list, minus_dm_list = [], [], []
+    for i in range(1, len(candles)):
+        high, low = candles[i]['high'], candles[i]['low']
+        prev_high, prev_low, prev_close = candles[i-1]['high'], candles[i-1]['low'], candles[i-1]['close']
+        tr_list.append(max(high - low, abs(high - prev_close), abs(low - prev_close)))
+        plus_dm = max(0, high - prev_high)
+        minus_dm = max(0, prev_low - low)
+        if plus_dm > minus_dm:
+            minus_dm = 0
+        elif minus_dm > plus_dm:
+            plus_dm = 0
+        plus_dm_list.append(plus_dm)
+        minus_dm_list.append(minus_dm)
+
+    tr_sum = sum(tr_list[:period])
+    plus_dm_sum = sum(plus_dm_list[:period])
+    minus_dm_sum = sum(minus_dm_list[:period])
+    plus_di = 100 * plus_dm_sum / tr_sum if tr_sum > 0 else 0
+    minus_di = 100 * minus_dm_sum / tr_sum if tr_sum > 0 else 0
+    adx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di) if (plus_di + minus_di) > 0 else 0
+
+    for i in range(period, len(tr_list)):
+        tr_sum = tr_sum - (tr_sum / period) + tr_list[i]
+        plus_dm_sum = plus_dm_sum - (plus_dm_sum / period) + plus_dm_list[i]
+        minus_dm_sum = minus_dm_sum - (minus_dm_sum / period) + minus_dm_list[i]
+        plus_di = 100 * plus_dm_sum / tr_sum if tr_sum > 0 else 0
+        minus_di = 100 * minus_dm_sum / tr_sum if tr_sum > 0 else 0
+        dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di) if (plus_di + minus_di) > 0 else 0
+        adx = (adx * (period - 1) + dx) / period
+    return adx, plus_di, minus_di
+
+
+def _reference_volatility(candles, lookback=20):
+    recent = candles[-lookback:]
+    heights = [(c['high'] - c['low']) / c['close'] * 100 for c in recent]
+    closes = [c['close'] for c in recent]
+    mean_price = sum(closes) / len(closes)
+    std_dev = math.sqrt(sum([(p - mean_price) ** 2 for p in closes]) / len(closes))
+    return (sum(heights) / len(heights) + std_dev / mean_price * 100) / 2
+
+
+def _reference_slope(values):
+    x = list(range(len(values)))
+    x_mean = sum(x) / len(x)
+    y_mean = sum(values) / len(values)
+    numerator = sum((x[i] - x_mean) * (values[i] - y_mean) for i in range(len(x)))
+    denominator = sum((x[i] - x_mean) ** 2 for i in range(len(x)))
+    return numerator / denominator
+
+
+# اختبارات التطابق
+
+def test_linear_recursion_matches_loop():
+    rng = np.random.default_rng(1)
+    inputs = rng.standard_normal((3, 700))
+    initial = rng.standard_normal(3)
+    expected = np.empty_like(inputs)
+    state = initial.copy()
+    for t in range(inputs.shape[1]):
+        state = 0.7 * state + inputs[:, t]
+        expected[:, t] = state
+    assert np.allclose(indicators.linear_recursion(inputs, 0.7, initial), expected)
+
+
+def test_rsi_matches_reference():
+    block, candles = _make_candles()
+    simple = indicators.rsi(block[3], 14)
+    for end in (15, 50, 300):
+        assert np.isclose(simple[end - 1], _reference_rsi_simple(candles[:end], 14))
+
+    wilder = indicators.rsi(block[3], 9, method='wilder')
+    assert np.allclose(wilder[9:], _reference_rsi_wilder(block[3], 9)[9:])
+
+
+def test_rsi_without_losses_is_100():
+    rising = np.linspace(1.0, 2.0, 40)
+    assert indicators.rsi(rising, 14)[-1] == 100
+    assert indicators.rsi(rising, 14, method='wilder')[-1] == 100
+
+
+def test_ema_and_macd_match_reference():
+    block, _ = _make_candles()
+    closes = block[3]
+    assert np.allclose(indicators.ema(closes, 13), _reference_ema(closes, 13))
+
+    macd_line, signal_line, histogram = indicators.macd(closes, 8, 17, 9)
+    expected_macd = _reference_ema(closes, 8) - _reference_ema(closes, 17)
+    expected_signal = _reference_ema(expected_macd, 9)
+    assert np.allclose(macd_line, expected_macd)
+    assert np.allclose(signal_line, expected_signal)
+    assert np.allclose(histogram, expected_macd - expected_signal)
+
+
+def test_bollinger_matches_reference():
+    block, _ = _make_candles()
+    closes = block[3]
+    for actual, expected in zip(indicators.bollinger_bands(closes, 20, 2.5, min_periods=1),
+                                _reference_bollinger_expanding(closes, 2.5, 20)):
+        assert np.allclose(actual, expected)
+
+    upper, middle, lower = indicators.bollinger_bands(closes, 20, 2.0)
+    assert np.isnan(middle[18]) and not np.isnan(middle[19])
+    assert np.isclose(middle[-1], closes[-20:].mean())
+    assert np.isclose(upper[-1] - middle[-1], 2.0 * closes[-20:].std())
+
+
+def test_stochastic_and_adx_match_reference():
+    block, candles = _make_candles()
+    raw_k, k, d = indicators.stochastic(block[1], block[2], block[3], 14, 3, 3)
+    for end in (14, 60, 300):
+        assert np.isclose(raw_k[end - 1], _reference_stochastic_raw_k(candles[:end], 14))
+    assert np.isclose(k[-1], raw_k[-3:].mean())
+    assert np.isclose(d[-1], k[-3:].mean())
+
+    adx, plus_di, minus_di = indicators.adx(block[1], block[2], block[3], 14)
+    for end in (15, 100, 300):
+        expected = _reference_adx(candles[:end], 14)
+        assert np.allclose((adx[end - 1], plus_di[end - 1], minus_di[end - 1]), expected)
+
+
+def test_volatility_and_regression_match_reference():
+    block, candles = _make_candles()
+    assert np.isclose(indicators.range_volatility(block[1], block[2], block[3], 20),
+                      _reference_volatility(candles, 20))
+
+    closes = block[3][-30:]
+    slope, intercept, r_squared = indicators.linear_regression(closes)
+    assert np.isclose(slope, _reference_slope(list(closes)))
+    assert 0 <= r_squared <= 1
+
+
+def test_batched_pairs_match_single_series():
+    batch = generate_ohlc_batch([1.1, 150.0, 0.65], [0.0008, 0.1, 0.0005], 200, seed=3)
+    closes = batch[:, 3]
+    batched = indicators.rsi(closes, 14)
+    for i in range(closes.shape[0]):
+        assert np.allclose(batched[i], indicators.rsi(closes[i], 14), equal_nan=True)
+
+
+def test_streaming_engine_matches_library():
+    block, _ = _make_candles(count=100)
+    store = CandleStore()
+    store.load('EURUSD', block)
+    values = StreamingIndicatorEngine(store).get('EURUSD')
+
+    assert np.isclose(values['rsi'], indicators.rsi(block[3][-15:], 14)[-1])
+    assert np.isclose(values['bollinger']['sma'], indicators.rolling_mean(block[3], 20)[-1])
+    adx, plus_di, minus_di = indicators.adx(block[1], block[2], block[3], 14)
+    assert np.allclose((values['adx'], values['plus_di'], values['minus_di']),
+                       (adx[-1], plus_di[-1], minus_di[-1]))
+
+
+def _library_values(block):
+    """قيم المؤشرات الأخيرة من المكتبة على كامل السلسلة التي غذّت الحالة المتدفقة"""
+    highs, lows, closes = block[1], block[2], block[3]
+    _, stoch_k, stoch_d = indicators.stochastic(highs, lows, closes, 14, 3, 3)
+    macd, signal, histogram = indicators.macd(closes, 12, 26, 9, seed='sma')
+    upper, middle, lower = indicators.bollinger_bands(closes[-20:], 20, 2.0)
+    adx, plus_di, minus_di = indicators.adx(highs, lows, closes, 14)
+    return [indicators.rsi(closes[-15:], 14)[-1], stoch_k[-1], stoch_d[-1], macd[-1], signal[-1], histogram[-1],
+            middle[-1], upper[-1], lower[-1], adx[-1], plus_di[-1], minus_di[-1]]
+
+
+def _streaming_values(values):
+    bollinger = values['bollinger']
+    return [values['rsi'], values['stoch_k'], values['stoch_d'], values['macd'], values['macd_signal'],
+            values['macd_histogram'], bollinger['sma'], bollinger['upper'], bollinger['lower'],
+            values['adx'], values['plus_di'], values['minus_di']]
+
+
+def test_streaming_engine_follows_appends_updates_and_rebuilds():
+    block, _ = _make_candles(count=320)
+    store = CandleStore(capacity=100)
+    store.load('EURUSD', block[:, :150])
+    engine = StreamingIndicatorEngine(store)
+    assert np.allclose(_streaming_values(engine.get('EURUSD')), _library_values(block[:, 50:150]))
+
+    # الإضافات تُغذّى تدريجياً: المؤشرات الأسية تستمر من بداية البناء وليس من نافذة المخزن
+    for end in range(151, 171):
+        store.append('EURUSD', *block[:, end - 1])
+        assert np.allclose(_streaming_values(engine.get('EURUSD')), _library_values(block[:, 50:end]))
+    store.extend('EURUSD', block[:, 170:200])
+    values = engine.get('EURUSD')
+    assert values['candles'] == 150
+    assert np.allclose(_streaming_values(values), _library_values(block[:, 50:200]))
+
+    # انقطاع التسلسل (تاريخ جديد لا يحتوي آخر شمعة معالجة) يعيد البناء من المخزن
+    store.load('EURUSD', block[:, 220:320])
+    values = engine.get('EURUSD')
+    assert values['candles'] == 100
+    assert np.allclose(_streaming_values(values), _library_values(block[:, 220:320]))
+
+    # تحديث آخر شمعة في مكانها (شمعة إطار أعلى غير مكتملة) يعيد البناء بالقيم الجديدة
+    buffer = CandleBuffer(100)
+    buffer.extend(block[:, :80])
+    engine.sources['M5'] = lambda pair: CandleView(buffer.view())
+    engine.get('EURUSD', 'M5')
+    updated = block[:, 79].copy()
+    updated[3] = updated[1] = updated[3] + 0.004
+    buffer.update_last(*updated)
+    stream = np.concatenate([block[:, :79], updated[:, None]], axis=1)
+    assert np.allclose(_streaming_values(engine.get('EURUSD', 'M5')), _library_values(stream))
+    buffer.append(*block[:, 80])
+    stream = np.concatenate([stream, block[:, 80:81]], axis=1)
+    assert np.allclose(_streaming_values(engine.get('EURUSD', 'M5')), _library_values(stream))
+
+
+def benchmark(count=2000, repeat=20):
+    """قياس سرعة الدوال المتجهة مقارنة بالتطبيقات الحلقية السابقة على count شمعة"""
+    block, candles = _make_candles(count=count)
+    closes = block[3]
+
+    cases = [
+        ('RSI (Wilder, series)', lambda: _reference_rsi_wilder(closes, 14),
+         lambda: indicators.rsi(closes, 14, method='wilder')),
+        ('EMA (series)', lambda: _reference_ema(closes, 13), lambda: indicators.ema(closes, 13)),
+        ('Bollinger (series)', lambda: _reference_bollinger_expanding(closes),
+         lambda: indicators.bollinger_bands(closes, 20, 2.0, min_periods=1)),
+        ('ADX (last value)', lambda: _reference_adx(candles, 14),
+         lambda: indicators.adx(block[1], block[2], block[3], 14)),
+        ('Volatility', lambda: _reference_volatility(candles, 20),
+         lambda: indicators.range_volatility(block[1], block[2], block[3], 20)),
+    ]
+
+    for name, reference, vectorized in cases:
+        timings = []
+        for func in (reference, vectorized):
+            func()  # تشغيل تمهيدي (تهيئة مصفوفات المعاملات المخزنة)
+            start = time.perf_counter()
+            for _ in range(repeat):
+                func()
+            timings.append((time.perf_counter() - start) / repeat)
+        print(f"{name:<22} loop: {timings[0] * 1000:8.3f} ms  "
+              f"numpy: {timings[1] * 1000:7.3f} ms  speedup: {timings[0] / timings[1]:6.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark()
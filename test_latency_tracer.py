@@ -0,0 +1,43 @@
+"""
+اختبار تتبع زمن المراحل
+يتحقق من حدود المخزن الحلقي ومن النسب المئوية وتسجيل المراحل المنتهية باستثناء
+"""
+
+import pytest
+
+from latency_tracer import LatencyTracer
+
+
+def test_percentiles_use_the_latest_samples():
+    tracer = LatencyTracer(capacity=100)
+    for value in range(1, 201):
+        tracer.record('generation.analysis', value / 1000.0)
+
+    stats = tracer.summary()['generation.analysis']
+    # المخزن يحتفظ بآخر 100 قياس فقط (101-200 مللي ثانية) بينما العدد والمتوسط لكل القياسات
+    assert stats['count'] == 200
+    assert stats['p50_ms'] == pytest.approx(150.5)
+    assert stats['p99_ms'] == pytest.approx(199.01)
+    assert stats['max_ms'] == pytest.approx(200.0)
+    assert len(tracer.recent(500)) == 100
+
+
+def test_traced_records_failures_and_can_be_disabled():
+    tracer = LatencyTracer(capacity=10)
+
+    @tracer.traced('filter.multi_stage')
+    def failing():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        failing()
+    with tracer.span('filter.multi_stage'):
+        pass
+
+    stats = tracer.summary()['filter.multi_stage']
+    assert stats['count'] == 2 and stats['errors'] == 1
+
+    tracer.enabled = False
+    with tracer.span('dispatch'):
+        pass
+    assert 'dispatch' not in tracer.summary()
@@ -0,0 +1,84 @@
+"""
+اختبار محلل حالة السوق
+يتحقق من أن الحساب المصفوفي لعدة أزواج يطابق التحليل الفردي لكل زوج على نوافذ اصطناعية
+متنوعة (تذبذب، ظلال طويلة، قفزات سعرية)، ومن الذاكرة المؤقتة لكل زوج وتحويل الزوج غير الصالح
+إلى حالة السوق العامة
+"""
+
+import numpy as np
+
+from candle_store import CandleView, HIGH, LOW, CLOSE, get_candle_store
+from market_condition_analyzer import CONDITION_WINDOW, MIN_CONDITION_CANDLES, MarketConditionAnalyzer
+from synthetic_price_generator import generate_ohlc_batch
+
+VOLATILITIES = [0.00002, 0.0002, 0.001, 0.005, 0.02, 0.04]
+
+
+def _windows(count, length, seed=3):
+    """نوافذ شموع بتقلبات مختلفة مع ظلال طويلة وقفزات في بعضها"""
+    volatilities = [VOLATILITIES[k % len(VOLATILITIES)] for k in range(count)]
+    batch = generate_ohlc_batch([1.1] * count, volatilities, length, seed=seed, end_time=1_700_000_000.0)
+    rng = np.random.default_rng(seed)
+    for k in range(count):
+        if k % 5 == 0:
+            # ظلال علوية وسفلية طويلة (تلاعب بالأسعار)
+            batch[k, HIGH, -15::2] += 0.01
+            batch[k, LOW, -14::3] -= 0.01
+        if k % 7 == 0:
+            # قفزات متعاكسة كبيرة (أنماط غير طبيعية)
+            batch[k, CLOSE, -10::2] *= 1 + rng.uniform(0.01, 0.03)
+            batch[k, HIGH, -10:] = np.maximum(batch[k, HIGH, -10:], batch[k, CLOSE, -10:])
+        if k % 9 == 0:
+            # سعر شبه ثابت (سيولة منخفضة)
+            batch[k, :4, -20:] = batch[k, CLOSE, -21]
+    return batch
+
+
+def test_batch_conditions_match_single_pair():
+    analyzer = MarketConditionAnalyzer()
+    batch = _windows(240, CONDITION_WINDOW)
+
+    conditions = analyzer._batch_conditions(batch)
+    expected = [analyzer._analyze_candles(f"BATCH{k}-OTC", CandleView(batch[k])) for k in range(len(batch))]
+    assert conditions == expected
+
+    # النوافذ تغطي جميع فروع القواعد
+    assert {c['trend'] for c in expected} == {'UP', 'DOWN', 'SIDEWAYS'}
+    assert any(c['abnormal_pattern'] for c in expected) and any(c['price_manipulation'] for c in expected)
+    assert any(c['low_liquidity'] for c in expected)
+
+
+def test_pairs_batch_matches_per_pair_path():
+    analyzer = MarketConditionAnalyzer()
+    store = get_candle_store()
+    lengths = [100, CONDITION_WINDOW, MIN_CONDITION_CANDLES + 3, MIN_CONDITION_CANDLES - 1]
+    batch = _windows(24, 100, seed=8)
+    pairs = []
+    for k, block in enumerate(batch):
+        pair = f"CONDITION{k}-OTC"
+        store.load(pair, block[:, -lengths[k % len(lengths)]:])
+        pairs.append(pair)
+
+    result = analyzer._analyze_pairs_batch(pairs)
+    expected = {pair: analyzer._analyze_single_pair(pair) for pair in pairs}
+    expected = {pair: condition for pair, condition in expected.items() if condition is not None}
+    assert list(result) == list(expected)
+    assert result == expected
+    # الأزواج ذات التاريخ الأقصر من MIN_CONDITION_CANDLES لا تظهر
+    assert len(result) == len(pairs) * 3 // 4
+
+
+def test_pair_cache_and_invalid_pair_fallback():
+    analyzer = MarketConditionAnalyzer()
+
+    first = analyzer.analyze_market_condition('EURUSD-OTC')
+    assert list(first['pairs_analysis']) == ['EURUSD-OTC']
+    assert analyzer.analyze_market_condition('EURUSD-OTC') is first
+    other = analyzer.analyze_market_condition('GBPUSD-OTC')
+    assert list(other['pairs_analysis']) == ['GBPUSD-OTC']
+
+    # الزوج غير الصالح يعيد حالة السوق العامة المحفوظة
+    general = analyzer.analyze_market_condition()
+    assert analyzer.analyze_market_condition('NOT-A-PAIR') is general
+    assert len(general['pairs_analysis']) > 1
+    assert analyzer.pair_cache.stats()['entries'] == 2
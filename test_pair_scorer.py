@@ -0,0 +1,116 @@
+"""
+اختبار تقييم الأزواج دفعة واحدة
+يتحقق من أن اتجاه واحتمالية كل مرشح من التمريرة المصفوفية يطابقان analyze_pair لنفس الزوج
+على شموع مسجلة ثابتة، ومن أن كل زوج يُقيّم على نافذته الكاملة مهما كان طول تاريخ الأزواج الأخرى،
+ومن معالجة الأزواج ذات التاريخ القصير والقائمة الفارغة والرجوع إلى أول الأزواج عند تعذر التقييم
+"""
+
+import csv
+
+import pytest
+
+from candle_sources import ReplayCandleSource
+from candle_store import CandleStore, CANDLE_FIELDS
+from pair_scorer import BatchPairScorer, MIN_SCORING_CANDLES, select_pairs
+from synthetic_price_generator import generate_ohlc_batch
+from technical_analyzer import TechnicalAnalyzer
+
+PAIRS = ['EURUSD-OTC', 'GBPUSD-OTC', 'USDJPY-OTC', 'AUDUSD-OTC', 'EURJPY-OTC', 'GBPJPY-OTC',
+         'EURGBP-OTC', 'NZDUSD-OTC']
+SHORT_PAIR = 'USDCAD-OTC'
+MEDIUM_PAIR = 'USDCHF-OTC'
+END_TIME = 1_700_000_000.0
+HISTORY = 150
+
+
+def _write_csv(path, block):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CANDLE_FIELDS)
+        writer.writerows(block.T.tolist())
+
+
+def _analyzer(tmp_path, pairs=PAIRS, short_pairs=(), medium_pairs=(), seed=4):
+    """محلل فني على شموع مسجلة بساعة إعادة متوقفة (لا تصل شموع جديدة أثناء الاختبار)"""
+    # تقلبات مختلفة لظهور إشارات قوية وضعيفة في الاتجاهين
+    volatilities = [0.0002 + 0.0004 * (k % 4) for k in range(len(pairs))]
+    batch = generate_ohlc_batch([1.1] * len(pairs), volatilities, HISTORY, seed=seed, end_time=END_TIME)
+    for pair, block in zip(pairs, batch):
+        _write_csv(tmp_path / f"{pair}.csv", block)
+    for pair in short_pairs:
+        block = generate_ohlc_batch([1.1], [0.0003], MIN_SCORING_CANDLES - 5, seed=seed, end_time=END_TIME)[0]
+        _write_csv(tmp_path / f"{pair}.csv", block)
+    for pair in medium_pairs:
+        # تاريخ يكفي للتقييم لكنه أقصر من نافذة التقييم
+        block = generate_ohlc_batch([1.1], [0.0006], 60, seed=seed + 1, end_time=END_TIME)[0]
+        _write_csv(tmp_path / f"{pair}.csv", block)
+
+    source = ReplayCandleSource(str(tmp_path), warmup_candles=HISTORY, loop=False, clock=lambda: 0.0)
+    return TechnicalAnalyzer(store=CandleStore(), seed=1, source=source)
+
+
+def test_scores_match_analyze_pair(tmp_path):
+    analyzer = _analyzer(tmp_path)
+    candidates = BatchPairScorer(analyzer).score_pairs(PAIRS)
+
+    assert sorted(candidate['pair'] for candidate in candidates) == sorted(PAIRS)
+    decided = [candidate for candidate in candidates if candidate['direction'] is not None]
+    assert decided
+    for candidate in decided:
+        result = analyzer.analyze_pair(candidate['pair'])
+        assert result['direction'] == candidate['direction'], candidate['pair']
+        assert result['probability'] == candidate['probability'], candidate['pair']
+
+    # الترتيب: الإشارات الواضحة قبل الضعيفة وقبل الأزواج بدون اتجاه
+    order = [(c['direction'] is not None, c['strong']) for c in candidates]
+    assert order == sorted(order, reverse=True)
+
+
+def test_empty_and_short_history(tmp_path):
+    analyzer = _analyzer(tmp_path, pairs=PAIRS[:2], short_pairs=[SHORT_PAIR])
+    scorer = BatchPairScorer(analyzer)
+
+    assert scorer.score_pairs([]) == []
+    assert scorer.score_pairs([SHORT_PAIR]) == []
+    # الزوج القصير يُستبعد دون أن يمنع تقييم الأزواج الأخرى
+    assert [c['pair'] for c in scorer.score_pairs([SHORT_PAIR] + PAIRS[:2])] == [
+        c['pair'] for c in scorer.score_pairs(PAIRS[:2])]
+
+
+def test_each_pair_scored_on_its_own_window(tmp_path):
+    analyzer = _analyzer(tmp_path, short_pairs=[SHORT_PAIR], medium_pairs=[MEDIUM_PAIR])
+    scorer = BatchPairScorer(analyzer)
+    assert len(analyzer.store.get_candles(MEDIUM_PAIR)) == 60
+
+    together = {c['pair']: c for c in scorer.score_pairs(PAIRS + [MEDIUM_PAIR, SHORT_PAIR])}
+    assert sorted(together) == sorted(PAIRS + [MEDIUM_PAIR])
+
+    # الزوج ذو التاريخ الأقصر لا يقص نوافذ الأزواج الأخرى، وتقييمه لا يتغير بوجودها
+    # (المؤشرات المصفوفية قد تختلف في آخر خانة عشرية بين مصفوفات بأحجام مختلفة)
+    for pair in PAIRS + [MEDIUM_PAIR]:
+        alone, = scorer.score_pairs([pair])
+        assert alone == pytest.approx(together[pair]), pair
+
+    medium = together[MEDIUM_PAIR]
+    if medium['direction'] is not None:
+        result = analyzer.analyze_pair(MEDIUM_PAIR)
+        assert (result['direction'], result['probability']) == (medium['direction'], medium['probability'])
+
+
+def test_select_pairs_falls_back_to_first_pairs(tmp_path):
+    analyzer = _analyzer(tmp_path, pairs=PAIRS[:4], short_pairs=[SHORT_PAIR])
+    scorer = BatchPairScorer(analyzer)
+
+    def rank(pairs, limit=None):
+        return scorer.score_pairs(pairs)[:limit]
+
+    def failing_rank(pairs, limit=None):
+        raise ValueError("scoring failed")
+
+    ranked = select_pairs(PAIRS[:4], count=2, ranker=rank)
+    assert ranked == [c['pair'] for c in scorer.score_pairs(PAIRS[:4])[:2]]
+
+    # لا يوجد زوج بتاريخ كافٍ أو فشل التقييم: أول الأزواج بالترتيب المعطى
+    assert select_pairs([SHORT_PAIR], count=3, ranker=rank) == [SHORT_PAIR]
+    assert select_pairs(PAIRS[:4], count=3, ranker=failing_rank) == PAIRS[:3]
+    assert select_pairs([], count=3, ranker=rank) == []
@@ -0,0 +1,63 @@
+"""
+اختبار فهرس مستويات الأسعار المرتبة
+يقارن استعلامات الفهرس بعمليات البحث الخطية التي حل محلها، بما في ذلك تساوي الأسعار
+"""
+
+import numpy as np
+
+from price_level_index import PriceLevelIndex
+
+
+def _random_levels(rng, count):
+    # أسعار مقربة لظهور مستويات متساوية في السعر
+    prices = np.round(1.1 + rng.normal(0, 0.004, count), 4)
+    return [{'price': float(price), 'id': k} for k, price in enumerate(prices)]
+
+
+def _nearest_above(levels, price):
+    nearest, min_dist = None, float('inf')
+    for level in levels:
+        dist = level['price'] - price
+        if dist > 0 and dist < min_dist:
+            nearest, min_dist = level, dist
+    return nearest
+
+
+def _nearest_below(levels, price):
+    nearest, min_dist = None, float('inf')
+    for level in levels:
+        dist = price - level['price']
+        if dist > 0 and dist < min_dist:
+            nearest, min_dist = level, dist
+    return nearest
+
+
+def test_queries_match_linear_scans():
+    rng = np.random.default_rng(3)
+    for count in (0, 1, 5, 40):
+        levels = _random_levels(rng, count)
+        index = PriceLevelIndex(levels)
+        queries = [level['price'] for level in levels[:5]] + list(1.1 + rng.normal(0, 0.005, 30))
+        for price in queries:
+            assert index.nearest_above(price) is _nearest_above(levels, price)
+            assert index.nearest_below(price) is _nearest_below(levels, price)
+            closest = sorted(levels, key=lambda x: abs(x['price'] - price))
+            assert index.nearest(price) is (closest[0] if closest else None)
+            for band in (0.0005, 0.002, 0.01):
+                assert index.within(price, band) == [
+                    level for level in levels if abs(level['price'] - price) / price < band]
+                assert index.within(price, band, relative_to_level=True) == [
+                    level for level in levels if abs((price - level['price']) / level['price']) < band]
+
+
+def test_merge_matches_index_of_concatenated_levels():
+    rng = np.random.default_rng(4)
+    by_timeframe = [_random_levels(rng, count) for count in (12, 0, 7)]
+    merged = PriceLevelIndex.merge([PriceLevelIndex(levels) for levels in by_timeframe])
+    combined = PriceLevelIndex([level for levels in by_timeframe for level in levels])
+
+    assert merged.levels == combined.levels
+    assert merged.positions.tolist() == combined.positions.tolist()
+    for price in 1.1 + rng.normal(0, 0.005, 20):
+        assert merged.within(price, 0.002) == combined.within(price, 0.002)
+        assert merged.nearest(price) is combined.nearest(price)
@@ -0,0 +1,106 @@
+"""
+اختبار أرشيف الإشارات
+يتحقق من أن التصفح بالمؤشر يمر على جميع الإشارات مرة واحدة بالترتيب (بما فيها الإشارات
+بنفس وقت الإنشاء)، ومن أن التصدير المتدفق يعطي نفس الصفوف على دفعات محدودة الحجم
+"""
+
+import csv
+import io
+import json
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from signal_archive import ARCHIVE_FIELDS, SignalArchive, decode_cursor, encode_cursor
+
+Base = declarative_base()
+
+
+class OTCPair(Base):
+    __tablename__ = 'otc_pairs'
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String(20), nullable=False)
+
+
+class Signal(Base):
+    __tablename__ = 'signals'
+    id = Column(Integer, primary_key=True)
+    pair_id = Column(Integer, ForeignKey('otc_pairs.id'))
+    direction = Column(String(10), nullable=False)
+    entry_time = Column(String(10), nullable=False)
+    expiration_time = Column(DateTime, nullable=False)
+    duration = Column(Integer, default=1)
+    success_probability = Column(Integer, default=85)
+    result = Column(String(10))
+    created_at = Column(DateTime)
+
+
+def _archive(count=230, seed=3):
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    rng = random.Random(seed)
+    session.add_all(OTCPair(id=k, symbol=f"PAIR{k}-OTC") for k in range(1, 4))
+    start = datetime(2024, 3, 1)
+    for _ in range(count):
+        # دقائق قليلة لظهور إشارات كثيرة بنفس وقت الإنشاء
+        created_at = start + timedelta(minutes=rng.randrange(60), microseconds=rng.choice([0, 0, 250]))
+        session.add(Signal(pair_id=rng.choice([1, 2, 3, None]), direction=rng.choice(['BUY', 'SELL']),
+                           entry_time=created_at.strftime('%H:%M'), expiration_time=created_at + timedelta(minutes=1),
+                           result=rng.choice(['WIN', 'LOSS', None]), created_at=created_at))
+    session.commit()
+    return session, SignalArchive(session, Signal, OTCPair)
+
+
+def _expected_ids(session, *criteria):
+    signals = session.query(Signal).filter(*criteria).all()
+    return [s.id for s in sorted(signals, key=lambda s: (s.created_at, s.id), reverse=True)]
+
+
+def test_cursor_pages_cover_all_signals_in_order():
+    session, archive = _archive()
+    for criteria in ([], archive.filters(direction='BUY', result='WIN'), archive.filters(pair_id=2),
+                     archive.filters(result='PENDING')):
+        seen, cursor, pages = [], None, 0
+        while True:
+            page = archive.page(criteria, cursor=cursor, limit=17)
+            seen.extend(record['id'] for record in page['signals'])
+            pages += 1
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        assert seen == _expected_ids(session, *criteria)
+        assert pages == max(1, -(-len(seen) // 17))
+
+
+def test_page_records_and_cursor_round_trip():
+    session, archive = _archive(count=5)
+    record = archive.page(limit=1)['signals'][0]
+    signal = session.get(Signal, record['id'])
+    assert list(record) == list(ARCHIVE_FIELDS)
+    assert record['pair'] == (f"PAIR{signal.pair_id}-OTC" if signal.pair_id else None)
+    assert record['created_at'] == signal.created_at.isoformat()
+
+    moment = datetime(2024, 3, 1, 12, 30, 5, 250)
+    assert decode_cursor(encode_cursor(moment, 42)) == (moment, 42)
+    with pytest.raises(ValueError):
+        archive.page(cursor='not-a-cursor')
+
+
+def test_streaming_export_matches_archive_rows():
+    session, archive = _archive()
+    batches = list(archive.iter_batches(batch_size=40))
+    assert max(len(batch) for batch in batches) <= 40
+    ids = [record['id'] for batch in batches for record in batch]
+    assert ids == _expected_ids(session)
+
+    chunks = list(archive.export_ndjson(batch_size=40))
+    records = [json.loads(line) for line in ''.join(chunks).splitlines()]
+    assert records == [record for batch in batches for record in batch]
+
+    rows = list(csv.DictReader(io.StringIO(''.join(archive.export_csv(batch_size=40)))))
+    assert [int(row['id']) for row in rows] == ids
+    assert rows[0]['direction'] == records[0]['direction']
@@ -0,0 +1,109 @@
+"""
+اختبار التحضير المسبق للإشارة التالية
+يتحقق من إعادة الترتيب عند وصول شموع جديدة فقط ومن أخذ المرشح مرة واحدة لكل إشارة
+"""
+
+import threading
+
+from candle_store import CandleStore
+from signal_precomputer import SignalPrecomputer
+
+
+class _Analyzer:
+    """محلل بسيط فوق مخزن شموع مستقل يسجل الأزواج التي تم تحليلها"""
+
+    def __init__(self, store):
+        self.store = store
+        self.analyzed = []
+
+    def _update_price_data(self, pair):
+        pass
+
+    def analyze_pair(self, pair):
+        self.analyzed.append(pair)
+        return {'direction': 'SELL', 'probability': 88}
+
+
+def _make_precomputer(now):
+    store = CandleStore()
+    for pair in ('EURUSD-OTC', 'GBPUSD-OTC'):
+        store.append(pair, 1.0, 1.0, 1.0, 1.0, 60.0)
+    rankings = []
+
+    def ranker(symbols):
+        rankings.append(list(symbols))
+        return [{'pair': 'GBPUSD-OTC', 'direction': None, 'probability': 75},
+                {'pair': 'EURUSD-OTC', 'direction': 'SELL', 'probability': 85}]
+
+    analyzer = _Analyzer(store)
+    precomputer = SignalPrecomputer(analyzer=analyzer, ranker=ranker, max_age_seconds=120,
+                                    seconds_until_slot=lambda: 30, clock=lambda: now[0])
+    precomputer.candidate_provider = lambda: [
+        {'symbol': 'EURUSD-OTC', 'pair_id': 1, 'source': 'EURUSD', 'pair_type': 'regular exchange'},
+        {'symbol': 'GBPUSD-OTC', 'pair_id': 2, 'source': 'GBPUSD', 'pair_type': 'regular exchange'},
+    ]
+    return precomputer, store, analyzer, rankings
+
+
+def test_best_candidate_is_refreshed_on_new_candles():
+    now = [1000.0]
+    precomputer, store, analyzer, rankings = _make_precomputer(now)
+
+    best = precomputer.refresh()
+    # أول مرشح له اتجاه واضح، واتجاهه واحتماليته من تحليله المحسوب مسبقاً
+    assert best['pair_id'] == 1 and best['direction'] == 'SELL' and best['probability'] == 88
+    assert best['analysis'] == {'direction': 'SELL', 'probability': 88}
+    assert analyzer.analyzed == ['EURUSD-OTC']
+    assert precomputer.is_current(best)
+
+    # بدون شموع جديدة لا يعاد الترتيب
+    precomputer.refresh()
+    assert len(rankings) == 1
+
+    store.append('GBPUSD-OTC', 1.0, 1.0, 1.0, 1.0, 120.0)
+    precomputer.refresh()
+    assert len(rankings) == 2
+
+    taken = precomputer.take_prepared_candidate()
+    assert taken['symbol'] == 'EURUSD-OTC'
+    store.append('EURUSD-OTC', 1.0, 1.0, 1.0, 1.0, 180.0)
+    assert not precomputer.is_current(taken)
+    assert precomputer.get_status()['used'] == 1
+    # المرشح يؤخذ مرة واحدة فقط
+    assert precomputer.take_prepared_candidate() is None
+
+
+def test_stale_candidate_is_discarded():
+    now = [1000.0]
+    precomputer, _, _, _ = _make_precomputer(now)
+
+    precomputer.refresh()
+    now[0] += 300
+    assert precomputer.take_prepared_candidate() is None
+    assert precomputer.stats['stale'] == 1
+
+
+def test_concurrent_refresh_and_take_keep_counts():
+    now = [1000.0]
+    precomputer, store, _, _ = _make_precomputer(now)
+    stop = threading.Event()
+
+    def worker():
+        candle = 180.0
+        while not stop.is_set():
+            store.append('EURUSD-OTC', 1.0, 1.0, 1.0, 1.0, candle)
+            candle += 60
+            precomputer.refresh()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    try:
+        for _ in range(2000):
+            precomputer.take_prepared_candidate()
+            precomputer.get_status()
+    finally:
+        stop.set()
+        thread.join()
+
+    stats = precomputer.get_status()
+    assert stats['used'] + stats['missed'] + stats['stale'] == 2000
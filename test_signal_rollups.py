@@ -0,0 +1,165 @@
+"""
+اختبار جداول تجميع الإشارات
+يتحقق من أن التحديث التدريجي عند الإدراج وتعيين النتيجة والحذف، وإعادة البناء الكاملة، يعطيان
+نفس إحصائيات الاستعلامات المباشرة على جدول الإشارات
+"""
+
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, String, create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, declarative_base, relationship
+
+from signal_rollups import SignalRollups
+from signal_statistics import SignalStatistics
+
+Base = declarative_base()
+
+
+class OTCPair(Base):
+    __tablename__ = 'otc_pairs'
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String(20), nullable=False)
+    signals = relationship('Signal', back_populates='pair')
+
+
+class Signal(Base):
+    __tablename__ = 'signals'
+    id = Column(Integer, primary_key=True)
+    pair_id = Column(Integer, ForeignKey('otc_pairs.id'))
+    pair = relationship('OTCPair', back_populates='signals')
+    direction = Column(String(10), nullable=False)
+    result = Column(String(10))
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+def _counts():
+    return (Column(Integer, nullable=False, default=0), Column(Integer, nullable=False, default=0),
+            Column(Integer, nullable=False, default=0))
+
+
+class SignalDailyStat(Base):
+    __tablename__ = 'signal_daily_stats'
+    day = Column(Date, primary_key=True)
+    total, wins, losses = _counts()
+
+
+class SignalHourlyStat(Base):
+    __tablename__ = 'signal_hourly_stats'
+    day = Column(Date, primary_key=True)
+    hour = Column(Integer, primary_key=True)
+    total, wins, losses = _counts()
+
+
+class SignalPairStat(Base):
+    __tablename__ = 'signal_pair_stats'
+    pair_id = Column(Integer, primary_key=True)
+    direction = Column(String(10), primary_key=True)
+    total, wins, losses = _counts()
+
+
+rollups = SignalRollups(Signal, SignalDailyStat, SignalHourlyStat, SignalPairStat)
+rollups.register(Session)
+
+TODAY = date(2024, 3, 10)
+
+
+def _session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    session.add_all(OTCPair(id=k, symbol=f"PAIR{k}-OTC") for k in range(1, 6))
+    session.commit()
+    return session
+
+
+def _add_signals(session, rng, count):
+    start = datetime.combine(TODAY, datetime.min.time()) - timedelta(days=10)
+    pairs = session.query(OTCPair).all()
+    for _ in range(count):
+        signal = Signal(direction=rng.choice(['BUY', 'SELL']),
+                        created_at=start + timedelta(minutes=rng.randrange(11 * 24 * 60)))
+        # الربط بالعلاقة أو بالمعرف أو بدون زوج
+        choice = rng.randrange(3)
+        if choice == 0:
+            signal.pair = rng.choice(pairs)
+        elif choice == 1:
+            signal.pair_id = rng.choice(pairs).id
+        session.add(signal)
+
+
+def _assert_matches_direct_queries(session):
+    direct = SignalStatistics(session, Signal, OTCPair)
+    rolled = rollups.statistics(session, OTCPair)
+    assert rolled.collect(TODAY) == direct.collect(TODAY)
+    assert rolled.overview(TODAY) == direct.overview(TODAY)
+
+
+def test_incremental_updates_match_direct_queries():
+    rng = random.Random(7)
+    session = _session()
+    _add_signals(session, rng, 300)
+    session.commit()
+    _assert_matches_direct_queries(session)
+
+    # تعيين النتائج على إشارات منتهية الصلاحية بعد commit، وتغيير نتيجة سابقة، وحذف إشارات
+    signals = session.query(Signal).all()
+    session.commit()
+    for signal in rng.sample(signals, 200):
+        signal.result = rng.choice(['WIN', 'LOSS'])
+    session.commit()
+    for signal in rng.sample(signals, 40):
+        signal.result = 'WIN' if signal.result == 'LOSS' else None
+    for signal in rng.sample(signals, 30):
+        session.delete(signal)
+    _add_signals(session, rng, 20)
+    session.commit()
+    _assert_matches_direct_queries(session)
+    assert session.query(SignalDailyStat).count() > 0
+
+
+def test_rollback_discards_rollup_changes():
+    session = _session()
+    _add_signals(session, random.Random(8), 50)
+    session.commit()
+    before = rollups.statistics(session, OTCPair).totals()
+
+    session.add(Signal(direction='BUY', result='WIN', pair_id=1))
+    session.flush()
+    session.rollback()
+    assert rollups.statistics(session, OTCPair).totals() == before
+
+
+def test_failed_flush_discards_pending_deletions():
+    session = _session()
+    _add_signals(session, random.Random(10), 3)
+    session.commit()
+
+    # حذف إشارة مع إدراج غير صالح: يفشل flush قبل after_flush ثم يُتراجع عن المعاملة
+    session.delete(session.query(Signal).first())
+    session.add(Signal(direction=None, pair_id=1))
+    with pytest.raises(IntegrityError):
+        session.flush()
+    session.rollback()
+
+    session.add(Signal(direction='SELL', pair_id=2))
+    session.commit()
+    assert session.query(Signal).count() == 4
+    assert rollups.statistics(session, OTCPair).totals()[0] == 4
+    _assert_matches_direct_queries(session)
+
+
+def test_backfill_rebuilds_rollups():
+    session = _session()
+    _add_signals(session, random.Random(9), 200)
+    session.commit()
+    # تعديل جماعي لا يمر بأحداث الجلسة
+    session.query(Signal).filter(Signal.id % 3 == 0).update({'result': 'WIN'}, synchronize_session=False)
+    session.commit()
+
+    written = rollups.backfill(session)
+    assert written['signal_daily_stats'] == 11
+    _assert_matches_direct_queries(session)
+    assert not rollups.is_empty(session)
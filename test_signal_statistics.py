@@ -0,0 +1,137 @@
+"""
+اختبار طبقة تجميع إحصائيات الإشارات
+يقارن نتائج استعلامات GROUP BY باستعلامات COUNT المنفصلة التي كانت تستخدمها صفحة الإحصائيات،
+على قاعدة SQLite في الذاكرة بجدولين بنفس أعمدة signals و otc_pairs المستخدمة
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, create_engine, func
+from sqlalchemy.orm import Session, declarative_base
+
+from signal_statistics import SignalStatistics, build_heatmap
+
+Base = declarative_base()
+
+
+class OTCPair(Base):
+    __tablename__ = 'otc_pairs'
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String(20), nullable=False)
+
+
+class Signal(Base):
+    __tablename__ = 'signals'
+    id = Column(Integer, primary_key=True)
+    pair_id = Column(Integer, ForeignKey('otc_pairs.id'))
+    direction = Column(String(10), nullable=False)
+    result = Column(String(10))
+    created_at = Column(DateTime)
+
+
+def _session(today, count=600, seed=5):
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    rng = random.Random(seed)
+    # زوج بدون إشارات وإشارات بدون زوج لا تظهر في إحصائيات الأزواج لكنها تدخل في الإجمالي
+    session.add_all(OTCPair(id=k, symbol=f"PAIR{k}-OTC") for k in range(1, 7))
+    start = datetime.combine(today, datetime.min.time()) - timedelta(days=12)
+    for _ in range(count):
+        session.add(Signal(
+            pair_id=rng.choice([1, 2, 3, 4, 5, None]),
+            direction=rng.choice(['BUY', 'SELL']),
+            result=rng.choice(['WIN', 'WIN', 'LOSS', None]),
+            created_at=start + timedelta(minutes=rng.randrange(13 * 24 * 60))))
+    session.commit()
+    return session
+
+
+def _reference(session, today):
+    """صفحة الإحصائيات السابقة: استعلام COUNT لكل قيمة"""
+    def count(*criteria):
+        return session.query(Signal).filter(*criteria).count()
+
+    def rate(successful, total):
+        return round((successful / total) * 100) if total > 0 else 0
+
+    total = count()
+    wins = count(Signal.result == 'WIN')
+    today_total = count(func.date(Signal.created_at) == today)
+    today_wins = count(func.date(Signal.created_at) == today, Signal.result == 'WIN')
+    stats = {'total_signals': total, 'successful_signals': wins, 'failed_signals': count(Signal.result == 'LOSS'),
+             'success_rate': rate(wins, total), 'today_signals': today_total,
+             'today_success_rate': rate(today_wins, today_total)}
+
+    weekly = {'dates': [], 'success_rates': []}
+    for i in range(6, -1, -1):
+        day = today - timedelta(days=i)
+        weekly['dates'].append(day.strftime('%m/%d'))
+        weekly['success_rates'].append(rate(count(func.date(Signal.created_at) == day, Signal.result == 'WIN'),
+                                            count(func.date(Signal.created_at) == day)))
+
+    pair_stats = []
+    for pair in session.query(OTCPair).all():
+        pair_total = count(Signal.pair_id == pair.id)
+        if pair_total == 0:
+            continue
+        entry = {'symbol': pair.symbol, 'total': pair_total,
+                 'success_rate': rate(count(Signal.pair_id == pair.id, Signal.result == 'WIN'), pair_total)}
+        for direction in ('BUY', 'SELL'):
+            side = count(Signal.pair_id == pair.id, Signal.direction == direction)
+            entry[f"{direction.lower()}_signals"] = side
+            entry[f"{direction.lower()}_success_rate"] = rate(
+                count(Signal.pair_id == pair.id, Signal.direction == direction, Signal.result == 'WIN'), side)
+        pair_stats.append(entry)
+    pair_stats.sort(key=lambda x: x['success_rate'], reverse=True)
+
+    hours = {'hours': [], 'success_counts': [], 'failure_counts': []}
+    for hour in range(24):
+        hours['hours'].append(f"{hour}:00")
+        hours['success_counts'].append(count(func.extract('hour', Signal.created_at) == hour,
+                                             Signal.result == 'WIN'))
+        hours['failure_counts'].append(count(func.extract('hour', Signal.created_at) == hour,
+                                             Signal.result == 'LOSS'))
+    return {'stats': stats, 'weekly_data': weekly, 'pair_stats': pair_stats, 'time_distribution': hours}
+
+
+def test_grouped_statistics_match_count_queries():
+    today = datetime(2024, 3, 10).date()
+    session = _session(today)
+    assert SignalStatistics(session, Signal, OTCPair).collect(today) == _reference(session, today)
+
+
+def test_empty_database():
+    today = datetime(2024, 3, 10).date()
+    session = _session(today, count=0)
+    result = SignalStatistics(session, Signal, OTCPair).collect(today)
+    assert result == _reference(session, today)
+    assert result['pair_stats'] == [] and result['stats']['success_rate'] == 0
+
+
+def test_heatmap_matches_binned_raw_signals():
+    today = datetime(2024, 3, 10).date()
+    session = _session(today)
+    pairs = {pair.id: pair.symbol for pair in session.query(OTCPair)}
+    criteria = [Signal.direction == 'BUY', Signal.created_at >= datetime(2024, 3, 1)]
+    heatmap = build_heatmap(SignalStatistics(session, Signal, OTCPair).heatmap_counts(criteria, by_pair=True),
+                            by_pair=True)
+
+    # التجميع كما كانت تفعله الصفحة من الإشارات الخام
+    week = {name: [[0] * 24 for _ in range(7)] for name in ('win', 'loss', 'expired')}
+    by_pair = {}
+    signals = session.query(Signal).filter(*criteria).all()
+    for signal in signals:
+        name = {'WIN': 'win', 'LOSS': 'loss'}.get(signal.result, 'expired')
+        week[name][signal.created_at.weekday()][signal.created_at.hour] += 1
+        symbol = pairs.get(signal.pair_id, 'Unknown')
+        by_pair.setdefault(symbol, {n: [0] * 24 for n in week})[name][signal.created_at.hour] += 1
+
+    assert heatmap['total'] == len(signals)
+    assert heatmap['day_of_week'] == week
+    symbols = sorted(by_pair)
+    assert heatmap['pairs']['symbols'] == symbols
+    for name in week:
+        assert heatmap['pairs'][name] == [by_pair[symbol][name] for symbol in symbols]
+    assert 'pairs' not in build_heatmap(SignalStatistics(session, Signal, OTCPair).heatmap_counts(criteria))
@@ -0,0 +1,86 @@
+"""
+اختبار الفهرس التزايدي للدعم والمقاومة
+يتحقق من مطابقة نتائجه للتحليل الكامل لنفس النافذة عند انزلاقها وتحديث آخر شمعة،
+ويقيس زمن تحديث الفهرس مقارنة بالتحليل الكامل عند التشغيل المباشر للملف
+"""
+
+import time
+
+import numpy as np
+
+from advanced_sr_analyzer import AdvancedSRAnalyzer
+from candle_store import CandleView
+from sr_level_index import SRLevelIndex
+from synthetic_price_generator import generate_ohlc_batch
+
+
+def _comparable(result):
+    """النتيجة بدون قواميس الشموع (تُنشأ من نفس النافذة في الحالتين)"""
+    return {key: [{field: item[field] for field in item if field != 'candle'} for item in value]
+            if isinstance(value, list) else value
+            for key, value in result.items()}
+
+
+def test_index_matches_full_analysis_while_sliding():
+    block = generate_ohlc_batch([1.1], [0.008], 700, seed=9)[0]
+    # فترات تذبذب مرتفع لظهور مناطق التذبذب
+    for start in range(40, 700, 90):
+        block[1, start:start + 12] += 0.02
+        block[2, start:start + 12] -= 0.02
+    for is_otc in (False, True):
+        kwargs = {'is_otc_pair': True, 'price_sensitivity': 0.0006, 'clustering_threshold': 0.0025} if is_otc else {}
+        analyzer = AdvancedSRAnalyzer(time_window=120, **kwargs)
+        index = SRLevelIndex(analyzer)
+        rng = np.random.default_rng(1)
+        with_zones = 0
+
+        for end in range(10, block.shape[1], 3):
+            window = block[:, max(0, end - 150):end].copy()
+            if rng.random() < 0.3:
+                # تحديث آخر شمعة في مكانها (شمعة لم تكتمل)
+                window[3, -1] += rng.normal(0, 0.002)
+                window[1, -1] = max(window[1, -1], window[3, -1])
+                window[2, -1] = min(window[2, -1], window[3, -1])
+            candles = CandleView(window)
+            result = index.update(candles).analysis()
+            assert _comparable(result) == _comparable(analyzer.analyze(candles))
+            with_zones += bool(result['volatility_zones'])
+
+        # انزلاق بعدة شموع في كل مرة يُطبق تزايدياً دون إعادة بناء
+        assert index.stats['rebuilds'] == 1
+        assert with_zones
+
+
+def test_different_history_rebuilds_index():
+    analyzer = AdvancedSRAnalyzer()
+    index = SRLevelIndex(analyzer)
+    first, second = generate_ohlc_batch([1.1, 1.1], [0.001, 0.001], 120, seed=4)
+
+    index.update(CandleView(first)).analysis()
+    # نفس الأوقات بأسعار مختلفة: لا يمكن اعتبارها امتداداً للنافذة السابقة
+    result = index.update(CandleView(second)).analysis()
+    assert index.stats['rebuilds'] == 2
+    assert _comparable(result) == _comparable(analyzer.analyze(CandleView(second)))
+
+
+def benchmark(history=10000, repeat=3):
+    """متوسط زمن تحليل شمعة جديدة: الفهرس التزايدي مقارنة بالتحليل الكامل للنافذة الافتراضية"""
+    block = generate_ohlc_batch([1.1], [0.0015], history, seed=9)[0]
+    analyzer = AdvancedSRAnalyzer()
+    window = analyzer.time_window
+    views = [CandleView(block[:, end - window:end]) for end in range(window, history)]
+
+    timings = []
+    for run in (lambda view: analyzer.analyze(view),
+                lambda view, index=SRLevelIndex(analyzer): index.update(view).analysis()):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for view in views:
+                run(view)
+        timings.append((time.perf_counter() - start) / (repeat * len(views)))
+    print(f"{len(views)} candles  full: {timings[0] * 1e6:8.1f} us/candle  "
+          f"incremental: {timings[1] * 1e6:8.1f} us/candle  speedup: {timings[0] / timings[1]:5.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,60 @@
+"""
+اختبار مولد الأسعار الاصطناعية المجمّع
+يتحقق من شكل الكتل وأوقاتها وعلاقات OHLC، ومن أن مسار الإغلاق يطابق حلقة المولد السابق
+لكل شمعة بنفس الضوضاء، بما في ذلك الحد الأدنى للسعر الذي يُطبق في كل خطوة
+"""
+
+import numpy as np
+
+from candle_store import OPEN, HIGH, LOW, CLOSE, TIME
+from synthetic_price_generator import MEAN_REVERSION, MIN_PRICE, generate_ohlc_batch
+
+
+def _reference_closes(base_prices, volatilities, count, seed, last_closes=None):
+    """مسارات الإغلاق بحلقة المولد السابق (شمعة بشمعة) من نفس الضوضاء"""
+    rng = np.random.default_rng(seed)
+    noise = rng.standard_normal((len(base_prices), count)) * np.asarray(volatilities)[:, None]
+    closes = np.empty((len(base_prices), count))
+    for p, base in enumerate(base_prices):
+        previous = base if last_closes is None else last_closes[p]
+        for t in range(count):
+            if t == 0 and last_closes is None:
+                closes[p, t] = base
+                continue
+            previous = max(MIN_PRICE, previous + (base - previous) * MEAN_REVERSION + noise[p, t])
+            closes[p, t] = previous
+    return closes
+
+
+def test_batch_shape_times_and_ohlc():
+    bases, vols = [1.1, 150.0, 0.65], [0.0004, 0.03, 0.0002]
+    batch = generate_ohlc_batch(bases, vols, 240, seed=1, end_time=1_700_000_040.0, timeframe_seconds=60)
+
+    assert batch.shape == (3, 5, 240)
+    np.testing.assert_array_equal(np.diff(batch[:, TIME], axis=1), 60.0)
+    assert (batch[:, TIME, -1] == 1_700_000_040.0).all()
+    np.testing.assert_array_equal(batch[:, OPEN, 1:], batch[:, CLOSE, :-1])
+    assert (batch[:, HIGH] >= np.maximum(batch[:, OPEN], batch[:, CLOSE])).all()
+    assert (batch[:, LOW] <= np.minimum(batch[:, OPEN], batch[:, CLOSE])).all()
+
+    np.testing.assert_array_equal(generate_ohlc_batch(bases, vols, 240, seed=1, end_time=1_700_000_040.0), batch)
+    assert generate_ohlc_batch(bases, vols, 0, seed=1).shape == (3, 5, 0)
+
+    # متابعة المسار من آخر إغلاق معروف
+    follow = generate_ohlc_batch(bases, vols, 5, seed=2, last_closes=batch[:, CLOSE, -1], end_time=1_700_000_340.0)
+    np.testing.assert_array_equal(follow[:, OPEN, 0], batch[:, CLOSE, -1])
+
+
+def test_closes_match_per_candle_loop_with_price_floor():
+    # الزوج الأول بتقلب أكبر من سعره يصل إلى الحد الأدنى مرات كثيرة
+    bases, vols = [0.001, 1.1], [0.01, 0.0004]
+    batch = generate_ohlc_batch(bases, vols, 500, seed=9)
+    closes = batch[:, CLOSE]
+
+    assert (closes >= MIN_PRICE).all()
+    assert (closes[0] == MIN_PRICE).sum() > 10
+    np.testing.assert_allclose(closes, _reference_closes(bases, vols, 500, seed=9), rtol=1e-9, atol=1e-12)
+
+    follow = generate_ohlc_batch(bases, vols, 300, seed=4, last_closes=[MIN_PRICE, 1.2])
+    np.testing.assert_allclose(follow[:, CLOSE], _reference_closes(bases, vols, 300, seed=4, last_closes=[MIN_PRICE, 1.2]),
+                               rtol=1e-9, atol=1e-12)
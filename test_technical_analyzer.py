@@ -0,0 +1,51 @@
+"""
+اختبار تحديث شموع المحلل الفني بعد فترات الخمول
+يتحقق من أن اللحاق بالشموع الفائتة لا يضيف أكثر من سعة المخزن مع فترة الإحماء مهما طالت
+فترة الخمول، وأن أوقات الشموع المضافة متصلة حتى الوقت الحالي، وأنه لا تُضاف شموع قبل
+مرور دقيقة كاملة
+"""
+
+import time
+
+import numpy as np
+
+from candle_store import CLOSE, OPEN, TIME, CandleStore
+from technical_analyzer import CATCH_UP_WARMUP_CANDLES, TechnicalAnalyzer
+
+PAIR = 'EURUSD-OTC'
+
+
+def test_catch_up_is_bounded_and_contiguous(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    store = CandleStore(capacity=50)
+    analyzer = TechnicalAnalyzer(store=store, seed=1)
+    assert store.get_last_time(PAIR) == now[0]
+
+    added = []
+    extend = store.extend
+    monkeypatch.setattr(store, 'extend', lambda pair, block: (added.append(block), extend(pair, block)))
+
+    def advance(seconds):
+        last_time, last_close = store.get_last_time(PAIR), store.get_current_price(PAIR)
+        now[0] += seconds
+        added.clear()
+        analyzer._update_price_data(PAIR)
+        return last_time, last_close, added[0] if added else None
+
+    # أقل من دقيقة: لا توجد شمعة مكتملة جديدة
+    assert advance(59)[2] is None
+
+    for idle, expected in [(1, 1), (45 * 60 + 30, 45), (3 * 24 * 3600, store.capacity + CATCH_UP_WARMUP_CANDLES)]:
+        last_time, last_close, block = advance(idle)
+        assert block.shape[1] == expected
+        # الشموع متصلة ببعضها وتنتهي خلال الدقيقة الحالية وتبدأ من آخر إغلاق معروف
+        np.testing.assert_array_equal(np.diff(block[TIME]), 60.0)
+        assert 0 <= now[0] - block[TIME, -1] < 60
+        assert block[OPEN, 0] == last_close
+        if expected < store.capacity:
+            assert block[TIME, 0] == last_time + 60
+        assert store.get_last_time(PAIR) == block[TIME, -1]
+        assert store.get_current_price(PAIR) == block[CLOSE, -1]
+
+    np.testing.assert_array_equal(np.diff(store.get_candles(PAIR).array[TIME]), 60.0)
@@ -0,0 +1,88 @@
+"""
+اختبار إعادة تجميع شموع الإطارات الأعلى
+يقارن شموع M5 و M15 المبنية من التاريخ الأولي ثم من إضافات M1 المتتالية (بما فيها شمعة
+غير مكتملة تكتمل لاحقاً) بتجميع مرجعي بحلقة بسيطة على كامل التاريخ، مع بداية غير محاذية
+لحدود الفترات وفجوات في شموع M1
+"""
+
+import numpy as np
+
+from candle_store import OPEN, HIGH, LOW, CLOSE, TIME, CandleStore
+from synthetic_price_generator import generate_ohlc_batch
+from timeframe_resampler import TIMEFRAME_SECONDS, TimeframeResampler, resample_block
+
+PAIR = 'EURUSD-OTC'
+
+
+def _reference_bars(block, seconds):
+    """تجميع مرجعي: كل شمعة M1 تنسب إلى الفترة floor(time / seconds)"""
+    bars = []
+    for open_, high, low, close, t in block.T:
+        start = np.floor(t / seconds) * seconds
+        if bars and bars[-1][TIME] == start:
+            bars[-1][HIGH] = max(bars[-1][HIGH], high)
+            bars[-1][LOW] = min(bars[-1][LOW], low)
+            bars[-1][CLOSE] = close
+        else:
+            bars.append([open_, high, low, close, start])
+    return np.array(bars, dtype=np.float64).reshape(-1, 5).T
+
+
+def _m1_history(count=700, seed=5):
+    """شموع M1 تبدأ في منتصف فترة M15 مع فجوات بطول دقيقة وعدة فترات كاملة"""
+    block = generate_ohlc_batch([1.1], [0.0005], count, seed=seed, end_time=1_700_000_000.0 + 7 * 60)[0]
+    gaps = np.zeros(count, dtype=bool)
+    gaps[[5, 130, 131, 302]] = True
+    gaps[400:440] = True
+    return block[:, ~gaps]
+
+
+def test_resample_block_matches_reference():
+    block = _m1_history()
+    assert block[TIME, 0] % TIMEFRAME_SECONDS['M15'] != 0
+    for tf in ('M5', 'M15'):
+        np.testing.assert_array_equal(resample_block(block, TIMEFRAME_SECONDS[tf]),
+                                      _reference_bars(block, TIMEFRAME_SECONDS[tf]))
+    assert resample_block(block[:, :0], 300).shape == (5, 0)
+
+
+def test_incremental_appends_match_full_resample():
+    block = _m1_history()
+    store = CandleStore(capacity=100)
+    resampler = TimeframeResampler(store, capacity=400)
+    seeded = 250
+    store.load(PAIR, block[:, :seeded])
+    resampler.seed(PAIR, block[:, :seeded])
+
+    # إضافات فردية وكتل تنتهي داخل فترة (شمعة أعلى غير مكتملة) وعلى حدودها
+    position = seeded
+    for count in [1, 1, 2, 3, 7, 1, 14, 15, 40, 1, 90, 5, 100, 30, 96]:
+        chunk = block[:, position:position + count]
+        if count == 1:
+            store.append(PAIR, *chunk[:, 0])
+        else:
+            store.extend(PAIR, chunk)
+        position += count
+
+        for tf in ('M5', 'M15'):
+            expected = _reference_bars(block[:, :position], TIMEFRAME_SECONDS[tf])
+            np.testing.assert_array_equal(resampler.get_candles(PAIR, tf).array, expected)
+            np.testing.assert_array_equal(resampler.get_candles(PAIR, tf, 3).array, expected[:, -3:])
+    assert position == block.shape[1]
+
+    # الإطار M1 يأتي من المخزن مباشرة
+    np.testing.assert_array_equal(resampler.get_candles(PAIR, 'M1').array, block[:, -100:])
+
+
+def test_history_reload_rebuilds_bars():
+    block = _m1_history()
+    store = CandleStore(capacity=100)
+    resampler = TimeframeResampler(store, capacity=400)
+    store.load(PAIR, block)
+    resampler.seed(PAIR, block)
+
+    # استبدال التاريخ بتاريخ أقدم يعيد بناء الإطارات من شموع المخزن فقط
+    older = block[:, :300]
+    store.load(PAIR, older)
+    np.testing.assert_array_equal(resampler.get_candles(PAIR, 'M5').array,
+                                  _reference_bars(older[:, -100:], TIMEFRAME_SECONDS['M5']))
@@ -0,0 +1,57 @@
+"""
+اختبار الذاكرة المؤقتة بمدة صلاحية
+يتحقق من انتهاء الصلاحية والإخراج حسب الاستخدام وعدادات نسبة الإصابة
+"""
+
+from ttl_cache import TTLCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = _Clock()
+    cache = TTLCache(ttl_seconds=60, capacity=4, clock=clock)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_compute('EURUSD', compute) == 1
+    clock.now += 59
+    assert cache.get_or_compute('EURUSD', compute) == 1
+    clock.now += 1
+    assert cache.get_or_compute('EURUSD', compute) == 2
+    assert cache.get('GBPUSD') is None
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['expirations']) == (1, 3, 1)
+    assert stats['hit_rate'] == 0.25
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(ttl_seconds=60, capacity=2, clock=_Clock())
+    cache.put('EURUSD', 1)
+    cache.put('GBPUSD', 2)
+    # قراءة الزوج الأول تجعل الثاني هو الأقدم استخداماً
+    assert cache.get('EURUSD') == 1
+    cache.put('USDJPY', 3)
+
+    assert cache.get('GBPUSD') is None
+    assert cache.get('EURUSD') == 1 and cache.get('USDJPY') == 3
+    assert cache.stats()['evictions'] == 1 and cache.stats()['entries'] == 2
+
+    cache.clear()
+    assert cache.stats()['entries'] == 0 and cache.stats()['hits'] == 0
+
+
+def test_zero_capacity_disables_cache():
+    cache = TTLCache(ttl_seconds=60, capacity=0, clock=_Clock())
+    values = iter(range(3))
+    assert [cache.get_or_compute('EURUSD', lambda: next(values)) for _ in range(3)] == [0, 1, 2]
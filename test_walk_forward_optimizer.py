@@ -0,0 +1,84 @@
+"""
+اختبار محسن معلمات الفلترة
+يتحقق من أن تقييم التجارب من المرشحين المحفوظين يطابق الاختبار التاريخي الكامل
+ومن حفظ المعلمات وتحميلها وإعادة مستوى تعطيل السجلات الذي حدده المستدعي
+"""
+
+import logging
+
+import numpy as np
+
+import advanced_signal_filter
+import backtester
+import multi_stage_signal_filter
+import walk_forward_optimizer
+from signal_parameters import get_signal_parameters, apply_signal_parameters, save_signal_parameters, load_signal_parameters
+from synthetic_price_generator import generate_ohlc_batch
+
+
+def test_cached_trials_match_backtest():
+    block = generate_ohlc_batch([1.1], [0.0004], 260, seed=5)[0]
+    trials = walk_forward_optimizer.generate_trials('random', 3, seed=2)
+    before = get_signal_parameters()
+
+    result = walk_forward_optimizer.optimize_pair('EURUSD-OTC', block, backtester.DEFAULT_WINDOW, trials, np.array([]))
+    expected = backtester.backtest_pair('EURUSD-OTC', block)
+
+    # التجربة الأولى هي الإعداد الحالي
+    assert result['wins'][0, 0] == expected['wins']
+    assert result['losses'][0, 0] == expected['losses']
+    # المعلمات تعود لقيمها بعد التقييم
+    assert get_signal_parameters() == before
+
+
+def test_caller_logging_disable_level_is_restored():
+    block = generate_ohlc_batch([1.1], [0.0004], 120, seed=5)[0]
+    trials = walk_forward_optimizer.generate_trials('random', 1, seed=2)
+
+    logging.disable(logging.CRITICAL)
+    try:
+        walk_forward_optimizer.optimize_pair('EURUSD-OTC', block, backtester.DEFAULT_WINDOW, trials, np.array([]))
+        assert logging.root.manager.disable == logging.CRITICAL
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def test_parameters_round_trip(tmp_path):
+    original = get_signal_parameters()
+    path = str(tmp_path / 'signal_parameters.json')
+    tuned = dict(original, MIN_MULTI_STAGE_SCORE=82, OTC_TIMEFRAME_WEIGHTS={'M1': 0.5, 'M5': 0.4, 'M15': 0.1})
+
+    try:
+        save_signal_parameters(tuned, path)
+        assert load_signal_parameters(path) == tuned
+        assert multi_stage_signal_filter.MIN_MULTI_STAGE_SCORE == 82
+        assert get_signal_parameters()['OTC_TIMEFRAME_WEIGHTS']['M5'] == 0.4
+    finally:
+        apply_signal_parameters(original)
+
+    assert load_signal_parameters(str(tmp_path / 'missing.json')) is None
+
+
+def test_applied_quality_score_reaches_existing_filters():
+    original = get_signal_parameters()
+    live_filter = advanced_signal_filter._signal_filter
+    signal = {'pair': 'EURUSD', 'direction': 'BUY', 'probability': 80, 'duration': 1}
+    quality = live_filter.evaluate_signal_quality(signal)[0]
+
+    try:
+        apply_signal_parameters({'MIN_QUALITY_SCORE': quality + 1})
+        assert advanced_signal_filter.filter_trading_signal(signal)[0] is False
+        apply_signal_parameters({'MIN_QUALITY_SCORE': quality - 1})
+        assert live_filter.min_quality_score == quality - 1
+        assert advanced_signal_filter.filter_trading_signal(signal)[0] is True
+    finally:
+        apply_signal_parameters(original)
+
+    # الحد المعين صراحة للمرشح يبقى كما هو
+    fixed_filter = advanced_signal_filter.AdvancedSignalFilter()
+    fixed_filter.set_min_quality_score(90)
+    apply_signal_parameters({'MIN_QUALITY_SCORE': 50})
+    try:
+        assert fixed_filter.min_quality_score == 90
+    finally:
+        apply_signal_parameters(original)
@@ -0,0 +1,195 @@
+"""
+إعادة تجميع شموع الإطارات الزمنية الأعلى
+يبني شموع M5 و M15 من تاريخ M1 في المخزن المشترك بعمليات تجميع مصفوفية،
+ويحدّث الشمعة الأعلى غير المكتملة مع وصول كل شمعة M1 جديدة بدون إعادة التجميع الكاملة
+"""
+
+import logging
+import threading
+
+import numpy as np
+
+from candle_store import (CANDLE_FIELDS, OPEN, HIGH, LOW, CLOSE, TIME,
+                          CandleBuffer, CandleView, candle_store)
+
+logger = logging.getLogger(__name__)
+
+# مدة شمعة كل إطار زمني بالثواني
+TIMEFRAME_SECONDS = {
+    'M1': 60,
+    'M5': 300,
+    'M15': 900
+}
+
+# الإطارات الزمنية المبنية من M1
+HIGHER_TIMEFRAMES = ('M5', 'M15')
+
+# عدد الشموع المحفوظة لكل إطار زمني أعلى
+DEFAULT_BAR_CAPACITY = 100
+
+
+def resample_block(block, seconds):
+    """
+    تجميع شموع متتالية إلى شموع إطار زمني أعلى
+
+    كل شمعة تُنسب إلى الفترة floor(time / seconds)؛ حدود الفترات تُحدد مرة واحدة ثم
+    يُحسب الأعلى والأدنى لكل فترة بـ reduceat (مكافئ لإعادة التشكيل والتجميع لكنه
+    يتحمل الفجوات وبداية غير محاذية).
+
+    Args:
+        block: مصفوفة شموع بالشكل (5, n) مرتبة زمنياً
+        seconds (int): مدة الشمعة الأعلى بالثواني
+
+    Returns:
+        numpy.ndarray: مصفوفة بالشكل (5, m) حيث الوقت هو بداية كل فترة
+    """
+    block = np.asarray(block, dtype=np.float64)
+    count = block.shape[1]
+    if count == 0:
+        return np.empty((len(CANDLE_FIELDS), 0), dtype=np.float64)
+
+    buckets = np.floor(block[TIME] / seconds)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.append(starts[1:], count)
+
+    bars = np.empty((len(CANDLE_FIELDS), len(starts)), dtype=np.float64)
+    bars[OPEN] = block[OPEN, starts]
+    bars[HIGH] = np.maximum.reduceat(block[HIGH], starts)
+    bars[LOW] = np.minimum.reduceat(block[LOW], starts)
+    bars[CLOSE] = block[CLOSE, ends - 1]
+    bars[TIME] = buckets[starts] * seconds
+    return bars
+
+
+class _PairBars:
+    """شموع الإطارات الأعلى لزوج واحد مع وقت آخر شمعة M1 تمت معالجتها"""
+
+    __slots__ = ('last_time', 'buffers')
+
+    def __init__(self, capacity):
+        self.last_time = None
+        self.buffers = {tf: CandleBuffer(capacity) for tf in HIGHER_TIMEFRAMES}
+
+    def merge(self, block):
+        """دمج شموع M1 جديدة (أحدث من last_time) في جميع الإطارات الأعلى"""
+        if block.shape[1] == 0:
+            return
+        for tf in HIGHER_TIMEFRAMES:
+            bars = resample_block(block, TIMEFRAME_SECONDS[tf])
+            buffer = self.buffers[tf]
+
+            # الشمعة الأولى قد تكمل آخر شمعة غير مكتملة في المخزن
+            if buffer.size and buffer.last(TIME) == bars[TIME, 0]:
+                buffer.update_last(
+                    buffer.last(OPEN),
+                    max(buffer.last(HIGH), bars[HIGH, 0]),
+                    min(buffer.last(LOW), bars[LOW, 0]),
+                    bars[CLOSE, 0],
+                    bars[TIME, 0]
+                )
+                bars = bars[:, 1:]
+            buffer.extend(bars)
+        self.last_time = float(block[TIME, -1])
+
+
+class TimeframeResampler:
+    """
+    مصدر شموع الإطارات الزمنية المتعددة المبني على مخزن M1 المشترك
+
+    عند كل قراءة تُدمج فقط شموع M1 التي وصلت منذ القراءة السابقة، لذا تكلفة التحديث
+    تتناسب مع عدد الشموع الجديدة وليس مع طول التاريخ.
+    """
+
+    def __init__(self, store=None, capacity=DEFAULT_BAR_CAPACITY):
+        """
+        Args:
+            store: مخزن شموع M1 (الافتراضي: المخزن المشترك)
+            capacity (int): عدد الشموع المحفوظة لكل إطار زمني أعلى
+        """
+        self.store = store if store is not None else candle_store
+        self.capacity = capacity
+        self._pairs = {}
+        self._lock = threading.Lock()
+
+    def seed(self, pair, block):
+        """
+        بناء الإطارات الأعلى لزوج من تاريخ M1 كامل (قد يكون أطول من سعة مخزن M1)
+
+        Args:
+            pair (str): رمز الزوج
+            block: شموع M1 بالشكل (5, n) تنتهي بآخر شمعة في المخزن
+        """
+        with self._lock:
+            bars = _PairBars(self.capacity)
+            bars.merge(np.asarray(block, dtype=np.float64))
+            self._pairs[pair] = bars
+
+    def sync(self, pair):
+        """دمج شموع M1 الجديدة للزوج في الإطارات الأعلى"""
+        with self.store.lock:
+            candles = self.store.get_candles(pair)
+            times = candles.time
+            with self._lock:
+                bars = self._pairs.get(pair)
+                if bars is not None and bars.last_time is not None and len(times) and times[-1] < bars.last_time:
+                    # تم استبدال تاريخ الزوج في المخزن: إعادة البناء من البداية
+                    logger.info(f"Rebuilding higher timeframes for {pair} after history reload")
+                    bars = None
+                if bars is None:
+                    bars = self._pairs[pair] = _PairBars(self.capacity)
+
+                start = 0 if bars.last_time is None else np.searchsorted(times, bars.last_time, side='right')
+                bars.merge(candles.array[:, start:])
+                return bars
+
+    def get_candles(self, pair, timeframe='M1', limit=None):
+        """
+        الحصول على شموع زوج لإطار زمني معين
+
+        Args:
+            pair (str): رمز الزوج
+            timeframe (str): 'M1' أو 'M5' أو 'M15'
+            limit (int, optional): عدد الشموع الأخيرة المطلوبة
+
+        Returns:
+            CandleView: عرض على الشموع (آخر شمعة في الإطار الأعلى قد تكون غير مكتملة)
+        """
+        if timeframe == 'M1':
+            return self.store.get_candles(pair, limit)
+        if timeframe not in HIGHER_TIMEFRAMES:
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
+
+        bars = self.sync(pair)
+        with self._lock:
+            return CandleView(bars.buffers[timeframe].view(limit))
+
+    def get_candles_dict(self, pair, limit=None):
+        """قاموس شموع جميع الإطارات الزمنية للزوج بالصيغة التي يتوقعها محلل الإطارات المتعددة"""
+        return {tf: self.get_candles(pair, tf, limit) for tf in TIMEFRAME_SECONDS}
+
+    def reset(self, pair=None):
+        """حذف الشموع المجمعة لزوج أو لجميع الأزواج"""
+        with self._lock:
+            if pair is None:
+                self._pairs.clear()
+            else:
+                self._pairs.pop(pair, None)
+
+
+# مصدر الإطارات الزمنية المشترك المبني على مخزن الشموع المشترك
+timeframe_resampler = TimeframeResampler()
+
+
+def get_timeframe_candles(pair, timeframe='M1', limit=None):
+    """
+    الحصول على شموع زوج لإطار زمني معين من المصدر المشترك
+
+    Args:
+        pair (str): رمز الزوج
+        timeframe (str): 'M1' أو 'M5' أو 'M15'
+        limit (int, optional): عدد الشموع الأخيرة المطلوبة
+
+    Returns:
+        CandleView: عرض على الشموع
+    """
+    return timeframe_resampler.get_candles(pair, timeframe, limit)
@@ -0,0 +1,129 @@
+"""
+ذاكرة مؤقتة بمدة صلاحية وحد أقصى للحجم
+تحفظ نتائج مفهرسة بمفتاح لمدة محددة بالثواني وتُخرج الأقدم استخداماً عند امتلائها (LRU)،
+مع عدادات للإصابة والإخفاق والانتهاء والإخراج كما في ذاكرة سياقات التحليل
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    ذاكرة مؤقتة بمدة صلاحية لكل عنصر وإخراج الأقدم استخداماً
+
+    القيم المحفوظة مشتركة بين جميع المستدعين ويجب معاملتها للقراءة فقط.
+    """
+
+    def __init__(self, ttl_seconds, capacity, clock=time.monotonic):
+        """
+        Args:
+            ttl_seconds (float): مدة صلاحية العنصر بالثواني
+            capacity (int): أقصى عدد عناصر محفوظة (0 لتعطيل الذاكرة)
+            clock: دالة الوقت الحالي بالثواني (قابلة للاستبدال في الاختبارات)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.capacity = capacity
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def _lookup(self, key, now):
+        """القيمة الصالحة للمفتاح (مع تحديث ترتيب الاستخدام)، أو (False, None) إذا لم تتوفر"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        stored_at, value = entry
+        if now - stored_at >= self.ttl_seconds:
+            del self._entries[key]
+            self.expirations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def get(self, key, default=None):
+        """
+        قراءة قيمة صالحة من الذاكرة
+
+        Args:
+            key: مفتاح العنصر
+            default: القيمة المعادة عند عدم وجود عنصر صالح
+
+        Returns:
+            القيمة المحفوظة أو default
+        """
+        with self._lock:
+            found, value = self._lookup(key, self._clock())
+            if found:
+                self.hits += 1
+                return value
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """حفظ قيمة للمفتاح بدءاً من الوقت الحالي"""
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """
+        قراءة قيمة من الذاكرة أو حسابها وحفظها
+
+        Args:
+            key: مفتاح العنصر
+            compute: دالة بدون معاملات تحسب القيمة عند عدم وجودها أو انتهاء صلاحيتها
+
+        Returns:
+            القيمة
+        """
+        if self.capacity <= 0:
+            return compute()
+
+        with self._lock:
+            found, value = self._lookup(key, self._clock())
+            if found:
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        # الحساب خارج القفل حتى لا تنتظر الخيوط الأخرى
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def stats(self):
+        """
+        إحصائيات استخدام الذاكرة
+
+        Returns:
+            dict: عدد العناصر والإصابات والإخفاقات ونسبة الإصابة
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'capacity': self.capacity,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'expirations': self.expirations,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def clear(self):
+        """حذف جميع العناصر وتصفير العدادات"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.expirations = self.evictions = 0
@@ -0,0 +1,337 @@
+"""
+محسن معلمات الفلترة بطريقة Walk-Forward
+يبحث (شبكياً أو عشوائياً) عن أفضل قيم لعتبات وأوزان الفلترة على تاريخ الشموع المعاد تشغيله:
+- يُقسم التاريخ زمنياً إلى folds + 1 فترة؛ في كل طية يُختار أفضل إعداد على فترة
+  ويُقاس على الفترة التالية (خارج العينة)
+- الإعداد النهائي هو الأفضل على أحدث فترة، ويُكتب في ملف يحمله النظام عند التشغيل
+
+التحليل ومؤشراته والتحقق من الدعم والمقاومة ونتيجة كل إشارة لا تعتمد على المعلمات،
+لذا تُحسب مرة واحدة لكل شمعة وتعيد كل تجربة تشغيل منطق التقييم الرخيص فقط.
+
+الاستخدام:
+    python walk_forward_optimizer.py --source replay --search random --trials 200 --folds 4
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import backtester
+from advanced_signal_filter import AdvancedSignalFilter
+from candle_store import TIME
+from dynamic_duration_calibrator import DynamicDurationCalibrator
+from multi_stage_signal_filter import MultiStageSignalFilter
+from signal_parameters import get_signal_parameters, apply_signal_parameters, save_signal_parameters
+from sr_signal_validator import SRSignalValidator
+from config import SIGNAL_PARAMETERS_FILE
+
+logger = logging.getLogger(__name__)
+
+# قيم البحث لكل معلمة تؤثر على قرار خط الإشارات
+PARAMETER_GRID = {
+    'MIN_MULTI_STAGE_SCORE': [65, 70, 75, 80, 85],
+    'MIN_CONFIRMATION_COUNT': [2, 3, 4],
+    'MARKET_TREND_WEIGHT': [1.0, 1.2, 1.4, 1.6],
+    'OTC_BONUS_SCORE': [5, 10, 15, 20],
+    'MIN_QUALITY_SCORE': [60, 65, 70, 75, 80],
+}
+
+# أقل عدد إشارات في الفترة ليكون الإعداد مؤهلاً للاختيار
+DEFAULT_MIN_SIGNALS = 30
+
+
+def generate_trials(search='random', trials=100, seed=None, grid=PARAMETER_GRID):
+    """
+    توليد إعدادات التجارب
+
+    التجربة الأولى دائماً هي القيم الحالية (للمقارنة).
+
+    Args:
+        search (str): 'grid' لجميع التوافيق أو 'random' لعينة منها
+        trials (int): عدد التجارب في البحث العشوائي
+        seed (int, optional): بذرة البحث العشوائي
+        grid (dict): قيم البحث لكل معلمة
+
+    Returns:
+        list: قائمة قواميس المعلمات
+    """
+    current = get_signal_parameters()
+    baseline = {name: current[name] for name in grid}
+
+    names = list(grid)
+    combinations = list(itertools.product(*(grid[name] for name in names)))
+    if search == 'random' and trials < len(combinations):
+        rng = np.random.default_rng(seed)
+        picks = rng.choice(len(combinations), size=trials, replace=False)
+        combinations = [combinations[i] for i in sorted(picks)]
+    elif search not in ('grid', 'random'):
+        raise ValueError(f"Unknown search mode: {search}")
+
+    candidates = [dict(zip(names, values)) for values in combinations]
+    return [baseline] + [params for params in candidates if params != baseline]
+
+
+class _CachedBasicFilter:
+    """
+    بديل للفلتر الأساسي داخل MultiStageSignalFilter أثناء التجارب
+
+    يعيد نتيجة التقييم المحفوظة للشمعة الحالية ويطبق عليها فقط عتبة الجودة
+    الخاصة بالتجربة بنفس قاعدة AdvancedSignalFilter.
+    """
+
+    def __init__(self, signal_filter):
+        self.signal_filter = signal_filter
+        self.result = None
+
+    def filter_signal(self, signal, candles=None, multi_timeframe_analysis=None):
+        sr_rejected, quality, reason = self.result
+        if sr_rejected:
+            return False, quality, reason
+        required = self.signal_filter.get_min_quality_required(signal.get('pair', ''))
+        return quality >= required, quality, reason
+
+
+def build_candidates(pair, block, window=backtester.DEFAULT_WINDOW):
+    """
+    حساب الأجزاء التي لا تعتمد على المعلمات لكل شمعة أنتجت إشارة أولية
+
+    Args:
+        pair (str): رمز الزوج
+        block: شموع M1 بالشكل (5, n)
+        window (int): عدد الشموع المتاحة للتحليل عند كل شمعة
+
+    Returns:
+        dict: قوائم التحليل والإشارة ونتيجة الفلتر الأساسي والتحقق من الدعم والمقاومة
+        ومصفوفات الوقت والنتيجة لكل مرشح، وعدد الشموع المقيمة
+    """
+    basic_filter = AdvancedSignalFilter()
+    # بدون حد أدنى للجودة: الرفض الوحيد المتبقي هو رفض الدعم والمقاومة المبكر
+    basic_filter.set_min_quality_score(float('-inf'))
+    sr_validator = SRSignalValidator()
+    calibrator = DynamicDurationCalibrator()
+
+    first, last = backtester.eligible_range(block, window)
+    candidates = {'analysis': [], 'signal': [], 'basic': [], 'sr_valid': []}
+    indices, directions, durations = [], [], []
+
+    for index, candles, analysis, signal in backtester.iterate_signals(pair, block, window):
+        if signal is None:
+            continue
+        accept, quality, reason = basic_filter.filter_signal(signal, candles)
+        is_valid, _, _ = sr_validator.validate_signal(signal, candles)
+
+        candidates['analysis'].append(analysis)
+        candidates['signal'].append(signal)
+        candidates['basic'].append((not accept, quality, reason))
+        candidates['sr_valid'].append(is_valid)
+        indices.append(index)
+        directions.append(1 if signal['direction'] == 'BUY' else -1)
+        durations.append(calibrator.calibrate_duration(signal, candles))
+
+    indices = np.asarray(indices, dtype=np.int64)
+    candidates['time'] = block[TIME, indices]
+    candidates['outcome'] = backtester.resolve_outcomes(block, indices, directions, durations)
+    candidates['evaluated'] = last - first
+    return candidates
+
+
+def evaluate_trials(pair, candidates, trials, edges):
+    """
+    تقييم جميع التجارب على مرشحي زوج واحد
+
+    Args:
+        pair (str): رمز الزوج
+        candidates (dict): ناتج build_candidates
+        trials (list): إعدادات التجارب
+        edges: الحدود الزمنية الداخلية بين الفترات
+
+    Returns:
+        tuple: مصفوفتا (الأرباح، الخسائر) بالشكل (عدد التجارب، عدد الفترات)
+    """
+    segments = len(edges) + 1
+    segment = np.searchsorted(edges, candidates['time'], side='right')
+    wins_mask = candidates['outcome'] == 1
+    losses_mask = candidates['outcome'] == -1
+    sr_valid = np.asarray(candidates['sr_valid'], dtype=bool)
+
+    signal_filter = MultiStageSignalFilter()
+    basic_filter = _CachedBasicFilter(signal_filter.advanced_filter)
+    signal_filter.advanced_filter = basic_filter
+
+    wins = np.zeros((len(trials), segments), dtype=np.int64)
+    losses = np.zeros((len(trials), segments), dtype=np.int64)
+    accepted = np.zeros(len(candidates['signal']), dtype=bool)
+
+    for t, params in enumerate(trials):
+        # يشمل حد الجودة في المرشح الأساسي الموجود (يقرأ MIN_QUALITY_SCORE عند التقييم)
+        apply_signal_parameters(params)
+
+        for k, (signal, analysis, basic) in enumerate(zip(candidates['signal'], candidates['analysis'], candidates['basic'])):
+            basic_filter.result = basic
+            accepted[k] = signal_filter.filter_signal(signal, None, pair, analysis)[0]
+
+        passed = accepted & sr_valid
+        wins[t] = np.bincount(segment[passed & wins_mask], minlength=segments)
+        losses[t] = np.bincount(segment[passed & losses_mask], minlength=segments)
+
+    return wins, losses
+
+
+def optimize_pair(pair, block, window, trials, edges):
+    """
+    بناء مرشحي زوج واحد وتقييم جميع التجارب عليهم (تُنفذ داخل عملية فرعية)
+
+    Returns:
+        dict: الأرباح والخسائر لكل تجربة وفترة وأزمنة التنفيذ
+    """
+    previous_disable = logging.root.manager.disable
+    logging.disable(logging.WARNING)
+    original = get_signal_parameters()
+    try:
+        start = time.perf_counter()
+        candidates = build_candidates(pair, np.ascontiguousarray(block, dtype=np.float64), window)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        wins, losses = evaluate_trials(pair, candidates, trials, edges)
+        trial_time = time.perf_counter() - start
+    finally:
+        apply_signal_parameters(original)
+        # إعادة مستوى التعطيل السابق (قد يكون المستدعي قد عطّل السجلات بنفسه)
+        logging.disable(previous_disable)
+
+    return {
+        'pair': pair,
+        'evaluated': candidates['evaluated'],
+        'candidates': len(candidates['signal']),
+        'wins': wins,
+        'losses': losses,
+        'build_time': build_time,
+        'trial_time': trial_time
+    }
+
+
+def _worker(args):
+    return optimize_pair(*args)
+
+
+def _score(wins, losses, min_signals):
+    """الدقة إذا كان عدد الإشارات كافياً، وإلا -1 (الترتيب الثانوي حسب عدد الإشارات)"""
+    signals = wins + losses
+    accuracy = np.divide(wins, signals, out=np.zeros(signals.shape), where=signals > 0)
+    return np.where(signals >= min_signals, accuracy, -1.0), signals
+
+
+def _best_trial(wins, losses, min_signals):
+    score, signals = _score(wins, losses, min_signals)
+    return int(np.lexsort((signals, score))[-1])
+
+
+def _segment_stats(wins, losses):
+    signals = int(wins + losses)
+    return {
+        'signals': signals,
+        'wins': int(wins),
+        'accuracy': round(wins / signals, 4) if signals else None
+    }
+
+
+def walk_forward(histories, trials, folds=4, window=backtester.DEFAULT_WINDOW,
+                 workers=None, min_signals=DEFAULT_MIN_SIGNALS):
+    """
+    تشغيل التحسين بطريقة Walk-Forward
+
+    Args:
+        histories (dict): {رمز الزوج: شموع M1 بالشكل (5, n)}
+        trials (list): إعدادات التجارب (الأولى هي الإعداد الحالي)
+        folds (int): عدد طيات التدريب/الاختبار
+        window (int): عدد الشموع المتاحة للتحليل عند كل شمعة
+        workers (int, optional): عدد العمليات (الافتراضي: عدد المعالجات)
+        min_signals (int): أقل عدد إشارات لاختيار إعداد في فترة
+
+    Returns:
+        tuple: (أفضل إعداد، التقرير)
+    """
+    start_time = min(block[TIME, 0] for block in histories.values())
+    end_time = max(block[TIME, -1] for block in histories.values())
+    edges = np.linspace(start_time, end_time, folds + 2)[1:-1]
+
+    tasks = [(pair, block, window, trials, edges) for pair, block in histories.items()]
+    workers = workers or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    if workers == 1 or len(tasks) <= 1:
+        results = [_worker(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            results = list(executor.map(_worker, tasks))
+    wall_time = time.perf_counter() - start
+
+    wins = sum(r['wins'] for r in results)
+    losses = sum(r['losses'] for r in results)
+
+    fold_reports = []
+    out_of_sample = np.zeros(2, dtype=np.int64)
+    baseline_out_of_sample = np.zeros(2, dtype=np.int64)
+    for fold in range(folds):
+        best = _best_trial(wins[:, fold], losses[:, fold], min_signals)
+        test = fold + 1
+        out_of_sample += (wins[best, test], losses[best, test])
+        baseline_out_of_sample += (wins[0, test], losses[0, test])
+        fold_reports.append({
+            'parameters': trials[best],
+            'train': _segment_stats(wins[best, fold], losses[best, fold]),
+            'test': _segment_stats(wins[best, test], losses[best, test]),
+            'baseline_test': _segment_stats(wins[0, test], losses[0, test])
+        })
+
+    # الإعداد النهائي: الأفضل على أحدث فترة
+    best = _best_trial(wins[:, folds], losses[:, folds], min_signals)
+
+    report = {
+        'pairs': len(results),
+        'evaluated_bars': sum(r['evaluated'] for r in results),
+        'candidates': sum(r['candidates'] for r in results),
+        'trials': len(trials),
+        'folds': fold_reports,
+        'walk_forward_test': _segment_stats(*out_of_sample),
+        'baseline_walk_forward_test': _segment_stats(*baseline_out_of_sample),
+        'latest_period': _segment_stats(wins[best, folds], losses[best, folds]),
+        'build_time': round(sum(r['build_time'] for r in results), 2),
+        'trial_time': round(sum(r['trial_time'] for r in results), 2),
+        'wall_time': round(wall_time, 2)
+    }
+    logger.info(f"Evaluated {len(trials)} trials on {len(results)} pairs in {wall_time:.1f}s")
+    return trials[best], report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Walk-forward optimization of signal filter parameters")
+    parser.add_argument('--source', choices=('replay', 'archive', 'synthetic'), default='replay')
+    parser.add_argument('--pairs', help="comma separated pair symbols (default: all available)")
+    parser.add_argument('--days', type=float, help="use only the last N days of each pair")
+    parser.add_argument('--search', choices=('grid', 'random'), default='random')
+    parser.add_argument('--trials', type=int, default=100, help="number of random trials")
+    parser.add_argument('--folds', type=int, default=4)
+    parser.add_argument('--min-signals', type=int, default=DEFAULT_MIN_SIGNALS)
+    parser.add_argument('--window', type=int, default=backtester.DEFAULT_WINDOW)
+    parser.add_argument('--workers', type=int, help="worker processes (default: CPU count)")
+    parser.add_argument('--seed', type=int, help="seed for random search and synthetic history")
+    parser.add_argument('--output', default=SIGNAL_PARAMETERS_FILE, help="parameter file to write")
+    args = parser.parse_args()
+
+    histories = backtester.load_histories(args.source, args.pairs.split(',') if args.pairs else None,
+                                          args.days, args.seed)
+    trials = generate_trials(args.search, args.trials, args.seed)
+    best, report = walk_forward(histories, trials, args.folds, args.window, args.workers, args.min_signals)
+
+    save_signal_parameters(best, args.output, metadata=report)
+    print(json.dumps({'parameters': best, 'report': report}, indent=2, ensure_ascii=False))